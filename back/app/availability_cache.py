@@ -0,0 +1,207 @@
+"""
+Cached public book-grid days (book-week-slots, book-month-day-states, book-day-slots).
+
+Every guest on ``/book/:tenantId`` asks for the same grids, again on each party-size
+change, week step or floor filter. The computed cells of one day are kept per
+(tenant, date, party size, floor, service) in a small in-process LRU per worker and reused
+while the availability version of that date is unchanged and the entry is younger than
+``RESERVATION_AVAILABILITY_CACHE_TTL_SECONDS`` (the "past" / lead-time cutoff moves with
+the clock).
+
+A flush hook bumps ``availability_version`` in the writing transaction:
+
+- reservation writes that can change demand or capacity bump their date (old and new);
+- table, table group and opening-hours writes, and tenant timezone / opening hours /
+  turn time / slot length / guest cap / walk-in buffer changes bump ``ALL_DAYS``, which
+  is part of every key.
+
+Table activation and in-flight orders only affect today's turn windows; the TTL bounds
+that staleness, and bookings are always re-checked against live capacity.
+"""
+
+from __future__ import annotations
+
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import date
+from itertools import chain
+from typing import Any, Callable, Hashable, Iterable
+
+from sqlalchemy import event, inspect, or_, text
+from sqlmodel import Session, select
+
+from . import models
+from .settings import settings
+from .slot_demand import lock_slot_days
+
+ALL_DAYS = date(1, 1, 1)
+AVAILABILITY_CACHE_MAX_ENTRIES = 4096
+
+_RESERVATION_FIELDS = (
+    "tenant_id",
+    "reservation_date",
+    "reservation_time",
+    "party_size",
+    "status",
+    "table_id",
+    "preferred_floor_id",
+    "seated_at",
+)
+_TABLE_FIELDS = ("tenant_id", "seat_count", "floor_id", "table_group_id")
+_TENANT_FIELDS = (
+    "timezone",
+    "opening_hours",
+    "reservation_average_table_turn_minutes",
+    "reservation_slot_minutes",
+    "reservation_max_guests_per_slot",
+    "reservation_walk_in_tables_reserved",
+)
+_TENANT_WIDE = (models.TableGroup, models.OpeningHoursBaselineSchedule, models.OpeningHoursDateOverride)
+
+_BUMP_SQL = text(
+    """
+    INSERT INTO availability_version (tenant_id, day, version) VALUES (:tid, :day, 1)
+    ON CONFLICT (tenant_id, day) DO UPDATE SET version = availability_version.version + 1
+    """
+)
+
+# Set while a transaction has bumped a version: what it reads is not visible to others yet
+_UNCOMMITTED_KEY = "availability_version_bumped"
+
+_lock = threading.Lock()
+# (tenant_id, date, *key) -> ((tenant-wide version, day version), stored monotonic, value)
+_days: "OrderedDict[tuple, tuple[tuple[int, int], float, Any]]" = OrderedDict()
+
+
+def _changed(obj: object, fields: Iterable[str]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+def _availability_scopes(session: Session, obj: object) -> set[tuple[int, date]]:
+    """(tenant_id, day) versions a pending write to ``obj`` invalidates."""
+    is_new = obj in session.new
+    is_deleted = obj in session.deleted
+    if isinstance(obj, models.Reservation):
+        if not (is_new or is_deleted or _changed(obj, _RESERVATION_FIELDS)):
+            return set()
+        attrs = inspect(obj).attrs
+        tenant_ids = {obj.tenant_id, *attrs.tenant_id.history.deleted}
+        days = {obj.reservation_date, *attrs.reservation_date.history.deleted}
+        return {(t, d) for t in tenant_ids for d in days if t is not None and d is not None}
+    if isinstance(obj, models.Table):
+        if not (is_new or is_deleted or _changed(obj, _TABLE_FIELDS)):
+            return set()
+        tenant_ids = {obj.tenant_id, *inspect(obj).attrs.tenant_id.history.deleted}
+        return {(t, ALL_DAYS) for t in tenant_ids if t is not None}
+    if isinstance(obj, models.Tenant):
+        if is_new or is_deleted or not _changed(obj, _TENANT_FIELDS):
+            return set()
+        return {(obj.id, ALL_DAYS)}
+    if isinstance(obj, _TENANT_WIDE):
+        return {(obj.tenant_id, ALL_DAYS)} if obj.tenant_id is not None else set()
+    return set()
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_availability_versions(session: Session, flush_context: object, instances: object | None) -> None:
+    scopes: set[tuple[int, date]] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        scopes.update(_availability_scopes(session, obj))
+    bump_availability_versions(session, scopes)
+
+
+def bump_availability_versions(session: Session, scopes: Iterable[tuple[int, date]]) -> None:
+    """Bump (tenant_id, day) versions in the session's transaction (also for bulk UPDATE / DELETE)."""
+    scopes = set(scopes)
+    if not scopes:
+        return
+    session.info[_UNCOMMITTED_KEY] = True
+    conn = session.connection()
+    # Per-day booking lock before the version rows, in the order create_reservation takes them
+    # (advisory lock, then rows); otherwise a booking and a cancel of one day can deadlock
+    days_by_tenant: dict[int, list[date]] = {}
+    for tenant_id, day in scopes:
+        if day != ALL_DAYS:
+            days_by_tenant.setdefault(tenant_id, []).append(day)
+    for tenant_id, days in sorted(days_by_tenant.items()):
+        lock_slot_days(conn, tenant_id, days)
+    # Fixed lock order (one flush may touch several dates)
+    for tenant_id, day in sorted(scopes):
+        conn.execute(_BUMP_SQL, {"tid": tenant_id, "day": day})
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_availability_bumps(session: Session) -> None:
+    session.info.pop(_UNCOMMITTED_KEY, None)
+
+
+def availability_versions(
+    session: Session, tenant_id: int, start: date, end: date
+) -> tuple[int, dict[date, int]]:
+    """(tenant-wide version, {day: version}) for ``[start, end]``; 0 when never bumped."""
+    rows = session.exec(
+        select(models.AvailabilityVersion.day, models.AvailabilityVersion.version).where(
+            models.AvailabilityVersion.tenant_id == tenant_id,
+            or_(
+                models.AvailabilityVersion.day == ALL_DAYS,
+                models.AvailabilityVersion.day.between(start, end),
+            ),
+        )
+    ).all()
+    by_day = {d: int(version) for d, version in rows}
+    return by_day.pop(ALL_DAYS, 0), by_day
+
+
+def _ttl_seconds() -> float:
+    return float(getattr(settings, "reservation_availability_cache_ttl_seconds", 30) or 0)
+
+
+def cached_days(
+    session: Session,
+    tenant_id: int,
+    days: list[date],
+    key: tuple[Hashable, ...],
+    build: Callable[[date], Any],
+) -> dict[date, Any]:
+    """
+    ``build(day)`` for each of ``days``, reused from the cache when the day's versions are
+    unchanged and the entry is within the TTL. ``key`` holds the other inputs of ``build``
+    (party size, floor, service). Callers must not mutate the returned values.
+    """
+    ttl = _ttl_seconds()
+    if ttl <= 0 or not days:
+        return {d: build(d) for d in days}
+    # Read the versions before building: a change committed meanwhile is picked up next time
+    tenant_version, by_day = availability_versions(session, tenant_id, min(days), max(days))
+    now = _time.monotonic()
+    out: dict[date, Any] = {}
+    missing: list[date] = []
+    with _lock:
+        for d in days:
+            hit = _days.get((tenant_id, d, *key))
+            if hit is not None and hit[0] == (tenant_version, by_day.get(d, 0)) and now - hit[1] < ttl:
+                _days.move_to_end((tenant_id, d, *key))
+                out[d] = hit[2]
+            else:
+                missing.append(d)
+    for d in missing:
+        out[d] = build(d)
+    if missing and not session.info.get(_UNCOMMITTED_KEY):
+        with _lock:
+            for d in missing:
+                cache_key = (tenant_id, d, *key)
+                _days[cache_key] = ((tenant_version, by_day.get(d, 0)), now, out[d])
+                _days.move_to_end(cache_key)
+            while len(_days) > AVAILABILITY_CACHE_MAX_ENTRIES:
+                _days.popitem(last=False)
+    return out
+
+
+def clear_availability_cache() -> None:
+    with _lock:
+        _days.clear()
@@ -27,3 +27,20 @@ def check_db_connection() -> None:
     with Session(engine) as session:
         session.exec(select(1)).first()
 
+
+# Session flush hooks that keep order projections (change feed, order_summary) in step
+# and record per-order deltas for real-time events; menu_cache and availability_cache bump
+# menu / reservation availability versions, slot_demand keeps the per-slot reservation
+# ledger current, reservation_reminder_due sets reminder due times and table_token_cache
+# writes table state through to Redis.
+# Registered here so seeds and workers that only import the engine get them too.
+from . import (  # noqa: E402,F401
+    availability_cache,
+    menu_cache,
+    order_change_feed,
+    order_delta,
+    order_summary,
+    reservation_reminder_due,
+    slot_demand,
+    table_token_cache,
+)
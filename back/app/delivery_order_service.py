@@ -284,7 +284,7 @@ def _add_order_items(
 ) -> None:
     channel = getattr(order, "order_channel", None)
     channel_val = channel.value if hasattr(channel, "value") else (channel or models.OrderChannel.satisfecho_delivery.value)
-    eligible = promo_svc.eligible_promos(session, tenant_id=tenant_id, channel=str(channel_val))
+    promos = promo_svc.promo_index(session, tenant_id=tenant_id, channel=str(channel_val))
     for product, qty, notes in resolved_lines:
         product_tax_id = getattr(product, "tax_id", None)
         effective_tax = _effective_tax(session, tenant_id, product_tax_id, order_date)
@@ -297,7 +297,7 @@ def _add_order_items(
             list_price_cents=list_price,
             product_category=getattr(product, "category", None),
             channel=str(channel_val),
-            eligible=eligible,
+            index=promos,
         )
         price_cents = applied["price_cents"]
         line_tax_cents = (
@@ -0,0 +1,90 @@
+"""
+Conditional GET helpers for public, unauthenticated endpoints.
+
+Handlers derive a strong ETag from the inputs that determine the body (content versions,
+table state, language, ...) and check ``If-None-Match`` before building anything, so a
+revalidation costs the version lookups only and answers ``304 Not Modified``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+# Live state (table PIN / active order, promo windows): always revalidate
+CACHE_CONTROL_REVALIDATE = "public, no-cache"
+# Marketing sites and tenant directory: a minute of staleness is fine
+SHORT_MAX_AGE_SECONDS = 60
+SHORT_STALE_SECONDS = 300
+CACHE_CONTROL_SHORT = (
+    f"public, max-age={SHORT_MAX_AGE_SECONDS}, stale-while-revalidate={SHORT_STALE_SECONDS}"
+)
+
+# ?lang= is part of the URL, Accept-Language is not
+_VARY = "Accept-Language"
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from JSON-serializable parts (order matters)."""
+    raw = json.dumps(parts, default=str, separators=(",", ":"), sort_keys=True)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def body_etag(content: Any) -> str:
+    """Strong ETag of a JSON body (for payloads that are cheap to build)."""
+    return make_etag(jsonable_encoder(content))
+
+
+def short_cache_control(expires_at: datetime | None) -> str:
+    """``CACHE_CONTROL_SHORT``, capped so caches revalidate by ``expires_at`` (UTC)."""
+    if expires_at is None:
+        return CACHE_CONTROL_SHORT
+    remaining = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+    if remaining >= SHORT_MAX_AGE_SECONDS + SHORT_STALE_SECONDS:
+        return CACHE_CONTROL_SHORT
+    return f"public, max-age={max(0, min(remaining, SHORT_MAX_AGE_SECONDS))}"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    ``If-None-Match`` check (weak comparison, as RFC 9110 requires for this header).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _cache_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": _VARY}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag, cache_control))
+
+
+def cached_json(content: Any, etag: str, cache_control: str) -> JSONResponse:
+    return JSONResponse(content=jsonable_encoder(content), headers=_cache_headers(etag, cache_control))
+
+
+def conditional_json(request: Request, content: Any, cache_control: str) -> Response:
+    """200 with a body-derived ETag, or 304 when the client already has it."""
+    etag = body_etag(content)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return cached_json(content, etag, cache_control)
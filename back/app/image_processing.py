@@ -0,0 +1,251 @@
+"""
+Upload image processing off the event loop.
+
+``optimize_image`` (resize, re-encode) and the responsive renditions are CPU-bound Pillow
+work that takes hundreds of milliseconds per photo. The async upload handlers run it with
+``process_image_upload`` in a small process pool: at most ``IMAGE_WORKER_PROCESSES`` jobs
+per API worker are in flight, further uploads wait for a slot, and a job that does not
+finish within ``IMAGE_PROCESSING_TIMEOUT_SECONDS`` (waiting included) fails with 503.
+A job that is still running at the timeout keeps its slot until the worker is done, and
+its files are removed then (the request never referenced them).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+
+from fastapi import HTTPException
+from PIL import Image
+
+from .image_renditions import delete_renditions, write_renditions
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Image optimization settings
+MAX_IMAGE_WIDTH = 1920  # Maximum width in pixels
+MAX_IMAGE_HEIGHT = 1920  # Maximum height in pixels
+JPEG_QUALITY = 85  # JPEG quality (1-100, 85 is a good balance)
+PNG_OPTIMIZE = True  # Enable PNG optimization
+WEBP_QUALITY = 85  # WebP quality (1-100)
+AVIF_QUALITY = 85  # AVIF quality (1-100)
+
+
+def optimize_image(image_data: bytes, content_type: str) -> bytes:
+    """
+    Optimize image locally using Pillow.
+    - Resizes if too large
+    - Compresses JPEG/WebP with quality settings
+    - Optimizes PNG files
+    Returns optimized image data.
+    """
+    try:
+        # Open image from bytes
+        image = Image.open(BytesIO(image_data))
+        original_format = image.format
+        original_size = len(image_data)
+
+        # Convert RGBA to RGB for JPEG (JPEG doesn't support transparency)
+        if (
+            content_type == "image/jpeg" or original_format == "JPEG"
+        ) and image.mode in ("RGBA", "LA", "P"):
+            # Create white background
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            if image.mode == "P":
+                image = image.convert("RGBA")
+            background.paste(
+                image, mask=image.split()[-1] if image.mode == "RGBA" else None
+            )
+            image = background
+        elif image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        # Resize if image is too large
+        width, height = image.size
+        if width > MAX_IMAGE_WIDTH or height > MAX_IMAGE_HEIGHT:
+            # Calculate new dimensions maintaining aspect ratio
+            ratio = min(MAX_IMAGE_WIDTH / width, MAX_IMAGE_HEIGHT / height)
+            new_width = int(width * ratio)
+            new_height = int(height * ratio)
+            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            logger.info(f"Image resized: {width}x{height} -> {new_width}x{new_height}")
+
+        # Save optimized image to bytes
+        output = BytesIO()
+
+        if content_type == "image/jpeg" or original_format == "JPEG":
+            image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        elif content_type == "image/webp" or original_format == "WEBP":
+            image.save(output, format="WEBP", quality=WEBP_QUALITY, method=6)
+        elif content_type == "image/png" or original_format == "PNG":
+            # PNG optimization
+            image.save(output, format="PNG", optimize=PNG_OPTIMIZE)
+        elif content_type == "image/avif" or original_format == "AVIF":
+            image.save(output, format="AVIF", quality=AVIF_QUALITY)
+        else:
+            # Default to JPEG
+            image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+
+        optimized_data = output.getvalue()
+        optimized_size = len(optimized_data)
+        reduction = ((original_size - optimized_size) / original_size) * 100
+
+        logger.info(
+            f"Image optimized: {original_size / 1024:.1f}KB -> "
+            f"{optimized_size / 1024:.1f}KB ({reduction:.1f}% reduction)"
+        )
+
+        return optimized_data
+
+    except Exception as e:
+        logger.warning(f"Error optimizing image: {e}, using original image")
+        return image_data
+
+
+def _process_upload(image_data: bytes, content_type: str, dest: str) -> int:
+    """Pool job: optimize, store at ``dest`` and write its renditions. Returns the stored size."""
+    data = optimize_image(image_data, content_type)
+    path = Path(dest)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    write_renditions(path, data)
+    return len(data)
+
+
+_pool_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+# Per event loop (tests run several); the pool itself is shared
+_slots: dict[int, asyncio.Semaphore] = {}
+
+
+def _max_workers() -> int:
+    return max(1, int(getattr(settings, "image_worker_processes", 2) or 1))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers import this module only, not the app (no forked threads / DB pool)
+            _pool = ProcessPoolExecutor(
+                max_workers=_max_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+        _slots.clear()
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _slot() -> asyncio.Semaphore:
+    loop_id = id(asyncio.get_running_loop())
+    with _pool_lock:
+        sem = _slots.get(loop_id)
+        if sem is None:
+            sem = _slots[loop_id] = asyncio.Semaphore(_max_workers())
+        return sem
+
+
+def _remove_upload(dest: Path) -> None:
+    delete_renditions(dest)
+    for path in (dest, dest.with_name(f".{dest.name}.tmp")):
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+class _UploadJob:
+    """One pool job. Whichever comes last of "worker done" and "request gave up" removes its files."""
+
+    def __init__(self, dest: Path) -> None:
+        self.dest = dest
+        self._lock = threading.Lock()
+        self._done = False
+        self._abandoned = False
+
+    def finished(self) -> None:
+        with self._lock:
+            self._done = True
+            remove = self._abandoned
+        if remove:
+            _remove_upload(self.dest)
+
+    def abandon(self) -> None:
+        with self._lock:
+            self._abandoned = True
+            remove = self._done
+        if remove:
+            _remove_upload(self.dest)
+
+
+def _release_from_pool(loop: asyncio.AbstractEventLoop, slot: asyncio.Semaphore) -> None:
+    try:
+        loop.call_soon_threadsafe(slot.release)
+    except RuntimeError:
+        pass  # Loop closed: the semaphore went with it
+
+
+async def _run_limited(
+    pool: ProcessPoolExecutor, image_data: bytes, content_type: str, dest: Path, job: _UploadJob
+) -> int:
+    slot = _slot()
+    await slot.acquire()
+    loop = asyncio.get_running_loop()
+    try:
+        future = pool.submit(_process_upload, image_data, content_type, str(dest))
+    except BaseException:
+        slot.release()
+        raise
+
+    def _done(_future) -> None:
+        # Runs when the worker is really done (or the queued job was cancelled), not at the timeout
+        job.finished()
+        _release_from_pool(loop, slot)
+
+    future.add_done_callback(_done)
+    return await asyncio.wrap_future(future)
+
+
+async def process_image_upload(image_data: bytes, content_type: str, dest: Path) -> int:
+    """
+    Optimize an uploaded raster image into ``dest`` (new file) and write its renditions in
+    the image pool. Returns the stored size in bytes; raises 503 on timeout or a dead worker.
+    """
+    timeout = float(getattr(settings, "image_processing_timeout_seconds", 30) or 30)
+    pool = _get_pool()
+    job = _UploadJob(dest)
+    try:
+        return await asyncio.wait_for(_run_limited(pool, image_data, content_type, dest, job), timeout)
+    except asyncio.TimeoutError:
+        # A running job keeps its slot until it ends; its files are removed then
+        job.abandon()
+        logger.warning("Image processing timed out after %.0fs for %s", timeout, dest.name)
+        raise HTTPException(status_code=503, detail="Image processing timed out, please retry")
+    except BrokenProcessPool:
+        logger.error("Image worker died while processing %s; restarting the pool", dest.name)
+        _discard_pool(pool)
+        raise HTTPException(status_code=503, detail="Image processing failed, please retry")
@@ -0,0 +1,266 @@
+"""
+Responsive image renditions for uploaded raster images (products, logos, headers).
+
+Next to each stored image ``{uuid}.jpg`` the upload writes downscaled copies for the widths
+in ``RENDITION_WIDTHS`` in WebP, AVIF (when Pillow has it) and the original format, named
+``{uuid}.{width}w.{content hash}.{ext}`` so they never change once written. A hidden
+manifest ``.{uuid}.jpg.renditions.json`` lists them; ``srcset_for`` turns it into
+``srcset`` strings per format for API payloads:
+
+    {"webp": "/uploads/1/products/ab.160w.3f9c0e1d2b4a.webp 160w, ...", "jpeg": "..."}
+
+The stored image itself is the largest entry of its own format. Existing files are
+backfilled with ``python -m app.seeds.backfill_image_renditions``.
+
+Compiled menu snapshots embed these srcsets. An upload writes its renditions before the
+row that references the file commits (which bumps the menu version); the backfill bumps
+the menu version of the tenants whose images it wrote. Manifests are cached per process
+in a bounded LRU, keyed by the manifest's mtime so a ``--force`` rewrite is picked up.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = Path(__file__).parent.parent / "uploads"
+
+RENDITION_WIDTHS = (160, 320, 640, 1280)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 55
+JPEG_QUALITY = 82
+
+_EXT_BY_FORMAT = {"jpeg": ".jpg", "png": ".png", "webp": ".webp", "avif": ".avif"}
+_FORMAT_BY_PIL = {"JPEG": "jpeg", "MPO": "jpeg", "PNG": "png", "WEBP": "webp", "AVIF": "avif"}
+_RENDITION_RE = re.compile(r"\.\d+w\.[0-9a-f]{12}\.(?:jpg|png|webp|avif)$")
+_MANIFEST_SUFFIX = ".renditions.json"
+_SOURCE_EXTS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".avif"})
+
+MANIFEST_CACHE_MAX_ENTRIES = 4096
+
+_manifest_lock = threading.Lock()
+# Image path -> (manifest mtime_ns, manifest); most recently used last
+_manifests: "OrderedDict[str, tuple[int, dict[str, Any]]]" = OrderedDict()
+
+
+def _modern_formats() -> tuple[str, ...]:
+    return ("avif", "webp") if features.check("avif") else ("webp",)
+
+
+def manifest_path(image_path: Path) -> Path:
+    # Dot prefix: the /uploads routes refuse hidden names
+    return image_path.with_name(f".{image_path.name}{_MANIFEST_SUFFIX}")
+
+
+def is_rendition_name(name: str) -> bool:
+    return bool(_RENDITION_RE.search(name))
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    out = BytesIO()
+    if fmt == "jpeg":
+        if image.mode in ("RGBA", "LA"):
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == "png":
+        image.save(out, format="PNG", optimize=True)
+    elif fmt == "webp":
+        image.save(out, format="WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(out, format="AVIF", quality=AVIF_QUALITY)
+    return out.getvalue()
+
+
+def write_renditions(image_path: Path, data: bytes | None = None) -> dict[str, Any] | None:
+    """
+    Write renditions and the manifest for the stored image at ``image_path`` (``data`` is
+    its content when the caller has it). Returns the manifest, or None when the file is
+    not a decodable raster image.
+    """
+    try:
+        image = Image.open(BytesIO(data) if data is not None else image_path)
+        image.load()
+    except Exception as e:
+        logger.warning("Renditions skipped for %s: %s", image_path.name, e)
+        return None
+    source_format = _FORMAT_BY_PIL.get(image.format or "")
+    if source_format is None:
+        return None
+    if image.mode == "P":
+        image = image.convert("RGBA")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGB")
+
+    width, height = image.size
+    formats = list(dict.fromkeys((*_modern_formats(), source_format)))
+    renditions: dict[str, list[list[Any]]] = {fmt: [] for fmt in formats}
+    stem = image_path.name.split(".", 1)[0]
+    for target in [w for w in RENDITION_WIDTHS if w < width] + [width]:
+        if target == width:
+            resized = image
+        else:
+            resized = image.resize(
+                (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+            )
+        for fmt in formats:
+            if target == width and fmt == source_format:
+                # The stored image is the full-width entry of its own format
+                renditions[fmt].append([width, image_path.name])
+                continue
+            encoded = _encode(resized, fmt)
+            digest = hashlib.sha256(encoded).hexdigest()[:12]
+            name = f"{stem}.{target}w.{digest}{_EXT_BY_FORMAT[fmt]}"
+            rendition_path = image_path.with_name(name)
+            if not rendition_path.exists():
+                rendition_path.write_bytes(encoded)
+            renditions[fmt].append([target, name])
+
+    manifest = {"source": image_path.name, "width": width, "height": height, "renditions": renditions}
+    target_path = manifest_path(image_path)
+    tmp = target_path.with_name(target_path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, target_path)
+    try:
+        _remember_manifest(str(image_path), target_path.stat().st_mtime_ns, manifest)
+    except OSError:
+        pass
+    return manifest
+
+
+def _remember_manifest(key: str, mtime_ns: int, manifest: dict[str, Any]) -> None:
+    with _manifest_lock:
+        _manifests[key] = (mtime_ns, manifest)
+        _manifests.move_to_end(key)
+        while len(_manifests) > MANIFEST_CACHE_MAX_ENTRIES:
+            _manifests.popitem(last=False)
+
+
+def load_manifest(image_path: Path) -> dict[str, Any] | None:
+    key = str(image_path)
+    path = manifest_path(image_path)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    with _manifest_lock:
+        cached = _manifests.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            _manifests.move_to_end(key)
+            return cached[1]
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    _remember_manifest(key, mtime_ns, manifest)
+    return manifest
+
+
+def delete_renditions(image_path: Path) -> None:
+    """Remove the renditions and manifest of ``image_path`` (not the image itself)."""
+    manifest = load_manifest(image_path)
+    with _manifest_lock:
+        _manifests.pop(str(image_path), None)
+    if manifest:
+        for entries in manifest.get("renditions", {}).values():
+            for _width, name in entries:
+                if name == image_path.name or not is_rendition_name(name):
+                    continue
+                try:
+                    image_path.with_name(name).unlink(missing_ok=True)
+                except OSError:
+                    pass
+    try:
+        manifest_path(image_path).unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def srcset_for(image_path: Path, url_dir: str) -> dict[str, str] | None:
+    """``{format: srcset}`` for the image at ``image_path`` served under ``url_dir``."""
+    manifest = load_manifest(image_path)
+    if not manifest:
+        return None
+    out: dict[str, str] = {}
+    for fmt, entries in manifest.get("renditions", {}).items():
+        if entries:
+            out[fmt] = ", ".join(f"{url_dir}/{name} {width}w" for width, name in entries)
+    return out or None
+
+
+def product_image_srcset(tenant_id: int, image_filename: str | None) -> dict[str, str] | None:
+    """Srcsets for a Product / TenantProduct ``image_filename`` (tenant file or providers/...)."""
+    if not image_filename:
+        return None
+    fn = image_filename.replace("\\", "/").strip("/")
+    if not fn or fn.startswith(".") or ".." in fn.split("/"):
+        return None
+    if fn.startswith("providers/"):
+        return srcset_for(UPLOADS_DIR / fn, f"/uploads/{fn.rpartition('/')[0]}")
+    if "/" in fn:
+        return None
+    return srcset_for(UPLOADS_DIR / str(tenant_id) / "products" / fn, f"/uploads/{tenant_id}/products")
+
+
+def srcset_for_upload_url(url: str | None) -> dict[str, str] | None:
+    """Srcsets for an ``/uploads/...`` image URL (as built by the API)."""
+    if not url or not url.startswith("/uploads/"):
+        return None
+    rel = url[len("/uploads/"):]
+    if ".." in rel.split("/"):
+        return None
+    return srcset_for(UPLOADS_DIR / rel, url.rpartition("/")[0])
+
+
+def _backfill_candidates(root: Path):
+    patterns = ("*/products/*", "*/logo/*", "*/header/*", "providers/*/products/*")
+    for pattern in patterns:
+        for path in sorted(root.glob(pattern)):
+            if (
+                path.is_file()
+                and not path.name.startswith(".")
+                and path.suffix.lower() in _SOURCE_EXTS
+                and not is_rendition_name(path.name)
+            ):
+                yield path
+
+
+def backfill_renditions(
+    root: Path = UPLOADS_DIR,
+    *,
+    force: bool = False,
+    on_written: Callable[[Path], None] | None = None,
+) -> dict[str, int]:
+    """
+    Write renditions for stored images under ``root`` that have no manifest yet.
+    ``on_written`` is called with each image path that got renditions.
+    """
+    counts = {"written": 0, "skipped": 0, "failed": 0}
+    for path in _backfill_candidates(root):
+        if not force and manifest_path(path).is_file():
+            counts["skipped"] += 1
+            continue
+        if force:
+            delete_renditions(path)
+        if write_renditions(path) is None:
+            counts["failed"] += 1
+        else:
+            counts["written"] += 1
+            if on_written is not None:
+                on_written(path)
+    return counts
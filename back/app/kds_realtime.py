@@ -0,0 +1,144 @@
+"""
+Station- and route-scoped real-time channels for kitchen / bar displays.
+
+Every order event published with an ``order_id`` is also fanned out to
+``kds:{tenant_id}:route:{kitchen|bar}`` and ``kds:{tenant_id}:station:{station_id}``, with
+``items`` and the ``delta`` items filtered to the lines that display shows (see
+``resolve_order_item_kds``). Item events (``item_id`` in the payload) only reach that
+item's route and station. A bar screen subscribed through ws-bridge with ``?route=bar`` or
+``?station_id=`` no longer receives food tickets.
+
+The writing request only stages one outbox row on ``kds-fanout:{tenant_id}`` (no queries);
+the outbox relay expands the rows of a batch into per-display payloads with one query each
+for items, products, tenants and stations (``expand_kds_fanout``).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any
+
+from sqlmodel import Session, select
+
+from . import models
+from .kitchen_stations_util import resolve_order_item_kds
+from .realtime_outbox import stage_event
+
+
+_FANOUT_PREFIX = "kds-fanout:"
+
+
+def kds_fanout_channel(tenant_id: int) -> str:
+    return f"{_FANOUT_PREFIX}{tenant_id}"
+
+
+def fanout_tenant_id(channel: str) -> int | None:
+    """Tenant of a ``kds-fanout:{tenant_id}`` outbox channel; None for real channels."""
+    if not channel.startswith(_FANOUT_PREFIX):
+        return None
+    try:
+        return int(channel[len(_FANOUT_PREFIX):])
+    except ValueError:
+        return None
+
+
+def kds_route_channel(tenant_id: int, route: str) -> str:
+    return f"kds:{tenant_id}:route:{route}"
+
+
+def kds_station_channel(tenant_id: int, station_id: int) -> str:
+    return f"kds:{tenant_id}:station:{station_id}"
+
+
+def _item_dict(item: models.OrderItem, station_id: int | None, route: str) -> dict[str, Any]:
+    return {
+        "id": item.id,
+        "product_name": item.product_name,
+        "quantity": item.quantity,
+        "status": item.status.value if hasattr(item.status, "value") else item.status,
+        "removed": bool(item.removed_by_customer or item.removed_by_user_id is not None),
+        "kitchen_station_id": station_id,
+        "kitchen_station_route": route,
+    }
+
+
+def expand_kds_fanout(
+    session: Session, events: list[tuple[int, dict]]
+) -> list[list[tuple[str, dict[str, Any]]]]:
+    """``(channel, payload)`` pairs for each ``(tenant_id, order event)``, in input order."""
+    order_ids = {d["order_id"] for _, d in events if isinstance(d.get("order_id"), int)}
+    if not order_ids:
+        return [[] for _ in events]
+    items_by_order: dict[int, list[models.OrderItem]] = defaultdict(list)
+    for item in session.exec(
+        select(models.OrderItem)
+        .where(models.OrderItem.order_id.in_(order_ids))
+        .order_by(models.OrderItem.id.asc())
+    ).all():
+        items_by_order[item.order_id].append(item)
+    product_ids = {i.product_id for items in items_by_order.values() for i in items if i.product_id is not None}
+    products = (
+        {p.id: p for p in session.exec(select(models.Product).where(models.Product.id.in_(product_ids))).all()}
+        if product_ids
+        else {}
+    )
+    tenant_ids = {tenant_id for tenant_id, _ in events}
+    tenants = {t.id: t for t in session.exec(select(models.Tenant).where(models.Tenant.id.in_(tenant_ids))).all()}
+    stations: dict[int, dict[int, models.KitchenStation]] = defaultdict(dict)
+    for station in session.exec(
+        select(models.KitchenStation).where(models.KitchenStation.tenant_id.in_(tenant_ids))
+    ).all():
+        stations[station.tenant_id][station.id] = station
+
+    out: list[list[tuple[str, dict[str, Any]]]] = []
+    for tenant_id, order_data in events:
+        items = items_by_order.get(order_data.get("order_id"), [])
+        item_id = order_data.get("item_id")
+        if isinstance(item_id, int):
+            items = [i for i in items if i.id == item_id]
+        tenant = tenants.get(tenant_id)
+        if not items or tenant is None:
+            out.append([])
+            continue
+        out.append(_payloads(tenant_id, order_data, items, products, tenant, stations[tenant_id]))
+    return out
+
+
+def _payloads(
+    tenant_id: int,
+    order_data: dict,
+    items: list[models.OrderItem],
+    products: dict[int, models.Product],
+    tenant: models.Tenant,
+    station_by_id: dict[int, models.KitchenStation],
+) -> list[tuple[str, dict[str, Any]]]:
+    grouped: dict[str, list[dict[str, Any]]] = {}
+    for item in items:
+        sid, _name, route = resolve_order_item_kds(products.get(item.product_id), tenant, station_by_id)
+        row = _item_dict(item, sid, route)
+        grouped.setdefault(kds_route_channel(tenant_id, route), []).append(row)
+        if sid is not None:
+            grouped.setdefault(kds_station_channel(tenant_id, sid), []).append(row)
+    delta = order_data.get("delta")
+    out: list[tuple[str, dict[str, Any]]] = []
+    for channel, rows in grouped.items():
+        payload = {**order_data, "items": rows}
+        if isinstance(delta, dict):
+            # Only this display's lines: a change to another station's line is not its concern
+            ids = {row["id"] for row in rows}
+            payload["delta"] = {**delta, "items": [i for i in delta.get("items", []) if i.get("id") in ids]}
+        out.append((channel, payload))
+    return out
+
+
+def kds_payloads(
+    session: Session, tenant_id: int, order_data: dict
+) -> list[tuple[str, dict[str, Any]]]:
+    """``(channel, payload)`` pairs for the displays an order event concerns."""
+    return expand_kds_fanout(session, [(tenant_id, order_data)])[0]
+
+
+def stage_kds_events(session: Session, tenant_id: int, order_data: dict) -> None:
+    """Stage the KDS copies of an order event in ``session``; the relay expands them per display."""
+    if isinstance(order_data.get("order_id"), int):
+        stage_event(session, [kds_fanout_channel(tenant_id)], order_data)
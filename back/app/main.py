@@ -31,13 +31,15 @@ from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Res
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel as _BaseModel, Field
-from sqlalchemy import event, or_
+from sqlalchemy import and_, event, or_
 from sqlalchemy.exc import IntegrityError, InvalidRequestError, OperationalError, StatementError
 from sqlmodel import Session, select
 
 from . import models, security
 from .db import check_db_connection, create_db_and_tables, get_session, engine
 from .provider_images import (
+    clear_provider_image_refs,
+    provider_image_reconcile_loop,
     provider_product_image_url,
     provider_product_stored_image_path,
 )
@@ -89,6 +91,21 @@ from .tse_service import (
 from .inventory_service import deduct_inventory_for_order
 from . import inventory_models
 from .translation_service import TranslationService
+from .table_token_cache import TAKE_AWAY_TABLE_NAMES, resolve_table_token
+from .image_processing import process_image_upload, shutdown_image_pool
+from .image_renditions import delete_renditions, product_image_srcset
+from .menu_export import export_dir as menu_export_dir, is_versioned_export_name, menu_export_loop
+from .upload_serving import CACHE_CONTROL_IMMUTABLE, preload_upload_manifest, serve_upload
+from .http_cache import (
+    CACHE_CONTROL_REVALIDATE,
+    CACHE_CONTROL_SHORT,
+    cached_json,
+    conditional_json,
+    etag_matches,
+    make_etag,
+    not_modified,
+    short_cache_control,
+)
 from .messages import get_message
 from .api_errors import api_error_payload
 
@@ -111,6 +128,9 @@ from . import loyalty_service as loyalty_svc
 from . import loyalty_wallet
 from . import promo_service as promo_svc
 from . import order_payment_service as order_pay_svc
+from . import kds_realtime, menu_cache, order_change_feed, order_delta, realtime_outbox
+from .order_summary import compute_order_status_from_items
+from . import order_summary as order_summary_svc
 from .order_discounts import order_level_discount_cents
 from .tenant_ui_modules import (
     merge_tenant_ui_modules_patch,
@@ -136,7 +156,11 @@ from .schedule_export_i18n import planned_vs_export_labels, schedule_export_labe
 from .opening_hours_effective import (
     effective_weekly_json_preview,
     opening_service_windows_for_date as _opening_service_windows_for_date,
+    opening_service_windows_for_range,
 )
+from .reservation_availability import ReservationAvailability
+from .availability_cache import cached_days as cached_availability_days
+from .slot_demand import lock_reservation_days, lock_slot_days, slot_demand
 
 from .rate_limits import (
     _rate_limit_key,
@@ -326,8 +350,71 @@ async def _app_lifespan(app: FastAPI):
     app.state.social_publish_task = social_task
     logger.info("Social publish worker started")
 
+    stop_outbox = asyncio.Event()
+    outbox_task = asyncio.create_task(
+        realtime_outbox.realtime_outbox_relay_loop(stop=stop_outbox)
+    )
+    app.state.realtime_outbox_stop = stop_outbox
+    app.state.realtime_outbox_task = outbox_task
+    logger.info("Realtime outbox relay started")
+
+    # Orders written before order_summary existed (or while it was out of step)
+    app.state.order_summary_backfill_task = asyncio.create_task(
+        asyncio.to_thread(order_summary_svc.backfill_missing_order_summaries)
+    )
+
+    if settings.uploads_preload_manifest:
+        await asyncio.to_thread(preload_upload_manifest)
+
+    if settings.menu_export_enabled:
+        stop_export = asyncio.Event()
+        app.state.menu_export_stop = stop_export
+        app.state.menu_export_task = asyncio.create_task(menu_export_loop(stop=stop_export))
+        logger.info("Public menu export started")
+
+    stop_images = asyncio.Event()
+    images_task = asyncio.create_task(provider_image_reconcile_loop(stop=stop_images))
+    app.state.provider_image_reconcile_stop = stop_images
+    app.state.provider_image_reconcile_task = images_task
+    logger.info("Provider image reconciliation started")
+
     yield
 
+    stop_exp = getattr(app.state, "menu_export_stop", None)
+    task_exp = getattr(app.state, "menu_export_task", None)
+    if stop_exp:
+        stop_exp.set()
+    if task_exp and not task_exp.done():
+        task_exp.cancel()
+        try:
+            await task_exp
+        except asyncio.CancelledError:
+            pass
+
+    stop_img = getattr(app.state, "provider_image_reconcile_stop", None)
+    task_img = getattr(app.state, "provider_image_reconcile_task", None)
+    if stop_img:
+        stop_img.set()
+    if task_img and not task_img.done():
+        task_img.cancel()
+        try:
+            await task_img
+        except asyncio.CancelledError:
+            pass
+    logger.info("Provider image reconciliation stopped")
+
+    stop_ob = getattr(app.state, "realtime_outbox_stop", None)
+    task_ob = getattr(app.state, "realtime_outbox_task", None)
+    if stop_ob:
+        stop_ob.set()
+    if task_ob and not task_ob.done():
+        task_ob.cancel()
+        try:
+            await task_ob
+        except asyncio.CancelledError:
+            pass
+    logger.info("Realtime outbox relay stopped")
+
     stop_soc = getattr(app.state, "social_publish_stop", None)
     task_soc = getattr(app.state, "social_publish_task", None)
     if stop_soc:
@@ -352,6 +439,8 @@ async def _app_lifespan(app: FastAPI):
             pass
     logger.info("Reservation reminder heartbeat stopped")
 
+    shutdown_image_pool()
+
 
 app = FastAPI(
     title="POS API",
@@ -475,15 +564,7 @@ async def database_statement_error_handler(request: Request, exc: StatementError
 UPLOADS_DIR = Path(__file__).parent.parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/avif"}
-MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB (optimized after upload via optimize_image)
-
-# Image optimization settings
-MAX_IMAGE_WIDTH = 1920  # Maximum width in pixels
-MAX_IMAGE_HEIGHT = 1920  # Maximum height in pixels
-JPEG_QUALITY = 85  # JPEG quality (1-100, 85 is a good balance)
-PNG_OPTIMIZE = True  # Enable PNG optimization
-WEBP_QUALITY = 85  # WebP quality (1-100)
-AVIF_QUALITY = 85  # AVIF quality (1-100)
+MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB (optimized after upload in the image pool)
 
 # Static files directory for favicon and other assets
 STATIC_DIR = Path(__file__).parent.parent
@@ -491,51 +572,43 @@ STATIC_DIR.mkdir(exist_ok=True)
 
 # Serve tenant logos via explicit route so path resolution is reliable (StaticFiles 404 in some setups)
 @app.get("/uploads/{tenant_id}/logo/{filename}", include_in_schema=False)
-def serve_tenant_logo(tenant_id: int, filename: str):
+def serve_tenant_logo(request: Request, tenant_id: int, filename: str):
     """Serve a tenant logo file. Filename must be a single path component (no slashes)."""
     if "/" in filename or "\\" in filename or filename.startswith("."):
         raise HTTPException(status_code=404, detail="Invalid filename")
     path = UPLOADS_DIR / str(tenant_id) / "logo" / filename
-    if not path.is_file():
-        raise HTTPException(status_code=404, detail="Logo not found")
     media_type = "image/svg+xml" if filename.lower().endswith(".svg") else None
-    return FileResponse(path, media_type=media_type)
+    return serve_upload(request, path, media_type=media_type, not_found="Logo not found")
 
 
 @app.get("/uploads/{tenant_id}/header/{filename}", include_in_schema=False)
-def serve_tenant_header_background(tenant_id: int, filename: str):
+def serve_tenant_header_background(request: Request, tenant_id: int, filename: str):
     """Serve tenant header background image. Filename must be a single path component (no slashes)."""
     if "/" in filename or "\\" in filename or filename.startswith("."):
         raise HTTPException(status_code=404, detail="Invalid filename")
     path = UPLOADS_DIR / str(tenant_id) / "header" / filename
-    if not path.is_file():
-        raise HTTPException(status_code=404, detail="Header image not found")
     media_type = "image/svg+xml" if filename.lower().endswith(".svg") else None
-    return FileResponse(path, media_type=media_type)
+    return serve_upload(request, path, media_type=media_type, not_found="Header image not found")
 
 
 # Serve provider product images via explicit route (StaticFiles often 404s on nested paths behind a proxy)
 @app.get("/uploads/providers/{provider_token}/products/{filename}", include_in_schema=False)
-def serve_provider_product_image(provider_token: str, filename: str):
+def serve_provider_product_image(request: Request, provider_token: str, filename: str):
     """Serve a provider product image. Filename must be a single path component (no slashes)."""
     if "/" in filename or "\\" in filename or filename.startswith("."):
         raise HTTPException(status_code=404, detail="Invalid filename")
     path = UPLOADS_DIR / "providers" / provider_token / "products" / filename
-    if not path.is_file():
-        raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(path)
+    return serve_upload(request, path)
 
 
 # Serve tenant product images (StaticFiles often 404s on nested paths behind a proxy)
 @app.get("/uploads/{tenant_id}/products/{filename}", include_in_schema=False)
-def serve_tenant_product_image(tenant_id: int, filename: str):
+def serve_tenant_product_image(request: Request, tenant_id: int, filename: str):
     """Serve a tenant product image. Filename must be a single path component (no slashes)."""
     if "/" in filename or "\\" in filename or filename.startswith("."):
         raise HTTPException(status_code=404, detail="Invalid filename")
     path = UPLOADS_DIR / str(tenant_id) / "products" / filename
-    if not path.is_file():
-        raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(path)
+    return serve_upload(request, path)
 
 
 @app.get("/uploads/{tenant_id}/contracts/{filename}", include_in_schema=False)
@@ -614,77 +687,6 @@ def format_file_size(size_bytes: int | None) -> str:
         return f"{size_bytes / (1024 * 1024):.1f} MB"
 
 
-def optimize_image(image_data: bytes, content_type: str) -> bytes:
-    """
-    Optimize image locally using Pillow.
-    - Resizes if too large
-    - Compresses JPEG/WebP with quality settings
-    - Optimizes PNG files
-    Returns optimized image data.
-    """
-    try:
-        # Open image from bytes
-        image = Image.open(BytesIO(image_data))
-        original_format = image.format
-        original_size = len(image_data)
-
-        # Convert RGBA to RGB for JPEG (JPEG doesn't support transparency)
-        if (
-            content_type == "image/jpeg" or original_format == "JPEG"
-        ) and image.mode in ("RGBA", "LA", "P"):
-            # Create white background
-            background = Image.new("RGB", image.size, (255, 255, 255))
-            if image.mode == "P":
-                image = image.convert("RGBA")
-            background.paste(
-                image, mask=image.split()[-1] if image.mode == "RGBA" else None
-            )
-            image = background
-        elif image.mode not in ("RGB", "L"):
-            image = image.convert("RGB")
-
-        # Resize if image is too large
-        width, height = image.size
-        if width > MAX_IMAGE_WIDTH or height > MAX_IMAGE_HEIGHT:
-            # Calculate new dimensions maintaining aspect ratio
-            ratio = min(MAX_IMAGE_WIDTH / width, MAX_IMAGE_HEIGHT / height)
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            logger.info(f"Image resized: {width}x{height} -> {new_width}x{new_height}")
-
-        # Save optimized image to bytes
-        output = BytesIO()
-
-        if content_type == "image/jpeg" or original_format == "JPEG":
-            image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
-        elif content_type == "image/webp" or original_format == "WEBP":
-            image.save(output, format="WEBP", quality=WEBP_QUALITY, method=6)
-        elif content_type == "image/png" or original_format == "PNG":
-            # PNG optimization
-            image.save(output, format="PNG", optimize=PNG_OPTIMIZE)
-        elif content_type == "image/avif" or original_format == "AVIF":
-            image.save(output, format="AVIF", quality=AVIF_QUALITY)
-        else:
-            # Default to JPEG
-            image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
-
-        optimized_data = output.getvalue()
-        optimized_size = len(optimized_data)
-        reduction = ((original_size - optimized_size) / original_size) * 100
-
-        logger.info(
-            f"Image optimized: {original_size / 1024:.1f}KB -> "
-            f"{optimized_size / 1024:.1f}KB ({reduction:.1f}% reduction)"
-        )
-
-        return optimized_data
-
-    except Exception as e:
-        logger.warning(f"Error optimizing image: {e}, using original image")
-        return image_data
-
-
 # Serve favicon for API docs (blue icon to distinguish from frontend)
 @app.get("/favicon.ico", include_in_schema=False)
 @app.head("/favicon.ico", include_in_schema=False)
@@ -732,36 +734,78 @@ def get_pin_client_key(request: Request, session_id: str | None) -> str:
         return f"{ip}:{session_id}"
     return ip
 
-def publish_order_update(tenant_id: int, order_data: dict, table_id: int | None = None) -> None:
-    """Publish order update to Redis for WebSocket bridge.
-    
-    Publishes to both:
+def _order_update_channels(tenant_id: int, table_id: int | None) -> list[str]:
+    channels = [f"orders:tenant:{tenant_id}"]  # restaurant staff (all tenant orders)
+    if table_id is not None:
+        channels.append(f"orders:table:{table_id}")  # customers at the table
+    return channels
+
+
+def publish_order_update(
+    tenant_id: int,
+    order_data: dict,
+    table_id: int | None = None,
+    *,
+    session: Session | None = None,
+) -> None:
+    """Queue an order update for the WebSocket bridge (via the realtime outbox).
+
+    Delivered to:
     - orders:tenant:{tenant_id} - for restaurant owners (all tenant orders)
     - orders:table:{table_id} - for customers (table-specific orders, if table_id provided)
+    - kds:{tenant_id}:route:* / kds:{tenant_id}:station:* - kitchen/bar displays, items
+      filtered per display (see kds_realtime.py)
+
+    With ``session`` the event is staged in that session and commits with the caller's
+    change (call before ``session.commit()``), and carries a ``delta`` (changed fields plus
+    ``version`` / ``base_version``, see order_delta.py) when the change allows one; the
+    delta is built when the session commits, from its final flush. Without it, the event
+    is written in its own transaction.
     """
+    channels = _order_update_channels(tenant_id, table_id)
+    try:
+        if session is not None:
+            order_delta.stage_order_event(session, tenant_id, channels, order_data)
+        else:
+            with Session(engine) as own:
+                realtime_outbox.stage_event(own, channels, order_data)
+                kds_realtime.stage_kds_events(own, tenant_id, order_data)
+                own.commit()
+    except Exception:
+        logger.warning("Could not queue order update for tenant %s", tenant_id, exc_info=True)
+
+
+# ws-bridge caches table token lookups; tokens published here are evicted immediately.
+TABLE_TOKEN_INVALIDATE_CHANNEL = "tables:invalidate"
+
+
+def publish_table_token_invalidation(table_token: str | None) -> None:
+    """Tell ws-bridge to drop its cached validation of ``table_token`` (table closed/deleted)."""
+    if not table_token:
+        return
     r = get_redis()
     if r:
         try:
-            # Always publish to tenant channel for restaurant owners
-            r.publish(f"orders:tenant:{tenant_id}", json.dumps(order_data))
-            
-            # Also publish to table channel if table_id is provided (for customers)
-            if table_id is not None:
-                r.publish(f"orders:table:{table_id}", json.dumps(order_data))
+            r.publish(TABLE_TOKEN_INVALIDATE_CHANNEL, table_token)
         except Exception:
             pass  # Fail silently if Redis unavailable
 
 
-def publish_reservation_update(tenant_id: int, reservation_data: dict) -> None:
-    """Publish reservation update to Redis for WebSocket bridge.
+def publish_reservation_update(
+    tenant_id: int, reservation_data: dict, *, session: Session | None = None
+) -> None:
+    """Queue a reservation update for the WebSocket bridge (via the realtime outbox).
     Channel: reservations:tenant:{tenant_id} (for restaurant owners).
+    ``session`` works as in :func:`publish_order_update`.
     """
-    r = get_redis()
-    if r:
-        try:
-            r.publish(f"reservations:tenant:{tenant_id}", json.dumps(reservation_data))
-        except Exception:
-            pass  # Fail silently if Redis unavailable
+    channels = [f"reservations:tenant:{tenant_id}"]
+    try:
+        if session is not None:
+            realtime_outbox.stage_event(session, channels, reservation_data)
+        else:
+            realtime_outbox.write_event(channels, reservation_data)
+    except Exception:
+        logger.warning("Could not queue reservation update for tenant %s", tenant_id, exc_info=True)
 
 
 @app.get("/health")
@@ -853,7 +897,6 @@ class TenantSummary(_BaseModel):
     guest_birthday_consent_text: str | None = None
 
 
-TAKE_AWAY_TABLE_NAMES = ("take away", "home ordering", "takeaway", "take-away")
 
 
 def _is_take_away_table(table) -> bool:
@@ -1136,7 +1179,9 @@ def list_public_tenants(
 ) -> list:
     """List all tenants (id, name, logo, description, phone, email). Public, no authentication."""
     tenants = session.exec(select(models.Tenant).order_by(models.Tenant.name)).all()
-    return [_tenant_to_summary(t, session) for t in tenants]
+    return conditional_json(
+        request, [_tenant_to_summary(t, session) for t in tenants], CACHE_CONTROL_SHORT
+    )
 
 
 @app.get("/public/legal-urls")
@@ -1197,7 +1242,7 @@ def get_public_tenant(
         "guest_birthday_marketing_enabled": summary.guest_birthday_marketing_enabled,
         "guest_birthday_consent_text": summary.guest_birthday_consent_text,
     }
-    return JSONResponse(content=body)
+    return conditional_json(request, body, CACHE_CONTROL_SHORT)
 
 
 @app.get(
@@ -1219,12 +1264,40 @@ def get_public_tenant_menu(
     Used by external marketing sites. Reuses product visibility rules from
     ``GET /menu/{table_token}`` (active catalog items, availability window).
     """
-    from .public_tenant_menu import build_public_tenant_menu
+    from .public_tenant_menu import build_public_tenant_menu, public_tenant_menu_etag
 
-    body = build_public_tenant_menu(session, tenant_id, lang)
-    if body is None:
+    tenant = session.get(models.Tenant, tenant_id)
+    if not tenant:
         raise HTTPException(status_code=404, detail=api_error_payload("tenant_not_found", lang))
-    return body
+    etag, promos_change_at = public_tenant_menu_etag(session, tenant, lang)
+    # Shared caches must not serve old prices past a happy-hour boundary
+    cache_control = short_cache_control(promos_change_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    body = build_public_tenant_menu(session, tenant_id, lang)
+    return cached_json(body, etag, cache_control)
+
+
+@app.get("/public/menu-export/{tenant_id}/{filename}", include_in_schema=False)
+def serve_public_menu_export(request: Request, tenant_id: int, filename: str):
+    """
+    Static menu export (see app/menu_export.py): ``index.json``, ``menu.{lang}.json`` or a
+    versioned ``menu.{lang}.{version}.json``. Marketing sites fall back to
+    ``/public/tenants/{tenant_id}/menu`` when a file is missing.
+    """
+    if "/" in filename or "\\" in filename or filename.startswith(".") or not filename.endswith(".json"):
+        raise HTTPException(status_code=404, detail="Invalid filename")
+    cache_control = (
+        CACHE_CONTROL_IMMUTABLE if is_versioned_export_name(filename) else CACHE_CONTROL_SHORT
+    )
+    return serve_upload(
+        request,
+        menu_export_dir() / str(tenant_id) / filename,
+        media_type="application/json",
+        not_found="Menu export not found",
+        cache_control=cache_control,
+        gzip_variant=True,
+    )
 
 
 @app.get(
@@ -1653,10 +1726,11 @@ def submit_public_waiting_list(
         updated_at=now,
     )
     session.add(row)
-    session.commit()
+    session.flush()
     session.refresh(row)
     out = _waiting_list_entry_to_dict(row, include_client_tech=False)
-    publish_reservation_update(tenant_id, {"type": "waiting_list_update", "entry": out})
+    publish_reservation_update(tenant_id, {"type": "waiting_list_update", "entry": out}, session=session)
+    session.commit()
     return out
 
 
@@ -5278,6 +5352,7 @@ def _delete_product_image_on_disk(image_filename: str | None, tenant_id: int) ->
             safe_name = Path(fn).name
             path = (UPLOADS_DIR / str(tenant_id) / "products" / safe_name).resolve()
         if path.is_relative_to(uploads_root) and path.is_file():
+            delete_renditions(path)
             path.unlink()
     except (OSError, ValueError):
         pass
@@ -5322,20 +5397,11 @@ async def upload_tenant_logo(
         )
 
     is_svg = content_type == "image/svg+xml"
-    if not is_svg:
-        # Optimize raster image locally (SVG is stored as-is)
-        contents = optimize_image(contents, content_type)
 
     # Create tenant logo directory
     tenant_dir = UPLOADS_DIR / str(current_user.tenant_id) / "logo"
     tenant_dir.mkdir(parents=True, exist_ok=True)
 
-    # Delete old logo if exists
-    if tenant.logo_filename:
-        old_path = tenant_dir / tenant.logo_filename
-        if old_path.exists():
-            old_path.unlink()
-
     # Generate unique filename
     ext = Path(file.filename or ("logo.svg" if is_svg else "logo.jpg")).suffix.lower()
     if is_svg:
@@ -5345,9 +5411,19 @@ async def upload_tenant_logo(
         ext = ".jpg"
     new_filename = f"{uuid4()}{ext}"
 
-    # Save file
+    # Save file (raster images are optimized in the image pool; SVG is stored as-is)
     file_path = tenant_dir / new_filename
-    file_path.write_bytes(contents)
+    if is_svg:
+        file_path.write_bytes(contents)
+    else:
+        await process_image_upload(contents, content_type, file_path)
+
+    # Delete old logo if exists
+    if tenant.logo_filename:
+        old_path = tenant_dir / tenant.logo_filename
+        if old_path.exists():
+            delete_renditions(old_path)
+            old_path.unlink()
 
     # Update tenant
     tenant.logo_filename = new_filename
@@ -5403,6 +5479,7 @@ def delete_tenant_logo(
         tenant_dir = UPLOADS_DIR / str(current_user.tenant_id) / "logo"
         path = tenant_dir / tenant.logo_filename
         if path.exists():
+            delete_renditions(path)
             path.unlink()
         tenant.logo_filename = None
         session.add(tenant)
@@ -5462,23 +5539,22 @@ async def upload_tenant_header_background(
             detail=f"File too large. Max size: {MAX_IMAGE_SIZE // (1024 * 1024)}MB",
         )
 
-    contents = optimize_image(contents, content_type)
-
     tenant_dir = UPLOADS_DIR / str(current_user.tenant_id) / "header"
     tenant_dir.mkdir(parents=True, exist_ok=True)
 
-    if tenant.header_background_filename:
-        old_path = tenant_dir / tenant.header_background_filename
-        if old_path.exists():
-            old_path.unlink()
-
     ext = Path(file.filename or "header.jpg").suffix.lower()
     if ext not in [".jpg", ".jpeg", ".png", ".webp", ".avif"]:
         ext = ".jpg"
     new_filename = f"{uuid4()}{ext}"
 
     file_path = tenant_dir / new_filename
-    file_path.write_bytes(contents)
+    await process_image_upload(contents, content_type, file_path)
+
+    if tenant.header_background_filename:
+        old_path = tenant_dir / tenant.header_background_filename
+        if old_path.exists():
+            delete_renditions(old_path)
+            old_path.unlink()
 
     tenant.header_background_filename = new_filename
     session.add(tenant)
@@ -5524,6 +5600,7 @@ def delete_tenant_header_background(
         tenant_dir = UPLOADS_DIR / str(current_user.tenant_id) / "header"
         path = tenant_dir / tenant.header_background_filename
         if path.exists():
+            delete_renditions(path)
             path.unlink()
         tenant.header_background_filename = None
         session.add(tenant)
@@ -5885,25 +5962,26 @@ async def upload_product_image(
             detail=f"Invalid file type. Allowed: {', '.join(sorted(ALLOWED_IMAGE_TYPES))}",
         )
 
-    # Optimize image locally
-    contents = optimize_image(contents, content_type)
-
     # Create tenant upload directory
     tenant_dir = UPLOADS_DIR / str(current_user.tenant_id) / "products"
     tenant_dir.mkdir(parents=True, exist_ok=True)
 
-    # Delete old image if exists (tenant path or catalog providers/... path)
-    _delete_product_image_on_disk(product.image_filename, current_user.tenant_id)
-
     # Generate unique filename
     ext = Path(file.filename or "image.jpg").suffix.lower()
     if ext not in [".jpg", ".jpeg", ".png", ".webp", ".avif"]:
         ext = ".jpg"
     new_filename = f"{uuid4()}{ext}"
 
-    # Save file
+    # Optimize and save in the image pool (off the event loop)
     file_path = tenant_dir / new_filename
-    file_path.write_bytes(contents)
+    await process_image_upload(contents, content_type, file_path)
+
+    # Delete old image if exists (tenant path or catalog providers/... path)
+    old_image = (product.image_filename or "").replace("\\", "/").strip("/")
+    _delete_product_image_on_disk(product.image_filename, current_user.tenant_id)
+    if old_image.startswith("providers/"):
+        # Shared catalog file is gone: drop every ref to it (provider product, other tenants)
+        clear_provider_image_refs(session, old_image)
 
     # Update product
     product.image_filename = new_filename
@@ -6440,24 +6518,42 @@ async def list_catalog(
 
     catalog_items = session.exec(query.order_by(models.ProductCatalog.name)).all()
 
-    result = []
-    for item in catalog_items:
-        # Get all provider products for this catalog item
-        provider_products = session.exec(
-            select(models.ProviderProduct).where(
-                models.ProviderProduct.catalog_id == item.id,
+    # Provider offers and providers for all listed items in two queries
+    provider_products_by_catalog: dict[int, list[models.ProviderProduct]] = {}
+    if catalog_items:
+        for pp in session.exec(
+            select(models.ProviderProduct)
+            .where(
+                models.ProviderProduct.catalog_id.in_([item.id for item in catalog_items]),
                 models.ProviderProduct.availability == True,
             )
-        ).all()
+            .order_by(models.ProviderProduct.id)
+        ).all():
+            provider_products_by_catalog.setdefault(pp.catalog_id, []).append(pp)
+    provider_ids = {
+        pp.provider_id for pps in provider_products_by_catalog.values() for pp in pps
+    }
+    provider_by_id = (
+        {
+            p.id: p
+            for p in session.exec(
+                select(models.Provider).where(models.Provider.id.in_(provider_ids))
+            ).all()
+        }
+        if provider_ids
+        else {}
+    )
+
+    result = []
+    for item in catalog_items:
+        provider_products = provider_products_by_catalog.get(item.id, [])
 
         # Get provider info
         providers_data = []
         for pp in provider_products:
-            provider = session.exec(
-                select(models.Provider).where(models.Provider.id == pp.provider_id)
-            ).first()
+            provider = provider_by_id.get(pp.provider_id)
             if provider:
-                # Local images only; omit URL when file is missing (avoids catalog 404s)
+                # Local images only; image_filename is cleared when the file goes (provider_images)
                 image_url = provider_product_image_url(provider.token, pp.image_filename)
 
                 providers_data.append(
@@ -6593,7 +6689,7 @@ async def get_catalog_item(
             select(models.Provider).where(models.Provider.id == pp.provider_id)
         ).first()
         if provider:
-            # Local images only; omit URL when file is missing (avoids catalog 404s)
+            # Local images only; image_filename is cleared when the file goes (provider_images)
             image_url = provider_product_image_url(provider.token, pp.image_filename)
 
             providers_data.append(
@@ -7183,7 +7279,7 @@ def courier_order_action(
         order.status = compute_order_status_from_items(list(all_items))
 
     session.add(order)
-    session.commit()
+    session.flush()
     session.refresh(order)
 
     publish_order_update(
@@ -7199,7 +7295,9 @@ def courier_order_action(
             else "Delivery",
         },
         table_id=order.table_id,
+        session=session,
     )
+    session.commit()
 
     pickup_name, pickup_address = _courier_pickup_context(session, tenant_id)
     detail = _serialize_courier_order_detail(
@@ -7446,18 +7544,22 @@ async def provider_upload_product_image(
             status_code=400,
             detail=f"Invalid file type. Allowed: {', '.join(sorted(ALLOWED_IMAGE_TYPES))}",
         )
-    contents = optimize_image(contents, content_type)
     provider_dir = UPLOADS_DIR / "providers" / provider.token / "products"
     provider_dir.mkdir(parents=True, exist_ok=True)
-    if pp.image_filename:
-        old_path = provider_dir / pp.image_filename
-        if old_path.exists():
-            old_path.unlink()
     ext = Path(file.filename or "image.jpg").suffix.lower()
     if ext not in [".jpg", ".jpeg", ".png", ".webp", ".avif"]:
         ext = ".jpg"
     new_filename = f"{uuid4()}{ext}"
-    (provider_dir / new_filename).write_bytes(contents)
+    await process_image_upload(contents, content_type, provider_dir / new_filename)
+    if pp.image_filename:
+        old_path = provider_dir / pp.image_filename
+        if old_path.exists():
+            delete_renditions(old_path)
+            old_path.unlink()
+        # Tenant products copied the old path
+        clear_provider_image_refs(
+            session, f"providers/{provider.token}/products/{pp.image_filename}"
+        )
     pp.image_filename = new_filename
     session.add(pp)
     session.commit()
@@ -9477,7 +9579,9 @@ def delete_table(
                 session.add(lone)
                 session.delete(grp)
 
+    deleted_token = table.token
     session.commit()
+    publish_table_token_invalidation(deleted_token)
     return JSONResponse(
         content={"status": "deleted", "id": table_id},
         status_code=status.HTTP_200_OK,
@@ -9759,42 +9863,6 @@ def _merge_table_statuses(statuses: list[str]) -> str:
     return "available"
 
 
-def _ensure_aware_utc(dt: datetime) -> datetime:
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc)
-
-
-def _slot_datetime_utc(res_date: date, slot_time: time, tenant: models.Tenant) -> datetime:
-    tz = ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
-    local = datetime.combine(res_date, slot_time, tzinfo=tz)
-    return local.astimezone(timezone.utc)
-
-
-def _table_busy_interval_turn(
-    table: models.Table,
-    seated: models.Reservation | None,
-    order: models.Order | None,
-    turn_minutes: int,
-    now_utc: datetime,
-) -> tuple[datetime, datetime] | None:
-    """Single busy window [start, end) from earliest relevant signal."""
-    starts: list[datetime] = []
-    if seated is not None:
-        s = seated.seated_at or seated.updated_at or seated.created_at
-        starts.append(_ensure_aware_utc(s))
-    if order is not None:
-        starts.append(_ensure_aware_utc(order.created_at))
-    if table.is_active and table.activated_at is not None:
-        starts.append(_ensure_aware_utc(table.activated_at))
-    if table.is_active and not starts:
-        starts.append(now_utc)
-    if not starts:
-        return None
-    st = min(starts)
-    return (st, st + timedelta(minutes=turn_minutes))
-
-
 def _bookable_floors_for_public(session: Session, tenant_id: int) -> list[models.Floor]:
     """Active floors that have at least one table on that floor (public zone list)."""
     floors = session.exec(
@@ -9816,35 +9884,6 @@ def _bookable_floors_for_public(session: Session, tenant_id: int) -> list[models
     return out
 
 
-def _table_blocks_reservation_slot(
-    table: models.Table,
-    seated: models.Reservation | None,
-    order: models.Order | None,
-    res_date: date,
-    slot_time: time,
-    tenant: models.Tenant,
-    now_utc: datetime,
-) -> bool:
-    """True if this table cannot be counted for reservations at (res_date, slot_time)."""
-    turn = tenant.reservation_average_table_turn_minutes
-    tz = ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
-    today_local = now_utc.astimezone(tz).date()
-    slot_utc = _slot_datetime_utc(res_date, slot_time, tenant)
-
-    if turn is None or turn <= 0:
-        if res_date != today_local:
-            return False
-        if seated is not None or order is not None or table.is_active:
-            return True
-        return False
-
-    interval = _table_busy_interval_turn(table, seated, order, turn, now_utc)
-    if interval is None:
-        return False
-    start, end = interval
-    return start <= slot_utc < end
-
-
 def _reservable_capacity_for_tenant(
     session: Session,
     tenant_id: int,
@@ -9863,110 +9902,11 @@ def _reservable_capacity_for_tenant(
     When ``floor_id`` is set, only tables on that floor are counted (``Table.floor_id == floor_id``).
     Tables with ``floor_id`` null are never counted for a zone-specific pool — they only contribute
     to venue-wide capacity (``floor_id`` None).
-    """
-    now_utc = _now_utc or datetime.now(timezone.utc)
-    tables = session.exec(
-        select(models.Table).where(models.Table.tenant_id == tenant_id)
-    ).all()
-    if floor_id is not None:
-        tables = [t for t in tables if t.floor_id == floor_id]
-    if not tables:
-        return (0, 0)
-    table_ids = [t.id for t in tables if t.id is not None]
-    if not table_ids:
-        return (0, 0)
-
-    seated_rows = session.exec(
-        select(models.Reservation).where(
-            models.Reservation.tenant_id == tenant_id,
-            models.Reservation.table_id.in_(table_ids),
-            models.Reservation.status == models.ReservationStatus.seated,
-        )
-    ).all()
-    seated_by_table: dict[int, models.Reservation] = {
-        r.table_id: r for r in seated_rows if r.table_id is not None
-    }
-
-    orders_all = session.exec(
-        select(models.Order).where(
-            models.Order.table_id.in_(table_ids),
-            models.Order.status.in_(
-                [
-                    models.OrderStatus.pending,
-                    models.OrderStatus.preparing,
-                    models.OrderStatus.ready,
-                    models.OrderStatus.partially_delivered,
-                ]
-            ),
-        )
-    ).all()
-    orders_by_table: dict[int, models.Order] = {}
-    for o in orders_all:
-        tid = o.table_id
-        if tid not in orders_by_table or o.created_at < orders_by_table[tid].created_at:
-            orders_by_table[tid] = o
-
-    blocked: set[int] = set()
-    for t in tables:
-        if t.id is None:
-            continue
-        if _table_blocks_reservation_slot(
-            t,
-            seated_by_table.get(t.id),
-            orders_by_table.get(t.id),
-            res_date,
-            slot_time,
-            tenant,
-            now_utc,
-        ):
-            blocked.add(t.id)
 
-    seen_group: set[int] = set()
-    for t in tables:
-        if t.id is None or not t.table_group_id:
-            continue
-        if t.table_group_id in seen_group:
-            continue
-        seen_group.add(t.table_group_id)
-        member_ids = [
-            x.id for x in tables if x.table_group_id == t.table_group_id and x.id is not None
-        ]
-        if any(mid in blocked for mid in member_ids):
-            blocked.update(member_ids)
-
-    # Reservation pool units: standalone tables or one unit per table group (combined seats).
-    units: list[tuple[int, int]] = []  # (seat_weight, sort_id)
-    seen_group = set()
-    for t in tables:
-        if t.id is None:
-            continue
-        if t.table_group_id:
-            if t.table_group_id in seen_group:
-                continue
-            seen_group.add(t.table_group_id)
-            members = [x for x in tables if x.table_group_id == t.table_group_id]
-            member_ids = [m.id for m in members if m.id is not None]
-            if any(mid in blocked for mid in member_ids):
-                continue
-            w = sum(m.seat_count for m in members)
-            rid = min(member_ids)
-            units.append((w, rid))
-        else:
-            if t.id in blocked:
-                continue
-            units.append((t.seat_count, t.id))
-
-    units.sort(key=lambda u: (u[0], u[1]))
-    walk = max(0, tenant.reservation_walk_in_tables_reserved or 0)
-    if walk >= len(units):
-        return (0, 0)
-    pool = units[walk:]
-    total_seats = sum(u[0] for u in pool)
-    n_tables = len(pool)
-    cap = tenant.reservation_max_guests_per_slot
-    if cap is not None and cap > 0:
-        total_seats = min(total_seats, cap)
-    return (total_seats, n_tables)
+    Grids and other multi-slot callers should use one ``ReservationAvailability`` instead.
+    """
+    availability = ReservationAvailability(session, tenant, res_date, res_date, now_utc=_now_utc)
+    return availability.capacity(res_date, slot_time, floor_id)
 
 
 def _normalize_floor_seating_zone_value(raw: str | None) -> str:
@@ -10038,35 +9978,18 @@ def _demand_for_slot(
     reservations with no preferred floor but a seated table on that floor (``table.floor_id``).
     Booked parties without preferred floor and without a table do not consume zone capacity (they
     only count venue-wide).
+
+    Read from the ``slot_demand`` ledger; take ``lock_slot_days`` first when the result gates a
+    booking so concurrent bookings of the day are checked one after the other.
     """
-    q = select(models.Reservation).where(
-        models.Reservation.tenant_id == tenant_id,
-        models.Reservation.reservation_date == slot_date,
-        models.Reservation.reservation_time == slot_time,
-        models.Reservation.status.in_([models.ReservationStatus.booked, models.ReservationStatus.seated]),
+    return slot_demand(
+        session,
+        tenant_id,
+        slot_date,
+        slot_time,
+        floor_id=floor_id,
+        exclude_reservation_id=exclude_reservation_id,
     )
-    if exclude_reservation_id is not None:
-        q = q.where(models.Reservation.id != exclude_reservation_id)
-    reservations = session.exec(q).all()
-    if floor_id is None:
-        reserved_guests = sum(r.party_size for r in reservations)
-        return (reserved_guests, len(reservations))
-    table_ids = [r.table_id for r in reservations if r.table_id]
-    tables_map: dict[int, models.Table] = {}
-    if table_ids:
-        tbls = session.exec(select(models.Table).where(models.Table.id.in_(table_ids))).all()
-        tables_map = {t.id: t for t in tbls if t.id is not None}
-    included: list[models.Reservation] = []
-    for r in reservations:
-        pf = getattr(r, "preferred_floor_id", None)
-        if pf == floor_id:
-            included.append(r)
-        elif pf is None and r.table_id:
-            t = tables_map.get(r.table_id)
-            if t and t.floor_id == floor_id:
-                included.append(r)
-    reserved_guests = sum(r.party_size for r in included)
-    return (reserved_guests, len(included))
 
 
 def _normalize_reservation_service_type(raw: str | None) -> str | None:
@@ -10161,12 +10084,11 @@ def get_slot_capacity(
     tenant = session.get(models.Tenant, tenant_id)
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
-    total_seats, total_tables = _reservable_capacity_for_tenant(
-        session, tenant_id, d, tenant, slot_time, floor_id=floor_id
-    )
-    reserved_guests, reserved_parties = _demand_for_slot(
-        session, tenant_id, d, slot_time, exclude_reservation_id=exclude_reservation_id, floor_id=floor_id
+    availability = ReservationAvailability(
+        session, tenant, d, d, exclude_reservation_id=exclude_reservation_id
     )
+    total_seats, total_tables = availability.capacity(d, slot_time, floor_id)
+    reserved_guests, reserved_parties = availability.demand(d, slot_time, floor_id)
     return {
         "total_seats": total_seats,
         "total_tables": total_tables,
@@ -10269,11 +10191,10 @@ def get_reservations_overbooking_report(
         slot_times = [t for t in slot_times if t <= time_to_parsed]
 
     slots = []
+    availability = ReservationAvailability(session, tenant, d, d)
     for st in slot_times:
-        total_seats, total_tables = _reservable_capacity_for_tenant(
-            session, tenant_id, d, tenant, st
-        )
-        reserved_guests, reserved_parties = _demand_for_slot(session, tenant_id, d, st)
+        total_seats, total_tables = availability.capacity(d, st)
+        reserved_guests, reserved_parties = availability.demand(d, st)
         over_seats = reserved_guests > total_seats
         over_tables = reserved_parties > total_tables
         slots.append({
@@ -10470,6 +10391,8 @@ def create_reservation(
             )
         else:
             eff_floor = None
+    # Serialize bookings of this day until commit (capacity check + insert)
+    lock_slot_days(session, tenant_id, [res_date])
     total_seats, total_tables = _reservable_capacity_for_tenant(
         session, tenant_id, res_date, tenant, res_time, floor_id=eff_floor
     )
@@ -10523,13 +10446,14 @@ def create_reservation(
         guest_birthday_marketing_consent=bday_consent,
     )
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     # Send confirmation whenever customer email is present (staff or public; token only adds view/cancel link)
     if reservation.customer_email and reservation.customer_email.strip():
         background_tasks.add_task(_send_reservation_confirmation_background, tenant_id, reservation.id)
     out = _reservation_to_dict(reservation, session, include_client_tech=current_user is not None)
-    publish_reservation_update(tenant_id, {"type": "new_reservation", "reservation": out})
+    publish_reservation_update(tenant_id, {"type": "new_reservation", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -10620,10 +10544,11 @@ def create_waiting_list_entry_staff(
         updated_at=now,
     )
     session.add(row)
-    session.commit()
+    session.flush()
     session.refresh(row)
     out = _waiting_list_entry_to_dict(row, include_client_tech=True)
-    publish_reservation_update(current_user.tenant_id, {"type": "waiting_list_update", "entry": out})
+    publish_reservation_update(current_user.tenant_id, {"type": "waiting_list_update", "entry": out}, session=session)
+    session.commit()
     return out
 
 
@@ -10649,10 +10574,11 @@ def update_waiting_list_status(
         entry.notified_at = now
     entry.updated_at = now
     session.add(entry)
-    session.commit()
+    session.flush()
     session.refresh(entry)
     out = _waiting_list_entry_to_dict(entry, include_client_tech=True)
-    publish_reservation_update(current_user.tenant_id, {"type": "waiting_list_update", "entry": out})
+    publish_reservation_update(current_user.tenant_id, {"type": "waiting_list_update", "entry": out}, session=session)
+    session.commit()
     return out
 
 
@@ -10694,10 +10620,11 @@ def get_reservation_book_calendar(
         raise HTTPException(status_code=404, detail="Tenant not found")
 
     _, last_day = monthrange(year, month)
+    month_windows = opening_service_windows_for_range(
+        session, tenant, date(year, month, 1), date(year, month, last_day)
+    )
     days: list[dict] = []
-    for dom in range(1, last_day + 1):
-        d = date(year, month, dom)
-        windows = _opening_service_windows_for_date(session, tenant, d)
+    for d, windows in month_windows.items():
         if windows is None:
             state = "open"
         elif len(windows) == 0:
@@ -10709,44 +10636,41 @@ def get_reservation_book_calendar(
     return {"year": year, "month": month, "days": days}
 
 
-def _public_book_slot_cells_for_single_date(
-    session: Session,
-    tenant_id: int,
-    tenant: models.Tenant,
+def _public_book_day_cells(
+    availability: ReservationAvailability,
     d: date,
     party_size: int,
-    exclude_reservation_id: int | None,
     svc: str | None,
     tz: ZoneInfo,
-    now_local: datetime,
     today_local: date,
     min_dt: datetime,
     max_book: date,
     floor_id: int | None = None,
-) -> dict[str, str]:
-    """Per time-slot state for one calendar day (same rules as book-week-slots)."""
-    slot_step = _effective_reservation_slot_minutes(tenant)
-    windows = _opening_service_windows_for_date(session, tenant, d)
+) -> tuple[str, dict[str, str]]:
+    """Per time-slot state for one calendar day (same rules as book-week-slots).
+
+    Returns (state of grid times outside this day's hours, states of the day's own slot times).
+    """
+    slot_step = _effective_reservation_slot_minutes(availability.tenant)
+    windows = availability.windows(d)
     if windows is None:
         windows = [(time(8, 0), time(23, 0))]
     windows_f = _filter_windows_by_service(windows, svc)
     day_closed = len(windows) == 0 or len(windows_f) == 0
-    allowed_times: set[time] = set()
-    if not day_closed:
-        allowed_times = set(_grid_slot_times_for_windows(windows_f, slot_step))
-    times_sorted = sorted(allowed_times, key=lambda x: x.hour * 60 + x.minute)
+    if d > max_book:
+        outside = "out_of_range"
+    elif day_closed:
+        outside = "closed_day"
+    else:
+        outside = "out_of_hours"
     cells: dict[str, str] = {}
-    for st in times_sorted:
+    if day_closed:
+        return outside, cells
+    for st in _grid_slot_times_for_windows(windows_f, slot_step):
         key = st.strftime("%H:%M")
         if d > max_book:
             cells[key] = "out_of_range"
             continue
-        if day_closed:
-            cells[key] = "closed_day"
-            continue
-        if st not in allowed_times:
-            cells[key] = "out_of_hours"
-            continue
         if d < today_local:
             cells[key] = "past"
             continue
@@ -10754,20 +10678,39 @@ def _public_book_slot_cells_for_single_date(
         if slot_dt < min_dt:
             cells[key] = "past"
             continue
-        total_seats, total_tables = _reservable_capacity_for_tenant(
-            session, tenant_id, d, tenant, st, floor_id=floor_id
-        )
-        if total_tables < 1 or total_seats < party_size:
-            cells[key] = "full"
-            continue
-        reserved_guests, reserved_parties = _demand_for_slot(
-            session, tenant_id, d, st, exclude_reservation_id=exclude_reservation_id, floor_id=floor_id
+        cells[key] = "available" if availability.has_room(d, st, party_size, floor_id) else "full"
+    return outside, cells
+
+
+def _public_book_days_cells(
+    session: Session,
+    tenant: models.Tenant,
+    start: date,
+    end: date,
+    party_size: int,
+    exclude_reservation_id: int | None,
+    svc: str | None,
+    floor_id: int | None,
+) -> dict[date, tuple[str, dict[str, str]]]:
+    """``_public_book_day_cells`` for each date in [start, end]; cached unless excluding a booking."""
+    tz = ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
+    now_local = datetime.now(tz)
+    today_local = now_local.date()
+    min_dt = now_local + timedelta(minutes=RESERVATION_PUBLIC_MIN_LEAD_MINUTES)
+    max_book = today_local + timedelta(days=366)
+    availability = ReservationAvailability(
+        session, tenant, start, end, exclude_reservation_id=exclude_reservation_id
+    )
+
+    def build(d: date) -> tuple[str, dict[str, str]]:
+        return _public_book_day_cells(
+            availability, d, party_size, svc, tz, today_local, min_dt, max_book, floor_id=floor_id
         )
-        if reserved_guests + party_size <= total_seats and reserved_parties + 1 <= total_tables:
-            cells[key] = "available"
-        else:
-            cells[key] = "full"
-    return cells
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    if exclude_reservation_id is not None:
+        return {d: build(d) for d in days}
+    return cached_availability_days(session, tenant.id, days, (party_size, floor_id, svc), build)
 
 
 def _aggregate_public_day_slot_state(cells: dict[str, str]) -> str:
@@ -10828,10 +10771,7 @@ def get_reservation_book_week_slots(
         svc = _normalize_reservation_service_type(str(service).strip())
 
     tz = ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
-    now_local = datetime.now(tz)
-    today_local = now_local.date()
-    min_dt = now_local + timedelta(minutes=RESERVATION_PUBLIC_MIN_LEAD_MINUTES)
-    max_book = today_local + timedelta(days=366)
+    today_local = datetime.now(tz).date()
 
     if week_anchor and str(week_anchor).strip():
         try:
@@ -10842,72 +10782,22 @@ def get_reservation_book_week_slots(
         anchor_day = today_local
 
     anchor_monday = _monday_on_or_before(anchor_day)
-
-    slot_step = _effective_reservation_slot_minutes(tenant)
-    all_slot_times: set[time] = set()
-    for i in range(7):
-        d = anchor_monday + timedelta(days=i)
-        windows = _opening_service_windows_for_date(session, tenant, d)
-        if windows is None:
-            windows = [(time(8, 0), time(23, 0))]
-        if len(windows) == 0:
-            continue
-        windows = _filter_windows_by_service(windows, svc)
-        if len(windows) == 0:
-            continue
-        for st in _grid_slot_times_for_windows(windows, slot_step):
-            all_slot_times.add(st)
-
-    times_sorted = sorted(all_slot_times, key=lambda x: x.hour * 60 + x.minute)
-    time_strings = [t.strftime("%H:%M") for t in times_sorted]
+    week = _public_book_days_cells(
+        session,
+        tenant,
+        anchor_monday,
+        anchor_monday + timedelta(days=6),
+        party_size,
+        exclude_reservation_id,
+        svc,
+        floor_id,
+    )
+    # Rows: every slot time of the week ("HH:MM" sorts chronologically)
+    time_strings = sorted({key for _, cells in week.values() for key in cells})
 
     days_out: list[dict] = []
-    for i in range(7):
-        d = anchor_monday + timedelta(days=i)
-        cells: dict[str, str] = {}
-        windows = _opening_service_windows_for_date(session, tenant, d)
-        if windows is None:
-            windows = [(time(8, 0), time(23, 0))]
-        windows_f = _filter_windows_by_service(windows, svc)
-        day_closed = len(windows) == 0 or len(windows_f) == 0
-        allowed_times = set()
-        if not day_closed:
-            allowed_times = set(_grid_slot_times_for_windows(windows_f, slot_step))
-
-        for st in times_sorted:
-            key = st.strftime("%H:%M")
-            if d > max_book:
-                cells[key] = "out_of_range"
-                continue
-            if day_closed:
-                cells[key] = "closed_day"
-                continue
-            if st not in allowed_times:
-                cells[key] = "out_of_hours"
-                continue
-            if d < today_local:
-                cells[key] = "past"
-                continue
-            slot_dt = datetime.combine(d, st, tzinfo=tz)
-            if slot_dt < min_dt:
-                cells[key] = "past"
-                continue
-
-            total_seats, total_tables = _reservable_capacity_for_tenant(
-                session, tenant_id, d, tenant, st, floor_id=floor_id
-            )
-            if total_tables < 1 or total_seats < party_size:
-                cells[key] = "full"
-                continue
-
-            reserved_guests, reserved_parties = _demand_for_slot(
-                session, tenant_id, d, st, exclude_reservation_id=exclude_reservation_id, floor_id=floor_id
-            )
-            if reserved_guests + party_size <= total_seats and reserved_parties + 1 <= total_tables:
-                cells[key] = "available"
-            else:
-                cells[key] = "full"
-
+    for d, (outside, own) in week.items():
+        cells = {key: own.get(key, outside) for key in time_strings}
         days_out.append({"date": d.isoformat(), "cells": cells})
 
     earliest_week_monday = _monday_on_or_before(today_local)
@@ -10949,32 +10839,21 @@ def get_reservation_book_month_day_states(
     if service and str(service).strip():
         svc = _normalize_reservation_service_type(str(service).strip())
 
-    tz = ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
-    now_local = datetime.now(tz)
-    today_local = now_local.date()
-    min_dt = now_local + timedelta(minutes=RESERVATION_PUBLIC_MIN_LEAD_MINUTES)
-    max_book = today_local + timedelta(days=366)
-
     _, last_day = monthrange(year, month)
-    days_out: list[dict] = []
-    for dom in range(1, last_day + 1):
-        d = date(year, month, dom)
-        cells = _public_book_slot_cells_for_single_date(
-            session,
-            tenant_id,
-            tenant,
-            d,
-            party_size,
-            exclude_reservation_id,
-            svc,
-            tz,
-            now_local,
-            today_local,
-            min_dt,
-            max_book,
-            floor_id=floor_id,
-        )
-        days_out.append({"date": d.isoformat(), "state": _aggregate_public_day_slot_state(cells)})
+    month_days = _public_book_days_cells(
+        session,
+        tenant,
+        date(year, month, 1),
+        date(year, month, last_day),
+        party_size,
+        exclude_reservation_id,
+        svc,
+        floor_id,
+    )
+    days_out = [
+        {"date": d.isoformat(), "state": _aggregate_public_day_slot_state(cells)}
+        for d, (_, cells) in month_days.items()
+    ]
 
     return {"year": year, "month": month, "days": days_out}
 
@@ -11012,27 +10891,9 @@ def get_reservation_book_day_slots(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    tz = ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
-    now_local = datetime.now(tz)
-    today_local = now_local.date()
-    min_dt = now_local + timedelta(minutes=RESERVATION_PUBLIC_MIN_LEAD_MINUTES)
-    max_book = today_local + timedelta(days=366)
-
-    cells = _public_book_slot_cells_for_single_date(
-        session,
-        tenant_id,
-        tenant,
-        d,
-        party_size,
-        exclude_reservation_id,
-        svc,
-        tz,
-        now_local,
-        today_local,
-        min_dt,
-        max_book,
-        floor_id=floor_id,
-    )
+    _, cells = _public_book_days_cells(
+        session, tenant, d, d, party_size, exclude_reservation_id, svc, floor_id
+    )[d]
     times_sorted = sorted(cells.keys(), key=lambda k: int(k[:2]) * 60 + int(k[3:5]))
     return {"date": d.isoformat(), "times": times_sorted, "cells": cells}
 
@@ -11071,9 +10932,10 @@ def get_next_available_reservation_time(
         raise HTTPException(status_code=400, detail=str(e))
 
     slot_step = _effective_reservation_slot_minutes(tenant)
+    availability = ReservationAvailability(session, tenant, check_date, check_date + timedelta(days=7))
     for day_offset in range(8):
         d = check_date + timedelta(days=day_offset)
-        windows = _opening_service_windows_for_date(session, tenant, d)
+        windows = availability.windows(d)
         if windows is None:
             windows = [(time(8, 0), time(23, 0))]
         if len(windows) == 0:
@@ -11086,17 +10948,7 @@ def get_next_available_reservation_time(
             slot_dt = datetime.combine(d, slot_time, tzinfo=tz)
             if slot_dt < min_dt:
                 continue
-
-            total_seats, total_tables = _reservable_capacity_for_tenant(
-                session, tenant_id, d, tenant, slot_time, floor_id=floor_id
-            )
-            if total_tables < 1 or total_seats < party_size:
-                continue
-
-            reserved_guests, reserved_parties = _demand_for_slot(
-                session, tenant_id, d, slot_time, exclude_reservation_id=None, floor_id=floor_id
-            )
-            if reserved_guests + party_size <= total_seats and reserved_parties + 1 <= total_tables:
+            if availability.has_room(d, slot_time, party_size, floor_id):
                 return {
                     "date": d.isoformat(),
                     "time": slot_time.strftime("%H:%M"),
@@ -11280,6 +11132,7 @@ def update_reservation(
         reservation.service_type,
     )
     cap_floor = reservation.preferred_floor_id
+    lock_reservation_days(session, reservation)
     total_seats, total_tables = _reservable_capacity_for_tenant(
         session,
         current_user.tenant_id,
@@ -11303,10 +11156,11 @@ def update_reservation(
         )
     reservation.updated_at = datetime.now(timezone.utc)
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     out = _reservation_to_dict(reservation, session, include_client_tech=True)
-    publish_reservation_update(current_user.tenant_id, {"type": "reservation_updated", "reservation": out})
+    publish_reservation_update(current_user.tenant_id, {"type": "reservation_updated", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -11340,10 +11194,11 @@ def update_reservation_status(
         reservation.status = body.status
     reservation.updated_at = datetime.now(timezone.utc)
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     out = _reservation_to_dict(reservation, session, include_client_tech=True)
-    publish_reservation_update(current_user.tenant_id, {"type": "reservation_status", "reservation": out})
+    publish_reservation_update(current_user.tenant_id, {"type": "reservation_status", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -11418,10 +11273,11 @@ def seat_reservation(
     reservation.seated_at = datetime.now(timezone.utc)
     reservation.updated_at = reservation.seated_at
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     out = _reservation_to_dict(reservation, session, include_client_tech=True)
-    publish_reservation_update(current_user.tenant_id, {"type": "reservation_seated", "reservation": out})
+    publish_reservation_update(current_user.tenant_id, {"type": "reservation_seated", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -11450,10 +11306,11 @@ def finish_reservation(
         raise HTTPException(status_code=404, detail="Reservation not found")
     _mark_reservation_finished(reservation)
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     out = _reservation_to_dict(reservation, session, include_client_tech=True)
-    publish_reservation_update(current_user.tenant_id, {"type": "reservation_finished", "reservation": out})
+    publish_reservation_update(current_user.tenant_id, {"type": "reservation_finished", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -11479,10 +11336,11 @@ def cancel_reservation_public(
     reservation.seated_at = None
     reservation.updated_at = datetime.now(timezone.utc)
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     out = _reservation_to_dict(reservation, session)
-    publish_reservation_update(reservation.tenant_id, {"type": "reservation_cancelled", "reservation": out})
+    publish_reservation_update(reservation.tenant_id, {"type": "reservation_cancelled", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -11517,10 +11375,11 @@ def update_reservation_public(
             reservation.customer_notes = body.customer_notes.strip() if isinstance(body.customer_notes, str) and body.customer_notes.strip() else None
     reservation.updated_at = datetime.now(timezone.utc)
     session.add(reservation)
-    session.commit()
+    session.flush()
     session.refresh(reservation)
     out = _reservation_to_dict(reservation, session)
-    publish_reservation_update(reservation.tenant_id, {"type": "reservation_updated", "reservation": out})
+    publish_reservation_update(reservation.tenant_id, {"type": "reservation_updated", "reservation": out}, session=session)
+    session.commit()
     return out
 
 
@@ -11671,6 +11530,7 @@ def activate_table(
 
     session.commit()
     session.refresh(table)
+    publish_table_token_invalidation(table.token)
 
     return JSONResponse(content={
         "id": table.id,
@@ -11743,7 +11603,7 @@ def close_table(
         if res.id is not None:
             finished_reservation_ids.append(res.id)
 
-    session.commit()
+    session.flush()
     session.refresh(table)
 
     for rid in finished_reservation_ids:
@@ -11751,7 +11611,9 @@ def close_table(
         if r:
             out = _reservation_to_dict(r, session, include_client_tech=True)
             publish_reservation_update(
-                current_user.tenant_id, {"type": "reservation_finished", "reservation": out}
+                current_user.tenant_id,
+                {"type": "reservation_finished", "reservation": out},
+                session=session,
             )
 
     # Notify connected customers via WebSocket that the table has been closed
@@ -11759,7 +11621,10 @@ def close_table(
         tenant_id=current_user.tenant_id,
         order_data={"type": "table_closed", "table_id": table_id},
         table_id=table_id,
+        session=session,
     )
+    session.commit()
+    publish_table_token_invalidation(table.token)
 
     return JSONResponse(content={
         "id": table.id,
@@ -11902,14 +11767,15 @@ def validate_table_token(
     session: Session = Depends(get_session),
 ) -> dict:
     """Internal endpoint for ws-bridge to validate table tokens."""
-    table = session.exec(select(models.Table).where(models.Table.token == table_token)).first()
-    
+    table = resolve_table_token(session, table_token)
+
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
     
     return {
         "table_id": table.id,
         "tenant_id": table.tenant_id,
+        "is_active": bool(table.is_active),
         "valid": True
     }
 
@@ -11917,107 +11783,30 @@ def validate_table_token(
 # ============ PUBLIC MENU ============
 
 
-@app.get("/menu/{table_token}")
-@limiter.limit(
-    f"{getattr(settings, 'rate_limit_public_menu_per_minute', 30)}/minute"
-)
-def get_menu(
-    request: Request,
-    table_token: str,
-    staff_access: str | None = Query(None, description="Staff link token: when valid, PIN is not required"),
-    lang: str = Depends(_get_requested_language),
-    session: Session = Depends(get_session),
+def _compile_menu_snapshot(
+    session: Session,
+    tenant_id: int,
+    tenant: models.Tenant | None,
+    lang: str,
+    today: date,
 ) -> dict:
-    """Public endpoint - get menu for a table by its token."""
-    if staff_access and not _verify_staff_menu_token(table_token, staff_access):
-        logger.warning("Menu staff_access token invalid or expired for table_token=%s", table_token[:8] + "...")
-    # Use raw SQL to avoid SQLAlchemy model issues
-    from sqlalchemy import text
-
-    try:
-        result = session.execute(
-            text("""
-            SELECT id, tenant_id, name, token, is_active, order_pin, active_order_id
-            FROM "table"
-            WHERE token = :token
-        """),
-            {"token": table_token},
-        )
-        table_row = result.fetchone()
-        logger.debug("get_menu table query token=%s row=%s", table_token[:8] + "...", table_row)
-    except Exception as e:
-        logger.exception("get_menu table query failed: %s", e)
-        raise HTTPException(
-            status_code=500,
-            detail=api_error_payload("database_error", lang),
-        )
-
-    if not table_row:
-        logger.debug("get_menu: no table for token prefix=%s", table_token[:8] + "...")
-        raise HTTPException(status_code=404, detail=api_error_payload("table_not_found", lang))
-
-    # Create a simple object with the needed attributes
-    class TableData:
-        def __init__(self, id, tenant_id, name, token, is_active, order_pin, active_order_id):
-            self.id = id
-            self.tenant_id = tenant_id
-            self.name = name
-            self.token = token
-            self.is_active = is_active or False
-            self.order_pin = order_pin
-            self.active_order_id = active_order_id
-
-    table = TableData(
-        table_row[0],
-        table_row[1],
-        table_row[2],
-        table_row[3],
-        table_row[4],
-        table_row[5],
-        table_row[6],
-    )
-
-    if not table.is_active:
-        # Return tenant/table info so the frontend can show a branded "table closed" page
-        tenant = session.exec(
-            select(models.Tenant).where(models.Tenant.id == table.tenant_id)
-        ).first()
-        raise HTTPException(
-            status_code=403,
-            detail={
-                "code": "TABLE_CLOSED",
-                "message": get_message("table_currently_closed", lang),
-                "table_name": table.name,
-                "tenant_name": tenant.name if tenant else None,
-                "tenant_logo": tenant.logo_filename if tenant else None,
-                "tenant_header_background_filename": tenant.header_background_filename if tenant else None,
-                "tenant_id": table.tenant_id,
-                "tenant_public_background_color": tenant.public_background_color if tenant else None,
-            },
-        )
-
+    """
+    Table-independent part of GET /menu/{table_token}: products available on ``today``
+    (before live promo prices) and tenant translations. Cached by menu_cache.
+    """
     # Get products from TenantProduct (new catalog system) and Product (legacy)
     tenant_products = session.exec(
         select(models.TenantProduct).where(
-            models.TenantProduct.tenant_id == table.tenant_id,
+            models.TenantProduct.tenant_id == tenant_id,
             models.TenantProduct.is_active == True,
         )
     ).all()
 
     legacy_products = session.exec(
-        select(models.Product).where(models.Product.tenant_id == table.tenant_id)
+        select(models.Product).where(models.Product.tenant_id == tenant_id)
     ).all()
 
-    tenant = session.exec(
-        select(models.Tenant).where(models.Tenant.id == table.tenant_id)
-    ).first()
-
     # Customer-facing: only show products available today (within available_from..available_until)
-    try:
-        tz = ZoneInfo(tenant.timezone) if tenant and tenant.timezone else timezone.utc
-    except Exception:
-        tz = timezone.utc
-    today = datetime.now(tz).date()
     def _is_available(available_from, available_until):
         if available_from is not None and available_from > today:
             return False
@@ -12040,7 +11829,7 @@ def get_menu(
     if effective_product_ids:
         product_questions = session.exec(
             select(models.ProductQuestion).where(
-                models.ProductQuestion.tenant_id == table.tenant_id,
+                models.ProductQuestion.tenant_id == tenant_id,
                 models.ProductQuestion.product_id.in_(effective_product_ids),
             ).order_by(models.ProductQuestion.sort_order, models.ProductQuestion.id)
         ).all()
@@ -12058,6 +11847,65 @@ def get_menu(
                 ),
             })
 
+    # Catalog rows, provider products / providers and linked products: one IN query each
+    catalog_ids = {tp.catalog_id for tp in tenant_products if tp.catalog_id is not None}
+    catalog_by_id = (
+        {
+            c.id: c
+            for c in session.exec(
+                select(models.ProductCatalog).where(models.ProductCatalog.id.in_(catalog_ids))
+            ).all()
+        }
+        if catalog_ids
+        else {}
+    )
+    pp_ids = {tp.provider_product_id for tp in tenant_products if tp.provider_product_id}
+    provider_product_by_id = (
+        {
+            pp.id: pp
+            for pp in session.exec(
+                select(models.ProviderProduct).where(models.ProviderProduct.id.in_(pp_ids))
+            ).all()
+        }
+        if pp_ids
+        else {}
+    )
+    provider_ids = {pp.provider_id for pp in provider_product_by_id.values() if pp.image_filename}
+    provider_by_id = (
+        {
+            pr.id: pr
+            for pr in session.exec(
+                select(models.Provider).where(models.Provider.id.in_(provider_ids))
+            ).all()
+        }
+        if provider_ids
+        else {}
+    )
+    linked_product_by_id = (
+        {
+            lp.id: lp
+            for lp in session.exec(
+                select(models.Product).where(models.Product.id.in_(linked_legacy_product_ids))
+            ).all()
+        }
+        if linked_legacy_product_ids
+        else {}
+    )
+
+    # All translated fields of the menu in one lookup
+    translations: dict[tuple[str, int, str], str] = {}
+    if lang != "en":
+        keys: list[tuple[str, int, str]] = []
+        for tp in tenant_products:
+            keys += [("tenant_product", tp.id, "name"), ("tenant_product", tp.id, "ingredients")]
+            if tp.catalog_id is not None:
+                keys.append(("product_catalog", tp.catalog_id, "description"))
+        for lp in legacy_products:
+            keys += [("product", lp.id, "name"), ("product", lp.id, "ingredients")]
+        if tenant:
+            keys += [("tenant", tenant.id, f) for f in ("name", "description", "address")]
+        translations = TranslationService.get_translations_bulk(session, tenant_id, lang, keys)
+
     # Combine products from both sources
     products_list = []
 
@@ -12065,35 +11913,22 @@ def get_menu(
     for tp in tenant_products:
         # Get image from provider product if available, otherwise use tenant product image
         image_filename = tp.image_filename
-        provider_product = None
-        catalog_item = None
 
-        # Get catalog item for description
-        catalog_item = session.exec(
-            select(models.ProductCatalog).where(
-                models.ProductCatalog.id == tp.catalog_id
-            )
-        ).first()
+        # Catalog item for description
+        catalog_item = catalog_by_id.get(tp.catalog_id)
 
-        # Get provider product for detailed wine info
-        if tp.provider_product_id:
-            provider_product = session.exec(
-                select(models.ProviderProduct).where(
-                    models.ProviderProduct.id == tp.provider_product_id
+        # Provider product for detailed wine info
+        provider_product = (
+            provider_product_by_id.get(tp.provider_product_id) if tp.provider_product_id else None
+        )
+        if provider_product and provider_product.image_filename:
+            provider = provider_by_id.get(provider_product.provider_id)
+            if provider:
+                stored = provider_product_stored_image_path(
+                    provider.token, provider_product.image_filename
                 )
-            ).first()
-            if provider_product and provider_product.image_filename:
-                provider = session.exec(
-                    select(models.Provider).where(
-                        models.Provider.id == provider_product.provider_id
-                    )
-                ).first()
-                if provider:
-                    stored = provider_product_stored_image_path(
-                        provider.token, provider_product.image_filename
-                    )
-                    if stored:
-                        image_filename = stored
+                if stored:
+                    image_filename = stored
 
         # Build product data with detailed wine information
         product_data = {
@@ -12101,6 +11936,7 @@ def get_menu(
             "name": tp.name or "",
             "price_cents": tp.price_cents,
             "image_filename": image_filename,
+            "image_srcset": product_image_srcset(tp.tenant_id, image_filename),
             "tenant_id": tp.tenant_id,
             "ingredients": tp.ingredients,
             "_source": "tenant_product",  # Indicate this is from TenantProduct table
@@ -12108,33 +11944,19 @@ def get_menu(
 
         # Get the actual product record to check for customized description
         if tp.product_id:
-            custom_product = session.get(models.Product, tp.product_id)
+            custom_product = linked_product_by_id.get(tp.product_id)
             if custom_product and custom_product.description:
                 product_data["description"] = custom_product.description
 
         # Add translations for tenant product
         if lang != "en":  # Only add if different from default
-            display_name = TranslationService.get_translated_field(
-                session,
-                table.tenant_id,
-                "tenant_product",
-                tp.id,
-                "name",
-                lang,
-                tp.name or "",
-            )
+            display_name = translations.get(("tenant_product", tp.id, "name"), tp.name or "")
             if display_name != (tp.name or ""):
                 product_data["display_name"] = display_name
 
             if tp.ingredients:
-                display_ingredients = TranslationService.get_translated_field(
-                    session,
-                    table.tenant_id,
-                    "tenant_product",
-                    tp.id,
-                    "ingredients",
-                    lang,
-                    tp.ingredients,
+                display_ingredients = translations.get(
+                    ("tenant_product", tp.id, "ingredients"), tp.ingredients
                 )
                 if display_ingredients != tp.ingredients:
                     product_data["display_ingredients"] = display_ingredients
@@ -12154,13 +11976,8 @@ def get_menu(
 
                 # Add translated description if available
                 if lang != "en":
-                    display_description = TranslationService.get_translated_field(
-                        session,
-                        table.tenant_id,
-                        "product_catalog",
-                        catalog_item.id,
-                        "description",
-                        lang,
+                    display_description = translations.get(
+                        ("product_catalog", catalog_item.id, "description"),
                         catalog_item.description,
                     )
                     if display_description != catalog_item.description:
@@ -12329,6 +12146,7 @@ def get_menu(
             "price_cents": lp.price_cents,
             "description": lp.description,
             "image_filename": lp.image_filename,
+            "image_srcset": product_image_srcset(lp.tenant_id, lp.image_filename),
             "tenant_id": lp.tenant_id,
             "ingredients": lp.ingredients,
             "category": lp.category,
@@ -12338,21 +12156,13 @@ def get_menu(
 
         # Add translations for legacy product
         if lang != "en":
-            display_name = TranslationService.get_translated_field(
-                session, table.tenant_id, "product", lp.id, "name", lang, lp.name or ""
-            )
+            display_name = translations.get(("product", lp.id, "name"), lp.name or "")
             if display_name != (lp.name or ""):
                 product_data["display_name"] = display_name
 
             if lp.ingredients:
-                display_ingredients = TranslationService.get_translated_field(
-                    session,
-                    table.tenant_id,
-                    "product",
-                    lp.id,
-                    "ingredients",
-                    lang,
-                    lp.ingredients,
+                display_ingredients = translations.get(
+                    ("product", lp.id, "ingredients"), lp.ingredients
                 )
                 if display_ingredients != lp.ingredients:
                     product_data["display_ingredients"] = display_ingredients
@@ -12377,19 +12187,153 @@ def get_menu(
 
         products_list.append(product_data)
 
+    tenant_translations: dict[str, str] = {}
+    # Add translations for tenant fields if requested language differs from default
+    if tenant and lang != "en":
+        # Translate tenant name
+        display_name = translations.get(("tenant", tenant.id, "name"), tenant.name or "")
+        if display_name != (tenant.name or ""):
+            tenant_translations["display_tenant_name"] = display_name
+
+        # Translate tenant description
+        if tenant.description:
+            display_description = translations.get(
+                ("tenant", tenant.id, "description"), tenant.description
+            )
+            if display_description != tenant.description:
+                tenant_translations["display_tenant_description"] = display_description
+
+        # Translate tenant address
+        if tenant.address:
+            display_address = translations.get(("tenant", tenant.id, "address"), tenant.address)
+            if display_address != tenant.address:
+                tenant_translations["display_tenant_address"] = display_address
+
+    return {"products": products_list, "tenant_translations": tenant_translations}
+
+
+
+def _menu_tenant_fingerprint(tenant: models.Tenant | None) -> list | None:
+    """Tenant columns GET /menu/{table_token} returns outside the menu snapshot."""
+    if tenant is None:
+        return None
+    return [
+        tenant.name,
+        tenant.logo_filename,
+        tenant.header_background_filename,
+        tenant.description,
+        tenant.phone,
+        tenant.whatsapp,
+        tenant.address,
+        tenant.website,
+        tenant.currency_code,
+        tenant.currency,
+        tenant.stripe_publishable_key,
+        bool(tenant.revolut_merchant_secret and tenant.revolut_merchant_secret.strip()),
+        bool(settings.revolut_merchant_secret and settings.revolut_merchant_secret.strip()),
+        tenant.immediate_payment_required,
+        tenant.public_background_color,
+    ]
+
+
+@app.get("/menu/{table_token}")
+@limiter.limit(
+    f"{getattr(settings, 'rate_limit_public_menu_per_minute', 30)}/minute"
+)
+def get_menu(
+    request: Request,
+    table_token: str,
+    staff_access: str | None = Query(None, description="Staff link token: when valid, PIN is not required"),
+    lang: str = Depends(_get_requested_language),
+    session: Session = Depends(get_session),
+) -> dict:
+    """Public endpoint - get menu for a table by its token."""
+    if staff_access and not _verify_staff_menu_token(table_token, staff_access):
+        logger.warning("Menu staff_access token invalid or expired for table_token=%s", table_token[:8] + "...")
+    try:
+        table = resolve_table_token(session, table_token)
+    except Exception as e:
+        logger.exception("get_menu table lookup failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=api_error_payload("database_error", lang),
+        )
+
+    if not table:
+        logger.debug("get_menu: no table for token prefix=%s", table_token[:8] + "...")
+        raise HTTPException(status_code=404, detail=api_error_payload("table_not_found", lang))
+
+    if not table.is_active:
+        # Return tenant/table info so the frontend can show a branded "table closed" page
+        tenant = session.exec(
+            select(models.Tenant).where(models.Tenant.id == table.tenant_id)
+        ).first()
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "code": "TABLE_CLOSED",
+                "message": get_message("table_currently_closed", lang),
+                "table_name": table.name,
+                "tenant_name": tenant.name if tenant else None,
+                "tenant_logo": tenant.logo_filename if tenant else None,
+                "tenant_header_background_filename": tenant.header_background_filename if tenant else None,
+                "tenant_id": table.tenant_id,
+                "tenant_public_background_color": tenant.public_background_color if tenant else None,
+            },
+        )
+
+    tenant = session.get(models.Tenant, table.tenant_id)
+
+    # Customer-facing: only show products available today (within available_from..available_until)
+    try:
+        tz = ZoneInfo(tenant.timezone) if tenant and tenant.timezone else timezone.utc
+    except Exception:
+        tz = timezone.utc
+    today = datetime.now(tz).date()
     # Live promo prices for QR menu (#322)
-    eligible_promos = promo_svc.eligible_promos(
+    promos = promo_svc.promo_index(
         session,
         tenant_id=table.tenant_id,
         channel=models.OrderChannel.table.value,
     )
+    staff_link_ok = bool(staff_access and _verify_staff_menu_token(table_token, staff_access))
+    versions = menu_cache.menu_versions(session, table.tenant_id)
+    # Everything the response depends on; 304 before touching the snapshot
+    etag = make_etag(
+        "menu",
+        table.id,
+        table.name,
+        table.is_active,
+        table.has_pin,
+        table.active_order_id,
+        staff_link_ok,
+        lang,
+        today,
+        versions,
+        promos.promo_ids,
+        _menu_tenant_fingerprint(tenant),
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_CONTROL_REVALIDATE)
+
+    snapshot = menu_cache.get_menu_snapshot(
+        session,
+        table.tenant_id,
+        lang,
+        today,
+        lambda: _compile_menu_snapshot(session, table.tenant_id, tenant, lang, today),
+        versions=versions,
+    )
+    # Shallow copies: promo pricing below sets top-level keys only
+    products_list = [dict(p) for p in snapshot["products"]]
+
     for product_data in products_list:
         promo_svc.decorate_menu_product(
             session,
             tenant_id=table.tenant_id,
             product=product_data,
             channel=models.OrderChannel.table.value,
-            eligible=eligible_promos,
+            index=promos,
         )
 
     # Build tenant response data
@@ -12417,57 +12361,26 @@ def get_menu(
         else None,
         "tenant_revolut_configured": bool(
             tenant
-            and (
-                (tenant.revolut_merchant_secret and tenant.revolut_merchant_secret.strip())
-                or (settings.revolut_merchant_secret and settings.revolut_merchant_secret.strip())
-            )
-        ),
-        "tenant_immediate_payment_required": tenant.immediate_payment_required
-        if tenant
-        else False,
-        "tenant_public_background_color": tenant.public_background_color if tenant else None,
-        # Table session status (take-away/home ordering tables do not require PIN; staff_access also skips PIN)
-        "table_is_active": table.is_active,
-        "table_requires_pin": False
-        if _is_take_away_table(table)
-        or (staff_access and _verify_staff_menu_token(table.token, staff_access))
-        else (table.is_active and table.order_pin is not None),
-        "active_order_id": table.active_order_id,
-        "products": products_list,
-    }
-
-    # Add translations for tenant fields if requested language differs from default
-    if tenant and lang != "en":
-        # Translate tenant name
-        display_name = TranslationService.get_translated_field(
-            session, tenant.id, "tenant", tenant.id, "name", lang, tenant.name or ""
-        )
-        if display_name != (tenant.name or ""):
-            tenant_data["display_tenant_name"] = display_name
-
-        # Translate tenant description
-        if tenant.description:
-            display_description = TranslationService.get_translated_field(
-                session,
-                tenant.id,
-                "tenant",
-                tenant.id,
-                "description",
-                lang,
-                tenant.description,
-            )
-            if display_description != tenant.description:
-                tenant_data["display_tenant_description"] = display_description
-
-        # Translate tenant address
-        if tenant.address:
-            display_address = TranslationService.get_translated_field(
-                session, tenant.id, "tenant", tenant.id, "address", lang, tenant.address
+            and (
+                (tenant.revolut_merchant_secret and tenant.revolut_merchant_secret.strip())
+                or (settings.revolut_merchant_secret and settings.revolut_merchant_secret.strip())
             )
-            if display_address != tenant.address:
-                tenant_data["display_tenant_address"] = display_address
+        ),
+        "tenant_immediate_payment_required": tenant.immediate_payment_required
+        if tenant
+        else False,
+        "tenant_public_background_color": tenant.public_background_color if tenant else None,
+        # Table session status (take-away/home ordering tables do not require PIN; staff_access also skips PIN)
+        "table_is_active": table.is_active,
+        "table_requires_pin": False
+        if table.is_take_away or staff_link_ok
+        else (table.is_active and table.has_pin),
+        "active_order_id": table.active_order_id,
+        "products": products_list,
+    }
+    tenant_data.update(snapshot["tenant_translations"])
 
-    return JSONResponse(content=tenant_data)
+    return cached_json(tenant_data, etag, CACHE_CONTROL_REVALIDATE)
 
 
 @app.get("/menu/{table_token}/order")
@@ -12481,9 +12394,7 @@ def get_current_order(
     session: Session = Depends(get_session),
 ) -> dict:
     """Public endpoint - get current active order for a table (if any)."""
-    table = session.exec(
-        select(models.Table).where(models.Table.token == table_token)
-    ).first()
+    table = resolve_table_token(session, table_token)
 
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
@@ -12601,9 +12512,7 @@ def get_table_order_history(
     session: Session = Depends(get_session),
 ) -> list[dict]:
     """Public endpoint - recent paid/completed orders for this table (for customer order history)."""
-    table = session.exec(
-        select(models.Table).where(models.Table.token == table_token)
-    ).first()
+    table = resolve_table_token(session, table_token)
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
 
@@ -12618,15 +12527,29 @@ def get_table_order_history(
         .limit(limit)
     ).all()
 
-    result = []
-    for order in orders:
-        items = session.exec(
-            select(models.OrderItem).where(
-                models.OrderItem.order_id == order.id,
+    order_ids = [o.id for o in orders if o.id is not None]
+    items_by_order: dict[int, list[models.OrderItem]] = {}
+    if order_ids:
+        for item in session.exec(
+            select(models.OrderItem)
+            .where(
+                models.OrderItem.order_id.in_(order_ids),
                 models.OrderItem.removed_by_customer == False,
             )
-        ).all()
-        total_cents = sum(item.price_cents * item.quantity for item in items)
+            .order_by(models.OrderItem.id.asc())
+        ).all():
+            items_by_order.setdefault(item.order_id, []).append(item)
+    summary_by_order = order_summary_svc.summaries_by_order_id(session, order_ids)
+
+    result = []
+    for order in orders:
+        items = items_by_order.get(order.id, [])
+        summary = summary_by_order.get(order.id)
+        total_cents = (
+            summary.total_cents
+            if summary is not None
+            else order_summary_svc.build_summary_values(order, items, 0)["total_cents"]
+        )
         result.append({
             "id": order.id,
             "status": order.status.value,
@@ -12799,16 +12722,25 @@ def create_order(
     session: Session = Depends(get_session),
 ) -> dict:
     """Public endpoint - add items to the table's shared order."""
-    table = session.exec(
-        select(models.Table).where(models.Table.token == table_token)
-    ).first()
+    table_ref = resolve_table_token(session, table_token)
 
-    if not table:
+    if not table_ref:
         raise HTTPException(status_code=404, detail="Table not found")
 
     if not order_data.items:
         raise HTTPException(status_code=400, detail="Order must have at least one item")
 
+    if not table_ref.is_active:
+        raise HTTPException(
+            status_code=403,
+            detail="Table is not accepting orders. Please ask staff to activate the table."
+        )
+
+    # The row itself: PIN check and shared-order updates below (also re-checks is_active)
+    table = session.get(models.Table, table_ref.id)
+    if not table or table.token != table_token:
+        raise HTTPException(status_code=404, detail="Table not found")
+
     # Get tenant for location verification
     tenant = session.get(models.Tenant, table.tenant_id)
 
@@ -13180,7 +13112,16 @@ def create_order(
     all_items = session.exec(select(models.OrderItem).where(models.OrderItem.order_id == order.id)).all()
     recompute_order_status_preserving_payment(order, list(all_items))
     logger.debug("Recomputed order status from items: %s", order.status.value)
-    
+
+    # Real-time notification commits with the order
+    publish_order_update(table.tenant_id, {
+        "type": "new_order" if is_new_order else "items_added",
+        "order_id": order.id,
+        "table_name": table.name,
+        "status": order.status.value,
+        "created_at": order.created_at.isoformat()
+    }, table_id=table.id, session=session)
+
     session.commit()
     session.refresh(order)
 
@@ -13195,15 +13136,6 @@ def create_order(
             # Log but don't fail the order - inventory can go negative
             logger.warning(f"Inventory deduction warning for order #{order.id}: {e}")
 
-    # Publish to Redis for real-time updates
-    publish_order_update(table.tenant_id, {
-        "type": "new_order" if is_new_order else "items_added",
-        "order_id": order.id,
-        "table_name": table.name,
-        "status": order.status.value,
-        "created_at": order.created_at.isoformat()
-    }, table_id=table.id)
-
     return JSONResponse(content={
         "status": "created" if is_new_order else "updated",
         "order_id": order.id,
@@ -13235,9 +13167,7 @@ def request_payment(
     Public endpoint - customer requests payment via cash or card terminal.
     Notifies staff via WebSocket so they can come to the table.
     """
-    table = session.exec(
-        select(models.Table).where(models.Table.token == table_token)
-    ).first()
+    table = resolve_table_token(session, table_token)
 
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
@@ -13262,7 +13192,7 @@ def request_payment(
     if payment_request.message:
         order.notes = f"{order.notes or ''}\n[CUSTOMER NOTE] {payment_request.message}".strip()
 
-    session.commit()
+    session.flush()
     session.refresh(order)
 
     # Resolve assigned waiter (table-level, then floor-level fallback)
@@ -13287,7 +13217,8 @@ def request_payment(
         "message": payment_request.message,
         "assigned_waiter_id": effective_waiter_id,
         "assigned_waiter_name": effective_waiter_name,
-    }, table_id=table.id)
+    }, table_id=table.id, session=session)
+    session.commit()
 
     return JSONResponse(content={
         "status": "payment_requested",
@@ -13314,9 +13245,7 @@ def call_waiter(
     Public endpoint - customer requests a waiter to come to the table.
     Sends a real-time notification to staff via WebSocket.
     """
-    table = session.exec(
-        select(models.Table).where(models.Table.token == table_token)
-    ).first()
+    table = resolve_table_token(session, table_token)
 
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
@@ -13509,43 +13438,6 @@ def _resolve_tip_on_mark_paid(
     return tp, amt
 
 
-def compute_order_status_from_items(items: list[models.OrderItem]) -> models.OrderStatus:
-    """Compute order status from item statuses (single source of truth)."""
-    if not items:
-        return models.OrderStatus.pending
-    
-    # Filter out removed items for status computation (removed by customer OR staff)
-    active_items = [item for item in items if not item.removed_by_customer and item.removed_by_user_id is None]
-    if not active_items:
-        return models.OrderStatus.cancelled
-    
-    # Check if all items are delivered
-    all_delivered = all(item.status == models.OrderItemStatus.delivered for item in active_items)
-    if all_delivered:
-        return models.OrderStatus.completed
-    
-    # Check if some items are delivered (partial delivery)
-    any_delivered = any(item.status == models.OrderItemStatus.delivered for item in active_items)
-    if any_delivered:
-        return models.OrderStatus.partially_delivered
-    
-    # Check if all items are ready
-    all_ready = all(item.status == models.OrderItemStatus.ready for item in active_items)
-    if all_ready:
-        return models.OrderStatus.ready
-    
-    # Check if any item is preparing or ready
-    any_preparing_or_ready = any(
-        item.status in [models.OrderItemStatus.preparing, models.OrderItemStatus.ready] 
-        for item in active_items
-    )
-    if any_preparing_or_ready:
-        return models.OrderStatus.preparing
-    
-    # All items are pending
-    return models.OrderStatus.pending
-
-
 def recompute_order_status_preserving_payment(
     order: models.Order,
     items: list[models.OrderItem],
@@ -13781,119 +13673,159 @@ def update_order_delivery(
     }
 
 
-@app.get("/orders")
-def list_orders(
-    current_user: Annotated[models.User, Depends(require_permission(Permission.ORDER_READ))],
-    include_removed: bool = Query(False, description="Include removed items in response"),
-    session: Session = Depends(get_session)
+def _order_has_active_items_clause():
+    """SQL EXISTS: order has at least one line not removed and not cancelled."""
+    return (
+        select(models.OrderItem.id)
+        .where(
+            models.OrderItem.order_id == models.Order.id,
+            models.OrderItem.removed_by_customer == False,  # noqa: E712
+            models.OrderItem.removed_by_user_id.is_(None),
+            models.OrderItem.status != models.OrderItemStatus.cancelled,
+        )
+        .exists()
+    )
+
+
+def _serialize_staff_order_rows(
+    session: Session,
+    tenant_id: int,
+    orders: list[models.Order],
+    *,
+    include_removed: bool,
 ) -> list[dict]:
-    orders = session.exec(
-        select(models.Order)
-        .where(models.Order.tenant_id == current_user.tenant_id)
-        .where(models.Order.deleted_at.is_(None))
-        .order_by(models.Order.created_at.desc())
-    ).all()
+    """
+    Staff order list rows (GET /orders, GET /orders/v2).
+
+    Related rows (items, tables, products, billing customers, table-group members,
+    payments, hub fulfillments) are loaded with one ``IN`` query per relation, so the
+    cost depends on ``len(orders)`` only through row counts, not query counts.
+    Orders without active items are skipped (empty orders are not listed).
+    """
+    order_ids = [o.id for o in orders if o.id is not None]
+    if not order_ids:
+        return []
 
-    tenant_row = session.get(models.Tenant, current_user.tenant_id)
+    tenant_row = session.get(models.Tenant, tenant_id)
     station_rows = session.exec(
-        select(models.KitchenStation).where(
-            models.KitchenStation.tenant_id == current_user.tenant_id
-        )
+        select(models.KitchenStation).where(models.KitchenStation.tenant_id == tenant_id)
     ).all()
     station_by_id = {s.id: s for s in station_rows if s.id is not None}
 
-    hub_by_order = hub_ff.fulfillments_by_order_ids(
-        session, [o.id for o in orders if o.id is not None]
-    )
-    group_for_user = rg.get_group_for_tenant(session, current_user.tenant_id)
+    all_item_rows = session.exec(
+        select(models.OrderItem)
+        .where(models.OrderItem.order_id.in_(order_ids))
+        .order_by(models.OrderItem.id.asc())
+    ).all()
+    items_by_order: dict[int, list[models.OrderItem]] = {}
+    for oi in all_item_rows:
+        items_by_order.setdefault(oi.order_id, []).append(oi)
+
+    table_ids = {o.table_id for o in orders if o.table_id is not None}
+    table_by_id: dict[int, models.Table] = {}
+    if table_ids:
+        table_by_id = {
+            t.id: t
+            for t in session.exec(
+                select(models.Table).where(models.Table.id.in_(table_ids))
+            ).all()
+        }
+    group_ids = {t.table_group_id for t in table_by_id.values() if t.table_group_id}
+    group_label_by_id: dict[int, str] = {}
+    if group_ids:
+        members_by_group: dict[int, list[str]] = {}
+        for m in session.exec(
+            select(models.Table).where(
+                models.Table.tenant_id == tenant_id,
+                models.Table.table_group_id.in_(group_ids),
+            )
+        ).all():
+            members_by_group.setdefault(m.table_group_id, []).append(m.name or "")
+        group_label_by_id = {
+            gid: " + ".join(sorted(names)) for gid, names in members_by_group.items() if names
+        }
+
+    product_ids = {oi.product_id for oi in all_item_rows}
+    product_map: dict[int, models.Product] = {}
+    if product_ids:
+        product_map = {
+            p.id: p
+            for p in session.exec(
+                select(models.Product).where(models.Product.id.in_(product_ids))
+            ).all()
+        }
+
+    bc_ids = {o.billing_customer_id for o in orders if o.billing_customer_id}
+    bc_by_id: dict[int, models.BillingCustomer] = {}
+    if bc_ids:
+        bc_by_id = {
+            bc.id: bc
+            for bc in session.exec(
+                select(models.BillingCustomer).where(
+                    models.BillingCustomer.id.in_(bc_ids),
+                    models.BillingCustomer.tenant_id == tenant_id,
+                )
+            ).all()
+        }
+
+    hub_by_order = hub_ff.fulfillments_by_order_ids(session, order_ids)
+    group_for_user = rg.get_group_for_tenant(session, tenant_id)
     can_request_hub = bool(
         group_for_user
         and group_for_user.hub_tenant_id
-        and group_for_user.hub_tenant_id != current_user.tenant_id
+        and group_for_user.hub_tenant_id != tenant_id
+    )
+    recon_by_order = order_pay_svc.reconciliation_dicts_for_orders(
+        session, orders, items_by_order
     )
+    summary_by_order = order_summary_svc.summaries_by_order_id(session, order_ids)
 
     result = []
     for order in orders:
-        table = session.exec(select(models.Table).where(models.Table.id == order.table_id)).first()
-        
-        # Get items, optionally including removed ones
+        if order.id is None:
+            continue
+        all_items = items_by_order.get(order.id, [])
+        table = table_by_id.get(order.table_id) if order.table_id is not None else None
+
         if include_removed:
-            items = session.exec(
-                select(models.OrderItem)
-                .where(models.OrderItem.order_id == order.id)
-                .order_by(models.OrderItem.removed_by_customer.asc(), models.OrderItem.id.asc())
-            ).all()
+            items = sorted(all_items, key=lambda i: (bool(i.removed_by_customer), i.id or 0))
         else:
-            items = session.exec(
-                select(models.OrderItem)
-                .where(
-                    models.OrderItem.order_id == order.id,
-                    models.OrderItem.removed_by_customer == False
-                )
-            ).all()
-        
-        # Display status from items; paid + fully delivered → completed for Active/History (#345)
-        status_items = session.exec(
-            select(models.OrderItem).where(models.OrderItem.order_id == order.id)
-        ).all()
-        if order.status == models.OrderStatus.cancelled:
-            computed_status = models.OrderStatus.cancelled
-        elif order.status == models.OrderStatus.out_for_delivery:
-            computed_status = models.OrderStatus.out_for_delivery
-        elif order.paid_at is not None or order.status == models.OrderStatus.paid:
-            item_status = compute_order_status_from_items(list(status_items))
-            computed_status = (
-                models.OrderStatus.completed
-                if item_status == models.OrderStatus.completed
-                else models.OrderStatus.paid
+            items = [i for i in all_items if not i.removed_by_customer]
+
+        # Status and totals from order_summary; recompute only if the row is missing
+        summary = summary_by_order.get(order.id)
+        if summary is None:
+            summary = models.OrderSummary(
+                order_id=order.id,
+                **order_summary_svc.build_summary_values(
+                    order, all_items, sum(p["amount_cents"] for p in recon_by_order[order.id]["payments"])
+                ),
             )
-        else:
-            computed_status = compute_order_status_from_items(list(status_items))
-        
-        # Get all items for removed count calculation
-        all_items = session.exec(select(models.OrderItem).where(models.OrderItem.order_id == order.id)).all()
-        
-        # Calculate total from active items only (exclude items removed by customer OR staff, and cancelled)
-        active_items = [
-            item for item in all_items
-            if not item.removed_by_customer and item.removed_by_user_id is None and item.status != models.OrderItemStatus.cancelled
-        ]
         # Do not list orders that have no products (empty orders are not allowed)
-        if len(active_items) == 0:
+        if summary.active_item_count == 0:
             continue
-        subtotal_cents = sum(item.price_cents * item.quantity for item in active_items)
-        tip_amt = int(order.tip_amount_cents or 0)
-        loyalty_discount = order_level_discount_cents(order)
-        total_cents = max(0, subtotal_cents - loyalty_discount) + tip_amt
-
-        # Product categories for kitchen/bar display filtering (one query per order)
-        product_ids = list({i.product_id for i in items})
-        product_map = {}
-        if product_ids:
-            products = session.exec(
-                select(models.Product).where(models.Product.id.in_(product_ids))
-            ).all()
-            product_map = {p.id: p for p in products}
+        subtotal_cents = summary.subtotal_cents
+        loyalty_discount = summary.loyalty_discount_cents
+        total_cents = summary.total_cents
 
         # Billing customer for Factura (if set)
         billing_customer = None
-        if order.billing_customer_id:
-            bc = session.get(models.BillingCustomer, order.billing_customer_id)
-            if bc and bc.tenant_id == current_user.tenant_id:
-                billing_customer = {
-                    "id": bc.id,
-                    "name": bc.name,
-                    "company_name": bc.company_name,
-                    "tax_id": bc.tax_id,
-                    "address": bc.address,
-                    "email": bc.email,
-                    "phone": bc.phone,
-                    "birth_date": bc.birth_date.isoformat() if bc.birth_date else None,
-                }
+        bc = bc_by_id.get(order.billing_customer_id) if order.billing_customer_id else None
+        if bc:
+            billing_customer = {
+                "id": bc.id,
+                "name": bc.name,
+                "company_name": bc.company_name,
+                "tax_id": bc.tax_id,
+                "address": bc.address,
+                "email": bc.email,
+                "phone": bc.phone,
+                "birth_date": bc.birth_date.isoformat() if bc.birth_date else None,
+            }
 
         order_items_json: list[dict] = []
         for oi in items:
-            prod = product_map.get(oi.product_id) if product_map else None
+            prod = product_map.get(oi.product_id)
             if tenant_row:
                 kid, knm, krt = resolve_order_item_kds(prod, tenant_row, station_by_id)
             else:
@@ -13916,7 +13848,7 @@ def list_orders(
                     "tax_id": getattr(oi, "tax_id", None),
                     "tax_rate_percent": getattr(oi, "tax_rate_percent", None),
                     "tax_amount_cents": getattr(oi, "tax_amount_cents", None),
-                    "category": getattr(product_map.get(oi.product_id), "category", None),
+                    "category": getattr(prod, "category", None),
                     "kitchen_station_id": kid,
                     "kitchen_station_name": knm,
                     "kitchen_station_route": krt,
@@ -13924,8 +13856,8 @@ def list_orders(
             )
 
         tg_label = None
-        if table:
-            tg_label = _table_group_display_label(session, current_user.tenant_id, table)
+        if table and table.table_group_id:
+            tg_label = group_label_by_id.get(table.table_group_id)
 
         channel = _order_channel_value(order)
         table_display = "Unknown"
@@ -13938,10 +13870,11 @@ def list_orders(
 
         row_out = {
             "id": order.id,
+            "version": order.change_seq,
             "table_name": table_display,
             "table_id": table.id if table else None,
             "table_token": table.token if table else None,
-            "status": computed_status.value,
+            "status": summary.status,
             "notes": order.notes,
             "session_id": order.session_id,
             "customer_name": order.customer_name,
@@ -13966,24 +13899,184 @@ def list_orders(
             "tip_amount_cents": getattr(order, "tip_amount_cents", None),
             "tip_attributed_user_id": getattr(order, "tip_attributed_user_id", None),
             "total_cents": total_cents,
-            "removed_items_count": len([item for item in all_items if item.removed_by_customer]),
+            "removed_items_count": summary.removed_items_count,
             "can_request_hub_fulfillment": can_request_hub and order.id not in hub_by_order,
         }
-        recon = order_pay_svc.reconciliation_dict(session, order)
+        recon = recon_by_order[order.id]
         row_out["amount_due_cents"] = recon["amount_due_cents"]
         row_out["amount_paid_cents"] = recon["amount_paid_cents"]
         row_out["amount_remaining_cents"] = recon["amount_remaining_cents"]
         row_out["payments"] = recon["payments"]
         if tg_label:
             row_out["table_group_label"] = tg_label
-        ff = hub_by_order.get(order.id) if order.id is not None else None
+        ff = hub_by_order.get(order.id)
         if ff:
             row_out["hub_fulfillment"] = hub_ff.fulfillment_to_dict(ff)
         result.append(row_out)
-    
+
     return result
 
 
+@app.get("/orders")
+def list_orders(
+    current_user: Annotated[models.User, Depends(require_permission(Permission.ORDER_READ))],
+    include_removed: bool = Query(False, description="Include removed items in response"),
+    session: Session = Depends(get_session)
+) -> list[dict]:
+    orders = session.exec(
+        select(models.Order)
+        .where(models.Order.tenant_id == current_user.tenant_id)
+        .where(models.Order.deleted_at.is_(None))
+        .order_by(models.Order.created_at.desc())
+    ).all()
+    return _serialize_staff_order_rows(
+        session, current_user.tenant_id, list(orders), include_removed=include_removed
+    )
+
+
+ORDERS_PAGE_DEFAULT_LIMIT = 50
+ORDERS_PAGE_MAX_LIMIT = 200
+# Stored order.status values that are out of the Active Orders view (#345)
+_ORDER_INACTIVE_STATUSES = (models.OrderStatus.completed, models.OrderStatus.cancelled)
+
+
+def _encode_orders_cursor(order: models.Order) -> str:
+    raw = json.dumps([order.created_at.isoformat(), order.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_orders_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, order_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created = datetime.fromisoformat(created_raw)
+        return created, int(order_id)
+    except (ValueError, TypeError, UnicodeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/orders/v2")
+def list_orders_page(
+    current_user: Annotated[models.User, Depends(require_permission(Permission.ORDER_READ))],
+    include_removed: bool = Query(False, description="Include removed items in response"),
+    limit: int = Query(ORDERS_PAGE_DEFAULT_LIMIT, ge=1, le=ORDERS_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(None, description="Opaque next_cursor from the previous page"),
+    status: list[models.OrderStatus] | None = Query(
+        None, description="Stored order status (repeatable)"
+    ),
+    channel: models.OrderChannel | None = Query(None),
+    created_since: datetime | None = Query(None),
+    paid_since: datetime | None = Query(None),
+    table_id: int | None = Query(None),
+    active_only: bool = Query(False, description="Exclude completed and cancelled orders"),
+    session: Session = Depends(get_session),
+) -> dict:
+    """
+    Paginated staff order list, newest first (keyset on created_at, id).
+
+    Rows have the same shape as GET /orders; filters run in SQL and related rows are
+    batch-loaded per page, so latency depends on ``limit`` rather than order history.
+    """
+    stmt = (
+        select(models.Order)
+        .where(models.Order.tenant_id == current_user.tenant_id)
+        .where(models.Order.deleted_at.is_(None))
+        .where(_order_has_active_items_clause())
+    )
+    if status:
+        stmt = stmt.where(models.Order.status.in_(status))
+    if active_only:
+        stmt = stmt.where(models.Order.status.not_in(_ORDER_INACTIVE_STATUSES))
+    if channel is not None:
+        stmt = stmt.where(models.Order.order_channel == channel)
+    if created_since is not None:
+        stmt = stmt.where(models.Order.created_at >= created_since)
+    if paid_since is not None:
+        stmt = stmt.where(models.Order.paid_at >= paid_since)
+    if table_id is not None:
+        stmt = stmt.where(models.Order.table_id == table_id)
+    if cursor:
+        c_created, c_id = _decode_orders_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                models.Order.created_at < c_created,
+                and_(models.Order.created_at == c_created, models.Order.id < c_id),
+            )
+        )
+    stmt = stmt.order_by(models.Order.created_at.desc(), models.Order.id.desc()).limit(limit + 1)
+    orders = list(session.exec(stmt).all())
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    return {
+        "orders": _serialize_staff_order_rows(
+            session, current_user.tenant_id, orders, include_removed=include_removed
+        ),
+        "next_cursor": _encode_orders_cursor(orders[-1]) if has_more and orders else None,
+    }
+
+
+ORDER_CHANGES_MAX_LIMIT = 500
+
+
+@app.get("/orders/changes")
+def list_order_changes(
+    current_user: Annotated[models.User, Depends(require_permission(Permission.ORDER_READ))],
+    cursor: int | None = Query(
+        None, ge=0, description="Cursor from the previous response; omit for a snapshot"
+    ),
+    view: str = Query("full", pattern="^(full|kds)$"),
+    limit: int = Query(200, ge=1, le=ORDER_CHANGES_MAX_LIMIT),
+    session: Session = Depends(get_session),
+) -> dict:
+    """
+    Incremental staff order feed (kitchen / bar displays, order lists).
+
+    Without ``cursor`` (or with a cursor ahead of the server, e.g. after a DB reset) the
+    response is a snapshot of active orders. With ``cursor`` only orders written since
+    then are returned; orders that left the view (deleted, finished, emptied, or with no
+    open items for ``view=kds``) are listed in ``removed_order_ids``. Clients store the
+    returned ``cursor`` and poll again immediately while ``has_more`` is true.
+    """
+    tenant_id = current_user.tenant_id
+    # Read the watermark before the rows: anything committed in between is re-sent next time.
+    watermark = order_change_feed.feed_watermark(session)
+    snapshot = cursor is None or cursor > watermark
+    if snapshot:
+        orders = list(
+            session.exec(
+                select(models.Order)
+                .where(models.Order.tenant_id == tenant_id)
+                .where(models.Order.deleted_at.is_(None))
+                .where(models.Order.status.not_in(_ORDER_INACTIVE_STATUSES))
+                .where(_order_has_active_items_clause())
+                .order_by(models.Order.created_at.desc())
+            ).all()
+        )
+        has_more = False
+        next_cursor = watermark
+    else:
+        orders, next_cursor, has_more = order_change_feed.orders_changed_since(
+            session, tenant_id, cursor, watermark, limit
+        )
+
+    live = [o for o in orders if o.deleted_at is None]
+    rows = _serialize_staff_order_rows(session, tenant_id, live, include_removed=False)
+    if view == "kds":
+        rows = [p for p in (order_change_feed.kds_order_projection(r) for r in rows) if p]
+    else:
+        rows = [r for r in rows if r["status"] not in ("completed", "cancelled")]
+    kept = {r["id"] for r in rows}
+    return {
+        "cursor": next_cursor,
+        "snapshot": snapshot,
+        "has_more": has_more,
+        "orders": rows,
+        "removed_order_ids": (
+            [] if snapshot else [o.id for o in orders if o.id is not None and o.id not in kept]
+        ),
+    }
+
+
 @app.put("/orders/{order_id}/status")
 def update_order_status(
     order_id: int,
@@ -14038,7 +14131,7 @@ def update_order_status(
                     session.add(item)
     
     session.add(order)
-    session.commit()
+    session.flush()
 
     # Publish status update
     table = session.exec(select(models.Table).where(models.Table.id == order.table_id)).first()
@@ -14047,7 +14140,8 @@ def update_order_status(
         "order_id": order.id,
         "table_name": table.name if table else "Unknown",
         "status": order.status.value
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
     
     return {"status": "updated", "order_id": order.id, "new_status": order.status.value}
 
@@ -14433,7 +14527,7 @@ def unmark_order_paid(
     order_pay_svc.void_all_payments(session, order_id)
 
     session.add(order)
-    session.commit()
+    session.flush()
 
     table = session.exec(select(models.Table).where(models.Table.id == order.table_id)).first()
     publish_order_update(current_user.tenant_id, {
@@ -14441,7 +14535,8 @@ def unmark_order_paid(
         "order_id": order.id,
         "table_name": table.name if table else "Unknown",
         "status": order.status.value
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
 
     return {"status": "unmarked", "order_id": order.id, "new_status": order.status.value}
 
@@ -14679,7 +14774,7 @@ def set_order_staff_urgent(
 
     order.staff_urgent = bool(body.urgent)
     session.add(order)
-    session.commit()
+    session.flush()
 
     table = session.exec(
         select(models.Table).where(models.Table.id == order.table_id)
@@ -14693,7 +14788,9 @@ def set_order_staff_urgent(
             "table_name": table.name if table else None,
         },
         table_id=order.table_id,
+        session=session,
     )
+    session.commit()
     return {"order_id": order.id, "staff_urgent": order.staff_urgent}
 
 
@@ -15039,7 +15136,7 @@ def update_order_item_status(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Publish update
     table = session.exec(select(models.Table).where(models.Table.id == order.table_id)).first()
@@ -15051,7 +15148,8 @@ def update_order_item_status(
         "new_status": item.status.value,
         "status": order.status.value if hasattr(order.status, 'value') else str(order.status),  # Include computed order status
         "table_name": table.name if table else "Unknown"
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
     
     return {
         "status": "updated",
@@ -15110,7 +15208,7 @@ def reset_item_status(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Publish update
     table = session.exec(select(models.Table).where(models.Table.id == order.table_id)).first()
@@ -15122,7 +15220,8 @@ def reset_item_status(
         "new_status": item.status.value,
         "status": order.status.value,
         "table_name": table.name if table else "Unknown"
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
     
     return {
         "status": "reset",
@@ -15190,7 +15289,7 @@ def cancel_order_item_staff(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Calculate new total
     active_items = [i for i in all_items if not i.removed_by_customer and i.removed_by_user_id is None]
@@ -15205,7 +15304,8 @@ def cancel_order_item_staff(
         "cancelled_by": "staff",
         "table_name": table.name if table else "Unknown",
         "new_total_cents": new_total
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
     
     return {
         "status": "item_cancelled",
@@ -15281,7 +15381,7 @@ def update_order_item_staff(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Calculate new total
     active_items = [i for i in all_items if not i.removed_by_customer and i.removed_by_user_id is None]
@@ -15296,7 +15396,8 @@ def update_order_item_staff(
         "new_quantity": item.quantity,
         "table_name": table.name if table else "Unknown",
         "new_total_cents": new_total
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
     
     return {
         "status": "item_updated",
@@ -15360,7 +15461,7 @@ def remove_order_item_staff(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Calculate new total
     active_items = [i for i in all_items if not i.removed_by_customer and i.removed_by_user_id is None]
@@ -15375,7 +15476,8 @@ def remove_order_item_staff(
         "removed_by": "staff",
         "table_name": table.name if table else "Unknown",
         "new_total_cents": new_total
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
     
     return {
         "status": "item_removed",
@@ -15455,7 +15557,7 @@ def remove_order_item(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Calculate new total (exclude removed items)
     active_items = [i for i in all_items if not i.removed_by_customer]
@@ -15468,7 +15570,8 @@ def remove_order_item(
         "item_id": item.id,
         "table_name": table.name,
         "new_total_cents": new_total
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
 
     return JSONResponse(content={
         "status": "item_removed",
@@ -15549,7 +15652,7 @@ def update_order_item_quantity(
     recompute_order_status_preserving_payment(order, list(all_items))
     
     session.add(order)
-    session.commit()
+    session.flush()
     
     # Calculate new total (exclude items removed by customer OR staff)
     active_items = [i for i in all_items if not i.removed_by_customer and i.removed_by_user_id is None]
@@ -15563,7 +15666,8 @@ def update_order_item_quantity(
         "new_quantity": item.quantity,
         "table_name": table.name,
         "new_total_cents": new_total
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
 
     return JSONResponse(content={
         "status": "item_updated",
@@ -15638,7 +15742,7 @@ def cancel_order(
         table.active_order_id = None
         session.add(table)
 
-    session.commit()
+    session.flush()
 
     # Publish update
     publish_order_update(order.tenant_id, {
@@ -15646,7 +15750,8 @@ def cancel_order(
         "order_id": order.id,
         "table_name": table.name,
         "cancelled_items": len(items)
-    }, table_id=order.table_id)
+    }, table_id=order.table_id, session=session)
+    session.commit()
 
     return JSONResponse(content={
         "status": "order_cancelled",
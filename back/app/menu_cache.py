@@ -0,0 +1,229 @@
+"""
+Compiled customer menu snapshots (GET /menu/{table_token}).
+
+The product list and tenant translations of the public menu only change with the menu
+data, so they are compiled once per (tenant, language, local date) and reused while the
+menu version is unchanged. A flush hook bumps ``menu_version`` for the tenant on writes
+to its products, catalog links, questions, translations, promotions, taxes or tenant
+name / description / address. Writes to the shared catalog, provider products and
+providers bump the tenants whose catalog links reference the changed rows. Global
+translations bump the global row (``tenant_id = 0``), which is part of every key, after
+the writing transaction commits so writers never queue on that one row. Snapshots live
+in a small in-process LRU per worker.
+
+Live promo prices (time-of-day windows) and table state (PIN, active order) are applied
+per request on a copy of the snapshot.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from itertools import chain
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import event, inspect, or_, text
+from sqlmodel import Session, select
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_MENU_SCOPE = 0
+MENU_CACHE_MAX_ENTRIES = 512
+
+_TENANT_SCOPED = (
+    models.Product,
+    models.TenantProduct,
+    models.ProductQuestion,
+    models.PricePromotion,
+    models.Tax,
+)
+_CATALOG_SCOPED = (models.ProductCatalog, models.ProviderProduct, models.Provider)
+# Tenant columns the snapshot reads (translation fallbacks); other settings are per request
+_TENANT_MENU_FIELDS = ("name", "description", "address")
+
+_BUMP_SQL = text(
+    """
+    INSERT INTO menu_version (tenant_id, version) VALUES (:tid, 1)
+    ON CONFLICT (tenant_id) DO UPDATE SET version = menu_version.version + 1
+    """
+)
+
+# Set while a transaction has bumped a version: what it reads is not visible to others yet
+_UNCOMMITTED_KEY = "menu_version_bumped"
+# Set while a transaction wrote global translations: bump the global row once it commits
+_GLOBAL_PENDING_KEY = "menu_version_global_pending"
+
+_lock = threading.Lock()
+_snapshots: "OrderedDict[tuple[int, str, str], tuple[tuple[int, int], dict[str, Any]]]" = OrderedDict()
+
+
+def _tenant_menu_fields_changed(tenant: models.Tenant) -> bool:
+    attrs = inspect(tenant).attrs
+    return any(attrs[name].history.has_changes() for name in _TENANT_MENU_FIELDS)
+
+
+def _menu_scope(obj: object) -> int | None:
+    if isinstance(obj, models.Tenant):
+        return obj.id
+    if isinstance(obj, _TENANT_SCOPED):
+        return obj.tenant_id
+    if isinstance(obj, models.I18nText):
+        return obj.tenant_id if obj.tenant_id is not None else GLOBAL_MENU_SCOPE
+    return None
+
+
+def catalog_menu_scopes(
+    session: Session,
+    catalog_ids: Iterable[int] = (),
+    provider_product_ids: Iterable[int] = (),
+    provider_ids: Iterable[int] = (),
+) -> set[int]:
+    """Tenants whose catalog links reference the given catalog items, provider products or providers."""
+    catalog_ids, provider_product_ids, provider_ids = set(catalog_ids), set(provider_product_ids), set(provider_ids)
+    tp, pp = models.TenantProduct, models.ProviderProduct
+    conditions = []
+    if catalog_ids:
+        conditions.append(tp.catalog_id.in_(catalog_ids))
+    if provider_product_ids:
+        # Catalog items show their provider offers, not only the one a link picked
+        conditions.append(tp.provider_product_id.in_(provider_product_ids))
+        conditions.append(tp.catalog_id.in_(select(pp.catalog_id).where(pp.id.in_(provider_product_ids))))
+    if provider_ids:
+        conditions.append(tp.catalog_id.in_(select(pp.catalog_id).where(pp.provider_id.in_(provider_ids))))
+    if not conditions:
+        return set()
+    return set(session.exec(select(tp.tenant_id).where(or_(*conditions)).distinct()).all())
+
+
+def _catalog_scopes(session: Session, objs: list[object]) -> set[int]:
+    ids: dict[type, set[int]] = {cls: set() for cls in _CATALOG_SCOPED}
+    for obj in objs:
+        # New rows are not referenced by any tenant yet
+        if obj.id is not None and obj not in session.new:
+            ids[type(obj)].add(obj.id)
+    with session.no_autoflush:
+        return catalog_menu_scopes(
+            session,
+            catalog_ids=ids[models.ProductCatalog],
+            provider_product_ids=ids[models.ProviderProduct],
+            provider_ids=ids[models.Provider],
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_menu_versions(session: Session, flush_context: object, instances: object | None) -> None:
+    scopes: set[int] = set()
+    catalog_rows: list[object] = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not isinstance(obj, models.Tenant) and not session.is_modified(obj):
+            continue
+        if isinstance(obj, _CATALOG_SCOPED):
+            catalog_rows.append(obj)
+            continue
+        scope = _menu_scope(obj)
+        if scope is None:
+            continue
+        if isinstance(obj, models.Tenant):
+            # New tenants have no snapshot yet; only menu-visible columns matter
+            if obj not in session.dirty or not _tenant_menu_fields_changed(obj):
+                continue
+        scopes.add(scope)
+    if catalog_rows:
+        scopes |= _catalog_scopes(session, catalog_rows)
+    bump_menu_versions(session, scopes)
+
+
+def bump_menu_versions(session: Session, scopes: Iterable[int]) -> None:
+    """
+    Bump the given scopes (also for bulk UPDATE / DELETE). Tenant scopes are bumped in the
+    session's transaction; the global scope is bumped after it commits.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    session.info[_UNCOMMITTED_KEY] = True
+    if GLOBAL_MENU_SCOPE in scopes:
+        scopes.discard(GLOBAL_MENU_SCOPE)
+        session.info[_GLOBAL_PENDING_KEY] = True
+    conn = session.connection()
+    # Fixed lock order (a flush may touch several tenants)
+    for scope in sorted(scopes):
+        conn.execute(_BUMP_SQL, {"tid": scope})
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_global_after_commit(session: Session) -> None:
+    session.info.pop(_UNCOMMITTED_KEY, None)
+    if not session.info.pop(_GLOBAL_PENDING_KEY, None):
+        return
+    # Own short transaction: the row lock is held for one statement, not the writer's transaction.
+    # A snapshot built in between is keyed by the old version and dropped by this bump.
+    try:
+        with session.get_bind().begin() as conn:
+            conn.execute(_BUMP_SQL, {"tid": GLOBAL_MENU_SCOPE})
+    except Exception as e:
+        logger.warning("Global menu version bump failed: %s", e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_menu_bumps(session: Session) -> None:
+    session.info.pop(_UNCOMMITTED_KEY, None)
+    session.info.pop(_GLOBAL_PENDING_KEY, None)
+
+
+def has_uncommitted_menu_writes(session: Session) -> bool:
+    """True when ``session`` wrote menu data not yet committed; do not cache what it reads."""
+    return bool(session.info.get(_UNCOMMITTED_KEY))
+
+
+def menu_versions(session: Session, tenant_id: int) -> tuple[int, int]:
+    """(tenant version, global version); 0 when never bumped."""
+    rows = session.exec(
+        select(models.MenuVersion.tenant_id, models.MenuVersion.version).where(
+            models.MenuVersion.tenant_id.in_((tenant_id, GLOBAL_MENU_SCOPE))
+        )
+    ).all()
+    by_scope = {int(tid): int(version) for tid, version in rows}
+    return by_scope.get(tenant_id, 0), by_scope.get(GLOBAL_MENU_SCOPE, 0)
+
+
+def get_menu_snapshot(
+    session: Session,
+    tenant_id: int,
+    lang: str,
+    local_date: date,
+    build: Callable[[], dict[str, Any]],
+    versions: tuple[int, int] | None = None,
+) -> dict[str, Any]:
+    """
+    Cached snapshot for (tenant, lang, local date), rebuilt with ``build`` when missing or
+    stale. Callers must not mutate the returned dict or its products. ``versions`` is the
+    caller's ``menu_versions`` result when it already read them (ETag).
+    """
+    # Read the versions before building: a change committed meanwhile is picked up next time
+    if versions is None:
+        versions = menu_versions(session, tenant_id)
+    key = (tenant_id, lang, local_date.isoformat())
+    with _lock:
+        hit = _snapshots.get(key)
+        if hit is not None and hit[0] == versions:
+            _snapshots.move_to_end(key)
+            return hit[1]
+    snapshot = build()
+    if has_uncommitted_menu_writes(session):
+        return snapshot
+    with _lock:
+        _snapshots[key] = (versions, snapshot)
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > MENU_CACHE_MAX_ENTRIES:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def clear_menu_snapshots() -> None:
+    with _lock:
+        _snapshots.clear()
@@ -0,0 +1,201 @@
+"""
+Static export of the public tenant menu (GET /public/tenants/{tenant_id}/menu).
+
+Marketing sites read the menu at render time; publishing it as files lets them (or a CDN
+in front of ``/public/menu-export``) skip the API and the database. For every tenant and
+supported language the exporter writes under ``MENU_EXPORT_DIR``::
+
+    {tenant_id}/menu.{lang}.{version}.json      immutable, version = menu ETag
+    {tenant_id}/menu.{lang}.json                latest copy (short cache)
+    {tenant_id}/index.json                      versions, ETags, valid_until per language
+
+plus ``.gz`` siblings when ``MENU_EXPORT_PRECOMPRESS`` is on. A language is re-rendered
+only when ``public_tenant_menu_etag`` changes (menu version, tenant fields, local date,
+live promos), so an unchanged menu costs the ETag lookups. ``menu_export_loop`` runs the
+publish step every ``MENU_EXPORT_INTERVAL_SECONDS`` when ``MENU_EXPORT_ENABLED``;
+``python -m app.seeds.export_public_menus`` runs it once. The live endpoint stays the
+fallback for tenants or languages not exported yet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from . import models
+from .language_service import get_supported_languages
+from .public_tenant_menu import build_public_tenant_menu, public_tenant_menu_etag
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_DIR = Path(__file__).parent.parent / "menu-export"
+# Versions kept per language after a publish (pages and CDNs may still reference them)
+KEEP_VERSIONS = 3
+# pg advisory lock key: one worker publishes at a time
+_EXPORT_LOCK_KEY = 0x4D45_4E55
+
+INDEX_NAME = "index.json"
+_VERSIONED_RE = re.compile(r"^menu\.(?P<lang>[A-Za-z-]+)\.(?P<version>[0-9a-f]{16})\.json$")
+
+
+def export_dir() -> Path:
+    configured = (getattr(settings, "menu_export_dir", "") or "").strip()
+    return Path(configured) if configured else DEFAULT_EXPORT_DIR
+
+
+def is_versioned_export_name(filename: str) -> bool:
+    return bool(_VERSIONED_RE.match(filename))
+
+
+def _version_from_etag(etag: str) -> str:
+    return etag.strip('"')[:16]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _write_with_variants(path: Path, data: bytes, precompress: bool) -> None:
+    _write_atomic(path, data)
+    gz_path = path.with_name(path.name + ".gz")
+    if precompress:
+        # mtime=0: identical bytes for an identical menu
+        _write_atomic(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    else:
+        gz_path.unlink(missing_ok=True)
+
+
+def _read_index(tenant_dir: Path) -> dict[str, Any]:
+    try:
+        return json.loads((tenant_dir / INDEX_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _prune_versions(tenant_dir: Path, entries: dict[str, Any]) -> None:
+    """Remove versioned files the index does not list, for every language.
+
+    Also catches files left by a publish that failed before writing its index.
+    """
+    for path in tenant_dir.iterdir():
+        match = _VERSIONED_RE.match(path.name.removesuffix(".gz"))
+        if match and match["version"] not in (entries.get(match["lang"]) or {}).get("versions", []):
+            path.unlink(missing_ok=True)
+
+
+def export_tenant_menu(
+    session: Session,
+    tenant: models.Tenant,
+    *,
+    root: Path | None = None,
+    force: bool = False,
+    languages: list[str] | None = None,
+) -> int:
+    """Publish ``tenant``'s menu for each language whose ETag changed. Returns files rendered."""
+    root = root or export_dir()
+    precompress = bool(getattr(settings, "menu_export_precompress", True))
+    tenant_dir = root / str(tenant.id)
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+    index = _read_index(tenant_dir)
+    entries: dict[str, Any] = index.get("languages", {})
+    rendered = 0
+    for lang in languages or get_supported_languages():
+        etag, valid_until = public_tenant_menu_etag(session, tenant, lang)
+        previous = entries.get(lang) or {}
+        if not force and previous.get("etag") == etag:
+            continue
+        body = build_public_tenant_menu(session, tenant.id, lang)
+        data = json.dumps(jsonable_encoder(body), ensure_ascii=False, separators=(",", ":")).encode()
+        version = _version_from_etag(etag)
+        versioned = f"menu.{lang}.{version}.json"
+        _write_with_variants(tenant_dir / versioned, data, precompress)
+        _write_with_variants(tenant_dir / f"menu.{lang}.json", data, precompress)
+        history = [version] + [v for v in previous.get("versions", []) if v != version]
+        history = history[:KEEP_VERSIONS]
+        entries[lang] = {
+            "etag": etag,
+            "file": versioned,
+            "versions": history,
+            "valid_until": valid_until.isoformat() if valid_until else None,
+        }
+        rendered += 1
+    if rendered:
+        index = {
+            "tenant_id": tenant.id,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "languages": entries,
+        }
+        _write_atomic(tenant_dir / INDEX_NAME, json.dumps(index, separators=(",", ":")).encode())
+    _prune_versions(tenant_dir, entries)
+    return rendered
+
+
+def export_public_menus(
+    session: Session,
+    *,
+    root: Path | None = None,
+    tenant_ids: list[int] | None = None,
+    force: bool = False,
+) -> dict[str, int]:
+    """Publish every tenant's menu (or ``tenant_ids``). Returns counts.
+
+    Each tenant runs in a savepoint: a failure rolls back only that tenant and keeps the
+    outer transaction, and with it the publisher's advisory lock (``_export_tick_sync``).
+    """
+    query = select(models.Tenant).order_by(models.Tenant.id)
+    if tenant_ids:
+        query = query.where(models.Tenant.id.in_(tenant_ids))
+    counts = {"tenants": 0, "rendered": 0, "failed": 0}
+    for tenant in session.exec(query).all():
+        counts["tenants"] += 1
+        try:
+            with session.begin_nested():
+                counts["rendered"] += export_tenant_menu(session, tenant, root=root, force=force)
+        except Exception as e:
+            counts["failed"] += 1
+            logger.warning("Menu export failed for tenant %s: %s", tenant.id, e, exc_info=True)
+    return counts
+
+
+def _export_tick_sync() -> dict[str, int] | None:
+    from .db import engine
+
+    with Session(engine) as session:
+        locked = session.exec(select(func.pg_try_advisory_xact_lock(_EXPORT_LOCK_KEY))).one()
+        if not locked:
+            session.rollback()
+            return None
+        try:
+            return export_public_menus(session)
+        finally:
+            session.rollback()
+
+
+async def menu_export_loop(stop: asyncio.Event | None = None) -> None:
+    stop_ev = stop or asyncio.Event()
+    interval = float(getattr(settings, "menu_export_interval_seconds", 60) or 60)
+    while not stop_ev.is_set():
+        try:
+            counts = await asyncio.to_thread(_export_tick_sync)
+            if counts and (counts["rendered"] or counts["failed"]):
+                logger.info("Menu export: %s", counts)
+        except Exception as e:
+            logger.warning("Menu export tick failed: %s", e, exc_info=True)
+        try:
+            await asyncio.wait_for(stop_ev.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
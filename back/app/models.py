@@ -3,7 +3,7 @@ from enum import Enum
 from typing import Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, Text, Time, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Date, DateTime, Enum as SAEnum, Text, Time, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -730,6 +730,8 @@ class Table(TenantMixin, table=True):
     is_active: bool = Field(default=False, index=True)  # Whether table is accepting orders
     active_order_id: int | None = Field(default=None)  # Current shared order for this table
     activated_at: datetime | None = Field(default=None)  # When table was activated
+    # Bumped on every ORM write; the table-token cache keeps the highest version it saw
+    cache_version: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, default=0))
 
 
 class Shift(TenantMixin, table=True):
@@ -822,6 +824,12 @@ class Reservation(TenantMixin, table=True):
     # When each reminder was sent (by staff or by heartbeat); null = not sent yet
     reminder_24h_sent_at: datetime | None = Field(default=None)
     reminder_2h_sent_at: datetime | None = Field(default=None)
+    # When each reminder is due (UTC; slot start in tenant timezone minus 24h / 2h), see reservation_reminder_due
+    reminder_24h_due_at: datetime | None = Field(default=None)
+    reminder_2h_due_at: datetime | None = Field(default=None)
+    # When the heartbeat claimed each reminder for sending; the claim lapses after a lease
+    reminder_24h_claimed_at: datetime | None = Field(default=None)
+    reminder_2h_claimed_at: datetime | None = Field(default=None)
     # Booking preferences (public / staff): lunch vs dinner when opening hours have a break; seating; allergies
     service_type: str | None = Field(default=None, max_length=16)  # lunch | dinner
     seating_preference: str | None = Field(default=None, max_length=32)  # indoor | terrace | no_preference
@@ -1213,11 +1221,79 @@ class Order(TenantMixin, table=True):
     loyalty_discount_cents: int = Field(default=0, ge=0)
     loyalty_units_redeemed: int = Field(default=0, ge=0)
 
+    # Stamped on every order/item write (order_change_feed): version for real-time deltas and
+    # the writing transaction id, the GET /orders/changes cursor
+    change_seq: int = Field(default=0)
+    change_xid: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, default=0))
+
     items: list["OrderItem"] = Relationship(back_populates="order")
     billing_customer: BillingCustomer | None = Relationship(back_populates="orders")
     customer: Customer | None = Relationship()
 
 
+class MenuVersion(SQLModel, table=True):
+    """Customer menu version per tenant (0: shared catalog / providers); keys menu snapshots (menu_cache.py)."""
+
+    __tablename__ = "menu_version"
+
+    tenant_id: int = Field(primary_key=True)  # no FK: 0 is the global scope
+    version: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, default=0))
+
+
+class AvailabilityVersion(SQLModel, table=True):
+    """Reservation availability version per tenant and date (ALL_DAYS: tenant-wide); keys availability_cache.py."""
+
+    __tablename__ = "availability_version"
+
+    tenant_id: int = Field(primary_key=True)
+    day: date = Field(sa_column=Column(Date, primary_key=True))
+    version: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, default=0))
+
+
+class SlotDemand(SQLModel, table=True):
+    """Booked + seated guests / parties per reservation slot and zone (0: no zone); see slot_demand.py."""
+
+    __tablename__ = "slot_demand"
+
+    tenant_id: int = Field(primary_key=True)
+    slot_date: date = Field(sa_column=Column(Date, primary_key=True))
+    slot_time: time = Field(sa_column=Column(Time, primary_key=True))
+    floor_id: int = Field(default=0, primary_key=True)  # no FK: 0 is "no zone"
+    guests: int = Field(default=0)
+    parties: int = Field(default=0)
+
+
+class RealtimeOutbox(SQLModel, table=True):
+    """Real-time event committed with its change; relayed to Redis pub/sub (see realtime_outbox.py)."""
+
+    __tablename__ = "realtime_outbox"
+
+    id: int | None = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    channels: list[str] = Field(sa_column=Column(JSONB, nullable=False))  # e.g. orders:tenant:1, orders:table:7
+    payload: str = Field(sa_column=Column(Text, nullable=False))  # JSON, encoded once for all channels
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class OrderSummary(SQLModel, table=True):
+    """Precomputed order aggregates, refreshed on every order/item/payment flush (see order_summary.py)."""
+
+    __tablename__ = "order_summary"
+
+    order_id: int = Field(foreign_key="order.id", primary_key=True)
+    tenant_id: int = Field(foreign_key="tenant.id", index=True)
+    status: str = Field(max_length=32)  # Display status (same rule as GET /orders)
+    active_item_count: int = Field(default=0)  # Not removed and not cancelled
+    removed_items_count: int = Field(default=0)  # removed_by_customer
+    subtotal_cents: int = Field(default=0)
+    loyalty_discount_cents: int = Field(default=0)
+    tip_amount_cents: int = Field(default=0)
+    total_cents: int = Field(default=0)  # max(0, subtotal − discount) + tip
+    amount_due_cents: int = Field(default=0)  # total + delivery fee (split-bill reconciliation)
+    amount_paid_cents: int = Field(default=0)  # Non-voided payment legs
+    revenue_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class OrderPayment(TenantMixin, table=True):
     """One payment leg against an order (split bill / partial pay). See docs/0071-split-bill.md."""
 
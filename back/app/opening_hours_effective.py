@@ -1,5 +1,5 @@
 """
-Resolve effective opening hours for a tenant on a calendar date.
+Resolve effective opening hours for a tenant on a calendar date (or each date of a range).
 
 Baseline: tenant.opening_hours applies until superseded by the latest
 opening_hours_baseline_schedule row with effective_from <= date.
@@ -10,8 +10,8 @@ Date overrides: narrowest covering range wins (tie-break: higher id).
 from __future__ import annotations
 
 import json
-from datetime import date, time
-from typing import TYPE_CHECKING, List, Tuple
+from datetime import date, time, timedelta
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 from sqlalchemy import desc
 from sqlmodel import Session, select
@@ -105,18 +105,82 @@ def _pick_override_for_date(
     return rows[0]
 
 
-def _windows_from_weekly_json_str(weekly_json: str | None, res_date: date) -> List[Tuple[time, time]] | None:
+def _parse_weekly(weekly_json: str | None) -> dict | None:
+    """Parsed weekly JSON; None when unset or unparseable (hours not enforced)."""
     if weekly_json is None or not str(weekly_json).strip():
         return None
     try:
         oh = json.loads(weekly_json)
     except (json.JSONDecodeError, TypeError):
         return None
-    day_key = _DAY_NAMES[res_date.weekday()]
-    day_hours = oh.get(day_key)
-    if not isinstance(day_hours, dict):
-        return []
-    return _service_windows_from_day_hours(day_hours)
+    return oh if isinstance(oh, dict) else {}
+
+
+def opening_service_windows_for_range(
+    session: Session,
+    tenant: models.Tenant,
+    start: date,
+    end: date,
+) -> Dict[date, List[Tuple[time, time]] | None]:
+    """
+    ``opening_service_windows_for_date`` for every date in [start, end] (empty when end < start).
+
+    One query for the baselines, one for the overrides overlapping the range; each distinct
+    weekly JSON is parsed once.
+    """
+    if end < start:
+        return {}
+    baselines = session.exec(
+        select(models.OpeningHoursBaselineSchedule)
+        .where(models.OpeningHoursBaselineSchedule.tenant_id == tenant.id)
+        .where(models.OpeningHoursBaselineSchedule.effective_from <= end)
+        .order_by(
+            models.OpeningHoursBaselineSchedule.effective_from,
+            models.OpeningHoursBaselineSchedule.id,
+        )
+    ).all()
+    overrides = session.exec(
+        select(models.OpeningHoursDateOverride).where(
+            models.OpeningHoursDateOverride.tenant_id == tenant.id,
+            models.OpeningHoursDateOverride.date_from <= end,
+            models.OpeningHoursDateOverride.date_to >= start,
+        )
+    ).all()
+    # Narrowest covering range wins (tie-break: higher id)
+    overrides = sorted(overrides, key=lambda r: ((r.date_to - r.date_from).days, -(r.id or 0)))
+
+    parsed: dict[str | None, dict | None] = {}
+
+    def weekly(source: str | None) -> dict | None:
+        if source not in parsed:
+            parsed[source] = _parse_weekly(source)
+        return parsed[source]
+
+    out: Dict[date, List[Tuple[time, time]] | None] = {}
+    baseline = tenant.opening_hours
+    next_baseline = 0
+    d = start
+    while d <= end:
+        while next_baseline < len(baselines) and baselines[next_baseline].effective_from <= d:
+            baseline = baselines[next_baseline].opening_hours
+            next_baseline += 1
+        override = next((r for r in overrides if r.date_from <= d <= r.date_to), None)
+        source = baseline
+        if override is not None:
+            if override.closed:
+                out[d] = []
+                d += timedelta(days=1)
+                continue
+            if override.opening_hours and str(override.opening_hours).strip():
+                source = override.opening_hours
+        oh = weekly(source)
+        if oh is None:
+            out[d] = None
+        else:
+            day_hours = oh.get(_DAY_NAMES[d.weekday()])
+            out[d] = _service_windows_from_day_hours(day_hours) if isinstance(day_hours, dict) else []
+        d += timedelta(days=1)
+    return out
 
 
 def opening_service_windows_for_date(
@@ -131,20 +195,7 @@ def opening_service_windows_for_date(
     """
     if session is None:
         return _legacy_windows_from_tenant_only(tenant, res_date)
-
-    baseline = _baseline_weekly_json(session, tenant, res_date)
-    override = _pick_override_for_date(session, tenant.id, res_date)
-    weekly_source: str | None = baseline
-
-    if override is not None:
-        if override.closed:
-            return []
-        if override.opening_hours and str(override.opening_hours).strip():
-            weekly_source = override.opening_hours
-        else:
-            weekly_source = baseline
-
-    return _windows_from_weekly_json_str(weekly_source, res_date)
+    return opening_service_windows_for_range(session, tenant, res_date, res_date)[res_date]
 
 
 def effective_weekly_json_preview(
@@ -0,0 +1,182 @@
+"""
+Order change stamps for incremental staff feeds (GET /orders/changes).
+
+Every flush that writes an ``Order`` or ``OrderItem`` stamps the touched orders with:
+
+- ``change_seq``: ``nextval('order_change_seq_global')``, the order's version (real-time
+  deltas chain on it). A sequence takes no row lock, so order writes of a tenant are not
+  serialized until commit.
+- ``change_xid``: the writing transaction id (``pg_current_xact_id()``), the feed cursor.
+
+Sequence values are handed out in flush order, not commit order, so they cannot be a
+cursor on their own. The feed returns only rows with ``change_xid`` below the oldest
+transaction still running (``pg_snapshot_xmin``) and answers with that watermark as the
+next cursor: every transaction below it has committed or aborted, so a later commit can
+never carry a ``change_xid`` under a cursor already handed out. Rows of a long-running
+transaction wait until it ends.
+
+Off Postgres (SQLite tests) both stamps come from ``max(change_seq) + 1``.
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+
+from sqlalchemy import event, func, text
+from sqlmodel import Session, select
+
+from . import models
+
+# Item statuses a kitchen / bar ticket still shows
+KDS_ITEM_STATUSES = frozenset({"pending", "preparing", "ready"})
+# Order statuses (as listed by GET /orders) the KDS keeps on screen
+KDS_ORDER_STATUSES = frozenset({"pending", "preparing", "ready", "partially_delivered", "paid"})
+
+_STAMP_SQL = text("SELECT nextval('order_change_seq_global'), pg_current_xact_id()::text::bigint")
+_WATERMARK_SQL = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def _is_written(session: Session, obj: object) -> bool:
+    if obj in session.new or obj in session.deleted:
+        return True
+    return session.is_modified(obj)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_order_change_seq(
+    session: Session, flush_context: object, instances: object | None
+) -> None:
+    """Stamp orders touched in this flush (directly or through their items)."""
+    touched: dict[int, models.Order] = {}
+    item_order_ids: set[int] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, models.Order):
+            if _is_written(session, obj):
+                touched[id(obj)] = obj
+        elif isinstance(obj, models.OrderItem):
+            if not _is_written(session, obj):
+                continue
+            # Do not lazy-load the relationship from inside a flush hook
+            parent = obj.__dict__.get("order")
+            if parent is not None:
+                touched[id(parent)] = parent
+            elif obj.order_id is not None:
+                item_order_ids.add(obj.order_id)
+    if not touched and not item_order_ids:
+        return
+    if item_order_ids:
+        with session.no_autoflush:
+            for oid in item_order_ids:
+                order = session.get(models.Order, oid)
+                if order is not None:
+                    touched[id(order)] = order
+
+    orders = [o for o in touched.values() if o not in session.deleted and o.tenant_id is not None]
+    if not orders:
+        return
+    seq, xid = _next_stamp(session)
+    for order in orders:
+        order.change_seq = seq
+        order.change_xid = xid
+
+
+def _next_stamp(session: Session) -> tuple[int, int]:
+    """(change_seq, change_xid) for one flush."""
+    conn = session.connection()
+    if conn.dialect.name == "postgresql":
+        seq, xid = conn.execute(_STAMP_SQL).one()
+        return int(seq), int(xid)
+    seq = int(conn.execute(select(func.coalesce(func.max(models.Order.change_seq), 0) + 1)).scalar_one())
+    return seq, seq
+
+
+def feed_watermark(session: Session) -> int:
+    """Cursor below which every order change has committed or aborted (see module docstring)."""
+    conn = session.connection()
+    if conn.dialect.name == "postgresql":
+        return int(conn.execute(_WATERMARK_SQL).scalar_one())
+    return int(
+        conn.execute(select(func.coalesce(func.max(models.Order.change_xid), 0) + 1)).scalar_one()
+    )
+
+
+def orders_changed_since(
+    session: Session, tenant_id: int, cursor: int, watermark: int, limit: int
+) -> tuple[list[models.Order], int, bool]:
+    """
+    Orders (including soft-deleted) with ``cursor <= change_xid < watermark``, oldest first.
+
+    Returns ``(orders, next_cursor, has_more)``. A page never splits one transaction: when
+    the limit falls inside a group of orders stamped by the same transaction, the whole
+    group is returned and the next cursor starts after it.
+    """
+    window = (
+        models.Order.tenant_id == tenant_id,
+        models.Order.change_xid >= cursor,
+        models.Order.change_xid < watermark,
+    )
+    rows = list(
+        session.exec(
+            select(models.Order)
+            .where(*window)
+            .order_by(models.Order.change_xid.asc(), models.Order.id.asc())
+            .limit(limit + 1)
+        ).all()
+    )
+    has_more = len(rows) > limit
+    if not has_more:
+        return rows, watermark, False
+    rows = rows[:limit]
+    boundary = rows[-1].change_xid
+    seen = {o.id for o in rows}
+    rest = session.exec(
+        select(models.Order)
+        .where(*window, models.Order.change_xid == boundary)
+        .order_by(models.Order.id.asc())
+    ).all()
+    rows.extend(o for o in rest if o.id not in seen)
+    return rows, boundary + 1, True
+
+
+def kds_order_projection(row: dict) -> dict | None:
+    """
+    Compact kitchen/bar ticket from a GET /orders row: only open items and the fields
+    the display renders. ``None`` when nothing is left to prepare or serve.
+    """
+    if row.get("status") not in KDS_ORDER_STATUSES:
+        return None
+    items = [
+        {
+            "id": i["id"],
+            "product_name": i["product_name"],
+            "quantity": i["quantity"],
+            "notes": i.get("notes"),
+            "status": i["status"],
+            "removed_by_customer": False,
+            "customization_answers": i.get("customization_answers"),
+            "customization_summary": i.get("customization_summary"),
+            "line_modifiers": i.get("line_modifiers"),
+            "line_modifiers_summary": i.get("line_modifiers_summary"),
+            "category": i.get("category"),
+            "kitchen_station_id": i.get("kitchen_station_id"),
+            "kitchen_station_name": i.get("kitchen_station_name"),
+            "kitchen_station_route": i.get("kitchen_station_route"),
+        }
+        for i in row.get("items") or []
+        if not i.get("removed_by_customer") and i.get("status") in KDS_ITEM_STATUSES
+    ]
+    if not items:
+        return None
+    return {
+        "id": row["id"],
+        "version": row.get("version"),
+        "table_name": row.get("table_name"),
+        "table_id": row.get("table_id"),
+        "status": row["status"],
+        "notes": row.get("notes"),
+        "customer_name": row.get("customer_name"),
+        "created_at": row.get("created_at"),
+        "staff_urgent": bool(row.get("staff_urgent")),
+        "order_channel": row.get("order_channel"),
+        "items": items,
+    }
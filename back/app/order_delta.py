@@ -0,0 +1,260 @@
+"""
+Compact per-order deltas for real-time order events.
+
+A flush hook records which order / item columns each transaction writes.
+``publish_order_update`` (with a session) turns that into a ``delta`` on the event:
+
+    {"order_id": 12, "version": 845, "base_version": 840,
+     "order": {"status": "preparing", "subtotal_cents": 2400, ...},
+     "items": [{"id": 7, "status": "ready"}], "removed_item_ids": []}
+
+``version`` is the order's ``change_seq`` after the change and ``base_version`` the value
+the client must hold for the delta to apply (the last published or committed version). A
+client at another version missed a change and reloads the order through
+GET /orders/changes. No delta is attached when the change cannot be expressed on an
+existing staff row (new order or item, soft delete, table or channel move, payments).
+
+Events staged with ``stage_order_event`` are written to the outbox when the session commits,
+after its last flush: ``version`` is then the committed ``change_seq`` even when the order
+is written again after the event was published. The delta rides on the order's last event
+of the transaction, which covers all of its writes.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlmodel import Session
+
+from . import models
+from .kds_realtime import stage_kds_events
+from .order_summary import summaries_by_order_id
+from .realtime_outbox import stage_event
+
+logger = logging.getLogger(__name__)
+
+_DELTAS_KEY = "order_deltas"
+_STAGED_KEY = "order_events_staged"
+
+# Order columns copied as-is into GET /orders rows
+ORDER_DELTA_FIELDS = frozenset(
+    {
+        "notes",
+        "session_id",
+        "customer_name",
+        "paid_at",
+        "payment_method",
+        "staff_urgent",
+        "delivery_address",
+        "customer_phone",
+        "courier_user_id",
+        "loyalty_membership_id",
+        "loyalty_units_redeemed",
+        "tip_percent_applied",
+        "tip_amount_cents",
+        "tip_attributed_user_id",
+    }
+)
+# Order columns whose change moves or re-labels the row: clients reload it
+_ORDER_RELOAD_FIELDS = frozenset(
+    {
+        "tenant_id",
+        "table_id",
+        "created_at",
+        "deleted_at",
+        "order_channel",
+        "delivery_integration_id",
+        "external_order_ref",
+        "billing_customer_id",
+    }
+)
+# Item columns copied as-is into row items
+ITEM_DELTA_FIELDS = frozenset(
+    {
+        "product_name",
+        "quantity",
+        "price_cents",
+        "notes",
+        "customization_answers",
+        "customization_summary",
+        "line_modifiers",
+        "line_modifiers_summary",
+        "status",
+        "removed_by_customer",
+        "removed_at",
+        "removed_reason",
+        "tax_id",
+        "tax_rate_percent",
+        "tax_amount_cents",
+    }
+)
+# Product drives category and KDS station of the line
+_ITEM_RELOAD_FIELDS = frozenset({"order_id", "product_id"})
+# Derived values from order_summary, always sent
+_SUMMARY_FIELDS = (
+    "status",
+    "subtotal_cents",
+    "loyalty_discount_cents",
+    "total_cents",
+    "removed_items_count",
+    "amount_due_cents",
+    "amount_paid_cents",
+)
+
+
+@dataclass
+class _PendingDelta:
+    base_version: int | None
+    reload: bool = False
+    order_fields: set[str] = field(default_factory=set)
+    item_fields: dict[int, set[str]] = field(default_factory=dict)
+    removed_item_ids: set[int] = field(default_factory=set)
+
+
+def _changed_columns(obj: object) -> set[str]:
+    state = inspect(obj)
+    attrs = state.attrs
+    return {k for k in state.committed_state if k in attrs and attrs[k].history.has_changes()}
+
+
+# insert=True: runs ahead of the change-seq hook, so ``change_seq`` is still the base version
+@event.listens_for(Session, "before_flush", insert=True)
+def _record_order_deltas(session: Session, flush_context: object, instances: object | None) -> None:
+    pending: dict[int, _PendingDelta] | None = session.info.get(_DELTAS_KEY)
+
+    def entry(order_id: int) -> _PendingDelta:
+        nonlocal pending
+        if pending is None:
+            pending = session.info.setdefault(_DELTAS_KEY, {})
+        found = pending.get(order_id)
+        if found is None:
+            with session.no_autoflush:
+                order = session.get(models.Order, order_id)
+                base = int(order.change_seq or 0) if order is not None else None
+            found = _PendingDelta(base_version=base)
+            pending[order_id] = found
+        return found
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, models.Order):
+            if obj.id is None:
+                continue  # New order: clients load it in full
+            if obj in session.deleted:
+                entry(obj.id).reload = True
+                continue
+            cols = _changed_columns(obj)
+            if not cols:
+                continue
+            e = entry(obj.id)
+            if cols & _ORDER_RELOAD_FIELDS:
+                e.reload = True
+            e.order_fields |= cols & ORDER_DELTA_FIELDS
+        elif isinstance(obj, models.OrderItem):
+            if obj.order_id is None:
+                continue
+            if obj in session.new or obj.id is None:
+                entry(obj.order_id).reload = True
+            elif obj in session.deleted:
+                entry(obj.order_id).removed_item_ids.add(obj.id)
+            else:
+                cols = _changed_columns(obj)
+                if not cols:
+                    continue
+                e = entry(obj.order_id)
+                if cols & _ITEM_RELOAD_FIELDS:
+                    e.reload = True
+                e.item_fields.setdefault(obj.id, set()).update(cols & ITEM_DELTA_FIELDS)
+        elif isinstance(obj, models.OrderPayment):
+            if obj.order_id is not None and (obj in session.new or session.is_modified(obj)):
+                entry(obj.order_id).reload = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_order_deltas(session: Session) -> None:
+    session.info.pop(_DELTAS_KEY, None)
+    session.info.pop(_STAGED_KEY, None)
+
+
+def stage_order_event(session: Session, tenant_id: int, channels: list[str], order_data: dict) -> None:
+    """Stage an order event (and its KDS copies) in ``session``; written when it commits."""
+    session.info.setdefault(_STAGED_KEY, []).append((tenant_id, channels, order_data))
+
+
+@event.listens_for(Session, "before_commit")
+def _stage_order_events(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # Savepoint release: the outer commit writes the events
+    staged: list[tuple[int, list[str], dict]] | None = session.info.pop(_STAGED_KEY, None)
+    if not staged:
+        return
+    session.flush()
+    last = {data.get("order_id"): i for i, (_, _, data) in enumerate(staged)}
+    for i, (tenant_id, channels, data) in enumerate(staged):
+        order_id = data.get("order_id")
+        try:
+            if isinstance(order_id, int) and last[order_id] == i:
+                delta = pop_order_delta(session, order_id)
+                if delta is not None:
+                    data = {**data, "delta": delta}
+            stage_event(session, channels, data)
+            stage_kds_events(session, tenant_id, data)
+        except Exception:
+            logger.warning("Could not queue order update for tenant %s", tenant_id, exc_info=True)
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def pop_order_delta(session: Session, order_id: int) -> dict[str, Any] | None:
+    """
+    Delta for ``order_id`` covering the writes since the last call (or transaction start).
+
+    Flushes ``session`` first. Returns ``None`` when there is nothing recorded or the
+    change needs a reload; either way the recorded changes are consumed.
+    """
+    session.flush()
+    pending: dict[int, _PendingDelta] | None = session.info.get(_DELTAS_KEY)
+    recorded = pending.pop(order_id, None) if pending else None
+    if recorded is None or recorded.reload or recorded.base_version is None:
+        return None
+    order = session.get(models.Order, order_id)
+    if order is None:
+        return None
+    summary = summaries_by_order_id(session, [order_id]).get(order_id)
+    if summary is None:
+        return None
+    order_values = {name: _json_value(getattr(order, name)) for name in sorted(recorded.order_fields)}
+    for name in _SUMMARY_FIELDS:
+        order_values[name] = getattr(summary, name)
+    order_values["amount_remaining_cents"] = max(
+        0, summary.amount_due_cents - summary.amount_paid_cents
+    )
+    items: list[dict[str, Any]] = []
+    for item_id in sorted(recorded.item_fields):
+        names = recorded.item_fields[item_id]
+        if not names:
+            continue
+        item = session.get(models.OrderItem, item_id)
+        if item is None:
+            return None
+        items.append({"id": item_id, **{n: _json_value(getattr(item, n)) for n in sorted(names)}})
+    return {
+        "order_id": order_id,
+        "version": order.change_seq,
+        "base_version": recorded.base_version,
+        "order": order_values,
+        "items": items,
+        "removed_item_ids": sorted(recorded.removed_item_ids),
+    }
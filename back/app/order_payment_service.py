@@ -102,7 +102,15 @@ def payment_line_ids(session: Session, payment_id: int) -> list[int]:
     return [int(r.order_item_id) for r in rows]
 
 
-def payment_to_dict(session: Session, p: models.OrderPayment) -> dict:
+def payment_to_dict(
+    session: Session,
+    p: models.OrderPayment,
+    *,
+    order_item_ids: list[int] | None = None,
+) -> dict:
+    """Serialize a payment leg. Pass ``order_item_ids`` when already batch-loaded."""
+    if order_item_ids is None:
+        order_item_ids = payment_line_ids(session, p.id) if p.id else []
     return {
         "id": p.id,
         "order_id": p.order_id,
@@ -115,7 +123,7 @@ def payment_to_dict(session: Session, p: models.OrderPayment) -> dict:
         "paid_at": p.paid_at.isoformat() if p.paid_at else None,
         "voided_at": p.voided_at.isoformat() if p.voided_at else None,
         "note": p.note,
-        "order_item_ids": payment_line_ids(session, p.id) if p.id else [],
+        "order_item_ids": order_item_ids,
     }
 
 
@@ -189,6 +197,77 @@ def reconciliation_dict(session: Session, order: models.Order) -> dict:
     }
 
 
+def reconciliation_dicts_for_orders(
+    session: Session,
+    orders: list[models.Order],
+    items_by_order: dict[int, list[models.OrderItem]],
+) -> dict[int, dict]:
+    """
+    Same shape as :func:`reconciliation_dict` for many orders at once.
+
+    ``items_by_order`` must hold every line of each order (removed ones too); payments
+    and their line allocations are loaded with one ``IN`` query each.
+    """
+    order_ids = [o.id for o in orders if o.id is not None]
+    if not order_ids:
+        return {}
+    pay_rows = session.exec(
+        select(models.OrderPayment)
+        .where(models.OrderPayment.order_id.in_(order_ids))  # type: ignore[attr-defined]
+        .where(models.OrderPayment.voided_at.is_(None))  # type: ignore[union-attr]
+        .order_by(models.OrderPayment.paid_at.asc(), models.OrderPayment.id.asc())
+    ).all()
+    payments_by_order: dict[int, list[models.OrderPayment]] = {}
+    for p in pay_rows:
+        payments_by_order.setdefault(p.order_id, []).append(p)
+    line_ids_by_payment: dict[int, list[int]] = {}
+    pay_ids = [p.id for p in pay_rows if p.id is not None]
+    if pay_ids:
+        alloc_rows = session.exec(
+            select(models.OrderPaymentItem).where(
+                models.OrderPaymentItem.order_payment_id.in_(pay_ids)  # type: ignore[attr-defined]
+            )
+        ).all()
+        for r in alloc_rows:
+            line_ids_by_payment.setdefault(r.order_payment_id, []).append(int(r.order_item_id))
+
+    out: dict[int, dict] = {}
+    for order in orders:
+        if order.id is None:
+            continue
+        active = [
+            i
+            for i in items_by_order.get(order.id, [])
+            if not i.removed_by_customer
+            and i.removed_by_user_id is None
+            and i.status != models.OrderItemStatus.cancelled
+        ]
+        subtotal = sum(i.price_cents * i.quantity for i in active)
+        if _channel_value(order) == models.OrderChannel.satisfecho_delivery.value:
+            from .delivery_order_service import order_delivery_fee_cents
+
+            subtotal = subtotal + order_delivery_fee_cents(order)
+        due = max(0, subtotal - order_level_discount_cents(order)) + int(order.tip_amount_cents or 0)
+        payments = payments_by_order.get(order.id, [])
+        paid = sum(int(p.amount_cents or 0) for p in payments)
+        remaining = max(0, due - paid)
+        taken = {iid for p in payments for iid in line_ids_by_payment.get(p.id, [])}
+        out[order.id] = {
+            "amount_due_cents": due,
+            "amount_paid_cents": paid,
+            "amount_remaining_cents": remaining,
+            "is_fully_paid": remaining == 0 and due > 0 and order.paid_at is not None,
+            "payments": [
+                payment_to_dict(session, p, order_item_ids=line_ids_by_payment.get(p.id, []))
+                for p in payments
+            ],
+            "unallocated_order_item_ids": [
+                i.id for i in active if i.id is not None and i.id not in taken
+            ],
+        }
+    return out
+
+
 def settlement_payment_method(payments: list[models.OrderPayment]) -> str:
     methods = {p.payment_method for p in payments if p.payment_method}
     if len(methods) == 1:
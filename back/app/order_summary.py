@@ -0,0 +1,270 @@
+"""
+Materialized per-order aggregates (``order_summary``).
+
+Staff lists, table history, receipts and reports used to re-aggregate ``OrderItem`` rows on
+every read. An ``after_flush`` hook recomputes the summary row of every order whose row,
+items or payments were written in that flush, in the same transaction, so readers can use
+the precomputed status and totals. ``python -m app.seeds.rebuild_order_summaries``
+backfills or repairs rows; the API also backfills orders without a row at startup
+(``backfill_missing_order_summaries``), so the status rules live in this module only.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Any, Iterable
+
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from . import models
+from .order_discounts import order_level_discount_cents
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_COLUMNS = (
+    "tenant_id",
+    "status",
+    "active_item_count",
+    "removed_items_count",
+    "subtotal_cents",
+    "loyalty_discount_cents",
+    "tip_amount_cents",
+    "total_cents",
+    "amount_due_cents",
+    "amount_paid_cents",
+    "revenue_at",
+    "updated_at",
+)
+
+
+def compute_order_status_from_items(items: list[models.OrderItem]) -> models.OrderStatus:
+    """Compute order status from item statuses (single source of truth)."""
+    if not items:
+        return models.OrderStatus.pending
+
+    # Filter out removed items for status computation (removed by customer OR staff)
+    active_items = [item for item in items if not item.removed_by_customer and item.removed_by_user_id is None]
+    if not active_items:
+        return models.OrderStatus.cancelled
+
+    # Check if all items are delivered
+    all_delivered = all(item.status == models.OrderItemStatus.delivered for item in active_items)
+    if all_delivered:
+        return models.OrderStatus.completed
+
+    # Check if some items are delivered (partial delivery)
+    any_delivered = any(item.status == models.OrderItemStatus.delivered for item in active_items)
+    if any_delivered:
+        return models.OrderStatus.partially_delivered
+
+    # Check if all items are ready
+    all_ready = all(item.status == models.OrderItemStatus.ready for item in active_items)
+    if all_ready:
+        return models.OrderStatus.ready
+
+    # Check if any item is preparing or ready
+    any_preparing_or_ready = any(
+        item.status in [models.OrderItemStatus.preparing, models.OrderItemStatus.ready]
+        for item in active_items
+    )
+    if any_preparing_or_ready:
+        return models.OrderStatus.preparing
+
+    # All items are pending
+    return models.OrderStatus.pending
+
+
+def order_display_status(order: Any, items: Iterable[Any]) -> models.OrderStatus:
+    """Display status from items; paid + fully delivered → completed for Active/History (#345)."""
+    if order.status == models.OrderStatus.cancelled:
+        return models.OrderStatus.cancelled
+    if order.status == models.OrderStatus.out_for_delivery:
+        return models.OrderStatus.out_for_delivery
+    if order.paid_at is not None or order.status == models.OrderStatus.paid:
+        item_status = compute_order_status_from_items(list(items))
+        return (
+            models.OrderStatus.completed
+            if item_status == models.OrderStatus.completed
+            else models.OrderStatus.paid
+        )
+    return compute_order_status_from_items(list(items))
+
+
+def _is_billable(item: Any) -> bool:
+    return (
+        not item.removed_by_customer
+        and item.removed_by_user_id is None
+        and item.status != models.OrderItemStatus.cancelled
+    )
+
+
+def build_summary_values(order: Any, items: list[Any], paid_cents: int) -> dict:
+    """Summary column values for one order (``order`` / ``items`` may be ORM rows or Rows)."""
+    billable = [i for i in items if _is_billable(i)]
+    subtotal = sum(int(i.price_cents) * int(i.quantity) for i in billable)
+    discount = order_level_discount_cents(order)
+    tip = int(order.tip_amount_cents or 0)
+    due_base = subtotal
+    channel = getattr(order, "order_channel", None)
+    channel = channel.value if hasattr(channel, "value") else channel
+    if channel == models.OrderChannel.satisfecho_delivery.value:
+        due_base += max(0, int(getattr(order, "delivery_fee_cents", 0) or 0))
+    return {
+        "tenant_id": order.tenant_id,
+        "status": order_display_status(order, items).value,
+        "active_item_count": len(billable),
+        "removed_items_count": sum(1 for i in items if i.removed_by_customer),
+        "subtotal_cents": subtotal,
+        "loyalty_discount_cents": discount,
+        "tip_amount_cents": tip,
+        "total_cents": max(0, subtotal - discount) + tip,
+        "amount_due_cents": max(0, due_base - discount) + tip,
+        "amount_paid_cents": int(paid_cents or 0),
+        "revenue_at": order.paid_at or order.created_at,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+
+def refresh_order_summaries(conn: Connection, order_ids: Iterable[int]) -> int:
+    """Recompute and upsert summary rows for ``order_ids`` (3 reads + 1 write). Returns rows written."""
+    ids = sorted({int(i) for i in order_ids if i is not None})
+    if not ids:
+        return 0
+    o = models.Order
+    orders = conn.execute(
+        select(
+            o.id,
+            o.tenant_id,
+            o.status,
+            o.paid_at,
+            o.created_at,
+            o.tip_amount_cents,
+            o.loyalty_discount_cents,
+            o.order_channel,
+            o.delivery_fee_cents,
+        ).where(o.id.in_(ids))
+    ).all()
+    if not orders:
+        return 0
+    i = models.OrderItem
+    items_by_order: dict[int, list[Any]] = {}
+    for row in conn.execute(
+        select(
+            i.order_id,
+            i.status,
+            i.removed_by_customer,
+            i.removed_by_user_id,
+            i.price_cents,
+            i.quantity,
+        ).where(i.order_id.in_(ids))
+    ).all():
+        items_by_order.setdefault(row.order_id, []).append(row)
+    p = models.OrderPayment
+    paid_by_order = {
+        row.order_id: int(row.paid or 0)
+        for row in conn.execute(
+            select(p.order_id, func.sum(p.amount_cents).label("paid"))
+            .where(p.order_id.in_(ids), p.voided_at.is_(None))
+            .group_by(p.order_id)
+        ).all()
+    }
+    values = [
+        {
+            "order_id": row.id,
+            **build_summary_values(
+                row, items_by_order.get(row.id, []), paid_by_order.get(row.id, 0)
+            ),
+        }
+        for row in orders
+    ]
+    stmt = pg_insert(models.OrderSummary.__table__).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["order_id"],
+        set_={c: stmt.excluded[c] for c in _SUMMARY_COLUMNS},
+    )
+    conn.execute(stmt)
+    return len(values)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_touched_order_summaries(session: Session, flush_context: object) -> None:
+    """Keep order_summary in step with order, item and payment writes (same transaction)."""
+    order_ids: set[int] = set()
+    # new / dirty / deleted still show the pre-flush state here
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, models.Order):
+            oid = obj.id
+        elif isinstance(obj, (models.OrderItem, models.OrderPayment)):
+            oid = obj.order_id
+        else:
+            continue
+        if oid is None or (obj in session.dirty and not session.is_modified(obj)):
+            continue
+        order_ids.add(oid)
+    for obj in session.deleted:
+        if isinstance(obj, (models.OrderItem, models.OrderPayment)) and obj.order_id is not None:
+            order_ids.add(obj.order_id)
+    if order_ids:
+        refresh_order_summaries(session.connection(), order_ids)
+
+
+def summaries_by_order_id(
+    session: Session, order_ids: Iterable[int]
+) -> dict[int, models.OrderSummary]:
+    ids = list({int(i) for i in order_ids if i is not None})
+    if not ids:
+        return {}
+    # populate_existing: rows are rewritten through Core by the flush hook
+    rows = session.exec(
+        select(models.OrderSummary)
+        .where(models.OrderSummary.order_id.in_(ids))
+        .execution_options(populate_existing=True)
+    ).all()
+    return {r.order_id: r for r in rows}
+
+
+def rebuild_order_summaries(
+    session: Session, *, tenant_id: int | None = None, batch_size: int = 500, missing_only: bool = False
+) -> int:
+    """
+    Backfill / repair summary rows for all orders (optionally one tenant, or only orders
+    without a row). Commits per batch.
+    """
+    last_id = 0
+    total = 0
+    while True:
+        stmt = select(models.Order.id).where(models.Order.id > last_id)
+        if tenant_id is not None:
+            stmt = stmt.where(models.Order.tenant_id == tenant_id)
+        if missing_only:
+            stmt = stmt.where(
+                ~select(models.OrderSummary.order_id)
+                .where(models.OrderSummary.order_id == models.Order.id)
+                .exists()
+            )
+        ids = list(session.exec(stmt.order_by(models.Order.id.asc()).limit(batch_size)).all())
+        if not ids:
+            return total
+        total += refresh_order_summaries(session.connection(), ids)
+        session.commit()
+        last_id = ids[-1]
+
+
+def backfill_missing_order_summaries() -> int:
+    """Write summary rows for orders that have none (startup, after the table was added)."""
+    from .db import engine
+
+    try:
+        with Session(engine) as session:
+            n = rebuild_order_summaries(session, missing_only=True)
+    except Exception as e:
+        logger.warning("Order summary backfill failed: %s", e, exc_info=True)
+        return 0
+    if n:
+        logger.info("Order summary backfill: %d order(s)", n)
+    return n
@@ -11,6 +11,7 @@ from fastapi import HTTPException
 from sqlmodel import Session, select
 
 from . import models
+from .order_summary import summaries_by_order_id
 
 # Agent considered online if heartbeat within this window.
 AGENT_ONLINE_SECONDS = 60
@@ -210,7 +211,8 @@ def _build_order_payload(session: Session, order: models.Order, job_type: str) -
             }
         )
     table_name = _order_table_name(session, order)
-    total_cents = _order_total_cents(items, order)
+    summary = summaries_by_order_id(session, [order.id]).get(order.id)
+    total_cents = summary.total_cents if summary is not None else _order_total_cents(items, order)
     title = "KITCHEN" if job_type == "kitchen" else "RECEIPT"
     plain_lines = [
         title,
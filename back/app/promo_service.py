@@ -1,8 +1,17 @@
-"""Price promotions engine (#322): %-off category with time/channel eligibility."""
+"""
+Price promotions engine (#322): %-off category with time/channel eligibility.
+
+Menu rendering and order pricing go through ``promo_index``: for one tenant and channel,
+the best live promo per category plus the next instant a promo window opens or closes.
+Indexes are cached per worker until that instant or until the tenant's menu version
+changes (promotion writes bump it, see menu_cache.py).
+"""
 
 from __future__ import annotations
 
-from datetime import datetime, time, timezone
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
 from typing import Any
 from zoneinfo import ZoneInfo
 
@@ -10,6 +19,7 @@ from fastapi import HTTPException
 from sqlmodel import Session, select
 
 from app import models
+from app.menu_cache import has_uncommitted_menu_writes, menu_versions
 
 
 PROMO_TYPE_PERCENT_OFF_CATEGORY = "percent_off_category"
@@ -165,6 +175,153 @@ def pick_best_percent_promo(
     return matches[0]
 
 
+@dataclass(frozen=True)
+class LivePromo:
+    """Plain copy of a live promotion (safe to share between sessions)."""
+
+    id: int
+    name: str
+    promo_type: str
+    percent_off: int
+    category: str
+    stackable: bool
+
+
+@dataclass(frozen=True)
+class PromoIndex:
+    """Best live percent-off promo per normalized category, for one tenant and channel."""
+
+    best_by_category: dict[str, LivePromo]
+    # Ids of all live promos (cache keys / ETags)
+    promo_ids: tuple[int, ...]
+    compiled_at: datetime
+    # UTC; next instant a promo window opens or closes (None: none ahead)
+    valid_until: datetime | None
+
+    def best_for(self, product_category: str | None) -> LivePromo | None:
+        return self.best_by_category.get(_normalize_category(product_category))
+
+    def is_current(self, now_utc: datetime) -> bool:
+        return self.compiled_at <= now_utc and (self.valid_until is None or now_utc < self.valid_until)
+
+
+# Inclusive window ends (``<=``) stop matching just after the end instant
+_AFTER = timedelta(microseconds=1)
+PROMO_INDEX_MAX_ENTRIES = 1024
+
+_index_lock = threading.Lock()
+# (tenant_id, channel, timezone) -> (menu versions, index)
+_indexes: dict[tuple[int, str, str], tuple[tuple[int, int], PromoIndex]] = {}
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _next_window_boundary(promo: models.PricePromotion, local_now: datetime) -> datetime | None:
+    """First UTC instant after ``local_now`` at which ``_window_ok`` may change for ``promo``."""
+    now_utc = local_now.astimezone(timezone.utc)
+    candidates: list[datetime] = []
+    if promo.starts_at is not None:
+        candidates.append(_as_utc(promo.starts_at))
+    if promo.ends_at is not None:
+        candidates.append(_as_utc(promo.ends_at) + _AFTER)
+    tz = local_now.tzinfo
+    today = local_now.date()
+    if isinstance(promo.days_of_week, list) and promo.days_of_week:
+        candidates.append(datetime.combine(today + timedelta(days=1), time(0), tzinfo=tz))
+    for t, shift in (
+        (_soft_hhmm(promo.start_time_local), timedelta(0)),
+        (_soft_hhmm(promo.end_time_local), _AFTER),
+    ):
+        if t is None:
+            continue
+        for day in (today, today + timedelta(days=1)):
+            at = datetime.combine(day, t, tzinfo=tz) + shift
+            if at > local_now:
+                candidates.append(at)
+                break
+    ahead = [_as_utc(c) for c in candidates if _as_utc(c) > now_utc]
+    return min(ahead) if ahead else None
+
+
+def compile_promo_index(
+    promos: list[models.PricePromotion],
+    *,
+    channel: str | None,
+    local_now: datetime,
+) -> PromoIndex:
+    """Index of ``promos`` (enabled rows of one tenant) at ``local_now`` for ``channel``."""
+    best: dict[str, LivePromo] = {}
+    live_ids: list[int] = []
+    boundaries: list[datetime] = []
+    for promo in promos:
+        if promo.promo_type != PROMO_TYPE_PERCENT_OFF_CATEGORY or not _channel_ok(promo, channel):
+            continue
+        boundary = _next_window_boundary(promo, local_now)
+        if boundary is not None:
+            boundaries.append(boundary)
+        if not _window_ok(promo, local_now):
+            continue
+        live_ids.append(int(promo.id or 0))
+        key = _normalize_category(promo.category)
+        current = best.get(key)
+        # Same policy as pick_best_percent_promo: highest percent_off, ties by lowest id
+        if current is None or (-int(promo.percent_off), int(promo.id or 0)) < (
+            -current.percent_off,
+            current.id,
+        ):
+            best[key] = LivePromo(
+                id=int(promo.id or 0),
+                name=promo.name,
+                promo_type=promo.promo_type,
+                percent_off=int(promo.percent_off),
+                category=promo.category,
+                stackable=bool(promo.stackable),
+            )
+    return PromoIndex(
+        best_by_category=best,
+        promo_ids=tuple(sorted(live_ids)),
+        compiled_at=local_now.astimezone(timezone.utc),
+        valid_until=min(boundaries) if boundaries else None,
+    )
+
+
+def promo_index(
+    session: Session,
+    *,
+    tenant_id: int,
+    channel: str | None = None,
+    now_utc: datetime | None = None,
+) -> PromoIndex:
+    """Cached ``compile_promo_index`` for the tenant's enabled promotions at ``now_utc``."""
+    tenant = session.get(models.Tenant, tenant_id)
+    local_now = _tenant_now(tenant, now_utc)
+    now = local_now.astimezone(timezone.utc)
+    ch = (channel or models.OrderChannel.table.value).strip().lower()
+    key = (tenant_id, ch, str(local_now.tzinfo))
+    versions = menu_versions(session, tenant_id)
+    with _index_lock:
+        hit = _indexes.get(key)
+    if hit is not None and hit[0] == versions and hit[1].is_current(now):
+        return hit[1]
+    index = compile_promo_index(list_enabled_promos(session, tenant_id), channel=ch, local_now=local_now)
+    if has_uncommitted_menu_writes(session):
+        return index
+    with _index_lock:
+        if len(_indexes) >= PROMO_INDEX_MAX_ENTRIES:
+            _indexes.clear()
+        _indexes[key] = (versions, index)
+    return index
+
+
+def clear_promo_indexes() -> None:
+    with _index_lock:
+        _indexes.clear()
+
+
 def apply_percent_off(list_price_cents: int, percent_off: int) -> tuple[int, int]:
     """Return (discounted_unit_price, unit_discount_cents)."""
     list_price = max(0, int(list_price_cents))
@@ -174,7 +331,7 @@ def apply_percent_off(list_price_cents: int, percent_off: int) -> tuple[int, int
     return paid, discount
 
 
-def promo_snapshot(promo: models.PricePromotion) -> dict[str, Any]:
+def promo_snapshot(promo: models.PricePromotion | LivePromo) -> dict[str, Any]:
     return {
         "id": promo.id,
         "name": promo.name,
@@ -194,12 +351,21 @@ def resolve_line_price(
     channel: str | None = None,
     now_utc: datetime | None = None,
     eligible: list[models.PricePromotion] | None = None,
+    index: PromoIndex | None = None,
 ) -> dict[str, Any]:
-    """Apply best eligible promo to a unit list price. Returns price + audit fields."""
-    promos = eligible if eligible is not None else eligible_promos(
-        session, tenant_id=tenant_id, channel=channel, now_utc=now_utc
-    )
-    best = pick_best_percent_promo(promos, product_category=product_category)
+    """
+    Apply best eligible promo to a unit list price. Returns price + audit fields.
+
+    Pass ``index`` (from ``promo_index``) when pricing several lines; ``eligible`` is the
+    older list form and is scanned per call.
+    """
+    best: models.PricePromotion | LivePromo | None
+    if eligible is not None:
+        best = pick_best_percent_promo(eligible, product_category=product_category)
+    else:
+        if index is None:
+            index = promo_index(session, tenant_id=tenant_id, channel=channel, now_utc=now_utc)
+        best = index.best_for(product_category)
     if best is None:
         return {
             "price_cents": max(0, int(list_price_cents)),
@@ -227,6 +393,7 @@ def decorate_menu_product(
     product: dict[str, Any],
     channel: str | None = None,
     eligible: list[models.PricePromotion] | None = None,
+    index: PromoIndex | None = None,
 ) -> dict[str, Any]:
     """Mutate/return menu product dict with live promo pricing fields."""
     list_price = int(product.get("price_cents") or 0)
@@ -238,6 +405,7 @@ def decorate_menu_product(
         product_category=category if isinstance(category, str) else None,
         channel=channel,
         eligible=eligible,
+        index=index,
     )
     if applied["promo_id"] is None:
         product["list_price_cents"] = None
@@ -1,29 +1,52 @@
-"""Provider product image paths: only expose URLs/refs when the file exists on disk."""
+"""
+Provider product image paths.
+
+``ProviderProduct.image_filename`` (and ``Product.image_filename`` values under
+``providers/``) are only set once the file is stored, and cleared when it is deleted, so
+URL building trusts the column and never touches the disk. Files that disappear some
+other way (restored database, lost volume, seed data without images) are picked up by
+``clear_orphan_provider_product_images``, which ``provider_image_reconcile_loop`` runs
+at startup and every ``RECONCILE_INTERVAL_SECONDS``.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
 from pathlib import Path
 
-from sqlmodel import Session, select
+from sqlmodel import Session, select, update
 
 from app import models
+from app.menu_cache import bump_menu_versions, catalog_menu_scopes
+
+logger = logging.getLogger(__name__)
 
 UPLOADS_DIR = Path(__file__).parent.parent / "uploads"
 
+# How often each API process reconciles image refs against the disk
+RECONCILE_INTERVAL_SECONDS = 3600
+
 
 def provider_product_file_path(provider_token: str, image_filename: str) -> Path:
     """Absolute path for a provider product image file."""
     return UPLOADS_DIR / "providers" / provider_token / "products" / image_filename
 
 
-def provider_product_image_url(provider_token: str, image_filename: str | None) -> str | None:
-    """Public /uploads URL when image_filename is set and the file exists; else None."""
+def _safe_filename(image_filename: str | None) -> str | None:
     if not image_filename:
         return None
     fn = image_filename.replace("\\", "/").strip("/")
-    if "/" in fn or fn.startswith("."):
+    if not fn or "/" in fn or fn.startswith("."):
         return None
-    if not provider_product_file_path(provider_token, fn).is_file():
+    return fn
+
+
+def provider_product_image_url(provider_token: str, image_filename: str | None) -> str | None:
+    """Public /uploads URL when image_filename is set (a stored file); else None."""
+    fn = _safe_filename(image_filename)
+    if fn is None:
         return None
     return f"/uploads/providers/{provider_token}/products/{fn}"
 
@@ -31,54 +54,156 @@ def provider_product_image_url(provider_token: str, image_filename: str | None)
 def provider_product_stored_image_path(
     provider_token: str, image_filename: str | None
 ) -> str | None:
-    """Relative path stored on Product.image_filename when the file exists; else None."""
-    if not image_filename:
-        return None
-    fn = image_filename.replace("\\", "/").strip("/")
-    if "/" in fn or fn.startswith("."):
-        return None
-    if not provider_product_file_path(provider_token, fn).is_file():
+    """Relative path stored on Product.image_filename when image_filename is set; else None."""
+    fn = _safe_filename(image_filename)
+    if fn is None:
         return None
     return f"providers/{provider_token}/products/{fn}"
 
 
+def clear_provider_image_refs(session: Session, stored_path: str) -> None:
+    """
+    Clear every ref to ``providers/{token}/products/{file}`` after that file was deleted
+    (the ProviderProduct and the tenant products copied from it). Caller commits.
+    """
+    parts = stored_path.replace("\\", "/").strip("/").split("/")
+    if len(parts) != 4 or parts[0] != "providers" or parts[2] != "products":
+        return
+    scopes: set[int] = set()
+    provider = session.exec(
+        select(models.Provider).where(models.Provider.token == parts[1])
+    ).first()
+    if provider is not None:
+        pp_ids = session.exec(
+            select(models.ProviderProduct.id).where(
+                models.ProviderProduct.provider_id == provider.id,
+                models.ProviderProduct.image_filename == parts[3],
+            )
+        ).all()
+        if pp_ids:
+            session.exec(
+                update(models.ProviderProduct)
+                .where(
+                    models.ProviderProduct.id.in_(pp_ids),
+                    models.ProviderProduct.image_filename == parts[3],
+                )
+                .values(image_filename=None)
+            )
+            scopes.update(catalog_menu_scopes(session, provider_product_ids=pp_ids))
+    stored_path = "/".join(parts)
+    tenant_ids = session.exec(
+        select(models.Product.tenant_id).where(models.Product.image_filename == stored_path)
+    ).all()
+    if tenant_ids:
+        session.exec(
+            update(models.Product)
+            .where(models.Product.image_filename == stored_path)
+            .values(image_filename=None)
+        )
+        scopes.update(tenant_ids)
+    # Bulk UPDATE skips the flush hook that versions the menu
+    bump_menu_versions(session, scopes)
+
+
+def _list_files(directory: Path) -> frozenset[str]:
+    try:
+        with os.scandir(directory) as entries:
+            return frozenset(e.name for e in entries if e.is_file())
+    except OSError:
+        return frozenset()
+
+
 def clear_orphan_provider_product_images(session: Session) -> dict[str, int]:
     """
     Clear ProviderProduct.image_filename (and Product refs under providers/) when the file is missing.
 
-    Idempotent. Does not delete rows or files that exist.
+    Idempotent. Does not delete rows or files that exist. Lists each provider directory once;
+    rows are read before the listing (an upload stores its file before committing the row)
+    and only cleared if they still hold the value that was checked.
     """
     providers = {p.id: p for p in session.exec(select(models.Provider)).all()}
-    cleared_pp = 0
-    for pp in session.exec(
-        select(models.ProviderProduct).where(models.ProviderProduct.image_filename.is_not(None))
-    ).all():
-        provider = providers.get(pp.provider_id)
-        if not provider or not pp.image_filename:
+    pp_rows = session.exec(
+        select(models.ProviderProduct.id, models.ProviderProduct.provider_id, models.ProviderProduct.image_filename)
+        .where(models.ProviderProduct.image_filename.is_not(None))
+    ).all()
+    product_rows = session.exec(
+        select(models.Product.id, models.Product.tenant_id, models.Product.image_filename).where(
+            models.Product.image_filename.like("providers/%")
+        )
+    ).all()
+
+    listings: dict[str, frozenset[str]] = {}
+
+    def stored(token: str, fn: str) -> bool:
+        if token not in listings:
+            listings[token] = _list_files(UPLOADS_DIR / "providers" / token / "products")
+        return fn in listings[token]
+
+    cleared_pp_ids: list[int] = []
+    for pp_id, provider_id, image_filename in pp_rows:
+        provider = providers.get(provider_id)
+        if not provider or not image_filename:
             continue
-        fn = pp.image_filename.replace("\\", "/").strip("/")
-        if "/" in fn or fn.startswith(".") or not provider_product_file_path(provider.token, fn).is_file():
-            pp.image_filename = None
-            session.add(pp)
-            cleared_pp += 1
+        fn = _safe_filename(image_filename)
+        if fn is None or not stored(provider.token, fn):
+            result = session.exec(
+                update(models.ProviderProduct)
+                .where(
+                    models.ProviderProduct.id == pp_id,
+                    models.ProviderProduct.image_filename == image_filename,
+                )
+                .values(image_filename=None)
+            )
+            if result.rowcount:
+                cleared_pp_ids.append(pp_id)
 
     cleared_product = 0
-    for product in session.exec(
-        select(models.Product).where(models.Product.image_filename.is_not(None))
-    ).all():
-        fn = (product.image_filename or "").replace("\\", "/").strip("/")
-        if not fn.startswith("providers/"):
+    scopes: set[int] = set()
+    for product_id, tenant_id, image_filename in product_rows:
+        parts = (image_filename or "").replace("\\", "/").strip("/").split("/")
+        if len(parts) == 4 and parts[2] == "products" and _safe_filename(parts[3]):
+            if stored(parts[1], parts[3]):
+                continue
+        elif (UPLOADS_DIR / "/".join(parts)).is_file():
             continue
-        path = UPLOADS_DIR / fn
-        if not path.is_file():
-            product.image_filename = None
-            session.add(product)
-            cleared_product += 1
-
-    if cleared_pp or cleared_product:
+        result = session.exec(
+            update(models.Product)
+            .where(models.Product.id == product_id, models.Product.image_filename == image_filename)
+            .values(image_filename=None)
+        )
+        if result.rowcount:
+            cleared_product += result.rowcount
+            scopes.add(tenant_id)
+
+    if cleared_pp_ids or cleared_product:
+        scopes.update(catalog_menu_scopes(session, provider_product_ids=cleared_pp_ids))
+        # Bulk UPDATE skips the flush hook that versions the menu
+        bump_menu_versions(session, scopes)
         session.commit()
 
     return {
-        "provider_products_cleared": cleared_pp,
+        "provider_products_cleared": len(cleared_pp_ids),
         "products_cleared": cleared_product,
     }
+
+
+def _reconcile_sync() -> dict[str, int]:
+    from .db import engine
+
+    with Session(engine) as session:
+        return clear_orphan_provider_product_images(session)
+
+
+async def provider_image_reconcile_loop(stop: asyncio.Event | None = None) -> None:
+    stop_ev = stop or asyncio.Event()
+    while not stop_ev.is_set():
+        try:
+            stats = await asyncio.to_thread(_reconcile_sync)
+            if any(stats.values()):
+                logger.info("Provider image reconciliation: %s", stats)
+        except Exception as e:
+            logger.warning("Provider image reconciliation failed: %s", e, exc_info=True)
+        try:
+            await asyncio.wait_for(stop_ev.wait(), timeout=float(RECONCILE_INTERVAL_SECONDS))
+        except asyncio.TimeoutError:
+            pass
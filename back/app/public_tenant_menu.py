@@ -12,6 +12,9 @@ from sqlmodel import Session, select
 from . import models
 from . import promo_service as promo_svc
 from .category_codes import get_public_category_display_label
+from .http_cache import make_etag
+from .image_renditions import srcset_for_upload_url
+from .menu_cache import menu_versions
 from .tenant_currency import normalize_tenant_currency_fields
 from .translation_service import TranslationService
 
@@ -124,49 +127,23 @@ def _resolve_tenant_product_image(
 
 
 def _translated_name(
-    session: Session,
-    tenant_id: int,
+    translations: dict[tuple[str, int, str], str],
     entity_type: str,
     entity_id: int,
     canonical: str,
-    lang: str,
 ) -> str:
-    if lang == "en":
-        return canonical
-    translated = TranslationService.get_translated_field(
-        session,
-        tenant_id,
-        entity_type,
-        entity_id,
-        "name",
-        lang,
-        canonical,
-    )
-    return translated or canonical
+    return translations.get((entity_type, entity_id, "name")) or canonical
 
 
 def _translated_description(
-    session: Session,
-    tenant_id: int,
+    translations: dict[tuple[str, int, str], str],
     entity_type: str,
     entity_id: int,
     canonical: str | None,
-    lang: str,
 ) -> str | None:
     if not canonical:
         return None
-    if lang == "en":
-        return canonical
-    translated = TranslationService.get_translated_field(
-        session,
-        tenant_id,
-        entity_type,
-        entity_id,
-        "description",
-        lang,
-        canonical,
-    )
-    return translated or canonical
+    return translations.get((entity_type, entity_id, "description")) or canonical
 
 
 def _load_flat_products(
@@ -207,13 +184,35 @@ def _load_flat_products(
         tp.product_id for tp in tenant_products if tp.product_id is not None
     }
 
+    catalog_ids = {tp.catalog_id for tp in tenant_products if tp.catalog_id is not None}
+    catalog_by_id = (
+        {
+            c.id: c
+            for c in session.exec(
+                select(models.ProductCatalog).where(models.ProductCatalog.id.in_(catalog_ids))
+            ).all()
+        }
+        if catalog_ids
+        else {}
+    )
+    linked_product_by_id = (
+        {
+            p.id: p
+            for p in session.exec(
+                select(models.Product).where(models.Product.id.in_(linked_legacy_product_ids))
+            ).all()
+        }
+        if linked_legacy_product_ids
+        else {}
+    )
+
+    # (tp, catalog item, canonical description, translation entity of the description)
+    rows: list[tuple[models.TenantProduct, models.ProductCatalog | None, str | None, str, int]] = []
     for tp in tenant_products:
-        catalog_item = session.get(models.ProductCatalog, tp.catalog_id)
-        category = catalog_item.category if catalog_item else None
-        subcategory = catalog_item.subcategory if catalog_item else None
+        catalog_item = catalog_by_id.get(tp.catalog_id)
         description = None
         if tp.product_id:
-            custom_product = session.get(models.Product, tp.product_id)
+            custom_product = linked_product_by_id.get(tp.product_id)
             if custom_product and custom_product.description:
                 description = custom_product.description
         if not description and catalog_item and catalog_item.description:
@@ -224,57 +223,60 @@ def _load_flat_products(
         if tp.product_id and description:
             entity_type = "product"
             entity_id = tp.product_id
+        rows.append((tp, catalog_item, description, entity_type, entity_id))
 
-        name = _translated_name(
-            session, tenant_id, "tenant_product", tp.id, tp.name or "", lang
-        )
-        description = _translated_description(
-            session,
-            tenant_id,
-            entity_type,
-            entity_id,
-            description,
-            lang,
-        )
+    legacy_rows = [lp for lp in legacy_products if lp.id not in linked_legacy_product_ids]
 
+    translations: dict[tuple[str, int, str], str] = {}
+    if lang != "en":
+        keys: list[tuple[str, int, str]] = []
+        for tp, _catalog_item, description, entity_type, entity_id in rows:
+            keys.append(("tenant_product", tp.id, "name"))
+            if description:
+                keys.append((entity_type, entity_id, "description"))
+        for lp in legacy_rows:
+            keys += [("product", lp.id, "name"), ("product", lp.id, "description")]
+        translations = TranslationService.get_translations_bulk(session, tenant_id, lang, keys)
+
+    for tp, catalog_item, description, entity_type, entity_id in rows:
+        image_url = _resolve_tenant_product_image(session, tenant_id, tp)
         products.append(
             {
                 "id": tp.id,
-                "name": name,
+                "name": _translated_name(translations, "tenant_product", tp.id, tp.name or ""),
                 "price_cents": tp.price_cents,
                 "price_formatted": format_public_price(tp.price_cents, lang),
-                "description": description,
-                "category": category,
-                "subcategory": subcategory,
-                "image_url": _resolve_tenant_product_image(session, tenant_id, tp),
+                "description": _translated_description(
+                    translations, entity_type, entity_id, description
+                ),
+                "category": catalog_item.category if catalog_item else None,
+                "subcategory": catalog_item.subcategory if catalog_item else None,
+                "image_url": image_url,
+                "image_srcset": srcset_for_upload_url(image_url),
                 "available": True,
             }
         )
 
-    for lp in legacy_products:
-        if lp.id in linked_legacy_product_ids:
-            continue
-        name = _translated_name(
-            session, tenant_id, "product", lp.id, lp.name or "", lang
-        )
-        description = _translated_description(
-            session, tenant_id, "product", lp.id, lp.description, lang
-        )
+    for lp in legacy_rows:
+        image_url = resolve_product_image_url(tenant_id, lp.image_filename)
         products.append(
             {
                 "id": lp.id,
-                "name": name,
+                "name": _translated_name(translations, "product", lp.id, lp.name or ""),
                 "price_cents": lp.price_cents,
                 "price_formatted": format_public_price(lp.price_cents, lang),
-                "description": description,
+                "description": _translated_description(
+                    translations, "product", lp.id, lp.description
+                ),
                 "category": lp.category,
                 "subcategory": lp.subcategory,
-                "image_url": resolve_product_image_url(tenant_id, lp.image_filename),
+                "image_url": image_url,
+                "image_srcset": srcset_for_upload_url(image_url),
                 "available": True,
             }
         )
 
-    eligible = promo_svc.eligible_promos(
+    promos = promo_svc.promo_index(
         session,
         tenant_id=tenant_id,
         channel=models.OrderChannel.table.value,
@@ -285,7 +287,7 @@ def _load_flat_products(
             tenant_id=tenant_id,
             product=product,
             channel=models.OrderChannel.table.value,
-            eligible=eligible,
+            index=promos,
         )
         if product.get("list_price_cents") is not None:
             product["price_formatted"] = format_public_price(product["price_cents"], lang)
@@ -379,6 +381,31 @@ def group_products_into_categories(products: list[dict], lang: str = "en") -> li
     return categories
 
 
+def public_tenant_menu_etag(
+    session: Session, tenant: models.Tenant, lang: str
+) -> tuple[str, datetime | None]:
+    """
+    ETag of ``build_public_tenant_menu`` without building it (menu versions, the tenant
+    fields it reads, the local date and the promos live right now), and the UTC instant the
+    live promos change (None: no window ahead).
+    """
+    promos = promo_svc.promo_index(
+        session, tenant_id=tenant.id, channel=models.OrderChannel.table.value
+    )
+    etag = make_etag(
+        "public-tenant-menu",
+        tenant.id,
+        lang,
+        menu_versions(session, tenant.id),
+        tenant.name,
+        tenant.currency_code,
+        tenant.currency,
+        _tenant_today(tenant),
+        promos.promo_ids,
+    )
+    return etag, promos.valid_until
+
+
 def build_public_tenant_menu(
     session: Session,
     tenant_id: int,
@@ -0,0 +1,223 @@
+"""
+Transactional outbox for real-time (ws-bridge) events.
+
+``publish_order_update`` / ``publish_reservation_update`` stage a ``realtime_outbox`` row in
+the caller's session, so the event commits or rolls back together with the change it
+describes. The relay worker drains committed rows, publishes each batch to Redis with
+pipelined commands and deletes the rows in the same transaction: delivery is at-least-once
+and never precedes the commit. If Redis is down, rows wait and are sent when it comes back.
+
+There is no global ordering. Row ids are taken at insert, not at commit, so a transaction
+that commits late publishes after events with higher ids; only the events of one
+transaction keep their relative order. Consumers must not rely on arrival order: order
+events carry ``version`` / ``base_version`` (order_delta.py) and a client that sees a gap
+reloads through GET /orders/changes, whose cursor is commit-safe; other events are
+refresh hints.
+
+Rows on ``kds-fanout:{tenant_id}`` are expanded by the relay into the per-display KDS
+channels (see kds_realtime.py), so writers do not query items and stations.
+
+Each event is also appended to a capped Redis Stream per WebSocket scope
+(``events:tenant:{id}`` for staff, ``events:table:{id}`` for customers). The published
+message carries the stream entry id as ``event_id`` so ws-bridge can replay the gap when
+a client reconnects with ``last_event_id``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Iterable
+
+from sqlalchemy import delete, event, func
+from sqlmodel import Session, select
+
+from app import models
+from app.db import engine
+
+logger = logging.getLogger(__name__)
+
+RELAY_BATCH_SIZE = 200
+# Fallback poll (other workers' commits, missed wake-ups)
+RELAY_IDLE_SECONDS = 1.0
+RELAY_ERROR_BACKOFF_SECONDS = 2.0
+# pg advisory lock key: one relay drains at a time (no duplicate sends across workers)
+_RELAY_LOCK_KEY = 0x5EA1_0B0C
+
+# Replay window per stream (approximate trim) and idle expiry of per-table streams
+STREAM_MAXLEN = int(os.getenv("REALTIME_STREAM_MAXLEN", "1000"))
+STREAM_TTL_SECONDS = 24 * 3600
+
+_PENDING_KEY = "realtime_outbox_pending"
+
+_wake_lock = threading.Lock()
+_wake_loop: asyncio.AbstractEventLoop | None = None
+_wake_event: asyncio.Event | None = None
+
+
+def stage_event(session: Session, channels: Iterable[str], payload: dict) -> None:
+    """Add an event to ``session``; it is published after the caller commits."""
+    chans = [c for c in channels if c]
+    if not chans:
+        return
+    session.add(models.RealtimeOutbox(channels=chans, payload=json.dumps(payload)))
+    session.info[_PENDING_KEY] = True
+
+
+def write_event(channels: Iterable[str], payload: dict) -> None:
+    """Stage and commit an event in its own transaction (callers without a session)."""
+    with Session(engine) as session:
+        stage_event(session, channels, payload)
+        session.commit()
+
+
+def _wake_relay() -> None:
+    with _wake_lock:
+        loop, ev = _wake_loop, _wake_event
+    if loop is None or ev is None:
+        return
+    try:
+        loop.call_soon_threadsafe(ev.set)
+    except RuntimeError:
+        pass  # Loop closed during shutdown
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        _wake_relay()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def stream_key_for_channel(channel: str) -> str | None:
+    """
+    orders:tenant:1 / reservations:tenant:1 -> events:tenant:1; orders:table:7 -> events:table:7;
+    kds:1:station:3 -> events:kds:1:station:3.
+    """
+    parts = channel.split(":")
+    if len(parts) == 3 and parts[1] in ("tenant", "table"):
+        return f"events:{parts[1]}:{parts[2]}"
+    if len(parts) == 4 and parts[0] == "kds":
+        return f"events:{channel}"
+    return None
+
+
+def with_event_id(payload: str, event_id: str) -> str:
+    """Add ``event_id`` to a JSON object payload without re-encoding it."""
+    if not payload.startswith("{"):
+        return payload
+    head = '{"event_id": ' + json.dumps(event_id)
+    rest = payload[1:].lstrip()
+    return head + ("}" if rest.startswith("}") else ", " + rest)
+
+
+def _publish_targets(session: Session, rows: list[models.RealtimeOutbox]) -> list[tuple[str, str]]:
+    """``(channel, payload)`` per row and channel, KDS fan-out rows expanded in place."""
+    from app.kds_realtime import expand_kds_fanout, fanout_tenant_id
+
+    fanout = [
+        (tenant_id, json.loads(row.payload))
+        for row in rows
+        for tenant_id in (fanout_tenant_id(c) for c in row.channels)
+        if tenant_id is not None
+    ]
+    expanded = iter(expand_kds_fanout(session, fanout) if fanout else [])
+    targets: list[tuple[str, str]] = []
+    for row in rows:
+        for channel in row.channels:
+            if fanout_tenant_id(channel) is None:
+                targets.append((channel, row.payload))
+            else:
+                targets.extend((c, json.dumps(p)) for c, p in next(expanded))
+    return targets
+
+
+def _publish_rows(redis_client, targets: list[tuple[str, str]]) -> None:
+    pipe = redis_client.pipeline(transaction=False)
+    streamed: list[int] = []
+    for i, (channel, payload) in enumerate(targets):
+        key = stream_key_for_channel(channel)
+        if key is None:
+            continue
+        pipe.xadd(key, {"channel": channel, "payload": payload}, maxlen=STREAM_MAXLEN, approximate=True)
+        pipe.expire(key, STREAM_TTL_SECONDS)
+        streamed.append(i)
+    event_ids: dict[int, str] = {}
+    if streamed:
+        results = pipe.execute()
+        for i, entry_id in zip(streamed, results[::2]):
+            event_ids[i] = entry_id.decode() if isinstance(entry_id, bytes) else str(entry_id)
+        pipe = redis_client.pipeline(transaction=False)
+    for i, (channel, payload) in enumerate(targets):
+        eid = event_ids.get(i)
+        pipe.publish(channel, with_event_id(payload, eid) if eid else payload)
+    pipe.execute()
+
+
+def relay_batch(session: Session, redis_client, batch_size: int = RELAY_BATCH_SIZE) -> int:
+    """
+    Publish and delete up to ``batch_size`` committed events, lowest id first (not commit
+    order, see the module docstring). Returns rows relayed.
+    """
+    locked = session.exec(select(func.pg_try_advisory_xact_lock(_RELAY_LOCK_KEY))).one()
+    if not locked:
+        session.rollback()
+        return 0
+    rows = session.exec(
+        select(models.RealtimeOutbox).order_by(models.RealtimeOutbox.id.asc()).limit(batch_size)
+    ).all()
+    if not rows:
+        session.rollback()
+        return 0
+    _publish_rows(redis_client, _publish_targets(session, list(rows)))
+    session.exec(
+        delete(models.RealtimeOutbox).where(models.RealtimeOutbox.id.in_([r.id for r in rows]))
+    )
+    session.commit()
+    return len(rows)
+
+
+def _drain_sync() -> int:
+    from app.main import get_redis
+
+    r = get_redis()
+    if r is None:
+        return 0
+    total = 0
+    with Session(engine) as session:
+        while True:
+            n = relay_batch(session, r)
+            total += n
+            if n < RELAY_BATCH_SIZE:
+                return total
+
+
+async def realtime_outbox_relay_loop(stop: asyncio.Event | None = None) -> None:
+    global _wake_loop, _wake_event
+    stop_ev = stop or asyncio.Event()
+    wake = asyncio.Event()
+    with _wake_lock:
+        _wake_loop, _wake_event = asyncio.get_running_loop(), wake
+    try:
+        while not stop_ev.is_set():
+            wake.clear()
+            delay = RELAY_IDLE_SECONDS
+            try:
+                await asyncio.to_thread(_drain_sync)
+            except Exception as e:
+                logger.warning("Realtime outbox relay failed: %s", e, exc_info=True)
+                delay = RELAY_ERROR_BACKOFF_SECONDS
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with _wake_lock:
+            _wake_loop, _wake_event = None, None
@@ -13,6 +13,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_
 from sqlmodel import Session, select
 
 from . import models
@@ -63,6 +64,42 @@ def _waiter_name_for_order_tips(session: Session, order: models.Order) -> str:
     return "Unassigned"
 
 
+def _revenue_orders(
+    session: Session,
+    tenant_id: int,
+    from_date: date,
+    to_date: date,
+    *,
+    tips_only: bool = False,
+) -> list[models.Order]:
+    """
+    Revenue-status orders whose revenue date falls in the range (order_summary.revenue_at;
+    paid_at / created_at for an order whose summary row is not written yet).
+    """
+    # One day of slack each side for non-UTC session time zones; _in_range is exact.
+    start = datetime.combine(from_date - timedelta(days=1), time.min, tzinfo=timezone.utc)
+    end = datetime.combine(to_date + timedelta(days=2), time.min, tzinfo=timezone.utc)
+    O, S = models.Order, models.OrderSummary
+    fallback_at = func.coalesce(O.paid_at, O.created_at)
+    stmt = (
+        select(O)
+        .outerjoin(S, S.order_id == O.id)
+        .where(O.tenant_id == tenant_id)
+        .where(
+            or_(
+                and_(S.revenue_at >= start, S.revenue_at < end),
+                and_(S.order_id.is_(None), fallback_at >= start, fallback_at < end),
+            )
+        )
+        .where(O.deleted_at.is_(None))
+        .where(O.status.in_([s.value for s in REVENUE_STATUSES]))
+    )
+    if tips_only:
+        stmt = stmt.where(func.coalesce(S.tip_amount_cents, O.tip_amount_cents, 0) > 0)
+    orders = session.exec(stmt.order_by(models.Order.created_at.asc(), models.Order.id.asc())).all()
+    return [o for o in orders if _in_range(_revenue_date(o), from_date, to_date)]
+
+
 def _get_revenue_items(
     session: Session,
     tenant_id: int,
@@ -70,40 +107,65 @@ def _get_revenue_items(
     to_date: date,
 ):
     """Load orders and items that count toward revenue in the date range."""
-    orders = session.exec(
-        select(models.Order)
-        .where(models.Order.tenant_id == tenant_id)
-        .where(models.Order.deleted_at.is_(None))
-        .where(models.Order.status.in_([s.value for s in REVENUE_STATUSES]))
-        .order_by(models.Order.created_at.asc())
-    ).all()
+    orders = _revenue_orders(session, tenant_id, from_date, to_date)
+    order_ids = [o.id for o in orders]
+    items_by_order: dict[int, list[models.OrderItem]] = defaultdict(list)
+    if order_ids:
+        for item in session.exec(
+            select(models.OrderItem)
+            .where(models.OrderItem.order_id.in_(order_ids))
+            .where(models.OrderItem.removed_by_customer == False)
+            .where(models.OrderItem.status != models.OrderItemStatus.cancelled)
+            .order_by(models.OrderItem.id.asc())
+        ).all():
+            items_by_order[item.order_id].append(item)
+
+    table_ids = {o.table_id for o in orders if o.table_id is not None}
+    tables = (
+        {t.id: t for t in session.exec(select(models.Table).where(models.Table.id.in_(table_ids))).all()}
+        if table_ids
+        else {}
+    )
+    floor_ids = {t.floor_id for t in tables.values() if t.assigned_waiter_id is None and t.floor_id}
+    floors = (
+        {f.id: f for f in session.exec(select(models.Floor).where(models.Floor.id.in_(floor_ids))).all()}
+        if floor_ids
+        else {}
+    )
+
+    def _table_waiter_id(table: models.Table | None) -> int | None:
+        if table is None:
+            return None
+        if table.assigned_waiter_id is not None:
+            return table.assigned_waiter_id
+        floor = floors.get(table.floor_id) if table.floor_id else None
+        return floor.default_waiter_id if floor else None
+
+    waiter_ids = {w for w in (_table_waiter_id(t) for t in tables.values()) if w}
+    users = (
+        {u.id: u for u in session.exec(select(models.User).where(models.User.id.in_(waiter_ids))).all()}
+        if waiter_ids
+        else {}
+    )
+    product_ids = {i.product_id for items in items_by_order.values() for i in items}
+    products = (
+        {p.id: p for p in session.exec(select(models.Product).where(models.Product.id.in_(product_ids))).all()}
+        if product_ids
+        else {}
+    )
 
     result = []
     for order in orders:
         rev_date = _revenue_date(order)
-        if not _in_range(rev_date, from_date, to_date):
-            continue
-        items = session.exec(
-            select(models.OrderItem)
-            .where(models.OrderItem.order_id == order.id)
-            .where(models.OrderItem.removed_by_customer == False)
-            .where(models.OrderItem.status != models.OrderItemStatus.cancelled)
-        ).all()
-        table = session.get(models.Table, order.table_id) if order.table_id is not None else None
-        waiter_id = None
+        table = tables.get(order.table_id) if order.table_id is not None else None
+        waiter_id = _table_waiter_id(table)
         waiter_name = None
-        if table:
-            waiter_id = table.assigned_waiter_id
-            if waiter_id is None and table.floor_id:
-                floor = session.get(models.Floor, table.floor_id)
-                if floor:
-                    waiter_id = floor.default_waiter_id
-            if waiter_id:
-                u = session.get(models.User, waiter_id)
-                waiter_name = (u.full_name or u.email) if u else str(waiter_id)
+        if waiter_id:
+            u = users.get(waiter_id)
+            waiter_name = (u.full_name or u.email) if u else str(waiter_id)
         table_name = table.name if table else "Unknown"
-        for item in items:
-            product = session.get(models.Product, item.product_id)
+        for item in items_by_order.get(order.id, []):
+            product = products.get(item.product_id)
             category = (product.category or "Uncategorized") if product else "Uncategorized"
             subcategory = (product.subcategory or "") if product else ""
             unit_cost = getattr(item, "cost_cents", None) or 0
@@ -138,16 +200,9 @@ def _build_report_payload(tenant_id: int, session: Session, from_date: date, to_
     tips_by_day: dict[str, int] = defaultdict(int)
     tips_by_waiter: dict[str, int] = defaultdict(int)
     total_tips_cents = 0
-    orders_for_tips = session.exec(
-        select(models.Order)
-        .where(models.Order.tenant_id == tenant_id)
-        .where(models.Order.deleted_at.is_(None))
-        .where(models.Order.status.in_([s.value for s in REVENUE_STATUSES]))
-    ).all()
+    orders_for_tips = _revenue_orders(session, tenant_id, from_date, to_date, tips_only=True)
     for order in orders_for_tips:
         rev_date = _revenue_date(order)
-        if not _in_range(rev_date, from_date, to_date):
-            continue
         tip = int(order.tip_amount_cents or 0)
         if tip <= 0:
             continue
@@ -0,0 +1,269 @@
+"""
+Reservation availability for a date range (public book grids, next-available, slot capacity).
+
+``ReservationAvailability`` loads what the per-slot rules need once per request: the
+tenant's tables (with groups), seated reservations, in-flight orders, the ``slot_demand``
+ledger rows of ``[start, end]`` and the opening-hours windows of the range. Capacity and
+demand for every (date, time, floor) cell are then computed in memory with the same rules
+as the single-slot helpers in main (``_reservable_capacity_for_tenant`` is a thin wrapper
+over this module and ``_demand_for_slot`` reads the same ledger), so the week grid costs a handful
+of queries instead of two or more per cell.
+
+Capacity rules:
+
+- A table is blocked at a slot while it is busy: ``[start, start + turn)`` from its
+  earliest signal (seated reservation, open order, activation) when
+  ``reservation_average_table_turn_minutes`` is set; otherwise any signal blocks the
+  whole of today.
+- A table group is blocked when any member is; each group is one unit with the
+  combined seats, other tables are one unit each.
+- The smallest ``reservation_walk_in_tables_reserved`` units are kept for walk-ins and
+  seats are capped at ``reservation_max_guests_per_slot``.
+- With ``floor_id`` only tables on that floor count (tables without floor only count
+  venue-wide).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlmodel import Session, select
+
+from . import models
+from .opening_hours_effective import (
+    opening_service_windows_for_date,
+    opening_service_windows_for_range,
+)
+from .slot_demand import SlotBuckets, demand_from_buckets, load_slot_demand
+
+# Orders that keep a table busy
+OPEN_ORDER_STATUSES = (
+    models.OrderStatus.pending,
+    models.OrderStatus.preparing,
+    models.OrderStatus.ready,
+    models.OrderStatus.partially_delivered,
+)
+
+
+def ensure_aware_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _tenant_tz(tenant: models.Tenant):
+    return ZoneInfo(tenant.timezone) if tenant.timezone else timezone.utc
+
+
+def slot_datetime_utc(res_date: date, slot_time: time, tenant: models.Tenant) -> datetime:
+    local = datetime.combine(res_date, slot_time, tzinfo=_tenant_tz(tenant))
+    return local.astimezone(timezone.utc)
+
+
+def table_busy_interval_turn(
+    table: models.Table,
+    seated: models.Reservation | None,
+    order: models.Order | None,
+    turn_minutes: int,
+    now_utc: datetime,
+) -> tuple[datetime, datetime] | None:
+    """Single busy window [start, end) from earliest relevant signal."""
+    starts: list[datetime] = []
+    if seated is not None:
+        s = seated.seated_at or seated.updated_at or seated.created_at
+        starts.append(ensure_aware_utc(s))
+    if order is not None:
+        starts.append(ensure_aware_utc(order.created_at))
+    if table.is_active and table.activated_at is not None:
+        starts.append(ensure_aware_utc(table.activated_at))
+    if table.is_active and not starts:
+        starts.append(now_utc)
+    if not starts:
+        return None
+    st = min(starts)
+    return (st, st + timedelta(minutes=turn_minutes))
+
+
+def pool_capacity(
+    tables: list[models.Table], blocked: set[int], tenant: models.Tenant
+) -> tuple[int, int]:
+    """(seats, tables) left in the reservation pool once ``blocked`` tables are removed."""
+    groups: dict[int, list[models.Table]] = defaultdict(list)
+    for t in tables:
+        if t.id is not None and t.table_group_id:
+            groups[t.table_group_id].append(t)
+
+    # Reservation pool units: standalone tables or one unit per table group (combined seats).
+    units: list[tuple[int, int]] = []  # (seat_weight, sort_id)
+    for t in tables:
+        if t.id is None or t.table_group_id:
+            continue
+        if t.id not in blocked:
+            units.append((t.seat_count, t.id))
+    for members in groups.values():
+        if any(m.id in blocked for m in members):
+            continue
+        units.append((sum(m.seat_count for m in members), min(m.id for m in members)))
+
+    units.sort(key=lambda u: (u[0], u[1]))
+    walk = max(0, tenant.reservation_walk_in_tables_reserved or 0)
+    if walk >= len(units):
+        return (0, 0)
+    pool = units[walk:]
+    total_seats = sum(u[0] for u in pool)
+    cap = tenant.reservation_max_guests_per_slot
+    if cap is not None and cap > 0:
+        total_seats = min(total_seats, cap)
+    return (total_seats, len(pool))
+
+
+class ReservationAvailability:
+    """Capacity, demand and opening windows for ``tenant`` over ``[start, end]``.
+
+    Everything is loaded lazily on first use and at most once, so a grid whose cells are all
+    closed or past never queries tables or reservations. ``now_utc`` is fixed at creation.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        tenant: models.Tenant,
+        start: date,
+        end: date,
+        *,
+        exclude_reservation_id: int | None = None,
+        now_utc: datetime | None = None,
+    ) -> None:
+        self.session = session
+        self.tenant = tenant
+        self.tenant_id = tenant.id
+        self.start = start
+        self.end = end
+        self.exclude_reservation_id = exclude_reservation_id
+        self.now_utc = now_utc or datetime.now(timezone.utc)
+        self.today_local = self.now_utc.astimezone(_tenant_tz(tenant)).date()
+        self._windows: dict[date, List[Tuple[time, time]] | None] = {}
+        self._tables: list[models.Table] | None = None
+        self._tables_by_id: dict[int, models.Table] = {}
+        self._busy: dict[int, tuple[datetime, datetime]] = {}
+        self._busy_today: set[int] = set()
+        self._pool_cache: dict[tuple[int | None, frozenset[int]], tuple[int, int]] = {}
+        self._demand: SlotBuckets | None = None
+
+    # Opening hours
+
+    def windows(self, d: date) -> List[Tuple[time, time]] | None:
+        """``opening_service_windows_for_date`` for ``d`` (None = not configured, [] = closed)."""
+        if not self._windows:
+            self._windows = opening_service_windows_for_range(self.session, self.tenant, self.start, self.end)
+        if d not in self._windows:
+            self._windows[d] = opening_service_windows_for_date(self.session, self.tenant, d)
+        return self._windows[d]
+
+    # Capacity
+
+    def _load_tables(self) -> list[models.Table]:
+        if self._tables is not None:
+            return self._tables
+        tables = list(
+            self.session.exec(select(models.Table).where(models.Table.tenant_id == self.tenant_id)).all()
+        )
+        self._tables = tables
+        self._tables_by_id = {t.id: t for t in tables if t.id is not None}
+        table_ids = list(self._tables_by_id)
+        if not table_ids:
+            return tables
+
+        seated_rows = self.session.exec(
+            select(models.Reservation).where(
+                models.Reservation.tenant_id == self.tenant_id,
+                models.Reservation.table_id.in_(table_ids),
+                models.Reservation.status == models.ReservationStatus.seated,
+            )
+        ).all()
+        seated_by_table = {r.table_id: r for r in seated_rows if r.table_id is not None}
+
+        orders_by_table: dict[int, models.Order] = {}
+        for o in self.session.exec(
+            select(models.Order).where(
+                models.Order.table_id.in_(table_ids),
+                models.Order.status.in_(list(OPEN_ORDER_STATUSES)),
+            )
+        ).all():
+            tid = o.table_id
+            if tid not in orders_by_table or o.created_at < orders_by_table[tid].created_at:
+                orders_by_table[tid] = o
+
+        # Busy state does not depend on the slot: one interval (turn time) or a today-only flag
+        turn = self.tenant.reservation_average_table_turn_minutes
+        for tid, t in self._tables_by_id.items():
+            seated = seated_by_table.get(tid)
+            order = orders_by_table.get(tid)
+            if turn is None or turn <= 0:
+                if seated is not None or order is not None or t.is_active:
+                    self._busy_today.add(tid)
+                continue
+            interval = table_busy_interval_turn(t, seated, order, turn, self.now_utc)
+            if interval is not None:
+                self._busy[tid] = interval
+        return tables
+
+    def _blocked_at(self, d: date, slot_time: time) -> set[int]:
+        turn = self.tenant.reservation_average_table_turn_minutes
+        if turn is None or turn <= 0:
+            return set(self._busy_today) if d == self.today_local else set()
+        if not self._busy:
+            return set()
+        slot_utc = slot_datetime_utc(d, slot_time, self.tenant)
+        return {tid for tid, (s, e) in self._busy.items() if s <= slot_utc < e}
+
+    def capacity(self, d: date, slot_time: time, floor_id: int | None = None) -> tuple[int, int]:
+        """(seats, tables) in the reservation pool at one slot; see module docstring."""
+        tables = self._load_tables()
+        if floor_id is not None:
+            tables = [t for t in tables if t.floor_id == floor_id]
+        if not any(t.id is not None for t in tables):
+            return (0, 0)
+        blocked = self._blocked_at(d, slot_time)
+        if blocked:
+            # A busy group member blocks the whole group (within the counted tables)
+            blocked_groups = {
+                t.table_group_id for t in tables if t.table_group_id and t.id in blocked
+            }
+            blocked = {
+                t.id
+                for t in tables
+                if t.id is not None and (t.id in blocked or (t.table_group_id in blocked_groups))
+            }
+        key = (floor_id, frozenset(blocked))
+        if key not in self._pool_cache:
+            self._pool_cache[key] = pool_capacity(tables, blocked, self.tenant)
+        return self._pool_cache[key]
+
+    # Demand
+
+    def _load_demand(self) -> SlotBuckets:
+        if self._demand is None:
+            self._demand = load_slot_demand(
+                self.session,
+                self.tenant_id,
+                self.start,
+                self.end,
+                exclude_reservation_id=self.exclude_reservation_id,
+            )
+        return self._demand
+
+    def demand(self, d: date, slot_time: time, floor_id: int | None = None) -> tuple[int, int]:
+        """(reserved guests, reserved parties) at one slot (booked and seated), from ``slot_demand``."""
+        return demand_from_buckets(self._load_demand().get((d, slot_time), {}), floor_id)
+
+    def has_room(self, d: date, slot_time: time, party_size: int, floor_id: int | None = None) -> bool:
+        """True when a party of ``party_size`` fits in seats and tables at the slot."""
+        total_seats, total_tables = self.capacity(d, slot_time, floor_id)
+        if total_tables < 1 or total_seats < party_size:
+            return False
+        reserved_guests, reserved_parties = self.demand(d, slot_time, floor_id)
+        return reserved_guests + party_size <= total_seats and reserved_parties + 1 <= total_tables
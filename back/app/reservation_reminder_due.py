@@ -0,0 +1,78 @@
+"""
+UTC due times of reservation reminders (``reminder_24h_due_at`` / ``reminder_2h_due_at``).
+
+The reminder heartbeat used to load every booked reservation of every tenant with
+reminders on and compare local times in Python each tick. Each reservation now stores
+when its reminders are due: the slot start in the tenant timezone, converted to UTC, minus
+24h / 2h. Partial indexes on unsent booked rows let the heartbeat select only the rows
+due in its window.
+
+A ``before_flush`` hook sets both columns on new reservations and when date, time or tenant
+change; a tenant timezone change recomputes that tenant's upcoming booked reservations.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlmodel import Session, select
+
+from . import models
+from .reservation_availability import slot_datetime_utc
+
+REMINDER_LEAD_TIMES = {"24h": timedelta(hours=24), "2h": timedelta(hours=2)}
+
+_RESERVATION_FIELDS = ("tenant_id", "reservation_date", "reservation_time")
+
+
+def _changed(obj: object, fields: tuple[str, ...]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+def set_reminder_due_times(r: models.Reservation, tenant: models.Tenant | None) -> None:
+    """Fill ``reminder_*_due_at`` from the reservation slot and the tenant timezone."""
+    if tenant is None or r.reservation_date is None or r.reservation_time is None:
+        r.reminder_24h_due_at = None
+        r.reminder_2h_due_at = None
+        return
+    starts_at = slot_datetime_utc(r.reservation_date, r.reservation_time, tenant)
+    r.reminder_24h_due_at = starts_at - REMINDER_LEAD_TIMES["24h"]
+    r.reminder_2h_due_at = starts_at - REMINDER_LEAD_TIMES["2h"]
+
+
+def _upcoming_booked(session: Session, tenant_id: int) -> list[models.Reservation]:
+    # A day of slack covers every timezone offset
+    since = datetime.now(timezone.utc).date() - timedelta(days=1)
+    return list(
+        session.exec(
+            select(models.Reservation).where(
+                models.Reservation.tenant_id == tenant_id,
+                models.Reservation.status == models.ReservationStatus.booked,
+                models.Reservation.reservation_date >= since,
+            )
+        ).all()
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _set_reminder_due_times(session: Session, flush_context: object, instances: object | None) -> None:
+    retimed: list[models.Tenant] = []
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, models.Reservation):
+            if obj in session.new or _changed(obj, _RESERVATION_FIELDS):
+                tenant = session.get(models.Tenant, obj.tenant_id) if obj.tenant_id is not None else None
+                set_reminder_due_times(obj, tenant)
+        elif (
+            isinstance(obj, models.Tenant)
+            and obj.id is not None
+            and obj not in session.new
+            and _changed(obj, ("timezone",))
+        ):
+            retimed.append(obj)
+    for tenant in retimed:
+        for r in _upcoming_booked(session, tenant.id):
+            set_reminder_due_times(r, tenant)
+
@@ -2,14 +2,19 @@
 Autonomous reservation reminder heartbeat.
 
 Runs inside the FastAPI process and periodically finds reservations due for
-24h or 2h reminders (per tenant settings), sends email/WhatsApp, and marks
-reminder_*_sent_at. No external cron required.
+24h or 2h reminders (per tenant settings, ``reminder_*_due_at`` stored in UTC),
+sends email/WhatsApp, and marks reminder_*_sent_at. No external cron required.
+
+Each reminder is claimed (``reminder_*_claimed_at``) before sending and marked sent only
+after a channel delivered it. A claim older than ``REMINDER_CLAIM_LEASE_MINUTES`` is taken
+again, so a worker that dies mid-send delays a reminder instead of dropping it; delivery
+is at-least-once.
 """
 import asyncio
 import logging
-from datetime import date, datetime, time, timedelta, timezone
-from zoneinfo import ZoneInfo
+from datetime import datetime, timedelta, timezone
 
+from sqlalchemy import and_, func, or_
 from sqlmodel import Session, select
 
 from . import models
@@ -23,96 +28,122 @@ logger = logging.getLogger(__name__)
 # How often the heartbeat runs (minutes)
 HEARTBEAT_INTERVAL_MINUTES = 5
 
-# Reminder windows: send when "now" (tenant TZ) falls in [target - window_end, target - window_start]
+# Reminder windows: send when "now" falls in [due_at - window_start, due_at + window_end)
 # e.g. 24h: send when now is between 24h30 and 23h30 before reservation (1h window)
 REMINDER_24H_WINDOW_START_MINUTES = 30  # 24h - 30min before reservation
 REMINDER_24H_WINDOW_END_MINUTES = 90    # 24h + 30min (window length 1h)
 REMINDER_2H_WINDOW_START_MINUTES = 10   # 2h - 10min
 REMINDER_2H_WINDOW_END_MINUTES = 30     # 2h + 10min (window length 20min)
 
+# A claimed reminder not marked sent within this time is claimed again
+REMINDER_CLAIM_LEASE_MINUTES = 15
 
-def _tenant_now(tz_name: str | None) -> datetime:
-    """Current time in tenant timezone (naive, for date/time comparison)."""
-    if tz_name and tz_name.strip():
-        try:
-            tz = ZoneInfo(tz_name.strip())
-            return datetime.now(tz).replace(tzinfo=None)
-        except Exception:
-            pass
-    return datetime.utcnow().replace(tzinfo=None)
 
+def _due_window(due_at, now_utc: datetime, start_minutes: int, end_minutes: int):
+    """SQL condition: ``now_utc`` in [due_at - start_minutes, due_at + end_minutes)."""
+    return and_(
+        due_at <= now_utc + timedelta(minutes=start_minutes),
+        due_at > now_utc - timedelta(minutes=end_minutes),
+    )
 
-def _reservation_datetime_naive(reservation_date: date, reservation_time: time) -> datetime:
-    """Combine reservation date and time into a naive datetime (tenant local)."""
-    return datetime.combine(reservation_date, reservation_time)
 
+def _collect_due_reminders(
+    session: Session, now_utc: datetime | None = None
+) -> list[tuple[models.Reservation, models.Tenant, str]]:
+    """Returns list of (reservation, tenant, '24h'|'2h') that are due for a reminder.
 
-def _due_for_24h_reminder(
-    reservation_date: date,
-    reservation_time: time,
-    now_tenant: datetime,
-) -> bool:
-    """True if reservation is in the 24h-reminder window (23h–25h before)."""
-    res_dt = _reservation_datetime_naive(reservation_date, reservation_time)
-    target = res_dt - timedelta(hours=24)
-    start = target - timedelta(minutes=REMINDER_24H_WINDOW_START_MINUTES)
-    end = target + timedelta(minutes=REMINDER_24H_WINDOW_END_MINUTES)
-    return start <= now_tenant < end
-
-
-def _due_for_2h_reminder(
-    reservation_date: date,
-    reservation_time: time,
-    now_tenant: datetime,
-) -> bool:
-    """True if reservation is in the 2h-reminder window (~1h50–2h10 before)."""
-    res_dt = _reservation_datetime_naive(reservation_date, reservation_time)
-    target = res_dt - timedelta(hours=2)
-    start = target - timedelta(minutes=REMINDER_2H_WINDOW_START_MINUTES)
-    end = target + timedelta(minutes=REMINDER_2H_WINDOW_END_MINUTES)
-    return start <= now_tenant < end
-
-
-def _collect_due_reminders(session: Session) -> list[tuple[models.Reservation, models.Tenant, str]]:
-    """Returns list of (reservation, tenant, '24h'|'2h') that are due for a reminder."""
-    tenants = session.exec(
-        select(models.Tenant).where(
-            (models.Tenant.reservation_reminder_24h_enabled == True)
-            | (models.Tenant.reservation_reminder_2h_enabled == True)
-        )
+    Selects only booked, unsent, unclaimed (or lease expired) rows whose ``reminder_*_due_at``
+    falls in the window (partial indexes) and locks them ``FOR UPDATE SKIP LOCKED``, so
+    concurrent workers skip each other's rows until the caller commits.
+    """
+    now_utc = now_utc or datetime.now(timezone.utc)
+    R, T = models.Reservation, models.Tenant
+    lease_expired = now_utc - timedelta(minutes=REMINDER_CLAIM_LEASE_MINUTES)
+    due_24h = and_(
+        T.reservation_reminder_24h_enabled == True,  # noqa: E712
+        R.reminder_24h_sent_at.is_(None),
+        or_(R.reminder_24h_claimed_at.is_(None), R.reminder_24h_claimed_at < lease_expired),
+        _due_window(
+            R.reminder_24h_due_at, now_utc, REMINDER_24H_WINDOW_START_MINUTES, REMINDER_24H_WINDOW_END_MINUTES
+        ),
+    )
+    due_2h = and_(
+        T.reservation_reminder_2h_enabled == True,  # noqa: E712
+        R.reminder_2h_sent_at.is_(None),
+        or_(R.reminder_2h_claimed_at.is_(None), R.reminder_2h_claimed_at < lease_expired),
+        _due_window(
+            R.reminder_2h_due_at, now_utc, REMINDER_2H_WINDOW_START_MINUTES, REMINDER_2H_WINDOW_END_MINUTES
+        ),
+    )
+    reachable = func.coalesce(func.trim(R.customer_email), "") != ""
+    if whatsapp_svc.is_whatsapp_configured():
+        reachable = or_(reachable, func.coalesce(func.trim(R.customer_phone), "") != "")
+    rows = session.exec(
+        select(R, T, due_24h, due_2h)
+        .join(T, T.id == R.tenant_id)
+        .where(R.status == models.ReservationStatus.booked, reachable, or_(due_24h, due_2h))
+        .order_by(R.id)
+        .with_for_update(of=R, skip_locked=True)
     ).all()
     out: list[tuple[models.Reservation, models.Tenant, str]] = []
-    for tenant in tenants:
-        now_tenant = _tenant_now(tenant.timezone)
-        reservations = session.exec(
-            select(models.Reservation).where(
-                models.Reservation.tenant_id == tenant.id,
-                models.Reservation.status == models.ReservationStatus.booked,
-            )
-        ).all()
-        for r in reservations:
-            if not r.reservation_date or not r.reservation_time:
-                continue
-            has_email = bool(r.customer_email and r.customer_email.strip())
-            has_phone = bool(r.customer_phone and r.customer_phone.strip())
-            whatsapp_ok = whatsapp_svc.is_whatsapp_configured()
-            if not has_email and not (has_phone and whatsapp_ok):
-                continue
-            if (
-                tenant.reservation_reminder_24h_enabled
-                and r.reminder_24h_sent_at is None
-                and _due_for_24h_reminder(r.reservation_date, r.reservation_time, now_tenant)
-            ):
-                out.append((r, tenant, "24h"))
-            if (
-                tenant.reservation_reminder_2h_enabled
-                and r.reminder_2h_sent_at is None
-                and _due_for_2h_reminder(r.reservation_date, r.reservation_time, now_tenant)
-            ):
-                out.append((r, tenant, "2h"))
+    for r, tenant, is_24h, is_2h in rows:
+        if is_24h:
+            out.append((r, tenant, "24h"))
+        if is_2h:
+            out.append((r, tenant, "2h"))
     return out
 
 
+def _mark_claimed(reservation: models.Reservation, kind: str, claimed_at: datetime | None) -> None:
+    if kind == "24h":
+        reservation.reminder_24h_claimed_at = claimed_at
+    else:
+        reservation.reminder_2h_claimed_at = claimed_at
+
+
+def _mark_sent(reservation: models.Reservation, kind: str, sent_at: datetime) -> None:
+    if kind == "24h":
+        reservation.reminder_24h_sent_at = sent_at
+    else:
+        reservation.reminder_2h_sent_at = sent_at
+
+
+def _claim_due_reminders() -> list[tuple[models.Reservation, models.Tenant, str]]:
+    """Collect due reminders and claim them in one transaction (runs in a worker thread).
+
+    The claim keeps other workers from sending the same reminder for the lease; the caller
+    then either marks it sent (``_finish_reminder``) or releases it (``_release_reminder``).
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        due = _collect_due_reminders(session)
+        now = datetime.now(timezone.utc)
+        for r, _, kind in due:
+            _mark_claimed(r, kind, now)
+            session.add(r)
+        session.commit()
+    return due
+
+
+def _finish_reminder(reservation_id: int, kind: str) -> None:
+    """Mark a delivered reminder sent (runs in a worker thread)."""
+    with Session(engine) as session:
+        r = session.get(models.Reservation, reservation_id)
+        if r:
+            _mark_sent(r, kind, datetime.now(timezone.utc))
+            session.add(r)
+            session.commit()
+
+
+def _release_reminder(reservation_id: int, kind: str) -> None:
+    """Drop a claim that was not delivered so the next tick retries it (runs in a worker thread)."""
+    with Session(engine) as session:
+        r = session.get(models.Reservation, reservation_id)
+        if r:
+            _mark_claimed(r, kind, None)
+            session.add(r)
+            session.commit()
+
+
 async def _send_one_reminder(
     reservation: models.Reservation,
     tenant: models.Tenant,
@@ -159,11 +190,8 @@ async def _send_one_reminder(
 
 
 async def _tick_async() -> int:
-    """One tick: get due reminders (sync DB), then send each (async) and update DB."""
-    with Session(engine) as session:
-        due = _collect_due_reminders(session)
-        # Load full objects so we can use them after session closes
-        due = [(r, tenant, kind) for r, tenant, kind in due]
+    """One tick: claim due reminders (DB work in a thread), then send each (async)."""
+    due = await asyncio.to_thread(_claim_due_reminders)
     count = 0
     for reservation, tenant, kind in due:
         try:
@@ -176,24 +204,19 @@ async def _tick_async() -> int:
                 e,
                 exc_info=True,
             )
-            continue
+            delivered = False
+        else:
+            if not delivered:
+                logger.warning(
+                    "Reservation reminder heartbeat: no channel delivered for %s reminder reservation id=%s tenant_id=%s",
+                    kind,
+                    reservation.id,
+                    tenant.id,
+                )
         if not delivered:
-            logger.warning(
-                "Reservation reminder heartbeat: no channel delivered for %s reminder reservation id=%s tenant_id=%s",
-                kind,
-                reservation.id,
-                tenant.id,
-            )
+            await asyncio.to_thread(_release_reminder, reservation.id, kind)
             continue
-        with Session(engine) as session:
-            r = session.get(models.Reservation, reservation.id)
-            if r:
-                if kind == "24h":
-                    r.reminder_24h_sent_at = datetime.now(timezone.utc)
-                else:
-                    r.reminder_2h_sent_at = datetime.now(timezone.utc)
-                session.add(r)
-                session.commit()
+        await asyncio.to_thread(_finish_reminder, reservation.id, kind)
         count += 1
         logger.info(
             "Reservation reminder heartbeat: sent %s reminder for reservation id=%s tenant_id=%s",
@@ -0,0 +1,78 @@
+"""
+Write responsive renditions (WebP / AVIF / original format, several widths) for images
+already stored under uploads/ (product, logo, header and provider product images).
+
+Uploads write renditions themselves; run this once after deploying, or with --force after
+changing RENDITION_WIDTHS or the encoder settings. Menus of the tenants whose product
+images got renditions are recompiled (their menu version is bumped).
+
+Usage (from repo root with backend in Docker):
+  docker compose exec back python -m app.seeds.backfill_image_renditions
+  docker compose exec back python -m app.seeds.backfill_image_renditions --force
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Iterable
+
+from sqlmodel import Session, select
+
+from app import models
+from app.db import engine
+from app.image_renditions import UPLOADS_DIR, backfill_renditions
+from app.menu_cache import bump_menu_versions, catalog_menu_scopes
+
+
+def menu_scopes_for_images(session: Session, paths: Iterable[Path], root: Path = UPLOADS_DIR) -> set[int]:
+    """Tenants whose compiled menu shows one of the product images at ``paths``."""
+    scopes: set[int] = set()
+    provider_tokens: set[str] = set()
+    for path in paths:
+        parts = path.relative_to(root).parts
+        if len(parts) == 4 and parts[0] == "providers" and parts[2] == "products":
+            provider_tokens.add(parts[1])
+        elif len(parts) == 3 and parts[0].isdigit() and parts[1] == "products":
+            scopes.add(int(parts[0]))
+    if provider_tokens:
+        provider_ids = session.exec(
+            select(models.Provider.id).where(models.Provider.token.in_(provider_tokens))
+        ).all()
+        scopes |= catalog_menu_scopes(session, provider_ids=provider_ids)
+        for token in provider_tokens:
+            # Tenant products that copied a provider image path
+            scopes.update(
+                session.exec(
+                    select(models.Product.tenant_id)
+                    .where(models.Product.image_filename.like(f"providers/{token}/products/%"))
+                    .distinct()
+                ).all()
+            )
+    return scopes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Write responsive image renditions for existing uploads."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rewrite renditions that already have a manifest"
+    )
+    args = parser.parse_args()
+    written: list[Path] = []
+    counts = backfill_renditions(UPLOADS_DIR, force=args.force, on_written=written.append)
+    print(
+        f"Image renditions: {counts['written']} written, {counts['skipped']} already present, "
+        f"{counts['failed']} not decodable"
+    )
+    if written:
+        with Session(engine) as session:
+            scopes = menu_scopes_for_images(session, written)
+            bump_menu_versions(session, scopes)
+            session.commit()
+        print(f"Menu versions bumped: {len(scopes)} tenant(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 """
 Clear ProviderProduct.image_filename (and Product provider-path refs) when files are missing on disk.
 
-Stops catalog/menu from requesting /uploads/providers/... paths that 404.
+Stops catalog/menu from requesting /uploads/providers/... paths that 404. The API also runs
+this every hour (provider_image_reconcile_loop); use the command after restoring files or a
+database.
 
 Usage:
     python -m app.seeds.clear_orphan_provider_product_images
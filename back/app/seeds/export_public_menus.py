@@ -0,0 +1,38 @@
+"""
+Publish the public tenant menu as static JSON files (every supported language) under
+MENU_EXPORT_DIR, as the API does periodically when MENU_EXPORT_ENABLED is set.
+
+Only languages whose menu changed are re-rendered; --force rewrites all of them.
+
+Usage (from repo root with backend in Docker):
+  docker compose exec back python -m app.seeds.export_public_menus
+  docker compose exec back python -m app.seeds.export_public_menus --tenant 1 --force
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from sqlmodel import Session
+
+from app.db import engine
+from app.menu_export import export_dir, export_public_menus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export public tenant menus as static JSON.")
+    parser.add_argument(
+        "--tenant", type=int, action="append", dest="tenant_ids", help="Tenant id (repeatable)"
+    )
+    parser.add_argument("--force", action="store_true", help="Re-render unchanged menus")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        counts = export_public_menus(session, tenant_ids=args.tenant_ids, force=args.force)
+    print(
+        f"Menu export to {export_dir()}: {counts['tenants']} tenant(s), "
+        f"{counts['rendered']} file(s) rendered, {counts['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
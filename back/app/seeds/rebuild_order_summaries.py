@@ -0,0 +1,33 @@
+"""
+Rebuild order_summary rows (precomputed order status / totals) from orders, items and payments.
+
+Run after restoring data or if a row looks out of date; normal writes keep rows current.
+
+Usage (from repo root with backend in Docker):
+  docker compose exec back python -m app.seeds.rebuild_order_summaries
+  docker compose exec back python -m app.seeds.rebuild_order_summaries --tenant-id 1
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from sqlmodel import Session
+
+from app.db import engine
+from app.order_summary import rebuild_order_summaries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild order_summary rows from orders, items and payments."
+    )
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only this tenant")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        n = rebuild_order_summaries(session, tenant_id=args.tenant_id)
+    print(f"Order summaries rebuilt: {n}")
+
+
+if __name__ == "__main__":
+    main()
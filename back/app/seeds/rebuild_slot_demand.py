@@ -0,0 +1,33 @@
+"""
+Rebuild slot_demand rows (reservation guests / parties per slot and zone) from reservations.
+
+Run after restoring data or bulk-editing reservations in SQL; normal writes keep rows current.
+
+Usage (from repo root with backend in Docker):
+  docker compose exec back python -m app.seeds.rebuild_slot_demand
+  docker compose exec back python -m app.seeds.rebuild_slot_demand --tenant-id 1
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from sqlmodel import Session
+
+from app.db import engine
+from app.slot_demand import rebuild_slot_demand
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild slot_demand rows from booked and seated reservations."
+    )
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only this tenant")
+    args = parser.parse_args()
+    with Session(engine) as session:
+        n = rebuild_slot_demand(session, tenant_id=args.tenant_id)
+    print(f"Slot demand rows rebuilt: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -229,6 +229,46 @@ class Settings(BaseSettings):
         description="Max password-reset email requests per IP per hour",
     )
 
+    # Upload image processing (resize, re-encode, renditions) runs in a process pool
+    image_worker_processes: int = Field(
+        default=2,
+        validation_alias="IMAGE_WORKER_PROCESSES",
+        description="Image pool processes per API worker; also the max in-flight uploads",
+    )
+    image_processing_timeout_seconds: float = Field(
+        default=30.0,
+        validation_alias="IMAGE_PROCESSING_TIMEOUT_SECONDS",
+        description="Max seconds an upload waits for its image job (queueing included) before 503",
+    )
+
+    # Answer /uploads revalidations from a startup listing instead of a stat per request
+    uploads_preload_manifest: bool = Field(
+        default=False, validation_alias="UPLOADS_PRELOAD_MANIFEST"
+    )
+
+    # Static public menu export for marketing sites (served under /public/menu-export)
+    menu_export_enabled: bool = Field(default=False, validation_alias="MENU_EXPORT_ENABLED")
+    menu_export_dir: str = Field(
+        default="",
+        validation_alias="MENU_EXPORT_DIR",
+        description="Output directory; empty = back/menu-export",
+    )
+    menu_export_interval_seconds: int = Field(
+        default=60, validation_alias="MENU_EXPORT_INTERVAL_SECONDS"
+    )
+    menu_export_precompress: bool = Field(
+        default=True,
+        validation_alias="MENU_EXPORT_PRECOMPRESS",
+        description="Also write .gz files next to each export",
+    )
+
+    # Public book grids: computed day cells reused per (tenant, date, party size, floor, service)
+    reservation_availability_cache_ttl_seconds: int = Field(
+        default=30,
+        validation_alias="RESERVATION_AVAILABILITY_CACHE_TTL_SECONDS",
+        description="Max age of a cached day (lead-time / past cutoff); 0 = no cache",
+    )
+
     # Club loyalty wallet (optional; see docs/0066-club-loyalty.md — PassKit / Google Wallet)
     loyalty_apple_pass_type_id: str = Field(
         default="", validation_alias="LOYALTY_APPLE_PASS_TYPE_ID"
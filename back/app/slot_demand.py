@@ -0,0 +1,264 @@
+"""
+Reservation demand ledger (``slot_demand``): guests and parties per (tenant, date, time, zone).
+
+Capacity checks used to sum every booked / seated reservation of the slot on each call,
+and two guests booking the last table at the same moment both passed the check. The
+ledger keeps one row per zone bucket of a slot:
+
+- ``preferred_floor_id`` when the reservation has one;
+- else the floor of its table (seated or assigned);
+- else ``NO_FLOOR`` (0): counted venue-wide only.
+
+That is exactly what ``_demand_for_slot`` counts for a zone, and venue-wide demand is the
+sum over the slot's rows.
+
+An ``after_flush`` hook recomputes the rows of every slot whose reservations were written
+in that flush (old and new slot on a move, and the slots of a table whose floor changed),
+in the same transaction. Before recomputing it takes a transaction-level advisory lock
+per (tenant, date); ``create_reservation`` / ``update_reservation`` take the same lock
+before their capacity check, so concurrent bookings of one day are serialized and each
+check reads the ledger after the previous booking committed. ``availability_cache`` takes
+the same lock before bumping a date's version row, so every writer locks advisory first.
+``python -m app.seeds.rebuild_slot_demand`` rebuilds the ledger from ``reservation`` rows.
+"""
+
+from __future__ import annotations
+
+from datetime import date, time
+from itertools import chain
+from typing import Iterable
+
+from sqlalchemy import and_, delete, event, func, insert, inspect
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from . import models
+
+NO_FLOOR = 0
+
+_ACTIVE = (models.ReservationStatus.booked, models.ReservationStatus.seated)
+_RESERVATION_FIELDS = (
+    "tenant_id",
+    "reservation_date",
+    "reservation_time",
+    "party_size",
+    "status",
+    "table_id",
+    "preferred_floor_id",
+)
+
+_R = models.Reservation
+_T = models.Table
+# Zone bucket of a reservation row (see module docstring)
+_BUCKET = func.coalesce(_R.preferred_floor_id, _T.floor_id, NO_FLOOR)
+
+SlotKey = tuple[int, date, time]
+
+
+def lock_slot_days(session: Session | Connection, tenant_id: int, days: Iterable[date]) -> None:
+    """Transaction-level advisory lock per (tenant, date), taken in date order. No-op off Postgres."""
+    conn = session.connection() if isinstance(session, Session) else session
+    if conn.dialect.name != "postgresql":
+        return
+    for day in sorted(set(days)):
+        conn.execute(select(func.pg_advisory_xact_lock(int(tenant_id), day.toordinal())))
+
+
+def lock_reservation_days(session: Session, r: models.Reservation) -> None:
+    """``lock_slot_days`` for a reservation's date and, when it is being moved, its old date."""
+    days = {r.reservation_date, *inspect(r).attrs.reservation_date.history.deleted}
+    lock_slot_days(session, r.tenant_id, [d for d in days if d is not None])
+
+
+def refresh_slot_demand(conn: Connection, slots: Iterable[SlotKey]) -> int:
+    """Recompute the ledger rows of ``slots`` from reservations. Returns rows written."""
+    slots = sorted(set(slots))
+    if not slots:
+        return 0
+    by_tenant: dict[int, set[date]] = {}
+    for tenant_id, day, _ in slots:
+        by_tenant.setdefault(tenant_id, set()).add(day)
+    for tenant_id, days in sorted(by_tenant.items()):
+        lock_slot_days(conn, tenant_id, days)
+    written = 0
+    for tenant_id, day, slot_time in slots:
+        rows = conn.execute(
+            select(_BUCKET, func.sum(_R.party_size), func.count(_R.id))
+            .select_from(_R)
+            .outerjoin(_T, _T.id == _R.table_id)
+            .where(
+                _R.tenant_id == tenant_id,
+                _R.reservation_date == day,
+                _R.reservation_time == slot_time,
+                _R.status.in_(list(_ACTIVE)),
+            )
+            .group_by(_BUCKET)
+        ).all()
+        sd = models.SlotDemand
+        conn.execute(
+            delete(sd).where(sd.tenant_id == tenant_id, sd.slot_date == day, sd.slot_time == slot_time)
+        )
+        if rows:
+            conn.execute(
+                insert(sd),
+                [
+                    {
+                        "tenant_id": tenant_id,
+                        "slot_date": day,
+                        "slot_time": slot_time,
+                        "floor_id": int(bucket),
+                        "guests": int(guests or 0),
+                        "parties": int(parties or 0),
+                    }
+                    for bucket, guests, parties in rows
+                ],
+            )
+            written += len(rows)
+    return written
+
+
+def _reservation_slots(session: Session, r: models.Reservation) -> set[SlotKey]:
+    attrs = inspect(r).attrs
+    if r not in session.new and r not in session.deleted:
+        if not any(attrs[name].history.has_changes() for name in _RESERVATION_FIELDS):
+            return set()
+    tenant_ids = {r.tenant_id, *attrs.tenant_id.history.deleted}
+    days = {r.reservation_date, *attrs.reservation_date.history.deleted}
+    times = {r.reservation_time, *attrs.reservation_time.history.deleted}
+    return {
+        (t, d, st)
+        for t in tenant_ids
+        for d in days
+        for st in times
+        if t is not None and d is not None and st is not None
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_touched_slots(session: Session, flush_context: object) -> None:
+    """Keep slot_demand in step with reservation (and table floor) writes, same transaction."""
+    slots: set[SlotKey] = set()
+    moved_tables: list[int] = []
+    # new / dirty / deleted still show the pre-flush state here
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, models.Reservation):
+            slots.update(_reservation_slots(session, obj))
+        elif (
+            isinstance(obj, models.Table)
+            and obj in session.dirty
+            and obj.id is not None
+            and inspect(obj).attrs.floor_id.history.has_changes()
+        ):
+            moved_tables.append(obj.id)
+    conn = session.connection()
+    if moved_tables:
+        slots.update(
+            (row.tenant_id, row.reservation_date, row.reservation_time)
+            for row in conn.execute(
+                select(_R.tenant_id, _R.reservation_date, _R.reservation_time).where(
+                    _R.table_id.in_(moved_tables),
+                    _R.preferred_floor_id.is_(None),
+                    _R.status.in_(list(_ACTIVE)),
+                )
+            ).all()
+        )
+    if slots:
+        refresh_slot_demand(conn, slots)
+
+
+SlotBuckets = dict[tuple[date, time], dict[int, tuple[int, int]]]
+
+
+def _ledger_rows(session: Session, tenant_id: int, *where) -> SlotBuckets:
+    sd = models.SlotDemand
+    out: SlotBuckets = {}
+    for day, slot_time, bucket, guests, parties in session.exec(
+        select(sd.slot_date, sd.slot_time, sd.floor_id, sd.guests, sd.parties).where(
+            sd.tenant_id == tenant_id, *where
+        )
+    ).all():
+        out.setdefault((day, slot_time), {})[int(bucket)] = (int(guests), int(parties))
+    return out
+
+
+def _subtract_reservation(
+    session: Session, tenant_id: int, reservation_id: int, ledger: SlotBuckets
+) -> None:
+    """Remove an active reservation's own contribution (as stored) from ``ledger``."""
+    own = session.exec(
+        select(_R.reservation_date, _R.reservation_time, _BUCKET, _R.party_size)
+        .select_from(_R)
+        .outerjoin(_T, _T.id == _R.table_id)
+        .where(_R.id == reservation_id, _R.tenant_id == tenant_id, _R.status.in_(list(_ACTIVE)))
+    ).first()
+    if own is None or (own[0], own[1]) not in ledger:
+        return
+    buckets = ledger[(own[0], own[1])]
+    guests, parties = buckets.get(int(own[2]), (0, 0))
+    buckets[int(own[2])] = (max(0, guests - int(own[3])), max(0, parties - 1))
+
+
+def load_slot_demand(
+    session: Session,
+    tenant_id: int,
+    start: date,
+    end: date,
+    *,
+    exclude_reservation_id: int | None = None,
+) -> SlotBuckets:
+    """Ledger rows for [start, end] as {(date, time): {bucket: (guests, parties)}}."""
+    sd = models.SlotDemand
+    ledger = _ledger_rows(session, tenant_id, sd.slot_date >= start, sd.slot_date <= end)
+    if exclude_reservation_id is not None:
+        _subtract_reservation(session, tenant_id, exclude_reservation_id, ledger)
+    return ledger
+
+
+def demand_from_buckets(buckets: dict[int, tuple[int, int]], floor_id: int | None) -> tuple[int, int]:
+    """(guests, parties) venue-wide (``floor_id`` None) or for one zone."""
+    if floor_id is None:
+        return (sum(g for g, _ in buckets.values()), sum(p for _, p in buckets.values()))
+    return buckets.get(floor_id, (0, 0))
+
+
+def slot_demand(
+    session: Session,
+    tenant_id: int,
+    slot_date: date,
+    slot_time: time,
+    *,
+    floor_id: int | None = None,
+    exclude_reservation_id: int | None = None,
+) -> tuple[int, int]:
+    """(reserved guests, reserved parties) for one slot from the ledger."""
+    sd = models.SlotDemand
+    ledger = _ledger_rows(session, tenant_id, sd.slot_date == slot_date, sd.slot_time == slot_time)
+    if exclude_reservation_id is not None:
+        _subtract_reservation(session, tenant_id, exclude_reservation_id, ledger)
+    return demand_from_buckets(ledger.get((slot_date, slot_time), {}), floor_id)
+
+
+def rebuild_slot_demand(session: Session, *, tenant_id: int | None = None) -> int:
+    """Rebuild the ledger from reservations (optionally one tenant), one date per commit."""
+    q = select(_R.tenant_id, _R.reservation_date).where(_R.status.in_(list(_ACTIVE))).distinct()
+    sd = models.SlotDemand
+    stale = select(sd.tenant_id, sd.slot_date).distinct()
+    if tenant_id is not None:
+        q = q.where(_R.tenant_id == tenant_id)
+        stale = stale.where(sd.tenant_id == tenant_id)
+    days = set(session.exec(q).all()) | set(session.exec(stale).all())
+    total = 0
+    for tid, day in sorted(days):
+        conn = session.connection()
+        lock_slot_days(conn, tid, [day])
+        times = session.exec(
+            select(_R.reservation_time)
+            .where(_R.tenant_id == tid, _R.reservation_date == day)
+            .distinct()
+        ).all()
+        conn.execute(delete(sd).where(and_(sd.tenant_id == tid, sd.slot_date == day)))
+        total += refresh_slot_demand(conn, [(tid, day, st) for st in times])
+        session.commit()
+    return total
@@ -0,0 +1,273 @@
+"""
+Shared table-token resolution for the public guest flow.
+
+Public endpoints identify the table by ``Table.token``. ``resolve_table_token`` reads the
+Redis hash ``table_token:{token}`` (id, tenant, name, active flag, active order, PIN set,
+take-away, waiter routing) and falls back to one query on a miss or when Redis is down.
+
+A flush hook captures every Table write and, after commit, writes the new state through
+(activate, close, PIN and token regeneration, active order changes); a token change or
+delete replaces the old key with a short-lived tombstone. Entries expire after
+``TABLE_TOKEN_TTL_SECONDS`` as a safety net for writes that bypass the ORM.
+
+Every entry carries the row's ``cache_version`` (bumped on each ORM write of the table) and
+is replaced only by a higher version, in one Lua step: a write-through applied after a later
+commit's, or a miss that loaded the row before a concurrent commit, cannot put older state
+back. Nothing but another tombstone replaces a tombstone, so a replaced token is not revived.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass
+from itertools import chain
+from typing import Iterable
+
+from sqlalchemy import event, inspect
+from sqlmodel import Session, select
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+TABLE_TOKEN_TTL_SECONDS = 3600
+# Longer than any read-to-fill gap of a miss that loaded the row before the token changed
+TABLE_TOKEN_TOMBSTONE_SECONDS = 60
+# Take-away / home ordering tables (no PIN required for ordering)
+TAKE_AWAY_TABLE_NAMES = ("take away", "home ordering", "takeaway", "take-away")
+
+_PENDING_KEY = "table_token_writes"
+# Bumped when the hash fields change; a miss may replace entries of another layout
+_LAYOUT = "3"
+
+# KEYS[1] = key; ARGV = layout, ttl, version, field, value, ...
+_STORE_IF_NEWER = """
+if redis.call('HGET', KEYS[1], 'layout') == ARGV[1] then
+    if redis.call('HGET', KEYS[1], 'tombstone') == '1' then
+        return 0
+    end
+    if tonumber(redis.call('HGET', KEYS[1], 'version') or '-1') >= tonumber(ARGV[3]) then
+        return 0
+    end
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class TableRef:
+    """What the guest flow needs to know about a table, without the ORM row."""
+
+    id: int
+    tenant_id: int
+    name: str
+    is_active: bool
+    active_order_id: int | None
+    has_pin: bool
+    is_take_away: bool
+    floor_id: int | None
+    assigned_waiter_id: int | None
+
+
+def _key(token: str) -> str:
+    return f"table_token:{token}"
+
+
+def table_ref(table: models.Table) -> TableRef:
+    return TableRef(
+        id=table.id,
+        tenant_id=table.tenant_id,
+        name=table.name or "",
+        is_active=bool(table.is_active),
+        active_order_id=table.active_order_id,
+        has_pin=table.order_pin is not None,
+        is_take_away=(table.name or "").strip().lower() in TAKE_AWAY_TABLE_NAMES,
+        floor_id=table.floor_id,
+        assigned_waiter_id=table.assigned_waiter_id,
+    )
+
+
+def _to_hash(ref: TableRef, version: int) -> dict[str, str]:
+    out: dict[str, str] = {"layout": _LAYOUT, "version": str(version)}
+    for name, value in asdict(ref).items():
+        if isinstance(value, bool):
+            out[name] = "1" if value else "0"
+        else:
+            out[name] = "" if value is None else str(value)
+    return out
+
+
+def _from_hash(raw: dict) -> TableRef | None:
+    data = {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in raw.items()
+    }
+    if data.get("layout") != _LAYOUT:
+        return None  # Written by an older layout: reload
+    if data.get("tombstone") == "1":
+        return None  # Token replaced or table deleted: ask the database
+
+    def opt_int(name: str) -> int | None:
+        value = data.get(name) or ""
+        return int(value) if value else None
+
+    try:
+        return TableRef(
+            id=int(data["id"]),
+            tenant_id=int(data["tenant_id"]),
+            name=data.get("name", ""),
+            is_active=data.get("is_active") == "1",
+            active_order_id=opt_int("active_order_id"),
+            has_pin=data.get("has_pin") == "1",
+            is_take_away=data.get("is_take_away") == "1",
+            floor_id=opt_int("floor_id"),
+            assigned_waiter_id=opt_int("assigned_waiter_id"),
+        )
+    except (KeyError, ValueError):
+        return None  # Written by an older layout: reload
+
+
+def _store(r, token: str, ref: TableRef, version: int):
+    """Cache ``ref`` unless the entry holds the same or a newer version, or a tombstone.
+
+    ``r`` is a client (returns 1 when written) or a pipeline (queues the script).
+    """
+    fields = [item for pair in _to_hash(ref, version).items() for item in pair]
+    return r.eval(_STORE_IF_NEWER, 1, _key(token), _LAYOUT, TABLE_TOKEN_TTL_SECONDS, version, *fields)
+
+
+def _store_tombstone(pipe, token: str) -> None:
+    key = _key(token)
+    pipe.delete(key)
+    pipe.hset(key, mapping={"layout": _LAYOUT, "tombstone": "1"})
+    pipe.expire(key, TABLE_TOKEN_TOMBSTONE_SECONDS)
+
+
+def _redis():
+    from app.main import get_redis
+
+    return get_redis()
+
+
+def resolve_table_token(session: Session, token: str) -> TableRef | None:
+    """Table for a public token (Redis first, then the database); None when unknown."""
+    if not token:
+        return None
+    r = _redis()
+    if r is not None:
+        try:
+            raw = r.hgetall(_key(token))
+        except Exception as e:
+            logger.debug("table token cache read failed: %s", e)
+            raw, r = None, None
+        if raw:
+            ref = _from_hash(raw)
+            if ref is not None:
+                return ref
+    table = session.exec(select(models.Table).where(models.Table.token == token)).first()
+    if table is None:
+        return None
+    ref = table_ref(table)
+    if r is not None:
+        try:
+            _store(r, token, ref, table.cache_version or 0)
+        except Exception as e:
+            logger.debug("table token cache write failed: %s", e)
+    return ref
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_cache_versions(session: Session, flush_context: object, instances: object | None) -> None:
+    for obj in session.dirty:
+        if isinstance(obj, models.Table) and obj not in session.deleted and session.is_modified(obj):
+            # In SQL: the row lock orders concurrent writers, each sees the previous commit's value
+            obj.cache_version = models.Table.cache_version + 1
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_replaced_tokens(session: Session, flush_context: object, instances: object | None) -> None:
+    for obj in chain(session.dirty, session.deleted):
+        if not isinstance(obj, models.Table) or obj.id is None:
+            continue
+        history = inspect(obj).attrs.token.history
+        if obj not in session.deleted and not history.has_changes():
+            continue
+        old_tokens = [t for t in history.deleted or () if t]
+        if not old_tokens:
+            # Set on an expired row: the old value was never loaded, the database still has it
+            with session.no_autoflush:
+                old = session.exec(select(models.Table.token).where(models.Table.id == obj.id)).first()
+            old_tokens = [old] if old else []
+        pending: dict[str, tuple[TableRef, int] | None] = session.info.setdefault(_PENDING_KEY, {})
+        for old in old_tokens:
+            pending[old] = None
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_table_writes(session: Session, flush_context: object) -> None:
+    # Pre-flush collections are still available here
+    written: list[models.Table] = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, models.Table) or not obj.token:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        pending: dict[str, tuple[TableRef, int] | None] = session.info.setdefault(_PENDING_KEY, {})
+        if obj in session.deleted:
+            pending[obj.token] = None
+        else:
+            written.append(obj)
+    if not written:
+        return
+    # The bumped versions, read under this transaction's row locks
+    versions = dict(
+        session.connection().execute(
+            select(models.Table.id, models.Table.cache_version).where(
+                models.Table.id.in_([obj.id for obj in written])
+            )
+        ).all()
+    )
+    pending = session.info[_PENDING_KEY]
+    for obj in written:
+        pending[obj.token] = (table_ref(obj), int(versions.get(obj.id) or 0))
+
+
+def tombstone_tokens(session: Session, tokens: Iterable[str]) -> None:
+    """Replace ``tokens`` with tombstones once the session commits (bulk DELETE of tables)."""
+    pending: dict[str, tuple[TableRef, int] | None] = session.info.setdefault(_PENDING_KEY, {})
+    for token in tokens:
+        if token:
+            pending[token] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _write_through_after_commit(session: Session) -> None:
+    pending: dict[str, tuple[TableRef, int] | None] | None = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    r = _redis()
+    if r is None:
+        return
+    try:
+        pipe = r.pipeline(transaction=True)
+        for token, written in pending.items():
+            if written is None:
+                _store_tombstone(pipe, token)
+            else:
+                _store(pipe, token, *written)
+        pipe.execute()
+    except Exception as e:
+        # Entries may be stale until they expire; drop them instead
+        logger.warning("table token cache write-through failed: %s", e)
+        try:
+            r.delete(*[_key(t) for t in pending])
+        except Exception:
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_table_writes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
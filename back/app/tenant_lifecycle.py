@@ -19,6 +19,7 @@ from sqlalchemy import delete
 from sqlmodel import Session, select
 
 from . import inventory_models, models
+from .table_token_cache import tombstone_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -346,11 +347,14 @@ def delete_tenant_cascade(session: Session, tenant_id: int) -> list[str]:
     for fl in session.exec(select(models.Floor).where(models.Floor.tenant_id == tenant_id)).all():
         fl.default_waiter_id = None
         session.add(fl)
-    for tbl in session.exec(select(models.Table).where(models.Table.tenant_id == tenant_id)).all():
+    tables = session.exec(select(models.Table).where(models.Table.tenant_id == tenant_id)).all()
+    for tbl in tables:
         tbl.assigned_waiter_id = None
         session.add(tbl)
     session.flush()
 
+    # Bulk DELETE skips the flush hook that writes the token cache through
+    tombstone_tokens(session, [tbl.token for tbl in tables])
     session.exec(delete(models.Table).where(models.Table.tenant_id == tenant_id))
     session.exec(delete(models.Floor).where(models.Floor.tenant_id == tenant_id))
 
@@ -1,15 +1,113 @@
 """
 Translation service for fetching localized content from the database.
+
+Lookups go through ``get_translations_bulk``: one query per (tenant, language) batch,
+with resolved texts (and misses) kept in a bounded in-process LRU. Entries are tagged
+with the tenant / global menu versions (see menu_cache.py), which the flush hook bumps on
+every I18nText write, so ``set_translation`` and PUT /i18n/... invalidate them across
+workers.
 """
 
-from typing import Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable, Tuple
+
+from sqlalchemy import or_
 from sqlmodel import Session, select
+
+from .menu_cache import GLOBAL_MENU_SCOPE, has_uncommitted_menu_writes, menu_versions
 from .models import I18nText
 
+# (entity_type, entity_id, field)
+TranslationKey = Tuple[str, int, str]
+
+TRANSLATION_CACHE_MAX_ENTRIES = 50_000
+
+_cache_lock = threading.Lock()
+# (tenant_id, lang, entity_type, entity_id, field) -> (versions, text or None when missing)
+_cache: "OrderedDict[tuple, tuple[tuple[int, int], Optional[str]]]" = OrderedDict()
+
+
+def clear_translation_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
 
 class TranslationService:
     """Service for managing and fetching translations."""
 
+    @staticmethod
+    def get_translations_bulk(
+        session: Session,
+        tenant_id: Optional[int],
+        lang: str,
+        keys: Iterable[TranslationKey],
+    ) -> Dict[TranslationKey, str]:
+        """
+        Translations for many (entity_type, entity_id, field) keys in one language.
+
+        Same precedence as ``get_translated_field`` (tenant override, then global); keys
+        without a translation are absent from the result. Uncached keys cost one query.
+        """
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        if tenant_id is not None:
+            versions = menu_versions(session, tenant_id)
+        else:
+            versions = (0, menu_versions(session, GLOBAL_MENU_SCOPE)[1])
+        out: Dict[TranslationKey, str] = {}
+        missing: set[TranslationKey] = set()
+        with _cache_lock:
+            for key in wanted:
+                hit = _cache.get((tenant_id, lang) + key)
+                if hit is not None and hit[0] == versions:
+                    _cache.move_to_end((tenant_id, lang) + key)
+                    if hit[1] is not None:
+                        out[key] = hit[1]
+                else:
+                    missing.add(key)
+        if not missing:
+            return out
+
+        scope = I18nText.tenant_id.is_(None)
+        if tenant_id is not None:
+            scope = or_(scope, I18nText.tenant_id == tenant_id)
+        rows = session.exec(
+            select(
+                I18nText.tenant_id,
+                I18nText.entity_type,
+                I18nText.entity_id,
+                I18nText.field,
+                I18nText.text,
+            ).where(
+                scope,
+                I18nText.lang == lang,
+                I18nText.entity_type.in_({k[0] for k in missing}),
+                I18nText.entity_id.in_({k[1] for k in missing}),
+                I18nText.field.in_({k[2] for k in missing}),
+            )
+        ).all()
+        found: Dict[TranslationKey, str] = {}
+        for row_tenant_id, entity_type, entity_id, field, text in rows:
+            key = (entity_type, entity_id, field)
+            if key not in missing:
+                continue
+            # Tenant override wins over the global row
+            if row_tenant_id is not None or key not in found:
+                found[key] = text
+        out.update(found)
+
+        if has_uncommitted_menu_writes(session):
+            return out
+        with _cache_lock:
+            for key in missing:
+                _cache[(tenant_id, lang) + key] = (versions, found.get(key))
+                _cache.move_to_end((tenant_id, lang) + key)
+            while len(_cache) > TRANSLATION_CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+        return out
+
     @staticmethod
     def get_translated_field(
         session: Session,
@@ -29,34 +127,11 @@ class TranslationService:
         3. Return fallback_value (usually the canonical field value)
 
         Returns the translated text or fallback_value if no translation found.
+        Loops over many entities should use ``get_translations_bulk`` instead.
         """
-        # First try tenant-specific translation
-        if tenant_id is not None:
-            stmt = select(I18nText).where(
-                I18nText.tenant_id == tenant_id,
-                I18nText.entity_type == entity_type,
-                I18nText.entity_id == entity_id,
-                I18nText.field == field,
-                I18nText.lang == lang,
-            )
-            result = session.exec(stmt).first()
-            if result:
-                return result.text
-
-        # Then try global translation
-        stmt = select(I18nText).where(
-            I18nText.tenant_id.is_(None),  # Global translation
-            I18nText.entity_type == entity_type,
-            I18nText.entity_id == entity_id,
-            I18nText.field == field,
-            I18nText.lang == lang,
-        )
-        result = session.exec(stmt).first()
-        if result:
-            return result.text
-
-        # Return fallback
-        return fallback_value
+        key = (entity_type, entity_id, field)
+        found = TranslationService.get_translations_bulk(session, tenant_id, lang, [key])
+        return found.get(key, fallback_value)
 
     @staticmethod
     def get_all_translations_for_entity(
@@ -0,0 +1,170 @@
+"""
+Cache-friendly responses for the explicit ``/uploads/...`` image routes.
+
+Uploaded images are stored once under a random UUID name (renditions add a content hash)
+and never rewritten, so those names are sent with a one-year ``immutable`` Cache-Control;
+other names (seeded files, legacy uploads) must revalidate. Every response carries an
+ETag and Last-Modified; ``If-None-Match`` / ``If-Modified-Since`` answer 304, and byte
+ranges are served by Starlette's ``FileResponse``.
+
+With ``UPLOADS_PRELOAD_MANIFEST`` the served directories are listed once at startup into
+an in-process manifest (path -> validators). A revalidation of a known file is then
+answered without touching the disk; full responses still stat the file they send.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import stat
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from .http_cache import etag_matches
+from .image_renditions import is_rendition_name
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = Path(__file__).parent.parent / "uploads"
+
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_REVALIDATE_UPLOAD = "public, no-cache"
+
+_UUID_NAME_RE = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.[a-z0-9]{2,5}$"
+)
+# Directory patterns served by the explicit routes (relative to UPLOADS_DIR)
+_SERVED_GLOBS = ("*/logo", "*/header", "*/products", "providers/*/products")
+
+_manifest_lock = threading.Lock()
+# str(path) -> (etag, last-modified); only filled when the preload mode is on
+_manifest: dict[str, tuple[str, str]] = {}
+_manifest_loaded = False
+
+
+def is_content_addressed(filename: str) -> bool:
+    """True for names that are written once and never change (UUID uploads, renditions)."""
+    name = filename.lower()
+    return bool(_UUID_NAME_RE.match(name)) or is_rendition_name(name)
+
+
+def _validators(st: os.stat_result) -> tuple[str, str]:
+    # Same values Starlette's FileResponse puts in its headers
+    etag_base = str(st.st_mtime) + "-" + str(st.st_size)
+    etag = f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+    return etag, formatdate(st.st_mtime, usegmt=True)
+
+
+def _manifest_enabled() -> bool:
+    return bool(getattr(settings, "uploads_preload_manifest", False))
+
+
+def preload_upload_manifest(root: Path | None = None) -> int:
+    """List the served upload directories into the manifest. Returns the number of files."""
+    global _manifest_loaded
+    root = root or UPLOADS_DIR
+    entries: dict[str, tuple[str, str]] = {}
+    for pattern in _SERVED_GLOBS:
+        for directory in root.glob(pattern):
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.startswith(".") or not entry.is_file():
+                            continue
+                        entries[str(directory / entry.name)] = _validators(entry.stat())
+            except OSError:
+                continue
+    with _manifest_lock:
+        _manifest.clear()
+        _manifest.update(entries)
+        _manifest_loaded = True
+    logger.info("Upload manifest preloaded: %d files", len(entries))
+    return len(entries)
+
+
+def clear_upload_manifest() -> None:
+    global _manifest_loaded
+    with _manifest_lock:
+        _manifest.clear()
+        _manifest_loaded = False
+
+
+def _not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    if request.headers.get("if-none-match") is not None:
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if not since:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+
+
+def serve_upload(
+    request: Request,
+    path: Path,
+    *,
+    media_type: str | None = None,
+    not_found: str = "Image not found",
+    cache_control: str | None = None,
+    gzip_variant: bool = False,
+) -> Response:
+    """
+    ``FileResponse`` for an upload with caching headers, or 304 / 404. ``path`` must already
+    be confined to its upload directory (single-component filename checked by the route).
+    ``cache_control`` overrides the name-based policy; with ``gzip_variant`` a pre-compressed
+    ``{path}.gz`` is sent to clients that accept gzip.
+    """
+    if cache_control is None:
+        cache_control = (
+            CACHE_CONTROL_IMMUTABLE
+            if is_content_addressed(path.name)
+            else CACHE_CONTROL_REVALIDATE_UPLOAD
+        )
+    headers = {"Cache-Control": cache_control}
+    if gzip_variant:
+        headers["Vary"] = "Accept-Encoding"
+        accepts = request.headers.get("accept-encoding", "").lower()
+        gz_path = path.with_name(path.name + ".gz")
+        if "gzip" in accepts and gz_path.is_file():
+            media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            headers["Content-Encoding"] = "gzip"
+            path = gz_path
+    key = str(path)
+    if _manifest_enabled():
+        with _manifest_lock:
+            known = _manifest.get(key)
+        if known is not None and _not_modified(request, *known):
+            return Response(
+                status_code=304,
+                headers={"ETag": known[0], "Last-Modified": known[1], **headers},
+            )
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        with _manifest_lock:
+            _manifest.pop(key, None)
+        raise HTTPException(status_code=404, detail=not_found)
+
+    etag, last_modified = _validators(st)
+    if _manifest_enabled():
+        with _manifest_lock:
+            _manifest[key] = (etag, last_modified)
+    if _not_modified(request, etag, last_modified):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Last-Modified": last_modified, **headers},
+        )
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=st)
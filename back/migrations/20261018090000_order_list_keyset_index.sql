@@ -0,0 +1,6 @@
+-- Paginated staff order list (GET /orders/v2): keyset scan on (created_at, id) per tenant.
+-- Item lookups by order_id already use idx_orderitem_status (order_id, status).
+
+CREATE INDEX IF NOT EXISTS ix_order_tenant_created_id_live
+    ON "order" (tenant_id, created_at DESC, id DESC)
+    WHERE deleted_at IS NULL;
@@ -0,0 +1,12 @@
+-- Incremental order feed (GET /orders/changes): per-tenant change sequence.
+-- Every order / order item write bumps order_change_seq.last_seq for the tenant and stamps
+-- the order with it; the row lock keeps sequence order equal to commit order per tenant.
+
+CREATE TABLE IF NOT EXISTS order_change_seq (
+    tenant_id INTEGER PRIMARY KEY REFERENCES tenant(id) ON DELETE CASCADE,
+    last_seq BIGINT NOT NULL DEFAULT 0
+);
+
+ALTER TABLE "order" ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS ix_order_tenant_change_seq ON "order" (tenant_id, change_seq);
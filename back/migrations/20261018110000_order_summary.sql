@@ -0,0 +1,24 @@
+-- Materialized order aggregates (order_summary): display status, totals, item counts.
+-- Kept in step by the API on every order / item / payment flush (app/order_summary.py).
+-- Existing orders are backfilled by the API at startup (orders without a row), with the
+-- same code as the flush hook; rebuild or repair by hand with
+--   python -m app.seeds.rebuild_order_summaries
+
+CREATE TABLE IF NOT EXISTS order_summary (
+    order_id INTEGER PRIMARY KEY REFERENCES "order"(id) ON DELETE CASCADE,
+    tenant_id INTEGER NOT NULL REFERENCES tenant(id) ON DELETE CASCADE,
+    status VARCHAR(32) NOT NULL,
+    active_item_count INTEGER NOT NULL DEFAULT 0,
+    removed_items_count INTEGER NOT NULL DEFAULT 0,
+    subtotal_cents INTEGER NOT NULL DEFAULT 0,
+    loyalty_discount_cents INTEGER NOT NULL DEFAULT 0,
+    tip_amount_cents INTEGER NOT NULL DEFAULT 0,
+    total_cents INTEGER NOT NULL DEFAULT 0,
+    amount_due_cents INTEGER NOT NULL DEFAULT 0,
+    amount_paid_cents INTEGER NOT NULL DEFAULT 0,
+    revenue_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_order_summary_tenant_revenue_at
+    ON order_summary (tenant_id, revenue_at);
@@ -0,0 +1,10 @@
+-- Transactional outbox for real-time WebSocket events (app/realtime_outbox.py).
+-- Rows are written in the same transaction as the order / reservation change and
+-- deleted by the relay once published to Redis.
+
+CREATE TABLE IF NOT EXISTS realtime_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    channels JSONB NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,8 @@
+-- Per-tenant customer menu version for compiled menu snapshots (app/menu_cache.py).
+-- Bumped by a flush hook on product, catalog, question, translation, promo, tax and
+-- tenant writes; tenant_id 0 is the shared catalog / providers / global translations.
+
+CREATE TABLE IF NOT EXISTS menu_version (
+    tenant_id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,11 @@
+-- Reservation availability version per tenant and date for cached book grids
+-- (app/availability_cache.py). Bumped by a flush hook on reservation writes (their date)
+-- and on table, table group, opening-hours and tenant reservation-setting writes
+-- (day 0001-01-01 = every date of the tenant).
+
+CREATE TABLE IF NOT EXISTS availability_version (
+    tenant_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, day)
+);
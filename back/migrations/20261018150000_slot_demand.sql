@@ -0,0 +1,27 @@
+-- Reservation demand ledger per tenant, date, time and zone (app/slot_demand.py).
+-- floor_id = preferred floor, else the floor of the reservation's table, else 0 (no zone).
+-- Kept current by a flush hook; rebuild with python -m app.seeds.rebuild_slot_demand.
+
+CREATE TABLE IF NOT EXISTS slot_demand (
+    tenant_id INTEGER NOT NULL,
+    slot_date DATE NOT NULL,
+    slot_time TIME NOT NULL,
+    floor_id INTEGER NOT NULL DEFAULT 0,
+    guests INTEGER NOT NULL DEFAULT 0,
+    parties INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, slot_date, slot_time, floor_id)
+);
+
+-- Backfill from existing booked / seated reservations
+INSERT INTO slot_demand (tenant_id, slot_date, slot_time, floor_id, guests, parties)
+SELECT r.tenant_id,
+       r.reservation_date,
+       r.reservation_time,
+       COALESCE(r.preferred_floor_id, t.floor_id, 0),
+       SUM(r.party_size),
+       COUNT(*)
+FROM reservation r
+LEFT JOIN "table" t ON t.id = r.table_id
+WHERE r.status IN ('booked', 'seated')
+GROUP BY 1, 2, 3, 4
+ON CONFLICT DO NOTHING;
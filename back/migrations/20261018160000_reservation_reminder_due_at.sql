@@ -0,0 +1,26 @@
+-- UTC due times of the 24h / 2h reservation reminders (app/reservation_reminder_due.py):
+-- slot start in the tenant timezone minus 24h / 2h. The reminder heartbeat selects unsent
+-- booked reservations whose due time falls in its window through the partial indexes below.
+
+ALTER TABLE reservation ADD COLUMN IF NOT EXISTS reminder_24h_due_at TIMESTAMPTZ NULL;
+ALTER TABLE reservation ADD COLUMN IF NOT EXISTS reminder_2h_due_at TIMESTAMPTZ NULL;
+
+-- Backfill upcoming booked reservations (unknown timezone names fall back to UTC)
+UPDATE reservation r
+SET reminder_24h_due_at = ((r.reservation_date + r.reservation_time) AT TIME ZONE tz.name) - INTERVAL '24 hours',
+    reminder_2h_due_at = ((r.reservation_date + r.reservation_time) AT TIME ZONE tz.name) - INTERVAL '2 hours'
+FROM (
+    SELECT t.id,
+           COALESCE((SELECT n.name FROM pg_timezone_names n WHERE n.name = t.timezone), 'UTC') AS name
+    FROM tenant t
+) tz
+WHERE tz.id = r.tenant_id
+  AND r.status = 'booked'
+  AND r.reservation_date >= CURRENT_DATE - 1;
+
+CREATE INDEX IF NOT EXISTS idx_reservation_reminder_24h_due
+    ON reservation(reminder_24h_due_at)
+    WHERE status = 'booked' AND reminder_24h_sent_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_reservation_reminder_2h_due
+    ON reservation(reminder_2h_due_at)
+    WHERE status = 'booked' AND reminder_2h_sent_at IS NULL;
@@ -0,0 +1,15 @@
+-- Order change stamps without a per-tenant row lock (app/order_change_feed.py).
+-- change_seq now comes from a global sequence (order version for real-time deltas);
+-- change_xid is the writing transaction id, read by GET /orders/changes up to the oldest
+-- running transaction. The per-tenant order_change_seq row serialized every order write of
+-- a tenant until commit.
+
+CREATE SEQUENCE IF NOT EXISTS order_change_seq_global AS BIGINT;
+SELECT setval('order_change_seq_global', GREATEST((SELECT COALESCE(MAX(change_seq), 0) FROM "order"), 1));
+
+ALTER TABLE "order" ADD COLUMN IF NOT EXISTS change_xid BIGINT NOT NULL DEFAULT 0;
+
+DROP INDEX IF EXISTS ix_order_tenant_change_seq;
+CREATE INDEX IF NOT EXISTS ix_order_tenant_change_xid ON "order" (tenant_id, change_xid);
+
+DROP TABLE IF EXISTS order_change_seq;
@@ -0,0 +1,7 @@
+-- Reminder claims (app/reservation_reminder_heartbeat.py): the heartbeat stamps
+-- reminder_*_claimed_at before sending and reminder_*_sent_at only once a channel delivered.
+-- A claim older than the lease is taken again, so a worker that dies mid-send does not
+-- lose the reminder.
+
+ALTER TABLE reservation ADD COLUMN IF NOT EXISTS reminder_24h_claimed_at TIMESTAMPTZ NULL;
+ALTER TABLE reservation ADD COLUMN IF NOT EXISTS reminder_2h_claimed_at TIMESTAMPTZ NULL;
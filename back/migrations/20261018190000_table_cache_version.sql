@@ -0,0 +1,5 @@
+-- Per-row write counter for the table-token cache (app/table_token_cache.py): every ORM
+-- write of a table bumps it, and the Redis entry is only replaced by a higher version, so
+-- write-throughs applied out of commit order cannot put older state back.
+
+ALTER TABLE "table" ADD COLUMN IF NOT EXISTS cache_version BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,115 @@
+"""Cached book-grid days: scope of availability writes and version/TTL-keyed reuse."""
+from __future__ import annotations
+
+import unittest
+from datetime import date, time
+from unittest.mock import MagicMock, patch
+
+from sqlmodel import Session
+
+from app import availability_cache, models
+from app.availability_cache import ALL_DAYS
+
+
+class TestAvailabilityScopes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.session = Session()
+
+    def _scopes(self, obj: object) -> set:
+        return availability_cache._availability_scopes(self.session, obj)
+
+    def test_new_reservation_bumps_its_date(self) -> None:
+        r = models.Reservation(
+            tenant_id=3,
+            customer_name="a",
+            customer_phone="+10000000001",
+            reservation_date=date(2031, 7, 2),
+            reservation_time=time(20, 0),
+            party_size=2,
+        )
+        self.session.add(r)
+        self.assertEqual(self._scopes(r), {(3, date(2031, 7, 2))})
+
+    def test_table_and_opening_hours_bump_every_date(self) -> None:
+        table = models.Table(tenant_id=3, name="T1", seat_count=4)
+        override = models.OpeningHoursDateOverride(
+            tenant_id=3, date_from=date(2031, 12, 24), date_to=date(2031, 12, 26), closed=True
+        )
+        self.session.add(table)
+        self.session.add(override)
+        self.assertEqual(self._scopes(table), {(3, ALL_DAYS)})
+        self.assertEqual(self._scopes(override), {(3, ALL_DAYS)})
+
+    def test_new_tenant_and_unrelated_rows_do_not_bump(self) -> None:
+        tenant = models.Tenant(name="t")
+        order = models.Order(tenant_id=1)
+        self.session.add(tenant)
+        self.session.add(order)
+        self.assertEqual(self._scopes(tenant), set())
+        self.assertEqual(self._scopes(order), set())
+
+    def test_bump_takes_the_day_lock_before_the_version_rows(self) -> None:
+        session = MagicMock(info={})
+        order = MagicMock()
+        session.connection.return_value.execute = order.execute
+        with patch.object(availability_cache, "lock_slot_days", order.lock):
+            availability_cache.bump_availability_versions(
+                session, {(3, date(2031, 7, 2)), (3, ALL_DAYS), (3, date(2031, 7, 1))}
+            )
+        name, args, _ = order.mock_calls[0]
+        self.assertEqual((name, args[1], sorted(args[2])), ("lock", 3, [date(2031, 7, 1), date(2031, 7, 2)]))
+        self.assertEqual([c[0] for c in order.mock_calls[1:]], ["execute"] * 3)
+
+
+class TestCachedDays(unittest.TestCase):
+    def setUp(self) -> None:
+        availability_cache.clear_availability_cache()
+        self.session = Session()
+        self.builds: list[date] = []
+        self.days = [date(2031, 7, 1), date(2031, 7, 2)]
+
+    def _build(self, d: date) -> tuple[str, dict[str, str]]:
+        self.builds.append(d)
+        return ("out_of_hours", {"20:00": "available"})
+
+    def _cached(self, key: tuple = (2, None, None)) -> dict:
+        return availability_cache.cached_days(self.session, 1, self.days, key, self._build)
+
+    def test_reused_until_day_version_changes(self) -> None:
+        with patch.object(availability_cache, "availability_versions", return_value=(1, {})):
+            first = self._cached()
+            again = self._cached()
+        self.assertIs(first[self.days[0]], again[self.days[0]])
+        self.assertEqual(len(self.builds), 2)
+        with patch.object(
+            availability_cache, "availability_versions", return_value=(1, {self.days[1]: 5})
+        ):
+            self._cached()
+        self.assertEqual(self.builds[2:], [self.days[1]])
+
+    def test_tenant_wide_version_and_key(self) -> None:
+        with patch.object(availability_cache, "availability_versions", return_value=(1, {})):
+            self._cached()
+            self._cached(key=(4, None, None))
+        with patch.object(availability_cache, "availability_versions", return_value=(2, {})):
+            self._cached()
+        self.assertEqual(len(self.builds), 6)
+
+    def test_entries_expire_after_ttl(self) -> None:
+        with patch.object(availability_cache, "availability_versions", return_value=(1, {})), patch.object(
+            availability_cache._time, "monotonic", side_effect=[100.0, 200.0]
+        ):
+            self._cached()
+            self._cached()
+        self.assertEqual(len(self.builds), 4)
+
+    def test_uncommitted_writes_are_not_cached(self) -> None:
+        self.session.info[availability_cache._UNCOMMITTED_KEY] = True
+        with patch.object(availability_cache, "availability_versions", return_value=(1, {})):
+            self._cached()
+            self._cached()
+        self.assertEqual(len(self.builds), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
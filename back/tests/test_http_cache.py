@@ -0,0 +1,64 @@
+"""If-None-Match handling for public endpoints (app/http_cache.py)."""
+
+import os
+import sys
+import unittest
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app.http_cache import (  # noqa: E402
+    CACHE_CONTROL_SHORT,
+    body_etag,
+    conditional_json,
+    make_etag,
+)
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        self.body = {"name": "Bar", "products": [1, 2]}
+
+        @app.get("/thing")
+        def thing(request: Request):
+            return conditional_json(request, self.body, CACHE_CONTROL_SHORT)
+
+        self.client = TestClient(app)
+
+    def test_make_etag_is_strong_and_stable(self):
+        etag = make_etag("menu", 1, "es", (3, 4))
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertEqual(etag, make_etag("menu", 1, "es", (3, 4)))
+        self.assertNotEqual(etag, make_etag("menu", 1, "es", (3, 5)))
+
+    def test_200_then_304(self):
+        first = self.client.get("/thing")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["etag"]
+        self.assertEqual(etag, body_etag(self.body))
+        self.assertEqual(first.headers["cache-control"], CACHE_CONTROL_SHORT)
+        self.assertEqual(first.json(), self.body)
+
+        again = self.client.get("/thing", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers["etag"], etag)
+        self.assertEqual(again.content, b"")
+
+        weak_list = self.client.get("/thing", headers={"If-None-Match": f'"nope", W/{etag}'})
+        self.assertEqual(weak_list.status_code, 304)
+
+    def test_changed_body_returns_200(self):
+        etag = self.client.get("/thing").headers["etag"]
+        self.body["products"].append(3)
+        changed = self.client.get("/thing", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Upload image processing in the process pool (app/image_processing.py)."""
+from __future__ import annotations
+
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from fastapi import HTTPException
+from PIL import Image
+
+from app import image_processing
+from app.image_processing import (
+    MAX_IMAGE_WIDTH,
+    optimize_image,
+    process_image_upload,
+    shutdown_image_pool,
+)
+from app.image_renditions import manifest_path
+
+
+def _png(width: int, height: int) -> bytes:
+    out = BytesIO()
+    Image.new("RGB", (width, height), (20, 120, 200)).save(out, format="PNG")
+    return out.getvalue()
+
+
+class TestOptimizeImage(unittest.TestCase):
+    def test_large_image_is_downscaled(self) -> None:
+        data = optimize_image(_png(MAX_IMAGE_WIDTH + 400, 200), "image/png")
+        with Image.open(BytesIO(data)) as im:
+            self.assertEqual(im.width, MAX_IMAGE_WIDTH)
+
+    def test_undecodable_data_is_returned_unchanged(self) -> None:
+        self.assertEqual(optimize_image(b"not an image", "image/jpeg"), b"not an image")
+
+
+class TestProcessImageUpload(unittest.TestCase):
+    def setUp(self) -> None:
+        shutdown_image_pool()
+        self._tmpdir = tempfile.mkdtemp()
+        self.dest = Path(self._tmpdir) / "upload.png"
+
+    def tearDown(self) -> None:
+        shutdown_image_pool()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def test_stores_optimized_image_and_renditions(self) -> None:
+        size = asyncio.run(process_image_upload(_png(700, 350), "image/png", self.dest))
+        self.assertEqual(size, self.dest.stat().st_size)
+        self.assertTrue(manifest_path(self.dest).is_file())
+        self.assertEqual([p.name for p in Path(self._tmpdir).glob(".*.tmp")], [])
+
+    def test_timeout_raises_503(self) -> None:
+        with mock.patch.object(
+            image_processing.settings, "image_processing_timeout_seconds", 0.001
+        ):
+            with self.assertRaises(HTTPException) as ctx:
+                asyncio.run(process_image_upload(_png(700, 350), "image/png", self.dest))
+        self.assertEqual(ctx.exception.status_code, 503)
+
+    def test_timed_out_job_keeps_its_slot_and_leaves_no_files(self) -> None:
+        release = threading.Event()
+        real_job = image_processing._process_upload
+
+        def _slow_job(*args):
+            release.wait(5)
+            return real_job(*args)
+
+        async def _run() -> None:
+            with self.assertRaises(HTTPException):
+                await process_image_upload(_png(700, 350), "image/png", self.dest)
+            slot = image_processing._slot()
+            self.assertTrue(slot.locked())
+            release.set()
+            for _ in range(100):
+                if not slot.locked():
+                    break
+                await asyncio.sleep(0.05)
+            self.assertFalse(slot.locked())
+
+        threads = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(threads.shutdown)
+        with mock.patch.object(image_processing, "_get_pool", return_value=threads), mock.patch.object(
+            image_processing, "_process_upload", _slow_job
+        ), mock.patch.object(image_processing.settings, "image_worker_processes", 1), mock.patch.object(
+            image_processing.settings, "image_processing_timeout_seconds", 0.1
+        ):
+            asyncio.run(_run())
+        self.assertFalse(self.dest.exists())
+        self.assertFalse(manifest_path(self.dest).exists())
+        self.assertEqual(list(Path(self._tmpdir).iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Responsive renditions written next to uploaded images (app/image_renditions.py)."""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from app import image_renditions
+from app.image_renditions import (
+    backfill_renditions,
+    delete_renditions,
+    is_rendition_name,
+    manifest_path,
+    product_image_srcset,
+    srcset_for,
+    write_renditions,
+)
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    out = BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class TestImageRenditions(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.mkdtemp()
+        self.uploads = Path(self._tmpdir)
+        self._patcher = mock.patch.object(image_renditions, "UPLOADS_DIR", self.uploads)
+        self._patcher.start()
+        image_renditions._manifests.clear()
+        self.products_dir = self.uploads / "7" / "products"
+        self.products_dir.mkdir(parents=True)
+        self.image = self.products_dir / "dish.jpg"
+        self.image.write_bytes(_jpeg(800, 600))
+
+    def tearDown(self) -> None:
+        self._patcher.stop()
+        image_renditions._manifests.clear()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def test_widths_below_source_plus_source_width(self) -> None:
+        manifest = write_renditions(self.image)
+        self.assertIsNotNone(manifest)
+        self.assertTrue(manifest_path(self.image).is_file())
+        jpeg = manifest["renditions"]["jpeg"]
+        self.assertEqual([w for w, _ in jpeg], [160, 320, 640, 800])
+        # The stored image is the full-width JPEG entry; nothing re-encoded for it
+        self.assertEqual(jpeg[-1], [800, "dish.jpg"])
+        webp = manifest["renditions"]["webp"]
+        self.assertEqual([w for w, _ in webp], [160, 320, 640, 800])
+        for fmt, entries in manifest["renditions"].items():
+            for width, name in entries:
+                if name == "dish.jpg":
+                    continue
+                self.assertTrue(is_rendition_name(name), name)
+                with Image.open(self.products_dir / name) as im:
+                    self.assertEqual(im.width, width)
+
+    def test_srcset_lists_urls_with_widths(self) -> None:
+        write_renditions(self.image)
+        srcset = product_image_srcset(7, "dish.jpg")
+        self.assertIn("webp", srcset)
+        self.assertTrue(srcset["jpeg"].endswith("/uploads/7/products/dish.jpg 800w"))
+        self.assertTrue(srcset["webp"].startswith("/uploads/7/products/dish.160w."))
+        self.assertIsNone(product_image_srcset(7, "missing.jpg"))
+        self.assertIsNone(product_image_srcset(7, "../8/products/dish.jpg"))
+
+    def test_manifest_read_from_disk_when_not_cached(self) -> None:
+        write_renditions(self.image)
+        image_renditions._manifests.clear()
+        self.assertIsNotNone(srcset_for(self.image, "/uploads/7/products"))
+
+    def test_delete_removes_renditions_and_manifest_only(self) -> None:
+        write_renditions(self.image)
+        delete_renditions(self.image)
+        self.assertEqual([p.name for p in self.products_dir.iterdir()], ["dish.jpg"])
+        self.assertIsNone(product_image_srcset(7, "dish.jpg"))
+
+    def test_undecodable_file_has_no_renditions(self) -> None:
+        broken = self.products_dir / "broken.jpg"
+        broken.write_bytes(b"not an image")
+        self.assertIsNone(write_renditions(broken))
+        self.assertFalse(manifest_path(broken).exists())
+
+    def test_backfill_skips_images_with_manifest(self) -> None:
+        logo_dir = self.uploads / "7" / "logo"
+        logo_dir.mkdir(parents=True)
+        (logo_dir / "logo.jpg").write_bytes(_jpeg(300, 100))
+        write_renditions(self.image)
+
+        counts = backfill_renditions(self.uploads)
+        self.assertEqual(counts, {"written": 1, "skipped": 1, "failed": 0})
+        self.assertTrue(manifest_path(logo_dir / "logo.jpg").is_file())
+
+        again = backfill_renditions(self.uploads)
+        self.assertEqual(again, {"written": 0, "skipped": 2, "failed": 0})
+
+    def test_backfill_reports_written_images(self) -> None:
+        written: list[Path] = []
+        backfill_renditions(self.uploads, on_written=written.append)
+        self.assertEqual(written, [self.image])
+
+    def test_manifest_cache_is_bounded_and_follows_rewrites(self) -> None:
+        write_renditions(self.image)
+        with mock.patch.object(image_renditions, "MANIFEST_CACHE_MAX_ENTRIES", 1):
+            other = self.products_dir / "other.jpg"
+            other.write_bytes(_jpeg(200, 100))
+            write_renditions(other)
+            self.assertEqual(list(image_renditions._manifests), [str(other)])
+        # Another process rewrote the manifest (backfill --force): reread, not the cached one
+        stale = image_renditions.load_manifest(other)
+        path = manifest_path(other)
+        rewritten = path.read_text(encoding="utf-8").replace('"width": 200', '"width": 201')
+        path.write_text(rewritten, encoding="utf-8")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+        self.assertEqual(stale["width"], 200)
+        self.assertEqual(image_renditions.load_manifest(other)["width"], 201)
+
+
+if __name__ == "__main__":
+    unittest.main()
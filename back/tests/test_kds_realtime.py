@@ -0,0 +1,93 @@
+"""Station-scoped KDS channels: order events are split per route/station with filtered items."""
+from __future__ import annotations
+
+import unittest
+
+from pg_client_mixin import PgClientTestCase
+
+from sqlmodel import select
+
+from app import models
+from app.kds_realtime import kds_fanout_channel, kds_payloads, stage_kds_events
+from app.realtime_outbox import _publish_targets
+
+
+class TestKdsPayloads(PgClientTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tenant = models.Tenant(name="KDS Channels")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        self.tenant_id = tenant.id
+        self.grill = models.KitchenStation(tenant_id=tenant.id, name="Grill", display_route="kitchen")
+        self.session.add(self.grill)
+        self.session.commit()
+        self.session.refresh(self.grill)
+        self.burger = models.Product(
+            name="Burger", price_cents=1200, tenant_id=tenant.id, kitchen_station_id=self.grill.id
+        )
+        self.beer = models.Product(name="Beer", price_cents=400, tenant_id=tenant.id, category="Beverages")
+        self.session.add(self.burger)
+        self.session.add(self.beer)
+        self.session.commit()
+        self.session.refresh(self.burger)
+        self.session.refresh(self.beer)
+        order = models.Order(tenant_id=tenant.id)
+        self.session.add(order)
+        self.session.commit()
+        self.session.refresh(order)
+        self.order_id = order.id
+        self.items = {}
+        for p in (self.burger, self.beer):
+            item = models.OrderItem(
+                order_id=order.id, product_id=p.id, product_name=p.name, quantity=1, price_cents=p.price_cents
+            )
+            self.session.add(item)
+            self.session.commit()
+            self.session.refresh(item)
+            self.items[p.name] = item
+
+    def test_order_event_split_by_route_and_station(self) -> None:
+        payloads = dict(kds_payloads(self.session, self.tenant_id, {"type": "new_order", "order_id": self.order_id}))
+        t = self.tenant_id
+        self.assertEqual(
+            set(payloads),
+            {f"kds:{t}:route:kitchen", f"kds:{t}:station:{self.grill.id}", f"kds:{t}:route:bar"},
+        )
+        self.assertEqual([i["product_name"] for i in payloads[f"kds:{t}:route:bar"]["items"]], ["Beer"])
+        self.assertEqual([i["product_name"] for i in payloads[f"kds:{t}:route:kitchen"]["items"]], ["Burger"])
+        self.assertEqual(payloads[f"kds:{t}:route:bar"]["type"], "new_order")
+
+    def test_item_event_only_reaches_its_route(self) -> None:
+        data = {"type": "item_status_update", "order_id": self.order_id, "item_id": self.items["Beer"].id}
+        channels = [c for c, _ in kds_payloads(self.session, self.tenant_id, data)]
+        self.assertEqual(channels, [f"kds:{self.tenant_id}:route:bar"])
+
+    def test_delta_items_filtered_per_display(self) -> None:
+        burger, beer = self.items["Burger"].id, self.items["Beer"].id
+        delta = {"order_id": self.order_id, "items": [{"id": burger, "status": "ready"}, {"id": beer, "status": "ready"}]}
+        payloads = dict(kds_payloads(self.session, self.tenant_id, {"order_id": self.order_id, "delta": delta}))
+        t = self.tenant_id
+        self.assertEqual(payloads[f"kds:{t}:route:bar"]["delta"]["items"], [{"id": beer, "status": "ready"}])
+        self.assertEqual(payloads[f"kds:{t}:station:{self.grill.id}"]["delta"]["items"], [{"id": burger, "status": "ready"}])
+
+    def test_writer_stages_one_row_the_relay_expands(self) -> None:
+        stage_kds_events(self.session, self.tenant_id, {"type": "new_order", "order_id": self.order_id})
+        self.session.commit()
+        rows = [
+            r
+            for r in self.session.exec(select(models.RealtimeOutbox)).all()
+            if r.channels == [kds_fanout_channel(self.tenant_id)]
+        ]
+        self.assertEqual(len(rows), 1)
+        channels = [c for c, _ in _publish_targets(self.session, rows)]
+        t = self.tenant_id
+        self.assertEqual(
+            sorted(channels),
+            sorted([f"kds:{t}:route:kitchen", f"kds:{t}:station:{self.grill.id}", f"kds:{t}:route:bar"]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
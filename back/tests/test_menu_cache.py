@@ -0,0 +1,136 @@
+"""Compiled menu snapshots: scope of menu writes and version-keyed reuse."""
+from __future__ import annotations
+
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from sqlalchemy import JSON as SAJSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import menu_cache, models
+
+
+class TestMenuScope(unittest.TestCase):
+    def test_tenant_rows_bump_their_tenant(self) -> None:
+        self.assertEqual(menu_cache._menu_scope(models.Product(tenant_id=4, name="x", price_cents=1)), 4)
+        self.assertEqual(menu_cache._menu_scope(models.Tenant(id=9, name="t")), 9)
+
+    def test_global_translations_bump_global_scope(self) -> None:
+        self.assertEqual(
+            menu_cache._menu_scope(models.I18nText(tenant_id=None, entity_type="product", entity_id=1,
+                                                   field="name", lang="es", text="x")),
+            menu_cache.GLOBAL_MENU_SCOPE,
+        )
+        # Catalog rows are scoped by the tenants linking them, not a fixed scope
+        self.assertIsNone(menu_cache._menu_scope(models.ProductCatalog(name="Wine")))
+
+    def test_unrelated_rows_do_not_bump(self) -> None:
+        self.assertIsNone(menu_cache._menu_scope(models.Order(tenant_id=1)))
+
+
+class TestGetMenuSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        menu_cache.clear_menu_snapshots()
+        self.builds = 0
+        # Unbound: versions are patched, only session.info is read
+        self.session = Session()
+
+    def _build(self) -> dict:
+        self.builds += 1
+        return {"products": [], "tenant_translations": {}, "n": self.builds}
+
+    def test_reused_until_version_changes(self) -> None:
+        day = date(2026, 10, 18)
+        with patch.object(menu_cache, "menu_versions", return_value=(3, 1)):
+            first = menu_cache.get_menu_snapshot(self.session, 1, "es", day, self._build)
+            again = menu_cache.get_menu_snapshot(self.session, 1, "es", day, self._build)
+        self.assertIs(first, again)
+        with patch.object(menu_cache, "menu_versions", return_value=(4, 1)):
+            fresh = menu_cache.get_menu_snapshot(self.session, 1, "es", day, self._build)
+        self.assertEqual(fresh["n"], 2)
+
+    def test_keyed_by_language_and_date(self) -> None:
+        with patch.object(menu_cache, "menu_versions", return_value=(1, 1)):
+            menu_cache.get_menu_snapshot(self.session, 1, "es", date(2026, 10, 18), self._build)
+            menu_cache.get_menu_snapshot(self.session, 1, "en", date(2026, 10, 18), self._build)
+            menu_cache.get_menu_snapshot(self.session, 1, "es", date(2026, 10, 19), self._build)
+        self.assertEqual(self.builds, 3)
+
+
+class TestCatalogScopes(unittest.TestCase):
+    def setUp(self) -> None:
+        self._jsonb = []
+        for col in models.Tenant.__table__.columns:
+            if isinstance(col.type, JSONB):
+                self._jsonb.append((col, col.type))
+                col.type = SAJSON()
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.Tax.__table__,
+                models.Product.__table__,
+                models.Provider.__table__,
+                models.ProductCatalog.__table__,
+                models.ProviderProduct.__table__,
+                models.TenantProduct.__table__,
+                models.I18nText.__table__,
+                models.MenuVersion.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.linked = models.Tenant(name="Linked")
+        self.other = models.Tenant(name="Other")
+        self.provider = models.Provider(name="Cellar", token="cellar")
+        self.wine = models.ProductCatalog(name="Wine")
+        self.session.add_all([self.linked, self.other, self.provider, self.wine])
+        self.session.commit()
+        self.offer = models.ProviderProduct(
+            catalog_id=self.wine.id, provider_id=self.provider.id, external_id="w1", name="Wine", price_cents=900
+        )
+        self.session.add(self.offer)
+        self.session.add(
+            models.TenantProduct(tenant_id=self.linked.id, catalog_id=self.wine.id, name="Wine", price_cents=1200)
+        )
+        self.session.commit()
+
+    def tearDown(self) -> None:
+        self.session.close()
+        for col, typ in self._jsonb:
+            col.type = typ
+
+    def _versions(self) -> dict[int, int]:
+        mv = models.MenuVersion
+        return dict(self.session.exec(select(mv.tenant_id, mv.version)).all())
+
+    def test_catalog_writes_bump_linking_tenants_only(self) -> None:
+        before = self._versions()
+        self.wine.name = "Red wine"
+        self.offer.price_cents = 950
+        self.session.add_all([self.wine, self.offer])
+        self.session.commit()
+        after = self._versions()
+        self.assertEqual(after[self.linked.id], before[self.linked.id] + 1)
+        self.assertNotIn(self.other.id, after)
+        self.assertNotIn(menu_cache.GLOBAL_MENU_SCOPE, after)
+
+    def test_global_translation_bumps_after_commit(self) -> None:
+        self.session.add(
+            models.I18nText(tenant_id=None, entity_type="product_catalog", entity_id=self.wine.id,
+                            field="name", lang="es", text="Vino")
+        )
+        self.session.flush()
+        self.assertNotIn(menu_cache.GLOBAL_MENU_SCOPE, self._versions())
+        self.assertTrue(menu_cache.has_uncommitted_menu_writes(self.session))
+        self.session.commit()
+        self.assertEqual(self._versions()[menu_cache.GLOBAL_MENU_SCOPE], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Static public menu export (app/menu_export.py)."""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import menu_export, models  # noqa: E402
+from app.menu_cache import clear_menu_snapshots  # noqa: E402
+from app.menu_export import (  # noqa: E402
+    export_public_menus,
+    export_tenant_menu,
+    is_versioned_export_name,
+)
+from app.promo_service import clear_promo_indexes  # noqa: E402
+from app.translation_service import clear_translation_cache  # noqa: E402
+
+
+class TestMenuExport(unittest.TestCase):
+    def setUp(self):
+        for clear in (clear_menu_snapshots, clear_promo_indexes, clear_translation_cache):
+            clear()
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.Product.__table__,
+                models.ProductCatalog.__table__,
+                models.Provider.__table__,
+                models.ProviderProduct.__table__,
+                models.TenantProduct.__table__,
+                models.PricePromotion.__table__,
+                models.I18nText.__table__,
+                models.MenuVersion.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.tenant = models.Tenant(name="Export Bistro", currency_code="EUR")
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(self.tenant)
+        self.session.add(
+            models.Product(tenant_id=self.tenant.id, name="Paella", price_cents=1200, category="Main Course")
+        )
+        self.session.commit()
+        self.root = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        self.session.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _index(self):
+        return json.loads((self.root / str(self.tenant.id) / "index.json").read_text())
+
+    def test_writes_versioned_latest_and_gzip_per_language(self):
+        rendered = export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en", "es"])
+        self.assertEqual(rendered, 2)
+        tenant_dir = self.root / str(self.tenant.id)
+        index = self._index()
+        self.assertEqual(set(index["languages"]), {"en", "es"})
+        versioned = index["languages"]["es"]["file"]
+        self.assertTrue(is_versioned_export_name(versioned))
+        body = json.loads((tenant_dir / versioned).read_text())
+        self.assertEqual(body["lang"], "es")
+        self.assertEqual(body["categories"][0]["products"][0]["price_formatted"], "12,00")
+        self.assertEqual((tenant_dir / "menu.es.json").read_bytes(), (tenant_dir / versioned).read_bytes())
+        self.assertEqual(
+            gzip.decompress((tenant_dir / f"{versioned}.gz").read_bytes()),
+            (tenant_dir / versioned).read_bytes(),
+        )
+
+    def test_unchanged_menu_is_not_rendered_again(self):
+        export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en"])
+        self.assertEqual(export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en"]), 0)
+        self.assertEqual(
+            export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en"], force=True), 1
+        )
+
+    def test_menu_change_publishes_new_version_and_keeps_previous(self):
+        export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en"])
+        first = self._index()["languages"]["en"]["file"]
+
+        self.session.add(models.Product(tenant_id=self.tenant.id, name="Tortilla", price_cents=600))
+        self.session.commit()
+        self.assertEqual(export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en"]), 1)
+        entry = self._index()["languages"]["en"]
+        self.assertNotEqual(entry["file"], first)
+        self.assertEqual(len(entry["versions"]), 2)
+        tenant_dir = self.root / str(self.tenant.id)
+        self.assertTrue((tenant_dir / first).is_file())
+        latest = json.loads((tenant_dir / "menu.en.json").read_text())
+        names = {p["name"] for c in latest["categories"] for p in c["products"]}
+        self.assertEqual(names, {"Paella", "Tortilla"})
+
+    def test_export_all_tenants(self):
+        counts = export_public_menus(self.session, root=self.root)
+        self.assertEqual(counts["tenants"], 1)
+        self.assertEqual(counts["failed"], 0)
+        self.assertGreater(counts["rendered"], 0)
+
+    def test_tenant_failure_keeps_the_locked_transaction(self):
+        second = models.Tenant(name="Second Bistro", currency_code="EUR")
+        self.session.add(second)
+        self.session.commit()
+        real_export = menu_export.export_tenant_menu
+
+        def _export(session, tenant, **kw):
+            if tenant.id == self.tenant.id:
+                raise RuntimeError("boom")
+            return real_export(session, tenant, **kw)
+
+        # The publisher's pg_try_advisory_xact_lock lives as long as this transaction
+        outer = self.session.begin()
+        with patch.object(menu_export, "export_tenant_menu", side_effect=_export):
+            counts = export_public_menus(self.session, root=self.root)
+        self.assertIs(self.session.get_transaction(), outer)
+        self.assertTrue(outer.is_active)
+        self.assertEqual(counts["failed"], 1)
+        self.assertGreater(counts["rendered"], 0)
+        self.assertTrue((self.root / str(second.id) / "index.json").is_file())
+
+    def test_files_from_a_failed_publish_are_pruned(self):
+        real_build = menu_export.build_public_tenant_menu
+
+        def _build(session, tenant_id, lang):
+            if lang == "es":
+                raise RuntimeError("boom")
+            return real_build(session, tenant_id, lang)
+
+        with patch.object(menu_export, "build_public_tenant_menu", side_effect=_build):
+            with self.assertRaises(RuntimeError):
+                export_tenant_menu(self.session, self.tenant, root=self.root, languages=["en", "es"])
+        tenant_dir = self.root / str(self.tenant.id)
+        orphans = [p.name for p in tenant_dir.iterdir() if is_versioned_export_name(p.name)]
+        self.assertEqual(len(orphans), 1)
+        self.assertFalse((tenant_dir / "index.json").exists())
+
+        export_tenant_menu(self.session, self.tenant, root=self.root, languages=["es"])
+        self.assertEqual(set(self._index()["languages"]), {"es"})
+        self.assertFalse((tenant_dir / orphans[0]).exists())
+        self.assertFalse((tenant_dir / f"{orphans[0]}.gz").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Effective opening hours for a date range (opening_service_windows_for_range, SQLite)."""
+
+import json
+import os
+import sys
+import unittest
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import JSON as SAJSON
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models, opening_hours_effective  # noqa: E402
+from app.opening_hours_effective import (  # noqa: E402
+    opening_service_windows_for_date,
+    opening_service_windows_for_range,
+)
+
+OPEN_DAY = {"closed": False, "open": "09:00", "close": "22:00"}
+BASE_WEEK = {
+    **{day: OPEN_DAY for day in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday")},
+    "sunday": {"closed": True},
+}
+
+
+class TestOpeningHoursRange(unittest.TestCase):
+    def setUp(self):
+        self._jsonb = []
+        for col in models.Tenant.__table__.columns:
+            if isinstance(col.type, JSONB):
+                self._jsonb.append((col, col.type))
+                col.type = SAJSON()
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.OpeningHoursBaselineSchedule.__table__,
+                models.OpeningHoursDateOverride.__table__,
+                models.AvailabilityVersion.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.tenant = models.Tenant(name="OH range", opening_hours=json.dumps(BASE_WEEK))
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(self.tenant)
+        late = {**BASE_WEEK, **{day: {**OPEN_DAY, "open": "11:00"} for day in ("monday", "tuesday", "wednesday")}}
+        self.session.add(
+            models.OpeningHoursBaselineSchedule(
+                tenant_id=self.tenant.id, effective_from=date(2026, 6, 10), opening_hours=json.dumps(late)
+            )
+        )
+        # Wide closure with a narrower special-hours range inside it
+        self.session.add(
+            models.OpeningHoursDateOverride(
+                tenant_id=self.tenant.id, date_from=date(2026, 6, 20), date_to=date(2026, 6, 26), closed=True
+            )
+        )
+        self.session.add(
+            models.OpeningHoursDateOverride(
+                tenant_id=self.tenant.id,
+                date_from=date(2026, 6, 22),
+                date_to=date(2026, 6, 23),
+                opening_hours=json.dumps({"monday": {"closed": False, "open": "18:00", "close": "23:00"}}),
+            )
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        for col, typ in self._jsonb:
+            col.type = typ
+
+    def test_baseline_switch_and_narrowest_override(self):
+        windows = opening_service_windows_for_range(self.session, self.tenant, date(2026, 6, 8), date(2026, 6, 28))
+        self.assertEqual(len(windows), 21)
+        self.assertEqual(windows[date(2026, 6, 8)], [(time(9, 0), time(22, 0))])  # Monday, old baseline
+        self.assertEqual(windows[date(2026, 6, 15)], [(time(11, 0), time(22, 0))])  # Monday, new baseline
+        self.assertEqual(windows[date(2026, 6, 14)], [])  # Sunday
+        self.assertEqual(windows[date(2026, 6, 20)], [])  # closure
+        self.assertEqual(windows[date(2026, 6, 22)], [(time(18, 0), time(23, 0))])  # narrower override
+        self.assertEqual(windows[date(2026, 6, 23)], [])  # override week has no tuesday
+        self.assertEqual(windows[date(2026, 6, 27)], [(time(9, 0), time(22, 0))])
+        for d, w in windows.items():
+            self.assertEqual(opening_service_windows_for_date(self.session, self.tenant, d), w)
+
+    def test_two_queries_and_one_parse_per_weekly_json(self):
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        start = date(2026, 6, 1)
+        self.session.refresh(self.tenant)
+        event.listen(self.engine, "before_cursor_execute", _count)
+        try:
+            with patch.object(opening_hours_effective.json, "loads", wraps=json.loads) as loads:
+                opening_service_windows_for_range(self.session, self.tenant, start, start + timedelta(days=41))
+        finally:
+            event.remove(self.engine, "before_cursor_execute", _count)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(loads.call_count, 3)
+
+    def test_unconfigured_hours(self):
+        bare = models.Tenant(name="No hours")
+        self.session.add(bare)
+        self.session.commit()
+        windows = opening_service_windows_for_range(self.session, bare, date(2026, 6, 1), date(2026, 6, 2))
+        self.assertEqual(windows, {date(2026, 6, 1): None, date(2026, 6, 2): None})
+        self.assertEqual(opening_service_windows_for_range(self.session, bare, date(2026, 6, 2), date(2026, 6, 1)), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
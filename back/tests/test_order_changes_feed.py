@@ -0,0 +1,144 @@
+"""GET /orders/changes — per-tenant change cursor and compact KDS projection."""
+from __future__ import annotations
+
+import unittest
+from datetime import timedelta
+
+from pg_client_mixin import PgClientTestCase
+
+from app import models, security
+from app.order_change_feed import kds_order_projection
+
+
+def _bearer_headers(user: models.User) -> dict[str, str]:
+    data = {
+        "sub": user.email,
+        "tenant_id": user.tenant_id,
+        "provider_id": getattr(user, "provider_id", None),
+        "token_version": user.token_version,
+    }
+    token = security.create_access_token(data, expires_delta=timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestKdsOrderProjection(unittest.TestCase):
+    def test_keeps_only_open_items(self) -> None:
+        row = {
+            "id": 7,
+            "status": "preparing",
+            "table_name": "T1",
+            "total_cents": 900,
+            "payments": [],
+            "items": [
+                {"id": 1, "product_name": "Soup", "quantity": 1, "status": "preparing"},
+                {"id": 2, "product_name": "Bread", "quantity": 1, "status": "delivered"},
+                {
+                    "id": 3,
+                    "product_name": "Wine",
+                    "quantity": 1,
+                    "status": "pending",
+                    "removed_by_customer": True,
+                },
+            ],
+        }
+        out = kds_order_projection(row)
+        assert out is not None
+        self.assertEqual([i["id"] for i in out["items"]], [1])
+        self.assertNotIn("total_cents", out)
+        self.assertNotIn("payments", out)
+
+    def test_finished_order_is_dropped(self) -> None:
+        row = {
+            "id": 8,
+            "status": "completed",
+            "items": [{"id": 1, "product_name": "Soup", "quantity": 1, "status": "pending"}],
+        }
+        self.assertIsNone(kds_order_projection(row))
+
+
+class TestOrderChangesFeed(PgClientTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tenant = models.Tenant(name="Changes Feed Test")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        self.owner = models.User(
+            email="changes-feed-owner@test.local",
+            hashed_password=security.get_password_hash("secret"),
+            full_name="Owner",
+            tenant_id=tenant.id,
+            role=models.UserRole.owner,
+        )
+        floor = models.Floor(name="Main", tenant_id=tenant.id)
+        self.session.add(self.owner)
+        self.session.add(floor)
+        self.session.commit()
+        self.session.refresh(self.owner)
+        self.session.refresh(floor)
+        self.table = models.Table(name="T1", tenant_id=tenant.id, floor_id=floor.id, is_active=True)
+        self.product = models.Product(name="Soup", price_cents=500, tenant_id=tenant.id)
+        self.session.add(self.table)
+        self.session.add(self.product)
+        self.session.commit()
+        self.session.refresh(self.table)
+        self.session.refresh(self.product)
+        self.h = _bearer_headers(self.owner)
+
+    def _order(self) -> tuple[models.Order, models.OrderItem]:
+        order = models.Order(tenant_id=self.owner.tenant_id, table_id=self.table.id)
+        self.session.add(order)
+        self.session.commit()
+        self.session.refresh(order)
+        item = models.OrderItem(
+            order_id=order.id,
+            product_id=self.product.id,
+            product_name=self.product.name,
+            quantity=1,
+            price_cents=500,
+        )
+        self.session.add(item)
+        self.session.commit()
+        self.session.refresh(item)
+        return order, item
+
+    def test_snapshot_then_delta(self) -> None:
+        first, _ = self._order()
+        r = self.client.get("/orders/changes", headers=self.h)
+        self.assertEqual(r.status_code, 200, r.text)
+        body = r.json()
+        self.assertTrue(body["snapshot"])
+        self.assertEqual([o["id"] for o in body["orders"]], [first.id])
+        cursor = body["cursor"]
+
+        r = self.client.get("/orders/changes", params={"cursor": cursor}, headers=self.h)
+        self.assertEqual(r.json()["orders"], [])
+        self.assertEqual(r.json()["cursor"], cursor)
+
+        second, _ = self._order()
+        r = self.client.get("/orders/changes", params={"cursor": cursor}, headers=self.h)
+        body = r.json()
+        self.assertFalse(body["snapshot"])
+        self.assertEqual([o["id"] for o in body["orders"]], [second.id])
+        self.assertGreater(body["cursor"], cursor)
+
+    def test_item_bump_stamps_order_and_kds_drops_delivered(self) -> None:
+        order, item = self._order()
+        cursor = self.client.get("/orders/changes", headers=self.h).json()["cursor"]
+
+        r = self.client.put(
+            f"/orders/{order.id}/items/{item.id}/status",
+            json={"status": "delivered"},
+            headers=self.h,
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+        r = self.client.get(
+            "/orders/changes", params={"cursor": cursor, "view": "kds"}, headers=self.h
+        )
+        body = r.json()
+        self.assertEqual(body["orders"], [])
+        self.assertEqual(body["removed_order_ids"], [order.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Order deltas on real-time events: changed fields only, chained by version."""
+from __future__ import annotations
+
+import json
+import unittest
+from datetime import timedelta
+
+from pg_client_mixin import PgClientTestCase
+from sqlmodel import select
+
+from app import models, security
+from app.main import publish_order_update
+from app.security import get_password_hash
+
+
+def _bearer_headers(user: models.User) -> dict[str, str]:
+    data = {
+        "sub": user.email,
+        "tenant_id": user.tenant_id,
+        "provider_id": getattr(user, "provider_id", None),
+        "token_version": user.token_version,
+    }
+    token = security.create_access_token(data, expires_delta=timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestOrderDelta(PgClientTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tenant = models.Tenant(name="Delta Test")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        self.owner = models.User(
+            email="delta-owner@test.local",
+            hashed_password=get_password_hash("secret"),
+            full_name="Owner",
+            tenant_id=tenant.id,
+            role=models.UserRole.owner,
+        )
+        product = models.Product(name="Dish", price_cents=900, tenant_id=tenant.id)
+        self.session.add(self.owner)
+        self.session.add(product)
+        self.session.commit()
+        self.session.refresh(product)
+        self.order = models.Order(tenant_id=tenant.id)
+        self.session.add(self.order)
+        self.session.commit()
+        self.session.refresh(self.order)
+        self.items = []
+        for name in ("Soup", "Steak"):
+            item = models.OrderItem(
+                order_id=self.order.id,
+                product_id=product.id,
+                product_name=name,
+                quantity=1,
+                price_cents=900,
+            )
+            self.session.add(item)
+            self.session.commit()
+            self.session.refresh(item)
+            self.items.append(item)
+        self.session.refresh(self.order)
+
+    def _events(self) -> list[dict]:
+        rows = self.session.exec(
+            select(models.RealtimeOutbox).order_by(models.RealtimeOutbox.id.asc())
+        ).all()
+        out = [json.loads(r.payload) for r in rows if "orders:tenant:" in r.channels[0]]
+        return [e for e in out if e.get("order_id") == self.order.id]
+
+    def _bump(self, item: models.OrderItem, status: str) -> None:
+        r = self.client.put(
+            f"/orders/{self.order.id}/items/{item.id}/status",
+            json={"status": status},
+            headers=_bearer_headers(self.owner),
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+
+    def test_item_status_event_carries_only_changed_item(self) -> None:
+        start = self.order.change_seq
+        self._bump(self.items[0], "preparing")
+        delta = self._events()[-1]["delta"]
+        self.assertEqual(delta["base_version"], start)
+        self.assertGreater(delta["version"], start)
+        self.assertEqual(delta["items"], [{"id": self.items[0].id, "status": "preparing"}])
+        self.assertEqual(delta["order"]["status"], "preparing")
+        self.assertEqual(delta["removed_item_ids"], [])
+
+    def test_consecutive_deltas_chain_versions(self) -> None:
+        self._bump(self.items[0], "preparing")
+        self._bump(self.items[1], "preparing")
+        first, second = [e["delta"] for e in self._events()[-2:]]
+        self.assertEqual(second["base_version"], first["version"])
+
+    def test_delta_version_is_the_committed_version(self) -> None:
+        start = self.order.change_seq
+        self.items[0].status = models.OrderItemStatus.preparing
+        self.session.add(self.items[0])
+        publish_order_update(
+            self.order.tenant_id,
+            {"type": "item_status_update", "order_id": self.order.id},
+            session=self.session,
+        )
+        # Written again after the event was published, in the same transaction
+        self.order.notes = "no onions"
+        self.session.add(self.order)
+        self.session.commit()
+        self.session.refresh(self.order)
+        delta = self._events()[-1]["delta"]
+        self.assertEqual(delta["base_version"], start)
+        self.assertEqual(delta["version"], self.order.change_seq)
+        self.assertEqual(delta["order"]["notes"], "no onions")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""order_summary projection: values, flush-hook maintenance and table history totals."""
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from pg_client_mixin import PgClientTestCase
+
+from app import models
+from app.order_summary import build_summary_values, rebuild_order_summaries, summaries_by_order_id
+from app.reports_routes import _revenue_orders
+from app.security import get_password_hash
+
+
+def _order(**kw) -> SimpleNamespace:
+    base = {
+        "tenant_id": 1,
+        "status": models.OrderStatus.pending,
+        "paid_at": None,
+        "created_at": datetime(2026, 1, 2, 12, 0, tzinfo=timezone.utc),
+        "tip_amount_cents": 0,
+        "loyalty_discount_cents": 0,
+        "order_channel": models.OrderChannel.table,
+        "delivery_fee_cents": 0,
+    }
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def _item(price: int, qty: int = 1, **kw) -> SimpleNamespace:
+    base = {
+        "price_cents": price,
+        "quantity": qty,
+        "status": models.OrderItemStatus.pending,
+        "removed_by_customer": False,
+        "removed_by_user_id": None,
+    }
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+class TestBuildSummaryValues(unittest.TestCase):
+    def test_totals_exclude_removed_and_cancelled_lines(self) -> None:
+        items = [
+            _item(500, 2),
+            _item(300, removed_by_customer=True),
+            _item(200, removed_by_user_id=9),
+            _item(100, status=models.OrderItemStatus.cancelled),
+        ]
+        v = build_summary_values(_order(tip_amount_cents=150, loyalty_discount_cents=200), items, 0)
+        self.assertEqual(v["subtotal_cents"], 1000)
+        self.assertEqual(v["active_item_count"], 1)
+        self.assertEqual(v["removed_items_count"], 1)
+        self.assertEqual(v["total_cents"], 1000 - 200 + 150)
+        self.assertEqual(v["amount_due_cents"], v["total_cents"])
+        self.assertEqual(v["status"], "pending")
+
+    def test_paid_and_delivered_is_completed_and_dated_by_paid_at(self) -> None:
+        paid_at = datetime(2026, 1, 3, 9, 0, tzinfo=timezone.utc)
+        items = [_item(500, status=models.OrderItemStatus.delivered)]
+        v = build_summary_values(_order(paid_at=paid_at, status=models.OrderStatus.paid), items, 500)
+        self.assertEqual(v["status"], "completed")
+        self.assertEqual(v["revenue_at"], paid_at)
+        self.assertEqual(v["amount_paid_cents"], 500)
+
+    def test_delivery_fee_only_in_amount_due(self) -> None:
+        order = _order(
+            order_channel=models.OrderChannel.satisfecho_delivery,
+            delivery_fee_cents=250,
+        )
+        v = build_summary_values(order, [_item(1000)], 0)
+        self.assertEqual(v["total_cents"], 1000)
+        self.assertEqual(v["amount_due_cents"], 1250)
+
+
+class TestOrderSummaryMaintained(PgClientTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tenant = models.Tenant(name="Summary Test")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        self.owner = models.User(
+            email="summary-owner@test.local",
+            hashed_password=get_password_hash("secret"),
+            full_name="Owner",
+            tenant_id=tenant.id,
+            role=models.UserRole.owner,
+        )
+        floor = models.Floor(name="Main", tenant_id=tenant.id)
+        self.session.add(self.owner)
+        self.session.add(floor)
+        self.session.commit()
+        self.session.refresh(floor)
+        self.table = models.Table(name="T1", tenant_id=tenant.id, floor_id=floor.id, is_active=True)
+        self.product = models.Product(name="Soup", price_cents=500, tenant_id=tenant.id)
+        self.session.add(self.table)
+        self.session.add(self.product)
+        self.session.commit()
+        self.session.refresh(self.table)
+        self.session.refresh(self.product)
+
+    def _add_order(self) -> tuple[models.Order, models.OrderItem]:
+        order = models.Order(table_id=self.table.id, tenant_id=self.owner.tenant_id)
+        self.session.add(order)
+        self.session.commit()
+        self.session.refresh(order)
+        item = models.OrderItem(
+            order_id=order.id,
+            product_id=self.product.id,
+            product_name=self.product.name,
+            quantity=2,
+            price_cents=500,
+        )
+        self.session.add(item)
+        self.session.commit()
+        self.session.refresh(item)
+        return order, item
+
+    def test_item_writes_refresh_summary(self) -> None:
+        order, item = self._add_order()
+        summary = summaries_by_order_id(self.session, [order.id])[order.id]
+        self.assertEqual(summary.total_cents, 1000)
+        self.assertEqual(summary.active_item_count, 1)
+        self.assertEqual(summary.status, "pending")
+
+        item.status = models.OrderItemStatus.preparing
+        item.quantity = 3
+        self.session.add(item)
+        self.session.commit()
+        summary = summaries_by_order_id(self.session, [order.id])[order.id]
+        self.assertEqual(summary.total_cents, 1500)
+        self.assertEqual(summary.status, "preparing")
+
+    def test_table_history_uses_summary_total(self) -> None:
+        order, _ = self._add_order()
+        order.tip_amount_cents = 100
+        order.status = models.OrderStatus.paid
+        order.paid_at = datetime.now(timezone.utc)
+        self.session.add(order)
+        self.session.commit()
+        r = self.client.get(f"/menu/{self.table.token}/order-history")
+        self.assertEqual(r.status_code, 200, r.text)
+        row = next(o for o in r.json() if o["id"] == order.id)
+        self.assertEqual(row["total_cents"], 1100)
+
+    def test_order_without_summary_row_still_reported_and_backfilled(self) -> None:
+        order, _ = self._add_order()
+        order.status = models.OrderStatus.paid
+        order.paid_at = datetime.now(timezone.utc)
+        self.session.add(order)
+        self.session.commit()
+        self.session.delete(summaries_by_order_id(self.session, [order.id])[order.id])
+        self.session.commit()
+        day = order.paid_at.date()
+        ids = [o.id for o in _revenue_orders(self.session, self.owner.tenant_id, day, day)]
+        self.assertIn(order.id, ids)
+        self.assertEqual(rebuild_order_summaries(self.session, missing_only=True), 1)
+        self.assertEqual(summaries_by_order_id(self.session, [order.id])[order.id].total_cents, 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
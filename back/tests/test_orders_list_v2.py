@@ -0,0 +1,154 @@
+"""GET /orders/v2 — cursor pagination, server-side filters, batch-loaded rows."""
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from pg_client_mixin import PgClientTestCase
+
+from app import models, security
+
+
+def _bearer_headers(user: models.User) -> dict[str, str]:
+    data = {
+        "sub": user.email,
+        "tenant_id": user.tenant_id,
+        "provider_id": getattr(user, "provider_id", None),
+        "token_version": user.token_version,
+    }
+    token = security.create_access_token(data, expires_delta=timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestOrdersListV2(PgClientTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tenant = models.Tenant(name="Orders V2 Test")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        self.tenant = tenant
+
+        self.owner = models.User(
+            email="orders-v2-owner@test.local",
+            hashed_password=security.get_password_hash("secret"),
+            full_name="Owner",
+            tenant_id=tenant.id,
+            role=models.UserRole.owner,
+        )
+        self.session.add(self.owner)
+        floor = models.Floor(name="Main", tenant_id=tenant.id)
+        self.session.add(floor)
+        self.session.commit()
+        self.session.refresh(self.owner)
+        self.session.refresh(floor)
+
+        self.t1 = models.Table(name="T1", tenant_id=tenant.id, floor_id=floor.id, is_active=True)
+        self.t2 = models.Table(name="T2", tenant_id=tenant.id, floor_id=floor.id, is_active=True)
+        self.product = models.Product(name="Soup", price_cents=500, tenant_id=tenant.id)
+        self.session.add(self.t1)
+        self.session.add(self.t2)
+        self.session.add(self.product)
+        self.session.commit()
+        self.session.refresh(self.t1)
+        self.session.refresh(self.t2)
+        self.session.refresh(self.product)
+
+        base = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+        self.orders: list[models.Order] = []
+        for i in range(5):
+            o = self._order(
+                table=self.t1 if i % 2 == 0 else self.t2,
+                created_at=base + timedelta(minutes=i),
+                status=models.OrderStatus.completed if i == 0 else models.OrderStatus.pending,
+            )
+            self.orders.append(o)
+        # Empty order (only a removed line) is never listed
+        self._order(
+            table=self.t1,
+            created_at=base + timedelta(minutes=10),
+            status=models.OrderStatus.pending,
+            removed=True,
+        )
+
+    def _order(
+        self,
+        *,
+        table: models.Table,
+        created_at: datetime,
+        status: models.OrderStatus,
+        removed: bool = False,
+    ) -> models.Order:
+        order = models.Order(
+            tenant_id=self.tenant.id,
+            table_id=table.id,
+            status=status,
+            created_at=created_at,
+        )
+        self.session.add(order)
+        self.session.commit()
+        self.session.refresh(order)
+        self.session.add(
+            models.OrderItem(
+                order_id=order.id,
+                product_id=self.product.id,
+                product_name=self.product.name,
+                quantity=2,
+                price_cents=self.product.price_cents,
+                status=models.OrderItemStatus.delivered
+                if status == models.OrderStatus.completed
+                else models.OrderItemStatus.pending,
+                removed_by_customer=removed,
+            )
+        )
+        self.session.commit()
+        return order
+
+    def test_pages_follow_cursor_newest_first(self) -> None:
+        h = _bearer_headers(self.owner)
+        r = self.client.get("/orders/v2", params={"limit": 2}, headers=h)
+        self.assertEqual(r.status_code, 200, r.text)
+        body = r.json()
+        self.assertEqual([o["id"] for o in body["orders"]], [self.orders[4].id, self.orders[3].id])
+        self.assertIsNotNone(body["next_cursor"])
+
+        seen = [o["id"] for o in body["orders"]]
+        cursor = body["next_cursor"]
+        while cursor:
+            r = self.client.get("/orders/v2", params={"limit": 2, "cursor": cursor}, headers=h)
+            self.assertEqual(r.status_code, 200, r.text)
+            seen.extend(o["id"] for o in r.json()["orders"])
+            cursor = r.json()["next_cursor"]
+        self.assertEqual(seen, [o.id for o in reversed(self.orders)])
+
+    def test_rows_match_legacy_list(self) -> None:
+        h = _bearer_headers(self.owner)
+        legacy = self.client.get("/orders", headers=h).json()
+        page = self.client.get("/orders/v2", params={"limit": 50}, headers=h).json()["orders"]
+        self.assertEqual(page, legacy)
+        self.assertEqual(page[0]["total_cents"], 1000)
+        self.assertEqual(page[0]["amount_remaining_cents"], 1000)
+
+    def test_filters(self) -> None:
+        h = _bearer_headers(self.owner)
+        r = self.client.get("/orders/v2", params={"active_only": True}, headers=h)
+        self.assertNotIn(self.orders[0].id, [o["id"] for o in r.json()["orders"]])
+
+        r = self.client.get(
+            "/orders/v2", params=[("status", "completed")], headers=h
+        )
+        self.assertEqual([o["id"] for o in r.json()["orders"]], [self.orders[0].id])
+
+        r = self.client.get("/orders/v2", params={"table_id": self.t2.id}, headers=h)
+        self.assertEqual(
+            [o["id"] for o in r.json()["orders"]], [self.orders[3].id, self.orders[1].id]
+        )
+
+    def test_invalid_cursor_400(self) -> None:
+        h = _bearer_headers(self.owner)
+        r = self.client.get("/orders/v2", params={"cursor": "not-a-cursor"}, headers=h)
+        self.assertEqual(r.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
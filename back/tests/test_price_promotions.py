@@ -216,3 +216,30 @@ class TestPricePromotions(PgClientTestCase):
         )
         self.assertEqual(applied["price_cents"], 700)
         self.assertEqual(applied["promo_snapshot"]["percent_off"], 30)
+
+    def test_index_cache_follows_promo_updates(self):
+        created = self._create_promo(percent_off=20)
+        first = promo_svc.resolve_line_price(
+            self.session,
+            tenant_id=self.tenant.id,
+            list_price_cents=500,
+            product_category="Beverages",
+            channel="table",
+        )
+        self.assertEqual(first["promo_id"], created["id"])
+
+        r = self.client.put(
+            f"/promos/{created['id']}",
+            json={"enabled": False},
+            headers=_bearer_headers(self.admin),
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+        after = promo_svc.resolve_line_price(
+            self.session,
+            tenant_id=self.tenant.id,
+            list_price_cents=500,
+            product_category="Beverages",
+            channel="table",
+        )
+        self.assertIsNone(after["promo_id"])
+        self.assertEqual(after["price_cents"], 500)
@@ -0,0 +1,86 @@
+"""Compiled promo index: best promo per category and next window boundary (#322)."""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models  # noqa: E402
+from app.promo_service import compile_promo_index  # noqa: E402
+
+_MADRID = ZoneInfo("Europe/Madrid")
+
+
+def _promo(promo_id: int, **fields) -> models.PricePromotion:
+    values = {
+        "tenant_id": 1,
+        "name": f"Promo {promo_id}",
+        "percent_off": 10,
+        "category": "Beverages",
+        "enabled": True,
+    }
+    values.update(fields)
+    return models.PricePromotion(id=promo_id, **values)
+
+
+class TestCompilePromoIndex(unittest.TestCase):
+    def test_best_per_category_and_channel(self):
+        promos = [
+            _promo(1, percent_off=10),
+            _promo(2, percent_off=30),
+            _promo(3, percent_off=30),
+            _promo(4, percent_off=50, category="Desserts", channels=["satisfecho_delivery"]),
+        ]
+        now = datetime(2026, 10, 18, 12, 0, tzinfo=_MADRID)
+        index = compile_promo_index(promos, channel="table", local_now=now)
+        self.assertEqual(index.best_for(" beverages ").id, 2)
+        self.assertIsNone(index.best_for("Desserts"))
+        self.assertEqual(index.promo_ids, (1, 2, 3))
+        self.assertIsNone(index.valid_until)
+
+        delivery = compile_promo_index(promos, channel="satisfecho_delivery", local_now=now)
+        self.assertEqual(delivery.best_for("desserts").percent_off, 50)
+
+    def test_happy_hour_boundaries(self):
+        promos = [_promo(1, start_time_local="17:00", end_time_local="19:00")]
+        before = datetime(2026, 10, 18, 16, 30, tzinfo=_MADRID)
+        index = compile_promo_index(promos, channel="table", local_now=before)
+        self.assertIsNone(index.best_for("Beverages"))
+        self.assertEqual(index.valid_until, datetime(2026, 10, 18, 17, 0, tzinfo=_MADRID))
+
+        during = datetime(2026, 10, 18, 17, 0, tzinfo=_MADRID)
+        index = compile_promo_index(promos, channel="table", local_now=during)
+        self.assertEqual(index.best_for("Beverages").id, 1)
+        self.assertEqual(
+            index.valid_until,
+            datetime(2026, 10, 18, 19, 0, tzinfo=_MADRID) + timedelta(microseconds=1),
+        )
+        self.assertTrue(index.is_current(datetime(2026, 10, 18, 17, 0, tzinfo=timezone.utc)))
+        self.assertFalse(index.is_current(index.valid_until))
+
+        after = datetime(2026, 10, 18, 20, 0, tzinfo=_MADRID)
+        index = compile_promo_index(promos, channel="table", local_now=after)
+        self.assertEqual(index.valid_until, datetime(2026, 10, 19, 17, 0, tzinfo=_MADRID))
+
+    def test_absolute_window_and_weekdays(self):
+        now = datetime(2026, 10, 18, 10, 0, tzinfo=timezone.utc)  # Sunday
+        promos = [
+            _promo(1, ends_at=now + timedelta(hours=2)),
+            _promo(2, starts_at=now + timedelta(hours=1)),
+            _promo(3, days_of_week=[6]),
+        ]
+        index = compile_promo_index(promos, channel="table", local_now=now)
+        self.assertEqual(index.promo_ids, (1, 3))
+        self.assertEqual(index.valid_until, now + timedelta(hours=1))
+
+        weekday_only = compile_promo_index([promos[2]], channel="table", local_now=now)
+        self.assertEqual(weekday_only.valid_until, datetime(2026, 10, 19, tzinfo=timezone.utc))
+
+
+if __name__ == "__main__":
+    unittest.main()
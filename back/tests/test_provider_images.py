@@ -1,4 +1,4 @@
-"""Tests for provider image URL helpers and orphan cleanup."""
+"""Tests for provider image URL helpers, ref clearing and orphan reconciliation."""
 from __future__ import annotations
 
 import shutil
@@ -14,6 +14,7 @@ from app import models
 from app import provider_images
 from app.provider_images import (
     clear_orphan_provider_product_images,
+    clear_provider_image_refs,
     provider_product_image_url,
     provider_product_stored_image_path,
 )
@@ -37,9 +38,6 @@ class TestProviderImageUrlHelpers(unittest.TestCase):
         self.assertIsNone(provider_product_image_url(self.token, None))
         self.assertIsNone(provider_product_image_url(self.token, ""))
 
-    def test_url_none_when_file_absent(self) -> None:
-        self.assertIsNone(provider_product_image_url(self.token, "missing.jpg"))
-
     def test_url_when_file_present(self) -> None:
         (self.products_dir / "ok.jpg").write_bytes(b"fake")
         self.assertEqual(
@@ -47,8 +45,17 @@ class TestProviderImageUrlHelpers(unittest.TestCase):
             f"/uploads/providers/{self.token}/products/ok.jpg",
         )
 
-    def test_stored_path_none_when_absent(self) -> None:
-        self.assertIsNone(provider_product_stored_image_path(self.token, "gone.jpg"))
+    def test_url_built_without_disk_access(self) -> None:
+        # The column is the existence record; reconciliation clears refs to missing files
+        with mock.patch.object(Path, "is_file", side_effect=AssertionError("disk access")):
+            self.assertEqual(
+                provider_product_image_url(self.token, "ok.jpg"),
+                f"/uploads/providers/{self.token}/products/ok.jpg",
+            )
+            self.assertEqual(
+                provider_product_stored_image_path(self.token, "ok.jpg"),
+                f"providers/{self.token}/products/ok.jpg",
+            )
 
     def test_rejects_path_traversal_filename(self) -> None:
         self.assertIsNone(provider_product_image_url(self.token, "../x.jpg"))
@@ -128,6 +135,46 @@ class TestClearOrphanProviderProductImages(PgClientTestCase):
         self.session.refresh(self.pp_orphan)
         self.assertIsNone(self.pp_orphan.image_filename)
 
+    def test_clears_product_refs_to_missing_provider_file(self) -> None:
+        tenant = models.Tenant(name="Orphan Img Tenant")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        prefix = f"providers/{self.provider.token}/products"
+        ok = models.Product(
+            tenant_id=tenant.id, name="Ok", price_cents=100, image_filename=f"{prefix}/present.jpg"
+        )
+        gone = models.Product(
+            tenant_id=tenant.id, name="Gone", price_cents=100, image_filename=f"{prefix}/absent.jpg"
+        )
+        self.session.add(ok)
+        self.session.add(gone)
+        self.session.commit()
+
+        stats = clear_orphan_provider_product_images(self.session)
+        self.assertGreaterEqual(stats["products_cleared"], 1)
+        self.session.refresh(ok)
+        self.session.refresh(gone)
+        self.assertEqual(ok.image_filename, f"{prefix}/present.jpg")
+        self.assertIsNone(gone.image_filename)
+
+    def test_clear_provider_image_refs_after_delete(self) -> None:
+        tenant = models.Tenant(name="Copied Img Tenant")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        stored = f"providers/{self.provider.token}/products/present.jpg"
+        copy = models.Product(tenant_id=tenant.id, name="Copy", price_cents=100, image_filename=stored)
+        self.session.add(copy)
+        self.session.commit()
+
+        clear_provider_image_refs(self.session, stored)
+        self.session.commit()
+        self.session.refresh(copy)
+        self.session.refresh(self.pp_ok)
+        self.assertIsNone(copy.image_filename)
+        self.assertIsNone(self.pp_ok.image_filename)
+
 
 if __name__ == "__main__":
     unittest.main()
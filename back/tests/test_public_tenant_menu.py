@@ -202,6 +202,28 @@ class TestPublicTenantMenu(PgClientTestCase):
         self.assertEqual(response.status_code, 200, response.text)
         self.assertEqual(response.json()["categories"], [])
 
+    def test_etag_revalidation_until_menu_changes(self):
+        url = f"/public/tenants/{self.tenant.id}/menu"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200, first.text)
+        etag = first.headers["etag"]
+
+        cached = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.headers["etag"], etag)
+
+        other_lang = self.client.get(url + "?lang=es", headers={"If-None-Match": etag})
+        self.assertEqual(other_lang.status_code, 200)
+
+        self.session.add(
+            models.Product(tenant_id=self.tenant.id, name="New Dish", price_cents=900)
+        )
+        self.session.commit()
+        changed = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], etag)
+        self.assertEqual(changed.json()["categories"][0]["products"][0]["name"], "New Dish")
+
     def test_availability_window_excludes_future_product(self):
         tomorrow = date.today() + timedelta(days=1)
         self.session.add(
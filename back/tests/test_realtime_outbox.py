@@ -0,0 +1,147 @@
+"""Realtime outbox: events commit with the change and the relay publishes them in order."""
+from __future__ import annotations
+
+import json
+import unittest
+from datetime import timedelta
+
+from pg_client_mixin import PgClientTestCase
+from sqlmodel import select
+
+from app import models, security
+from app.realtime_outbox import relay_batch, stage_event
+from app.security import get_password_hash
+
+
+def _bearer_headers(user: models.User) -> dict[str, str]:
+    data = {
+        "sub": user.email,
+        "tenant_id": user.tenant_id,
+        "provider_id": getattr(user, "provider_id", None),
+        "token_version": user.token_version,
+    }
+    token = security.create_access_token(data, expires_delta=timedelta(minutes=30))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class _RecordingPipeline:
+    def __init__(self, redis_client: "_RecordingRedis"):
+        self._redis = redis_client
+        self._ops: list = []
+
+    def publish(self, channel: str, payload: str) -> None:
+        self._ops.append(lambda: self._redis.published.append((channel, payload)))
+
+    def xadd(self, key: str, fields: dict, **kwargs) -> None:
+        def _add() -> str:
+            entries = self._redis.streams.setdefault(key, [])
+            entry_id = f"{len(entries) + 1}-0"
+            entries.append((entry_id, fields))
+            return entry_id
+
+        self._ops.append(_add)
+
+    def expire(self, key: str, seconds: int) -> None:
+        self._ops.append(lambda: True)
+
+    def execute(self) -> list:
+        return [op() for op in self._ops]
+
+
+class _RecordingRedis:
+    def __init__(self) -> None:
+        self.published: list[tuple[str, str]] = []
+        self.streams: dict[str, list] = {}
+
+    def pipeline(self, transaction: bool = True) -> _RecordingPipeline:
+        return _RecordingPipeline(self)
+
+
+class TestRealtimeOutbox(PgClientTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tenant = models.Tenant(name="Outbox Test")
+        self.session.add(tenant)
+        self.session.commit()
+        self.session.refresh(tenant)
+        self.owner = models.User(
+            email="outbox-owner@test.local",
+            hashed_password=get_password_hash("secret"),
+            full_name="Owner",
+            tenant_id=tenant.id,
+            role=models.UserRole.owner,
+        )
+        floor = models.Floor(name="Main", tenant_id=tenant.id)
+        self.session.add(self.owner)
+        self.session.add(floor)
+        self.session.commit()
+        self.session.refresh(floor)
+        self.table = models.Table(name="T1", tenant_id=tenant.id, floor_id=floor.id, is_active=True)
+        self.session.add(self.table)
+        self.session.commit()
+        self.session.refresh(self.table)
+
+    def _outbox_for(self, order_id: int) -> list[models.RealtimeOutbox]:
+        rows = self.session.exec(
+            select(models.RealtimeOutbox).order_by(models.RealtimeOutbox.id.asc())
+        ).all()
+        # KDS fan-out rows are expanded by the relay (see test_kds_realtime)
+        return [
+            r
+            for r in rows
+            if json.loads(r.payload).get("order_id") == order_id and not r.channels[0].startswith("kds-fanout:")
+        ]
+
+    def test_status_update_stages_event_for_tenant_and_table(self) -> None:
+        order = models.Order(table_id=self.table.id, tenant_id=self.owner.tenant_id)
+        self.session.add(order)
+        self.session.commit()
+        self.session.refresh(order)
+
+        r = self.client.put(
+            f"/orders/{order.id}/status",
+            json={"status": "preparing"},
+            headers=_bearer_headers(self.owner),
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+        rows = self._outbox_for(order.id)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            rows[0].channels,
+            [f"orders:tenant:{self.owner.tenant_id}", f"orders:table:{self.table.id}"],
+        )
+        self.assertEqual(json.loads(rows[0].payload)["type"], "status_update")
+
+    def test_rolled_back_change_leaves_no_event(self) -> None:
+        stage_event(self.session, ["orders:tenant:1"], {"type": "phantom", "order_id": -1})
+        self.session.rollback()
+        self.assertEqual(self._outbox_for(-1), [])
+
+    def test_relay_publishes_in_order_and_deletes(self) -> None:
+        stage_event(self.session, ["orders:tenant:1"], {"type": "a", "order_id": -10})
+        stage_event(self.session, ["orders:tenant:1", "orders:table:2"], {"type": "b", "order_id": -10})
+        self.session.commit()
+
+        redis_client = _RecordingRedis()
+        relay_batch(self.session, redis_client, batch_size=1000)
+        mine = [(c, json.loads(p)["type"]) for c, p in redis_client.published if '"order_id": -10' in p]
+        self.assertEqual(
+            mine,
+            [("orders:tenant:1", "a"), ("orders:tenant:1", "b"), ("orders:table:2", "b")],
+        )
+        self.assertEqual(self._outbox_for(-10), [])
+
+    def test_relay_appends_to_scope_streams_and_tags_event_id(self) -> None:
+        stage_event(self.session, ["orders:tenant:1", "orders:table:2"], {"type": "c", "order_id": -20})
+        self.session.commit()
+
+        redis_client = _RecordingRedis()
+        relay_batch(self.session, redis_client, batch_size=1000)
+        self.assertIn("events:tenant:1", redis_client.streams)
+        self.assertIn("events:table:2", redis_client.streams)
+        mine = [json.loads(p) for _, p in redis_client.published if '"order_id": -20' in p]
+        self.assertTrue(all(m.get("event_id") for m in mine))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -58,6 +58,8 @@ class TestReservableCapacityTurnWalkin(unittest.TestCase):
                 models.Table.__table__,
                 models.Reservation.__table__,
                 models.Order.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
             ],
         )
         self.session = Session(self.engine)
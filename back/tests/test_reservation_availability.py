@@ -0,0 +1,187 @@
+"""Range availability engine for book grids (app/reservation_availability.py)."""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import JSON as SAJSON
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models  # noqa: E402
+from app.availability_cache import ALL_DAYS, availability_versions  # noqa: E402
+from app.main import _demand_for_slot, _reservable_capacity_for_tenant  # noqa: E402
+from app.reservation_availability import ReservationAvailability  # noqa: E402
+
+
+class TestReservationAvailability(unittest.TestCase):
+    def setUp(self):
+        self._jsonb = []
+        for col in models.Tenant.__table__.columns:
+            if isinstance(col.type, JSONB):
+                self._jsonb.append((col, col.type))
+                col.type = SAJSON()
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.Floor.__table__,
+                models.TableGroup.__table__,
+                models.Table.__table__,
+                models.Reservation.__table__,
+                models.Order.__table__,
+                models.OpeningHoursBaselineSchedule.__table__,
+                models.OpeningHoursDateOverride.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.tenant = models.Tenant(
+            name="Grid Test",
+            timezone="UTC",
+            reservation_average_table_turn_minutes=90,
+            reservation_walk_in_tables_reserved=1,
+        )
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(self.tenant)
+        self.floor = models.Floor(name="Terrace", tenant_id=self.tenant.id, is_active=True)
+        self.group = models.TableGroup(tenant_id=self.tenant.id)
+        self.session.add(self.floor)
+        self.session.add(self.group)
+        self.session.commit()
+        self.tables = {}
+        for name, seats, floor_id, group_id in [
+            ("A", 2, None, None),
+            ("B", 4, self.floor.id, None),
+            ("C", 4, None, self.group.id),
+            ("D", 4, None, self.group.id),
+        ]:
+            t = models.Table(
+                name=name, tenant_id=self.tenant.id, seat_count=seats, floor_id=floor_id, table_group_id=group_id
+            )
+            self.session.add(t)
+            self.tables[name] = t
+        self.session.commit()
+        self.now = datetime(2031, 7, 1, 12, 0, tzinfo=timezone.utc)
+        # C is seated at noon: the whole group is busy until 13:30 today
+        self.session.add(
+            models.Reservation(
+                tenant_id=self.tenant.id,
+                customer_name="seated",
+                customer_phone="+10000000001",
+                reservation_date=self.now.date(),
+                reservation_time=time(12, 0),
+                party_size=6,
+                status=models.ReservationStatus.seated,
+                table_id=self.tables["C"].id,
+                seated_at=self.now,
+            )
+        )
+        self.booked = models.Reservation(
+            tenant_id=self.tenant.id,
+            customer_name="booked",
+            customer_phone="+10000000002",
+            reservation_date=date(2031, 7, 2),
+            reservation_time=time(20, 0),
+            party_size=3,
+            status=models.ReservationStatus.booked,
+            preferred_floor_id=self.floor.id,
+        )
+        self.session.add(self.booked)
+        self.session.commit()
+        self.session.refresh(self.booked)
+
+    def tearDown(self):
+        self.session.close()
+        for col, typ in self._jsonb:
+            col.type = typ
+
+    def _availability(self, start, end, **kw):
+        return ReservationAvailability(self.session, self.tenant, start, end, now_utc=self.now, **kw)
+
+    def test_matches_single_slot_helpers(self):
+        start, end = self.now.date(), self.now.date() + timedelta(days=6)
+        availability = self._availability(start, end)
+        for offset in range(7):
+            d = start + timedelta(days=offset)
+            for st in (time(12, 0), time(13, 0), time(14, 0), time(20, 0)):
+                for floor_id in (None, self.floor.id):
+                    self.assertEqual(
+                        availability.capacity(d, st, floor_id),
+                        _reservable_capacity_for_tenant(
+                            self.session, self.tenant.id, d, self.tenant, st, _now_utc=self.now, floor_id=floor_id
+                        ),
+                    )
+                    self.assertEqual(
+                        availability.demand(d, st, floor_id),
+                        _demand_for_slot(self.session, self.tenant.id, d, st, floor_id=floor_id),
+                    )
+
+    def test_busy_group_and_walk_in_buffer(self):
+        availability = self._availability(self.now.date(), self.now.date())
+        # Group C+D busy: units A(2), B(4); walk-in keeps A
+        self.assertEqual(availability.capacity(self.now.date(), time(13, 0)), (4, 1))
+        # After the turn: A(2), B(4), group(8); walk-in keeps A
+        self.assertEqual(availability.capacity(self.now.date(), time(14, 0)), (12, 2))
+
+    def test_demand_by_floor_and_exclusion(self):
+        d = date(2031, 7, 2)
+        self.assertEqual(self._availability(d, d).demand(d, time(20, 0), self.floor.id), (3, 1))
+        excluded = self._availability(d, d, exclude_reservation_id=self.booked.id)
+        self.assertEqual(excluded.demand(d, time(20, 0)), (0, 0))
+        self.assertTrue(excluded.has_room(d, time(20, 0), 12))
+        self.assertFalse(excluded.has_room(d, time(20, 0), 13))
+
+    def test_week_grid_loads_once(self):
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        start = self.now.date()
+        availability = self._availability(start, start + timedelta(days=6))
+        event.listen(self.engine, "before_cursor_execute", _count)
+        try:
+            for offset in range(7):
+                d = start + timedelta(days=offset)
+                availability.windows(d)
+                for minutes in range(12 * 60, 23 * 60, 15):
+                    availability.has_room(d, time(minutes // 60, minutes % 60), 2, self.floor.id)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", _count)
+        table_and_reservation_loads = [s for s in statements if "opening_hours" not in s]
+        self.assertLessEqual(len(table_and_reservation_loads), 4)
+
+    def test_writes_bump_availability_versions(self):
+        d = date(2031, 7, 2)
+        before_wide, before = availability_versions(self.session, self.tenant.id, d, d)
+        self.booked.status = models.ReservationStatus.cancelled
+        self.session.add(self.booked)
+        self.session.commit()
+        wide, by_day = availability_versions(self.session, self.tenant.id, d, d)
+        self.assertEqual(by_day[d], before[d] + 1)
+        self.assertEqual(wide, before_wide)
+
+        self.tenant.reservation_walk_in_tables_reserved = 0
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.assertEqual(availability_versions(self.session, self.tenant.id, d, d)[0], wide + 1)
+        self.assertIn(ALL_DAYS, {row.day for row in self.session.exec(select(models.AvailabilityVersion))})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,6 +35,8 @@ class TestReservationBookZonesPublic(unittest.TestCase):
                 models.Table.__table__,
                 models.Reservation.__table__,
                 models.Order.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
             ],
         )
         self.session = Session(self.engine)
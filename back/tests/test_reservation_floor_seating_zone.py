@@ -32,6 +32,8 @@ class TestReservationFloorSeatingZone(unittest.TestCase):
                 models.Tenant.__table__,
                 models.Floor.__table__,
                 models.Table.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
             ],
         )
         self.session = Session(self.engine)
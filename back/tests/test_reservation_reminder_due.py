@@ -0,0 +1,167 @@
+"""Reminder due times (app/reservation_reminder_due.py) and the heartbeat's due query, SQLite."""
+
+import asyncio
+import os
+import sys
+import unittest
+from datetime import date, datetime, time, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import JSON as SAJSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models, reservation_reminder_heartbeat as heartbeat  # noqa: E402
+
+DAY = date(2031, 7, 2)
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    """SQLite may hand back naive datetimes: read them as UTC."""
+    if dt is None or dt.tzinfo is not None:
+        return dt
+    return dt.replace(tzinfo=timezone.utc)
+
+
+class TestReservationReminderDue(unittest.TestCase):
+    def setUp(self):
+        self._jsonb = []
+        for col in models.Tenant.__table__.columns:
+            if isinstance(col.type, JSONB):
+                self._jsonb.append((col, col.type))
+                col.type = SAJSON()
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.Floor.__table__,
+                models.Table.__table__,
+                models.Reservation.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.tenant = models.Tenant(
+            name="Reminders",
+            timezone="Europe/Madrid",
+            reservation_reminder_24h_enabled=True,
+            reservation_reminder_2h_enabled=True,
+        )
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(self.tenant)
+
+    def tearDown(self):
+        self.session.close()
+        for col, typ in self._jsonb:
+            col.type = typ
+
+    def _reserve(self, slot=time(20, 0), reservation_date=None, **kw):
+        kw.setdefault("tenant_id", self.tenant.id)
+        kw.setdefault("customer_email", "guest@example.com")
+        r = models.Reservation(
+            customer_name="guest",
+            customer_phone="+10000000001",
+            reservation_date=reservation_date or DAY,
+            reservation_time=slot,
+            party_size=2,
+            **kw,
+        )
+        self.session.add(r)
+        self.session.commit()
+        self.session.refresh(r)
+        return r
+
+    def _collect(self, now_utc):
+        with patch.object(heartbeat.whatsapp_svc, "is_whatsapp_configured", return_value=False):
+            return [(r.id, kind) for r, _, kind in heartbeat._collect_due_reminders(self.session, now_utc)]
+
+    def test_due_times_follow_slot_and_timezone(self):
+        r = self._reserve()
+        # 20:00 Madrid (CEST) = 18:00 UTC
+        self.assertEqual(_utc(r.reminder_24h_due_at), datetime(2031, 7, 1, 18, 0, tzinfo=timezone.utc))
+        self.assertEqual(_utc(r.reminder_2h_due_at), datetime(2031, 7, 2, 16, 0, tzinfo=timezone.utc))
+        r.reservation_time = time(21, 30)
+        self.session.add(r)
+        self.session.commit()
+        self.session.refresh(r)
+        self.assertEqual(_utc(r.reminder_2h_due_at), datetime(2031, 7, 2, 17, 30, tzinfo=timezone.utc))
+
+    def test_tenant_timezone_change_retimes_upcoming_bookings(self):
+        today = datetime.now(timezone.utc).date()
+        upcoming = self._reserve(reservation_date=today + timedelta(days=3))
+        self.tenant.timezone = "UTC"
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(upcoming)
+        self.assertEqual(
+            _utc(upcoming.reminder_2h_due_at),
+            datetime.combine(today + timedelta(days=3), time(18, 0), tzinfo=timezone.utc),
+        )
+
+    def test_collect_selects_only_rows_in_window(self):
+        due = self._reserve()
+        self._reserve(slot=time(23, 0))  # 24h window not open yet
+        self._reserve(customer_email=None)  # no channel without WhatsApp
+        sent = self._reserve()
+        sent.reminder_24h_sent_at = datetime(2031, 7, 1, 17, 0, tzinfo=timezone.utc)
+        self.session.add(sent)
+        self.session.commit()
+        now = datetime(2031, 7, 1, 17, 45, tzinfo=timezone.utc)
+        self.assertEqual(self._collect(now), [(due.id, "24h")])
+        self.assertEqual(
+            self._collect(datetime(2031, 7, 2, 15, 55, tzinfo=timezone.utc)), [(due.id, "2h"), (sent.id, "2h")]
+        )
+        self.tenant.reservation_reminder_24h_enabled = False
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.assertEqual(self._collect(now), [])
+
+    def _tick(self, now, send):
+        class _Now(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now
+
+        with patch.object(heartbeat, "engine", self.engine), patch.object(heartbeat, "datetime", _Now), patch.object(
+            heartbeat.whatsapp_svc, "is_whatsapp_configured", return_value=False
+        ), patch.object(heartbeat, "_send_one_reminder", send):
+            return asyncio.run(heartbeat._tick_async())
+
+    def test_tick_marks_delivered_and_releases_undelivered(self):
+        due = self._reserve()
+        other = self._reserve()
+        now = datetime(2031, 7, 1, 17, 45, tzinfo=timezone.utc)
+        sent = self._tick(now, AsyncMock(side_effect=lambda r, t: r.id == due.id))
+        self.assertEqual(sent, 1)
+        self.session.expire_all()
+        delivered = self.session.get(models.Reservation, due.id)
+        self.assertEqual(_utc(delivered.reminder_24h_sent_at), now)
+        released = self.session.get(models.Reservation, other.id)
+        self.assertIsNone(released.reminder_24h_sent_at)
+        self.assertIsNone(released.reminder_24h_claimed_at)
+
+    def test_claim_without_delivery_is_retried_after_lease(self):
+        r = self._reserve()
+        now = datetime(2031, 7, 1, 17, 40, tzinfo=timezone.utc)
+        # A worker claimed the reminder and died before marking it sent
+        r.reminder_24h_claimed_at = now
+        self.session.add(r)
+        self.session.commit()
+        self.assertEqual(self._collect(now + timedelta(minutes=5)), [])
+        later = now + timedelta(minutes=heartbeat.REMINDER_CLAIM_LEASE_MINUTES + 1)
+        self.assertEqual(self._collect(later), [(r.id, "24h")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Reservation demand ledger (app/slot_demand.py): flush hook, exclusion and rebuild, SQLite."""
+
+import os
+import sys
+import unittest
+from datetime import date, time
+
+from sqlalchemy import JSON as SAJSON
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models  # noqa: E402
+from app.main import _demand_for_slot  # noqa: E402
+from app.slot_demand import NO_FLOOR, lock_slot_days, rebuild_slot_demand  # noqa: E402
+
+DAY = date(2031, 7, 2)
+EIGHT = time(20, 0)
+
+
+class TestSlotDemand(unittest.TestCase):
+    def setUp(self):
+        self._jsonb = []
+        for col in models.Tenant.__table__.columns:
+            if isinstance(col.type, JSONB):
+                self._jsonb.append((col, col.type))
+                col.type = SAJSON()
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.Floor.__table__,
+                models.Table.__table__,
+                models.Reservation.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.tenant = models.Tenant(name="Ledger Test", timezone="UTC")
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(self.tenant)
+        self.terrace = models.Floor(name="Terrace", tenant_id=self.tenant.id, is_active=True)
+        self.hall = models.Floor(name="Hall", tenant_id=self.tenant.id, is_active=True)
+        self.session.add(self.terrace)
+        self.session.add(self.hall)
+        self.session.commit()
+        self.table = models.Table(name="T1", tenant_id=self.tenant.id, seat_count=4, floor_id=self.terrace.id)
+        self.session.add(self.table)
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        for col, typ in self._jsonb:
+            col.type = typ
+
+    def _reserve(self, party_size, **kw):
+        r = models.Reservation(
+            tenant_id=self.tenant.id,
+            customer_name="guest",
+            customer_phone="+10000000001",
+            reservation_date=kw.pop("reservation_date", DAY),
+            reservation_time=kw.pop("reservation_time", EIGHT),
+            party_size=party_size,
+            **kw,
+        )
+        self.session.add(r)
+        self.session.commit()
+        self.session.refresh(r)
+        return r
+
+    def _ledger(self):
+        sd = models.SlotDemand
+        return {
+            (row.slot_date, row.slot_time, row.floor_id): (row.guests, row.parties)
+            for row in self.session.exec(select(sd).where(sd.tenant_id == self.tenant.id)).all()
+        }
+
+    def test_buckets_follow_reservation_writes(self):
+        self._reserve(2, preferred_floor_id=self.hall.id)
+        seated = self._reserve(3, table_id=self.table.id, status=models.ReservationStatus.seated)
+        loose = self._reserve(4)
+        self.assertEqual(
+            self._ledger(),
+            {
+                (DAY, EIGHT, self.hall.id): (2, 1),
+                (DAY, EIGHT, self.terrace.id): (3, 1),
+                (DAY, EIGHT, NO_FLOOR): (4, 1),
+            },
+        )
+        self.assertEqual(_demand_for_slot(self.session, self.tenant.id, DAY, EIGHT), (9, 3))
+        self.assertEqual(_demand_for_slot(self.session, self.tenant.id, DAY, EIGHT, floor_id=self.terrace.id), (3, 1))
+
+        loose.reservation_time = time(21, 0)
+        seated.status = models.ReservationStatus.cancelled
+        self.session.add(loose)
+        self.session.add(seated)
+        self.session.commit()
+        self.assertEqual(
+            self._ledger(),
+            {(DAY, EIGHT, self.hall.id): (2, 1), (DAY, time(21, 0), NO_FLOOR): (4, 1)},
+        )
+
+    def test_table_floor_change_moves_its_reservations(self):
+        self._reserve(3, table_id=self.table.id, status=models.ReservationStatus.seated)
+        self.table.floor_id = self.hall.id
+        self.session.add(self.table)
+        self.session.commit()
+        self.assertEqual(self._ledger(), {(DAY, EIGHT, self.hall.id): (3, 1)})
+
+    def test_exclude_reservation_subtracts_its_own_row(self):
+        mine = self._reserve(2, preferred_floor_id=self.hall.id)
+        self._reserve(5, preferred_floor_id=self.hall.id)
+        self.assertEqual(
+            _demand_for_slot(
+                self.session, self.tenant.id, DAY, EIGHT, exclude_reservation_id=mine.id, floor_id=self.hall.id
+            ),
+            (5, 1),
+        )
+        # Another tenant's id on the same slot is not subtracted
+        self.assertEqual(
+            _demand_for_slot(self.session, self.tenant.id + 1, DAY, EIGHT, exclude_reservation_id=mine.id),
+            (0, 0),
+        )
+
+    def test_rebuild_matches_hook(self):
+        self._reserve(2, preferred_floor_id=self.hall.id)
+        self._reserve(3, table_id=self.table.id)
+        self._reserve(1, reservation_date=date(2031, 7, 3))
+        expected = self._ledger()
+        conn = self.session.connection()
+        conn.execute(delete(models.SlotDemand))
+        # A stale row for a date without reservations is dropped too
+        conn.execute(
+            models.SlotDemand.__table__.insert().values(
+                tenant_id=self.tenant.id, slot_date=date(2031, 8, 1), slot_time=EIGHT, floor_id=0, guests=9, parties=9
+            )
+        )
+        self.session.commit()
+        self.assertEqual(rebuild_slot_demand(self.session, tenant_id=self.tenant.id), 3)
+        self.assertEqual(self._ledger(), expected)
+
+    def test_lock_is_noop_off_postgres(self):
+        lock_slot_days(self.session, self.tenant.id, [DAY, DAY])
+        self.assertEqual(self._ledger(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""Shared table-token resolver: Redis hash with write-through on table changes."""
+
+import os
+import sys
+import unittest
+from dataclasses import replace
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models  # noqa: E402
+from app.table_token_cache import _store, resolve_table_token, table_ref, tombstone_tokens  # noqa: E402
+
+
+class _HashPipeline:
+    def __init__(self, redis_client: "_HashRedis"):
+        self._redis = redis_client
+        self._ops: list = []
+
+    def delete(self, key: str) -> None:
+        self._ops.append(lambda: self._redis.delete(key))
+
+    def hset(self, key: str, mapping: dict) -> None:
+        self._ops.append(lambda: self._redis.hashes.setdefault(key, {}).update(mapping))
+
+    def expire(self, key: str, seconds: int) -> None:
+        self._ops.append(lambda: True)
+
+    def eval(self, *args) -> None:
+        self._ops.append(lambda: self._redis.eval(*args))
+
+    def execute(self) -> list:
+        return [op() for op in self._ops]
+
+
+class _HashRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    def hgetall(self, key: str) -> dict:
+        return {k.encode(): v.encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def pipeline(self, transaction: bool = True) -> _HashPipeline:
+        return _HashPipeline(self)
+
+    def eval(self, script: str, numkeys: int, key: str, layout: str, ttl: int, version: int, *fields: str) -> int:
+        # Only the store script: write unless a tombstone or the same / a newer version is there
+        current = self.hashes.get(key, {})
+        if current.get("layout") == layout:
+            if current.get("tombstone") == "1" or int(current.get("version", -1)) >= int(version):
+                return 0
+        self.hashes[key] = dict(zip(fields[::2], fields[1::2]))
+        return 1
+
+
+class TestTableTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.Floor.__table__,
+                models.Table.__table__,
+                models.AvailabilityVersion.__table__,
+                models.SlotDemand.__table__,
+            ],
+        )
+        self.redis = _HashRedis()
+        patcher = patch("app.table_token_cache._redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.session = Session(self.engine)
+        tenant = models.Tenant(name="Token Cache")
+        self.session.add(tenant)
+        self.session.commit()
+        floor = models.Floor(name="Main", tenant_id=tenant.id)
+        self.session.add(floor)
+        self.session.commit()
+        self.table = models.Table(
+            name="T1", tenant_id=tenant.id, floor_id=floor.id, token="tok-1", is_active=False
+        )
+        self.session.add(self.table)
+        self.session.commit()
+        self.session.refresh(self.table)
+
+        self.queries = 0
+        event.listen(self.engine, "before_cursor_execute", self._count)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+        self.session.close()
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def test_created_table_is_written_through(self):
+        ref = resolve_table_token(self.session, "tok-1")
+        self.assertEqual(self.queries, 0)
+        self.assertEqual(ref.id, self.table.id)
+        self.assertFalse(ref.is_active)
+        self.assertFalse(ref.has_pin)
+        self.assertFalse(ref.is_take_away)
+
+    def test_activate_pin_and_token_regeneration(self):
+        self.table.is_active = True
+        self.table.order_pin = "1234"
+        self.table.active_order_id = 42
+        self.session.commit()
+        ref = resolve_table_token(self.session, "tok-1")
+        self.assertTrue(ref.is_active)
+        self.assertTrue(ref.has_pin)
+        self.assertEqual(ref.active_order_id, 42)
+
+        self.table.token = "tok-2"
+        self.session.commit()
+        self.assertEqual(self.redis.hashes["table_token:tok-1"].get("tombstone"), "1")
+        self.queries = 0
+        self.assertIsNone(resolve_table_token(self.session, "tok-1"))
+        self.assertEqual(self.queries, 1)
+        self.assertEqual(resolve_table_token(self.session, "tok-2").id, self.table.id)
+
+    def test_rollback_keeps_cached_state(self):
+        self.table.is_active = True
+        self.session.flush()
+        self.session.rollback()
+        self.assertFalse(resolve_table_token(self.session, "tok-1").is_active)
+
+    def test_miss_loads_and_fills_cache(self):
+        self.redis.hashes.clear()
+        ref = resolve_table_token(self.session, "tok-1")
+        self.assertEqual(ref.name, "T1")
+        self.assertEqual(self.queries, 1)
+        self.assertEqual(resolve_table_token(self.session, "tok-1"), ref)
+        self.assertEqual(self.queries, 1)
+
+    def test_miss_does_not_overwrite_concurrent_write_through(self):
+        self.redis.hashes.clear()
+        stale = table_ref(self.table)
+        fresh = replace(stale, is_active=True, has_pin=True)
+
+        def _loaded(table):
+            # Another request's commit writes through after this miss read the row
+            _store(self.redis, "tok-1", fresh, table.cache_version + 1)
+            return table_ref(table)
+
+        with patch("app.table_token_cache.table_ref", side_effect=_loaded):
+            self.assertEqual(resolve_table_token(self.session, "tok-1"), stale)
+        self.assertEqual(resolve_table_token(self.session, "tok-1"), fresh)
+
+    def test_replaced_token_is_not_revived_by_a_late_fill(self):
+        old = table_ref(self.table)
+        self.table.token = "tok-2"
+        self.session.commit()
+        self.assertFalse(_store(self.redis, "tok-1", old, 99))
+        self.assertIsNone(resolve_table_token(self.session, "tok-1"))
+
+    def test_out_of_order_write_through_keeps_newer_state(self):
+        self.table.is_active = True
+        self.session.commit()
+        newer = resolve_table_token(self.session, "tok-1")
+        version = int(self.redis.hashes["table_token:tok-1"]["version"])
+        self.assertEqual(version, 1)
+        # An earlier commit's write-through arriving late
+        self.assertFalse(_store(self.redis, "tok-1", replace(newer, is_active=False), version - 1))
+        self.assertTrue(resolve_table_token(self.session, "tok-1").is_active)
+
+    def test_bulk_delete_tombstones_tokens(self):
+        tombstone_tokens(self.session, ["tok-1"])
+        self.session.commit()
+        self.assertEqual(self.redis.hashes["table_token:tok-1"].get("tombstone"), "1")
+
+    def test_older_layout_entry_is_replaced_on_miss(self):
+        self.redis.hashes["table_token:tok-1"] = {"id": str(self.table.id)}
+        self.assertEqual(resolve_table_token(self.session, "tok-1").name, "T1")
+        self.assertEqual(self.redis.hashes["table_token:tok-1"]["name"], "T1")
+
+
+if __name__ == "__main__":
+    unittest.main()
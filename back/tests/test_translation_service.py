@@ -0,0 +1,123 @@
+"""Bulk I18nText lookups and their version-checked cache."""
+
+import os
+import sys
+import unittest
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+_back = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _back not in sys.path:
+    sys.path.insert(0, _back)
+
+from app import models  # noqa: E402
+from app.translation_service import TranslationService, clear_translation_cache  # noqa: E402
+
+
+class TestTranslationsBulk(unittest.TestCase):
+    def setUp(self):
+        clear_translation_cache()
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(
+            self.engine,
+            tables=[
+                models.Tenant.__table__,
+                models.I18nText.__table__,
+                models.MenuVersion.__table__,
+            ],
+        )
+        self.session = Session(self.engine)
+        self.tenant = models.Tenant(name="Translations")
+        self.session.add(self.tenant)
+        self.session.commit()
+        self.session.refresh(self.tenant)
+        self.queries: list[str] = []
+        event.listen(self.engine, "before_cursor_execute", self._count)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+        self.session.close()
+        clear_translation_cache()
+
+    def _count(self, conn, cursor, statement, *args):
+        if "FROM i18ntext" in statement and statement.lstrip().upper().startswith("SELECT"):
+            self.queries.append(statement)
+
+    def _add(self, tenant_id, entity_type, entity_id, field, text, lang="es"):
+        self.session.add(
+            models.I18nText(
+                tenant_id=tenant_id,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                field=field,
+                lang=lang,
+                text=text,
+            )
+        )
+
+    def test_tenant_override_wins_and_one_query(self):
+        tid = self.tenant.id
+        self._add(None, "product_catalog", 5, "description", "Global")
+        self._add(None, "product", 1, "name", "Global uno")
+        self._add(tid, "product", 1, "name", "Uno")
+        self._add(tid, "product", 2, "name", "Dos")
+        self._add(tid, "product", 2, "name", "Two", lang="de")
+        self.session.commit()
+        self.queries.clear()
+
+        keys = [
+            ("product", 1, "name"),
+            ("product", 2, "name"),
+            ("product", 3, "name"),
+            ("product_catalog", 5, "description"),
+        ]
+        found = TranslationService.get_translations_bulk(self.session, tid, "es", keys)
+        self.assertEqual(
+            found,
+            {
+                ("product", 1, "name"): "Uno",
+                ("product", 2, "name"): "Dos",
+                ("product_catalog", 5, "description"): "Global",
+            },
+        )
+        self.assertEqual(len(self.queries), 1)
+
+        # Hits and misses are both cached
+        again = TranslationService.get_translations_bulk(self.session, tid, "es", keys)
+        self.assertEqual(again, found)
+        self.assertEqual(len(self.queries), 1)
+
+    def test_write_invalidates_cached_entries(self):
+        tid = self.tenant.id
+        self._add(tid, "product", 1, "name", "Uno")
+        self.session.commit()
+        self.assertEqual(
+            TranslationService.get_translated_field(self.session, tid, "product", 1, "name", "es", "One"),
+            "Uno",
+        )
+        self.assertEqual(
+            TranslationService.get_translated_field(self.session, tid, "product", 2, "name", "es", "Two"),
+            "Two",
+        )
+
+        TranslationService.set_translation(self.session, tid, "product", 1, "name", "es", "Primero")
+        TranslationService.set_translation(self.session, tid, "product", 2, "name", "es", "Segundo")
+        self.session.commit()
+        self.assertEqual(
+            TranslationService.get_translated_field(self.session, tid, "product", 1, "name", "es", "One"),
+            "Primero",
+        )
+        self.assertEqual(
+            TranslationService.get_translated_field(self.session, tid, "product", 2, "name", "es", "Two"),
+            "Segundo",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
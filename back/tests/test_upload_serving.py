@@ -0,0 +1,127 @@
+"""Caching, conditional and range responses for /uploads images (app/upload_serving.py)."""
+from __future__ import annotations
+
+import gzip
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import upload_serving
+from app.upload_serving import (
+    CACHE_CONTROL_IMMUTABLE,
+    CACHE_CONTROL_REVALIDATE_UPLOAD,
+    clear_upload_manifest,
+    is_content_addressed,
+    preload_upload_manifest,
+    serve_upload,
+)
+
+UUID_NAME = "0b6f3a52-4c1e-4d8a-9b7e-2f1c3d4e5a6b.jpg"
+
+
+class TestServeUpload(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.mkdtemp()
+        self.root = Path(self._tmpdir)
+        self.products = self.root / "7" / "products"
+        self.products.mkdir(parents=True)
+        (self.products / UUID_NAME).write_bytes(b"0123456789")
+        (self.products / "dish.jpg").write_bytes(b"legacy")
+
+        app = FastAPI()
+
+        @app.get("/uploads/{tenant_id}/products/{filename}")
+        def serve(request: Request, tenant_id: int, filename: str):
+            return serve_upload(request, self.root / str(tenant_id) / "products" / filename)
+
+        self.client = TestClient(app)
+        clear_upload_manifest()
+
+    def tearDown(self) -> None:
+        clear_upload_manifest()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def test_content_addressed_names(self) -> None:
+        self.assertTrue(is_content_addressed(UUID_NAME))
+        self.assertTrue(is_content_addressed("0b6f3a52.320w.3f9c0e1d2b4a.webp"))
+        self.assertFalse(is_content_addressed("dish.jpg"))
+
+    def test_uuid_name_is_immutable(self) -> None:
+        response = self.client.get(f"/uploads/7/products/{UUID_NAME}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"0123456789")
+        self.assertEqual(response.headers["cache-control"], CACHE_CONTROL_IMMUTABLE)
+        self.assertIn("etag", response.headers)
+        self.assertIn("last-modified", response.headers)
+
+    def test_other_names_revalidate(self) -> None:
+        response = self.client.get("/uploads/7/products/dish.jpg")
+        self.assertEqual(response.headers["cache-control"], CACHE_CONTROL_REVALIDATE_UPLOAD)
+
+    def test_conditional_requests_answer_304(self) -> None:
+        first = self.client.get(f"/uploads/7/products/{UUID_NAME}")
+        etag = first.headers["etag"]
+        by_etag = self.client.get(f"/uploads/7/products/{UUID_NAME}", headers={"If-None-Match": etag})
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag.headers["etag"], etag)
+        self.assertEqual(by_etag.content, b"")
+        by_date = self.client.get(
+            f"/uploads/7/products/{UUID_NAME}",
+            headers={"If-Modified-Since": first.headers["last-modified"]},
+        )
+        self.assertEqual(by_date.status_code, 304)
+        stale = self.client.get(f"/uploads/7/products/{UUID_NAME}", headers={"If-None-Match": '"other"'})
+        self.assertEqual(stale.status_code, 200)
+
+    def test_range_request(self) -> None:
+        response = self.client.get(f"/uploads/7/products/{UUID_NAME}", headers={"Range": "bytes=2-5"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, b"2345")
+        self.assertEqual(response.headers["content-range"], "bytes 2-5/10")
+        self.assertEqual(response.headers["cache-control"], CACHE_CONTROL_IMMUTABLE)
+
+    def test_gzip_variant_for_clients_that_accept_it(self) -> None:
+        (self.products / "menu.json").write_bytes(b'{"a":1}')
+        (self.products / "menu.json.gz").write_bytes(gzip.compress(b'{"a":1}'))
+        app = FastAPI()
+
+        @app.get("/export/{filename}")
+        def export(request: Request, filename: str):
+            return serve_upload(
+                request, self.products / filename, cache_control="public, max-age=60", gzip_variant=True
+            )
+
+        client = TestClient(app)
+        response = client.get("/export/menu.json", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.json(), {"a": 1})
+        plain = client.get("/export/menu.json", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(plain.headers["cache-control"], "public, max-age=60")
+
+    def test_missing_file_404(self) -> None:
+        self.assertEqual(self.client.get("/uploads/7/products/gone.jpg").status_code, 404)
+
+    def test_preloaded_manifest_answers_revalidation_without_stat(self) -> None:
+        etag = self.client.get(f"/uploads/7/products/{UUID_NAME}").headers["etag"]
+        with mock.patch.object(upload_serving.settings, "uploads_preload_manifest", True):
+            self.assertEqual(preload_upload_manifest(self.root), 2)
+            with mock.patch.object(upload_serving.os, "stat", side_effect=AssertionError("stat")):
+                response = self.client.get(
+                    f"/uploads/7/products/{UUID_NAME}", headers={"If-None-Match": etag}
+                )
+            self.assertEqual(response.status_code, 304)
+            # Deleted behind the manifest's back: full responses still check the disk
+            (self.products / "dish.jpg").unlink()
+            self.assertEqual(self.client.get("/uploads/7/products/dish.jpg").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
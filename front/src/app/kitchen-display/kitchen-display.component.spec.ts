@@ -8,10 +8,13 @@ import { TranslateModule, TranslateService } from '@ngx-translate/core';
 import { RouterTestingModule } from '@angular/router/testing';
 import { of } from 'rxjs';
 
+const snapshot = (orders: unknown[] = []) =>
+  of({ cursor: 1, snapshot: true, has_more: false, orders, removed_order_ids: [] });
+
 describe('KitchenDisplayComponent', () => {
   let orderUpdates$: Subject<unknown>;
   let mockApi: {
-    getOrders: jasmine.Spy;
+    getOrderChanges: jasmine.Spy;
     connectWebSocket: jasmine.Spy;
     orderUpdates$: Subject<unknown>;
     getCurrentUser: jasmine.Spy;
@@ -23,7 +26,7 @@ describe('KitchenDisplayComponent', () => {
   beforeEach(async () => {
     orderUpdates$ = new Subject<unknown>();
     mockApi = {
-      getOrders: jasmine.createSpy('getOrders').and.returnValue(of([])),
+      getOrderChanges: jasmine.createSpy('getOrderChanges').and.returnValue(snapshot()),
       connectWebSocket: jasmine.createSpy('connectWebSocket'),
       orderUpdates$,
       getCurrentUser: jasmine.createSpy('getCurrentUser').and.returnValue({ id: 1, role: 'kitchen' }),
@@ -66,10 +69,10 @@ describe('KitchenDisplayComponent', () => {
     expect(fixture.componentInstance).toBeTruthy();
   });
 
-  it('should load orders on init', () => {
+  it('should load a KDS snapshot on init', () => {
     const fixture = TestBed.createComponent(KitchenDisplayComponent);
     fixture.detectChanges();
-    expect(mockApi.getOrders).toHaveBeenCalledWith(false);
+    expect(mockApi.getOrderChanges).toHaveBeenCalledWith(null, 'kds');
   });
 
   it('should connect WebSocket on init', () => {
@@ -105,9 +108,9 @@ describe('KitchenDisplayComponent', () => {
   it('should refresh orders when WebSocket emits', () => {
     const fixture = TestBed.createComponent(KitchenDisplayComponent);
     fixture.detectChanges();
-    mockApi.getOrders.calls.reset();
+    mockApi.getOrderChanges.calls.reset();
     orderUpdates$.next({ type: 'items_added' });
-    expect(mockApi.getOrders).toHaveBeenCalledWith(false);
+    expect(mockApi.getOrderChanges).toHaveBeenCalledWith(1, 'kds');
   });
 
   it('should filter to orders that have at least one pending or preparing item', () => {
@@ -148,13 +151,35 @@ describe('KitchenDisplayComponent', () => {
       },
       { id: 3, status: 'completed', table_name: 'T3', created_at: new Date().toISOString(), items: [], total_cents: 0 },
     ];
-    mockApi.getOrders.and.returnValue(of(orders));
+    mockApi.getOrderChanges.and.returnValue(snapshot(orders));
     const fixture = TestBed.createComponent(KitchenDisplayComponent);
     fixture.detectChanges();
     expect(fixture.componentInstance.activeOrders().length).toBe(1);
     expect(fixture.componentInstance.activeOrders()[0].id).toBe(1);
   });
 
+  it('should merge deltas and drop removed orders', () => {
+    const ticket = (id: number, status: string) => ({
+      id,
+      status: 'pending',
+      table_name: `T${id}`,
+      created_at: new Date().toISOString(),
+      items: [{ id, product_name: 'Soup', quantity: 1, status, price_cents: 0, category: 'Main Course' }],
+      total_cents: 0,
+    });
+    mockApi.getOrderChanges.and.returnValue(snapshot([ticket(1, 'pending'), ticket(2, 'pending')]));
+    const fixture = TestBed.createComponent(KitchenDisplayComponent);
+    fixture.detectChanges();
+    expect(fixture.componentInstance.activeOrders().length).toBe(2);
+
+    mockApi.getOrderChanges.and.returnValue(
+      of({ cursor: 2, snapshot: false, has_more: false, orders: [ticket(3, 'pending')], removed_order_ids: [1] })
+    );
+    fixture.componentInstance.loadOrders({ background: true });
+    expect(mockApi.getOrderChanges).toHaveBeenCalledWith(1, 'kds');
+    expect(fixture.componentInstance.activeOrders().map((o) => o.id).sort()).toEqual([2, 3]);
+  });
+
   it('should toggle sound and persist to localStorage', () => {
     const fixture = TestBed.createComponent(KitchenDisplayComponent);
     fixture.detectChanges();
@@ -167,10 +192,10 @@ describe('KitchenDisplayComponent', () => {
   it('should auto-refresh after interval', fakeAsync(() => {
     const fixture = TestBed.createComponent(KitchenDisplayComponent);
     fixture.detectChanges();
-    mockApi.getOrders.calls.reset();
+    mockApi.getOrderChanges.calls.reset();
     tick(15000);
     fixture.detectChanges();
-    expect(mockApi.getOrders).toHaveBeenCalledWith(false);
+    expect(mockApi.getOrderChanges).toHaveBeenCalledWith(1, 'kds');
   }));
 
   it('should not show full-page loading on background refresh', fakeAsync(() => {
@@ -182,19 +207,19 @@ describe('KitchenDisplayComponent', () => {
     tick();
     fixture.detectChanges();
     expect(fixture.componentInstance.loading()).toBe(false);
-    expect(mockApi.getOrders).toHaveBeenCalled();
+    expect(mockApi.getOrderChanges).toHaveBeenCalled();
   }));
 
   it('should defer background refresh until item status dropdown closes', () => {
     const fixture = TestBed.createComponent(KitchenDisplayComponent);
     fixture.detectChanges();
-    mockApi.getOrders.calls.reset();
+    mockApi.getOrderChanges.calls.reset();
     fixture.componentInstance.toggleItemStatusDropdown(1, 1);
     fixture.componentInstance.loadOrders({ background: true });
-    expect(mockApi.getOrders).not.toHaveBeenCalled();
-    mockApi.getOrders.calls.reset();
+    expect(mockApi.getOrderChanges).not.toHaveBeenCalled();
+    mockApi.getOrderChanges.calls.reset();
     fixture.componentInstance.toggleItemStatusDropdown(1, 1);
-    expect(mockApi.getOrders).toHaveBeenCalledWith(false);
+    expect(mockApi.getOrderChanges).toHaveBeenCalledWith(1, 'kds');
   });
 
   it('should call requestFullscreen when toggleFullscreen and not already fullscreen', () => {
@@ -12,7 +12,16 @@ import {
 } from '@angular/core';
 import { ActivatedRoute, Router, RouterLink } from '@angular/router';
 import { FormsModule } from '@angular/forms';
-import { ApiService, KitchenStation, Order, OrderItem, OrderLineModifiers } from '../services/api.service';
+import {
+  ApiService,
+  applyOrderDelta,
+  KitchenStation,
+  Order,
+  OrderChangesResponse,
+  OrderDelta,
+  OrderItem,
+  OrderLineModifiers,
+} from '../services/api.service';
 import { AudioService } from '../services/audio.service';
 import { PermissionService } from '../services/permission.service';
 import { Subscription } from 'rxjs';
@@ -700,6 +709,9 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
   private queryParamSub: Subscription | null = null;
   private initialLoadDone = false;
   private pendingBackgroundRefresh = false;
+  /** Change cursor from GET /orders/changes; null until the first snapshot. */
+  private changeCursor: number | null = null;
+  private changesInFlight = false;
 
   orders = signal<Order[]>([]);
   loading = signal(true);
@@ -815,6 +827,7 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
     this.routeDataSub = this.route.data.subscribe((data) => {
       const v = (data['view'] as 'kitchen' | 'bar') || 'kitchen';
       this.viewMode.set(v);
+      if (this.wsSub) this.connectScopedSocket();
     });
 
     this.queryParamSub = this.route.queryParamMap.subscribe((qm) => {
@@ -827,6 +840,7 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
           this.stationSelection.set(n);
         }
       }
+      if (this.wsSub) this.connectScopedSocket();
     });
 
     this.api.getKitchenStations().subscribe({
@@ -843,13 +857,15 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
     this.tickIntervalId = setInterval(() => this.now.set(Date.now()), 1000);
 
     try {
-      this.api.connectWebSocket();
+      this.connectScopedSocket();
       this.wsSub = this.api.orderUpdates$.subscribe((update: unknown) => {
         if (update && typeof update === 'object' && 'type' in update) {
           const type = (update as { type: string }).type;
           if (this.soundEnabled() && ['new_order', 'items_added'].includes(type)) {
             this.audio.playRestaurantOrderChange();
           }
+          const delta = (update as { delta?: OrderDelta }).delta;
+          if (delta && this.applyDelta(delta)) return;
           this.loadOrders({ background: true });
         }
       });
@@ -889,6 +905,15 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
     void this.exitFullscreenIfActive();
   }
 
+  /** Subscribe only to this screen's station (or route), so bar screens skip food tickets. */
+  private connectScopedSocket(): void {
+    const sel = this.stationSelection();
+    this.api.connectWebSocket({
+      route: this.viewMode() === 'bar' ? 'bar' : 'kitchen',
+      stationId: sel === 'all' ? null : sel,
+    });
+  }
+
   onStationSelectChange(value: number | 'all'): void {
     this.stationSelection.set(value);
     void this.router.navigate([], {
@@ -1045,16 +1070,29 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
       this.loading.set(true);
     }
 
-    this.api.getOrders(false).subscribe({
-      next: (list) => {
-        this.orders.set(list);
+    if (this.changesInFlight) {
+      this.pendingBackgroundRefresh = true;
+      return;
+    }
+    this.changesInFlight = true;
+    const cursor = isInitial ? null : this.changeCursor;
+    this.api.getOrderChanges(cursor, 'kds').subscribe({
+      next: (res) => {
+        this.changesInFlight = false;
+        this.applyOrderChanges(res);
         this.lastRefreshAt.set(new Date());
         if (isInitial) {
           this.loading.set(false);
           this.initialLoadDone = true;
         }
+        if (res.has_more) {
+          this.loadOrders({ background: true });
+        } else {
+          this.flushPendingBackgroundRefresh();
+        }
       },
       error: () => {
+        this.changesInFlight = false;
         if (isInitial) {
           this.loading.set(false);
           this.initialLoadDone = true;
@@ -1063,6 +1101,30 @@ export class KitchenDisplayComponent implements OnInit, AfterViewInit, OnDestroy
     });
   }
 
+  /** Merge a snapshot or delta from GET /orders/changes into the ticket list. */
+  private applyOrderChanges(res: OrderChangesResponse): void {
+    this.changeCursor = res.cursor;
+    if (res.snapshot) {
+      this.orders.set(res.orders);
+      return;
+    }
+    if (res.orders.length === 0 && res.removed_order_ids.length === 0) return;
+    const byId = new Map(this.orders().map((o) => [o.id, o] as const));
+    for (const id of res.removed_order_ids) byId.delete(id);
+    for (const o of res.orders) byId.set(o.id, o);
+    this.orders.set([...byId.values()]);
+  }
+
+  /** Patch one ticket from a WebSocket delta; false when the ticket must be reloaded. */
+  private applyDelta(delta: OrderDelta): boolean {
+    if (this.itemStatusDropdownOpen() || this.changesInFlight) return false;
+    const current = this.orders().find((o) => o.id === delta.order_id);
+    const next = current ? applyOrderDelta(current, delta) : null;
+    if (!next) return false;
+    this.orders.set(this.orders().map((o) => (o.id === next.id ? next : o)));
+    return true;
+  }
+
   private flushPendingBackgroundRefresh(): void {
     if (!this.pendingBackgroundRefresh) return;
     this.pendingBackgroundRefresh = false;
@@ -155,6 +155,7 @@ export class MenuComponent implements OnInit, OnDestroy {
   private tableToken = '';
   private tenantId = 0;
   private ws: WebSocket | null = null;
+  private wsLastEventId: string | null = null;
   private sessionId = '';
   /** When set (from staff link), PIN is not required; sent with getMenu and submitOrder. */
   private staffAccess: string | null = null;
@@ -382,10 +383,15 @@ export class MenuComponent implements OnInit, OnDestroy {
     // environment.wsUrl already includes /ws, so we just append the path
     // If environment.wsUrl is absolute (e.g. ws://host:port/ws), it works
     // If it was relative, we fixed it above
-    this.ws = new WebSocket(`${wsUrl}/table/${this.tableToken}`);
+    // Reconnect with the last seen event id so only missed updates are replayed
+    const resume = this.wsLastEventId ? `?last_event_id=${encodeURIComponent(this.wsLastEventId)}` : '';
+    this.ws = new WebSocket(`${wsUrl}/table/${this.tableToken}${resume}`);
     this.ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
+        if (typeof data.event_id === 'string') {
+          this.wsLastEventId = data.event_id;
+        }
         if (data.type === 'table_closed') {
           // Staff has closed this table -- show the closed screen
           this.tableIsActive.set(false);
@@ -411,7 +417,7 @@ export class MenuComponent implements OnInit, OnDestroy {
             );
           }
           this.loadStoredOrders();
-        } else if (data.type === 'item_removed' || data.type === 'item_updated' || data.type === 'order_cancelled' || data.type === 'items_added' || data.type === 'new_order') {
+        } else if (data.type === 'item_removed' || data.type === 'item_updated' || data.type === 'order_cancelled' || data.type === 'items_added' || data.type === 'new_order' || data.type === 'resync_required') {
           this.audio.playCustomerOrderChange();
           this.loadStoredOrders();
         }
@@ -629,6 +635,22 @@ export class MenuComponent implements OnInit, OnDestroy {
     }
   }
 
+  /** Responsive srcset for one format (avif, webp, or the stored image format), absolute URLs. */
+  getProductImageSrcset(product: Product, format: string): string | null {
+    const srcset = product.image_srcset?.[format];
+    if (!srcset) return null;
+    return srcset
+      .split(', ')
+      .map((entry) => `${environment.apiUrl}${entry}`)
+      .join(', ');
+  }
+
+  /** srcset for the <img> fallback: the stored image's own format. */
+  getProductImageFallbackSrcset(product: Product): string | null {
+    const formats = Object.keys(product.image_srcset || {}).filter((f) => f !== 'avif' && f !== 'webp');
+    return formats.length ? this.getProductImageSrcset(product, formats[0]) : null;
+  }
+
   getProductKey(product: Product, customizationAnswers?: Record<string, string | number | string[]>): string {
     if (!product) return 'null-product';
     const source = product._source || 'unknown';
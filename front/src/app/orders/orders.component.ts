@@ -4,7 +4,9 @@ import { FormsModule } from '@angular/forms';
 import { environment } from '../../environments/environment';
 import {
   ApiService,
+  applyOrderDelta,
   Order,
+  OrderDelta,
   OrderItem,
   TenantSettings,
   BillingCustomer,
@@ -2894,6 +2896,7 @@ export class OrdersComponent implements OnInit, OnDestroy {
             }
           }
         }
+        if (update?.delta && this.applyDelta(update.delta)) return;
         this.loadOrders();
       });
     } catch (error) {
@@ -2933,6 +2936,15 @@ export class OrdersComponent implements OnInit, OnDestroy {
   }
 
 
+  /** Patch one order from a WebSocket delta; false when the list must be reloaded. */
+  private applyDelta(delta: OrderDelta): boolean {
+    const current = this.orders().find((o) => o.id === delta.order_id);
+    const next = current ? applyOrderDelta(current, delta) : null;
+    if (!next) return false;
+    this.orders.set(this.orders().map((o) => (o.id === next.id ? next : o)));
+    return true;
+  }
+
   loadOrders() {
     this.loading.set(true);
     this.api.getOrders(this.showRemovedItems).subscribe({
@@ -961,6 +961,8 @@ export interface Product {
   cost_cents?: number | null;
   tenant_id?: number;
   image_filename?: string;
+  /** Customer menu: srcset per format (avif, webp, jpeg/png), URLs relative to the API */
+  image_srcset?: Record<string, string> | null;
   ingredients?: string;
   image_size_bytes?: number | null;
   image_size_formatted?: string | null;
@@ -1532,6 +1534,8 @@ export interface OrderPaymentLeg {
 
 export interface Order {
   id: number;
+  /** Per-order change version; WebSocket `delta`s apply on top of it (see applyOrderDelta) */
+  version?: number;
   table_name: string;
   table_id?: number | null;
   table_token?: string | null;
@@ -1575,6 +1579,46 @@ export interface Order {
   can_request_hub_fulfillment?: boolean;
 }
 
+/** GET /orders/changes — snapshot or delta since `cursor`. */
+export interface OrderChangesResponse {
+  cursor: number;
+  snapshot: boolean;
+  has_more: boolean;
+  orders: Order[];
+  removed_order_ids: number[];
+}
+
+/** Compact change carried as `delta` on order WebSocket events (changed fields only). */
+export interface OrderDelta {
+  order_id: number;
+  version: number;
+  base_version: number;
+  order: Partial<Order>;
+  items: Array<Partial<OrderItem> & { id: number }>;
+  removed_item_ids: number[];
+}
+
+/**
+ * Apply `delta` to `order` when the order is at `delta.base_version`. Returns `null` when
+ * a change was missed (version gap) or a changed line is not held locally; reload then.
+ */
+export function applyOrderDelta(order: Order, delta: OrderDelta): Order | null {
+  if (order.id !== delta.order_id || order.version == null || order.version !== delta.base_version) {
+    return null;
+  }
+  const changes = new Map(delta.items.map((i) => [i.id, i] as const));
+  const removed = new Set(delta.removed_item_ids);
+  const items: OrderItem[] = [];
+  for (const item of order.items) {
+    if (item.id != null && removed.has(item.id)) continue;
+    const change = item.id != null ? changes.get(item.id) : undefined;
+    if (change) changes.delete(change.id);
+    items.push(change ? { ...item, ...change } : item);
+  }
+  if (changes.size > 0) return null;
+  return { ...order, ...delta.order, id: order.id, items, version: delta.version };
+}
+
 /** Staff create first-party Satisfecho Delivery order (no table). */
 export interface SatisfechoDeliveryOrderCreate {
   items: OrderItemCreate[];
@@ -1987,6 +2031,17 @@ export interface TenantProduct {
   } | null;
 }
 
+/** Staff WebSocket scope for KDS screens: one prep station, else one route (kitchen / bar). */
+export interface KdsSocketScope {
+  route?: 'kitchen' | 'bar';
+  stationId?: number | null;
+}
+
+function kdsScopeKey(scope: KdsSocketScope | null): string {
+  if (!scope) return '';
+  return scope.stationId != null ? `station:${scope.stationId}` : scope.route ? `route:${scope.route}` : '';
+}
+
 @Injectable({
   providedIn: 'root'
 })
@@ -2013,6 +2068,10 @@ export class ApiService {
   private orderUpdates = new Subject<any>();
   private reservationUpdates = new Subject<any>();
   private ws: WebSocket | null = null;
+  /** Last real-time event id seen; sent on reconnect so the bridge replays only the gap. */
+  private wsLastEventId: string | null = null;
+  /** Kitchen/bar displays narrow the staff socket to one route or station (see KdsSocketScope). */
+  private wsScope: KdsSocketScope | null = null;
 
   user$ = this.userSubject.asObservable();
   orderUpdates$ = this.orderUpdates.asObservable();
@@ -2788,6 +2847,17 @@ export class ApiService {
     return this.http.get<Order[]>(`${this.apiUrl}/orders`, params);
   }
 
+  /**
+   * Incremental order feed. Omit `cursor` for a snapshot of active orders; then pass the
+   * returned cursor to receive only orders changed since. `view=kds` returns compact tickets
+   * (open items only, no billing/total fields).
+   */
+  getOrderChanges(cursor: number | null, view: 'full' | 'kds' = 'full'): Observable<OrderChangesResponse> {
+    const params: Record<string, string> = { view };
+    if (cursor != null) params['cursor'] = String(cursor);
+    return this.http.get<OrderChangesResponse>(`${this.apiUrl}/orders/changes`, { params });
+  }
+
   createSatisfechoDeliveryOrder(body: SatisfechoDeliveryOrderCreate): Observable<SatisfechoDeliveryOrderResponse> {
     return this.http.post<SatisfechoDeliveryOrderResponse>(`${this.apiUrl}/orders/satisfecho-delivery`, body);
   }
@@ -3929,10 +3999,17 @@ export class ApiService {
     });
   }
 
-  // WebSocket for real-time updates (restaurant owners only)
-  connectWebSocket(): void {
+  // WebSocket for real-time updates (restaurant owners only).
+  // Without a scope the socket receives every tenant event; KDS screens pass a route/station.
+  connectWebSocket(scope: KdsSocketScope | null = null): void {
     const user = this.getCurrentUser();
-    if (!user || this.ws) return;
+    if (!user) return;
+    if (kdsScopeKey(scope) !== kdsScopeKey(this.wsScope)) {
+      this.closeSocketQuietly();
+      this.wsLastEventId = null; // event ids are per stream
+    }
+    this.wsScope = scope;
+    if (this.ws) return;
 
     // Fetch token so we can pass it in the URL; cookie may not be sent on WebSocket upgrade (e.g. cross-origin)
     this.getWsToken().subscribe({
@@ -3966,7 +4043,12 @@ export class ApiService {
     }
 
     const base = `${wsUrl}/tenant/${tenantId}`;
-    const wsEndpoint = token ? `${base}?token=${encodeURIComponent(token)}` : base;
+    const query: string[] = [];
+    if (token) query.push(`token=${encodeURIComponent(token)}`);
+    if (this.wsScope?.stationId != null) query.push(`station_id=${this.wsScope.stationId}`);
+    else if (this.wsScope?.route) query.push(`route=${this.wsScope.route}`);
+    if (this.wsLastEventId) query.push(`last_event_id=${encodeURIComponent(this.wsLastEventId)}`);
+    const wsEndpoint = query.length ? `${base}?${query.join('&')}` : base;
 
     try {
       this.ws = new WebSocket(wsEndpoint);
@@ -3974,6 +4056,15 @@ export class ApiService {
       this.ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          if (typeof data?.event_id === 'string') {
+            this.wsLastEventId = data.event_id;
+          }
+          if (data?.type === 'resync_required') {
+            // Missed events were trimmed: both views reload from the API
+            this.orderUpdates.next(data);
+            this.reservationUpdates.next(data);
+            return;
+          }
           const isReservation = data?.type && [
             'new_reservation', 'reservation_updated', 'reservation_status',
             'reservation_seated', 'reservation_finished', 'reservation_cancelled'
@@ -4001,7 +4092,7 @@ export class ApiService {
             console.log('WebSocket will reconnect in 3 seconds...');
           }
           // Reconnect after 3 seconds
-          setTimeout(() => this.connectWebSocket(), 3000);
+          setTimeout(() => this.connectWebSocket(this.wsScope), 3000);
         } else if (event.code === 1008) {
           console.warn('WebSocket connection closed due to authentication error:', event.reason);
         } else if (event.code === 1000) {
@@ -4037,12 +4128,25 @@ export class ApiService {
   }
 
   disconnectWebSocket(): void {
+    this.wsLastEventId = null;
+    this.wsScope = null;
     if (this.ws) {
       this.ws.close();
       this.ws = null;
     }
   }
 
+  /** Close the current socket without triggering its reconnect handler (scope switch). */
+  private closeSocketQuietly(): void {
+    if (!this.ws) return;
+    const old = this.ws;
+    this.ws = null;
+    old.onclose = null;
+    old.onerror = null;
+    old.onmessage = null;
+    old.close(1000);
+  }
+
   // Providers
   getProviders(activeOnly: boolean = true): Observable<Provider[]> {
     const params = new HttpParams().set('active_only', activeOnly.toString());
@@ -5,13 +5,23 @@ Subscribes to Redis pub/sub channels and broadcasts messages to connected WebSoc
 - orders:table:{table_id} (for customers)
 - orders:tenant:{tenant_id} (for restaurant owners - orders)
 - reservations:tenant:{tenant_id} (for restaurant owners - reservations)
+- kds:{tenant_id}:route:{route} / kds:{tenant_id}:station:{id} (kitchen / bar displays)
+
+Each instance subscribes only to the channels of its own connections (refcounted), so
+replicas behind HAProxy split the Redis traffic instead of each receiving all of it.
+
+Clients reconnecting with ?last_event_id= get the missed events replayed from the
+events:tenant:{id} / events:table:{id} streams, or {"type": "resync_required"}.
 """
 import asyncio
 import json
 import logging
 import os
+import socket
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import Any, Optional
 from urllib.parse import unquote
 
 import httpx
@@ -31,28 +41,364 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# Store connected clients
-# Key: "table:{table_id}" or "tenant:{tenant_id}"
-table_connections: dict[int, set[WebSocket]] = {}  # table_id -> set of WebSockets
-tenant_connections: dict[int, set[WebSocket]] = {}  # tenant_id -> set of WebSockets
-
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "CHANGE_THIS_IN_PRODUCTION")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 API_URL = os.getenv("API_URL", "http://localhost:8020")
+# Per-connection outbound buffer (messages) and what to do when a client cannot keep up:
+# "drop_oldest" discards the oldest queued message, "disconnect" closes the socket (1013)
+# so the client reconnects and refetches state.
+WS_SEND_QUEUE_SIZE = max(1, int(os.getenv("WS_SEND_QUEUE_SIZE", "256")))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest").strip().lower()
+if WS_SLOW_CONSUMER_POLICY not in ("drop_oldest", "disconnect"):
+    WS_SLOW_CONSUMER_POLICY = "drop_oldest"
+# A single send_text stuck longer than this closes the connection
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+
+class ClientConnection:
+    """
+    One connected WebSocket with its own bounded send queue and writer task.
 
+    The Redis listener only enqueues (never awaits a socket), so a slow client delays
+    nobody but itself.
+    """
 
-async def validate_table_token(table_token: str) -> Optional[dict]:
-    """Validate table token by calling backend API."""
+    def __init__(self, websocket: WebSocket, label: str):
+        self.websocket = websocket
+        self.label = label
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.closed = False
+        # Last event id sent by replay; queued live copies up to it are skipped once
+        self.replayed_through: Optional[tuple[int, int]] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, data: str) -> bool:
+        """Queue a message without blocking. Returns False once the connection is closed."""
+        global dropped_messages_total
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if WS_SLOW_CONSUMER_POLICY == "disconnect":
+            logger.warning(f"Slow consumer {self.label}: send queue full, disconnecting")
+            self.closed = True
+            asyncio.create_task(self._close(1013, "Slow consumer"))
+            return False
+        try:
+            self.queue.get_nowait()
+            self.dropped += 1
+            dropped_messages_total += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"Slow consumer {self.label}: dropped {self.dropped} message(s)")
+        except asyncio.QueueEmpty:
+            pass
+        self.queue.put_nowait(data)
+        return True
+
+    async def _write_loop(self) -> None:
+        try:
+            while not self.closed:
+                data = await self.queue.get()
+                if self.replayed_through is not None:
+                    eid = _parse_event_id(_event_id_of(data))
+                    if eid is not None and eid <= self.replayed_through:
+                        continue
+                    self.replayed_through = None
+                await asyncio.wait_for(self.websocket.send_text(data), timeout=WS_SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Send timeout for {self.label}, disconnecting")
+            self.closed = True
+            await self._close(1013, "Send timeout")
+        except Exception:
+            # Socket already gone; the endpoint's receive loop cleans up
+            self.closed = True
+
+    async def _close(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    async def stop(self) -> None:
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+class ConnectionRegistry:
+    """
+    Local connections by Redis channel; the channel sets double as subscription refcounts.
+
+    The first connection on a channel subscribes this instance to it and the last one
+    leaving unsubscribes, so an instance receives (and parses) only events for devices
+    connected to it. Subscribe / unsubscribe commands are reconciled under one lock
+    against the current sets, so interleaved joins and leaves cannot reorder them.
+    """
+
+    def __init__(self) -> None:
+        self.channels: dict[str, set[ClientConnection]] = {}
+        self.clients: dict[ClientConnection, tuple[str, tuple[str, ...]]] = {}  # conn -> (kind, channels)
+        self._pubsub: Any = None
+        self._subscribed: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    async def add(self, conn: ClientConnection, kind: str, channels: tuple[str, ...]) -> None:
+        """Add to fan-out; live events queue up until ``conn.start()`` (after any replay)."""
+        self.clients[conn] = (kind, channels)
+        for channel in channels:
+            self.channels.setdefault(channel, set()).add(conn)
+        await self._reconcile(channels)
+
+    async def remove(self, conn: ClientConnection) -> None:
+        kind_channels = self.clients.pop(conn, None)
+        await conn.stop()
+        if kind_channels is None:
+            return
+        channels = kind_channels[1]
+        for channel in channels:
+            conns = self.channels.get(channel)
+            if conns is not None:
+                conns.discard(conn)
+                if not conns:
+                    del self.channels[channel]
+        await self._reconcile(channels)
+
+    def fan_out(self, channel: str, data: str) -> None:
+        """Enqueue ``data`` on every connection of ``channel``; skip closed ones."""
+        conns = self.channels.get(channel)
+        if not conns:
+            return
+        dead = [conn for conn in conns if not conn.enqueue(data)]
+        # Closed connections leave through remove() when their endpoint exits
+        conns.difference_update(dead)
+
+    async def attach(self, pubsub: Any) -> None:
+        """Use a (re)connected pubsub: subscribe to every channel with local connections."""
+        async with self._lock:
+            self._pubsub = pubsub
+            self._subscribed = set(self.channels)
+            if self._subscribed:
+                await pubsub.subscribe(*self._subscribed)
+
+    async def detach(self) -> None:
+        async with self._lock:
+            self._pubsub = None
+            self._subscribed = set()
+
+    async def _reconcile(self, channels: tuple[str, ...]) -> None:
+        async with self._lock:
+            if self._pubsub is None:
+                return  # attach() subscribes when the listener (re)connects
+            wanted = [c for c in channels if c in self.channels and c not in self._subscribed]
+            unwanted = [c for c in channels if c not in self.channels and c in self._subscribed]
+            try:
+                if wanted:
+                    await self._pubsub.subscribe(*wanted)
+                    self._subscribed.update(wanted)
+                if unwanted:
+                    await self._pubsub.unsubscribe(*unwanted)
+                    self._subscribed.difference_update(unwanted)
+            except Exception as e:
+                # The listener reconnects and attach() resubscribes from the current sets
+                logger.warning(f"Redis (un)subscribe failed for {channels}: {e}")
+
+    def counts(self) -> dict[str, int]:
+        out = {"table": 0, "tenant": 0, "kds": 0}
+        for kind, _ in self.clients.values():
+            out[kind] = out.get(kind, 0) + 1
+        return out
+
+
+registry = ConnectionRegistry()
+dropped_messages_total = 0
+
+# Cluster view for replicas behind HAProxy: each instance refreshes its own key (connection
+# counts, subscribed channels) with a short TTL; GET /instances lists the live ones.
+INSTANCE_ID = os.getenv("WS_BRIDGE_INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+INSTANCE_KEY_PREFIX = "ws_bridge:instance:"
+INSTANCE_HEARTBEAT_SECONDS = 15
+
+
+# Replay after reconnect: the API appends every event to a capped stream per scope
+# (events:tenant:{id}, events:table:{id}) and tags live messages with its entry id.
+REPLAY_MAX_EVENTS = int(os.getenv("WS_REPLAY_MAX_EVENTS", "500"))
+RESYNC_REQUIRED_MESSAGE = json.dumps({"type": "resync_required"})
+
+_redis_client: Optional[redis.Redis] = None
+
+
+def _get_redis_client() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    return _redis_client
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[tuple[int, int]]:
+    """Redis stream id "ms-seq" -> (ms, seq); None when malformed."""
+    if not value:
+        return None
+    ms, sep, seq = value.partition("-")
+    if not sep or not ms.isdigit() or not seq.isdigit():
+        return None
+    return int(ms), int(seq)
+
+
+def _event_id_of(data: str) -> Optional[str]:
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{API_URL}/internal/validate-table/{table_token}")
-            if response.status_code == 200:
-                return response.json()
-            return None
+        eid = json.loads(data).get("event_id")
+    except (ValueError, AttributeError):
+        return None
+    return eid if isinstance(eid, str) else None
+
+
+def _with_event_id(payload: str, event_id: str) -> str:
+    if not payload.startswith("{"):
+        return payload
+    head = '{"event_id": ' + json.dumps(event_id)
+    rest = payload[1:].lstrip()
+    return head + ("}" if rest.startswith("}") else ", " + rest)
+
+
+async def replay_events(conn: ClientConnection, stream_key: str, last_event_id: str) -> None:
+    """
+    Send events after ``last_event_id`` directly (before the writer starts). When the gap
+    was trimmed from the stream, or is larger than REPLAY_MAX_EVENTS, send
+    ``{"type": "resync_required"}`` so the client reloads instead.
+    """
+    last = _parse_event_id(last_event_id)
+    if last is None:
+        await conn.websocket.send_text(RESYNC_REQUIRED_MESSAGE)
+        return
+    r = _get_redis_client()
+    try:
+        info = await r.xinfo_stream(stream_key)
+    except redis.ResponseError:
+        # Stream expired (idle > 1 day): anything after last_event_id is gone
+        await conn.websocket.send_text(RESYNC_REQUIRED_MESSAGE)
+        return
+    max_deleted = info.get("max-deleted-entry-id")
+    if isinstance(max_deleted, bytes):
+        max_deleted = max_deleted.decode()
+    deleted = _parse_event_id(max_deleted) if max_deleted else None
+    if deleted is not None and last < deleted:
+        await conn.websocket.send_text(RESYNC_REQUIRED_MESSAGE)
+        return
+    entries = await r.xrange(stream_key, min=f"({last_event_id}", max="+", count=REPLAY_MAX_EVENTS + 1)
+    if len(entries) > REPLAY_MAX_EVENTS:
+        await conn.websocket.send_text(RESYNC_REQUIRED_MESSAGE)
+        return
+    for entry_id, fields in entries:
+        eid = entry_id.decode() if isinstance(entry_id, bytes) else str(entry_id)
+        payload = fields.get(b"payload") or fields.get("payload") or b"{}"
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        await conn.websocket.send_text(_with_event_id(payload, eid))
+        conn.replayed_through = _parse_event_id(eid)
+
+
+async def _receive_until_closed(websocket: WebSocket) -> None:
+    """Keep the socket open and drain client messages until it disconnects."""
+    try:
+        while True:
+            # Could handle client messages here if needed (e.g., ping/pong)
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: server side already closed the socket (slow-consumer policy)
+        pass
+
+
+# Table token lookups: one keep-alive client to the API plus a TTL cache (invalid tokens are
+# cached briefly too). The API publishes tokens on TABLE_TOKEN_INVALIDATE_CHANNEL when a
+# table is activated, closed or deleted.
+TABLE_TOKEN_INVALIDATE_CHANNEL = "tables:invalidate"
+TABLE_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TABLE_TOKEN_CACHE_TTL_SECONDS", "300"))
+TABLE_TOKEN_NEGATIVE_TTL_SECONDS = float(os.getenv("TABLE_TOKEN_NEGATIVE_TTL_SECONDS", "30"))
+TABLE_TOKEN_CACHE_MAX_ENTRIES = 10000
+
+_api_client: Optional[httpx.AsyncClient] = None
+# token -> (expires_at monotonic, table info or None for "not found")
+_table_token_cache: "OrderedDict[str, tuple[float, Optional[dict]]]" = OrderedDict()
+# token -> in-flight lookup, so a reconnect storm for one table makes a single API call
+_table_token_inflight: dict[str, asyncio.Future] = {}
+
+
+def _get_api_client() -> httpx.AsyncClient:
+    global _api_client
+    if _api_client is None or _api_client.is_closed:
+        _api_client = httpx.AsyncClient(
+            base_url=API_URL,
+            timeout=5.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _api_client
+
+
+def invalidate_table_token(table_token: str) -> None:
+    _table_token_cache.pop(table_token, None)
+
+
+def _cache_table_token(table_token: str, info: Optional[dict]) -> None:
+    ttl = TABLE_TOKEN_CACHE_TTL_SECONDS if info else TABLE_TOKEN_NEGATIVE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    _table_token_cache[table_token] = (time.monotonic() + ttl, info)
+    _table_token_cache.move_to_end(table_token)
+    while len(_table_token_cache) > TABLE_TOKEN_CACHE_MAX_ENTRIES:
+        _table_token_cache.popitem(last=False)
+
+
+async def _fetch_table_token(table_token: str) -> Optional[dict]:
+    """Call the API. Errors are not cached (the next connect retries)."""
+    try:
+        response = await _get_api_client().get(f"/internal/validate-table/{table_token}")
     except Exception as e:
         logger.error(f"Error validating table token {table_token}: {e}", exc_info=True)
         return None
+    if response.status_code == 200:
+        info = response.json()
+        _cache_table_token(table_token, info)
+        return info
+    if response.status_code == 404:
+        _cache_table_token(table_token, None)
+    return None
+
+
+async def validate_table_token(table_token: str) -> Optional[dict]:
+    """Validate table token (cached; falls back to the backend API)."""
+    cached = _table_token_cache.get(table_token)
+    if cached is not None:
+        expires_at, info = cached
+        if expires_at > time.monotonic():
+            return info
+        _table_token_cache.pop(table_token, None)
+
+    pending = _table_token_inflight.get(table_token)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    task = asyncio.ensure_future(_fetch_table_token(table_token))
+    _table_token_inflight[table_token] = task
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if task.done():
+            _table_token_inflight.pop(table_token, None)
+        else:
+            task.add_done_callback(lambda _t: _table_token_inflight.pop(table_token, None))
 
 
 def validate_jwt_token(token: str) -> Optional[dict]:
@@ -75,55 +421,71 @@ async def redis_listener():
         try:
             r = redis.from_url(redis_url)
             pubsub = r.pubsub()
-            
-            # Subscribe to orders and reservations channels
-            await pubsub.psubscribe("orders:table:*", "orders:tenant:*", "reservations:tenant:*")
+
+            # Always subscribed (keeps listen() alive with no clients); event channels follow
+            # the registry
+            await pubsub.subscribe(TABLE_TOKEN_INVALIDATE_CHANNEL)
+            await registry.attach(pubsub)
+            # Anything cached may have missed invalidations while disconnected
+            _table_token_cache.clear()
 
             async for message in pubsub.listen():
-                if message["type"] == "pmessage":
-                    channel = message["channel"].decode()
-                    data = message["data"].decode()
-
-                    # Parse channel: orders:table:{id}, orders:tenant:{id}, or reservations:tenant:{id}
-                    parts = channel.split(":")
-                    if len(parts) == 3:
-                        channel_type = parts[1]  # "table" or "tenant"
-                        entity_id = int(parts[2])
-                        # orders:tenant:* and reservations:tenant:* both use tenant_connections
-
-                        dead_connections = set()
-                        
-                        if channel_type == "table":
-                            # Broadcast to all clients connected to this table
-                            if entity_id in table_connections:
-                                for ws in table_connections[entity_id]:
-                                    try:
-                                        await ws.send_text(data)
-                                    except Exception:
-                                        dead_connections.add(ws)
-                                table_connections[entity_id] -= dead_connections
-                        
-                        elif channel_type == "tenant":
-                            # Broadcast to all clients connected to this tenant
-                            if entity_id in tenant_connections:
-                                for ws in tenant_connections[entity_id]:
-                                    try:
-                                        await ws.send_text(data)
-                                    except Exception:
-                                        dead_connections.add(ws)
-                                tenant_connections[entity_id] -= dead_connections
-                        
+                if message["type"] != "message":
+                    continue
+                channel = message["channel"].decode()
+                data = message["data"].decode()
+                if channel == TABLE_TOKEN_INVALIDATE_CHANNEL:
+                    invalidate_table_token(data)
+                else:
+                    registry.fan_out(channel, data)
+
         except Exception as e:
             logger.error(f"Redis connection error: {e}", exc_info=True)
+            await registry.detach()
             await asyncio.sleep(5)  # Retry after 5 seconds
 
 
+def _instance_info() -> dict:
+    counts = registry.counts()
+    return {
+        "instance_id": INSTANCE_ID,
+        "connections": counts,
+        "total_connections": sum(counts.values()),
+        "subscribed_channels": len(registry.channels),
+        "dropped_messages": dropped_messages_total,
+        "updated_at": time.time(),
+    }
+
+
+async def instance_heartbeat():
+    """Publish this instance's registry summary for GET /instances."""
+    key = f"{INSTANCE_KEY_PREFIX}{INSTANCE_ID}"
+    while True:
+        try:
+            await _get_redis_client().set(
+                key, json.dumps(_instance_info()), ex=INSTANCE_HEARTBEAT_SECONDS * 3
+            )
+        except Exception as e:
+            logger.warning(f"Instance heartbeat failed: {e}")
+        await asyncio.sleep(INSTANCE_HEARTBEAT_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Start Redis listener on startup
     task = asyncio.create_task(redis_listener())
+    heartbeat = asyncio.create_task(instance_heartbeat())
     yield
     task.cancel()
+    heartbeat.cancel()
+    try:
+        await _get_redis_client().delete(f"{INSTANCE_KEY_PREFIX}{INSTANCE_ID}")
+    except Exception:
+        pass
+    if _api_client is not None:
+        await _api_client.aclose()
+    if _redis_client is not None:
+        await _redis_client.aclose()
 
 
 app_base = FastAPI(title="WS Bridge", lifespan=lifespan)
@@ -271,21 +633,49 @@ async def method_not_allowed_handler(request: Request, exc):
 
 @app_base.get("/health")
 def health():
-    table_count = sum(len(c) for c in table_connections.values())
-    tenant_count = sum(len(c) for c in tenant_connections.values())
+    counts = registry.counts()
     return {
         "status": "ok",
-        "table_connections": table_count,
-        "tenant_connections": tenant_count,
-        "total_connections": table_count + tenant_count,
+        "instance_id": INSTANCE_ID,
+        "table_connections": counts["table"],
+        "tenant_connections": counts["tenant"],
+        "kds_connections": counts["kds"],
+        "total_connections": sum(counts.values()),
+        "subscribed_channels": len(registry.channels),
+        "dropped_messages": dropped_messages_total,
+        "table_token_cache_entries": len(_table_token_cache),
         "config": {
             "api_url_configured": bool(API_URL),
             "secret_key_configured": bool(SECRET_KEY and SECRET_KEY != "CHANGE_THIS_IN_PRODUCTION"),
-            "algorithm": ALGORITHM
+            "algorithm": ALGORITHM,
+            "table_token_cache_ttl_seconds": TABLE_TOKEN_CACHE_TTL_SECONDS,
+            "send_queue_size": WS_SEND_QUEUE_SIZE,
+            "slow_consumer_policy": WS_SLOW_CONSUMER_POLICY,
         }
     }
 
 
+@app_base.get("/instances")
+async def instances():
+    """Live ws-bridge replicas (from their heartbeats) with connection and channel counts."""
+    r = _get_redis_client()
+    keys = [k async for k in r.scan_iter(match=f"{INSTANCE_KEY_PREFIX}*", count=100)]
+    values = await r.mget(keys) if keys else []
+    out = []
+    for raw in values:
+        if raw is None:
+            continue
+        try:
+            out.append(json.loads(raw))
+        except ValueError:
+            continue
+    out.sort(key=lambda i: i.get("instance_id", ""))
+    return {
+        "instances": out,
+        "total_connections": sum(i.get("total_connections", 0) for i in out),
+    }
+
+
 @app_base.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"])
 async def catch_all(request: Request, path: str):
     """Catch-all route to log unmatched requests."""
@@ -305,8 +695,9 @@ async def catch_all(request: Request, path: str):
             "detail": f"Endpoint not found: /{path}",
             "available_endpoints": [
                 "/health",
+                "/instances",
                 "/ws/table/{table_token}",
-                "/ws/tenant/{tenant_id}?token=..."
+                "/ws/tenant/{tenant_id}?token=...[&route=kitchen|bar|&station_id=...]"
             ]
         }
     )
@@ -335,36 +726,57 @@ async def websocket_table_endpoint(websocket: WebSocket, table_token: str):
     table_id = table_info["table_id"]
     
     # Add to connections
-    if table_id not in table_connections:
-        table_connections[table_id] = set()
-    table_connections[table_id].add(websocket)
-    
+    conn = ClientConnection(websocket, f"table:{table_id}@{client_host}")
     try:
-        while True:
-            # Keep connection alive, handle any incoming messages
-            data = await websocket.receive_text()
-            # Could handle client messages here if needed (e.g., ping/pong)
-    except WebSocketDisconnect:
-        pass
+        await registry.add(conn, "table", (f"orders:table:{table_id}",))
+        await _start_with_replay(websocket, conn, f"events:table:{table_id}")
+        await _receive_until_closed(websocket)
     finally:
-        # Remove from connections
-        if table_id in table_connections:
-            table_connections[table_id].discard(websocket)
-            if not table_connections[table_id]:
-                del table_connections[table_id]
+        await registry.remove(conn)
 
 
-def _get_ws_token(websocket: WebSocket) -> Optional[str]:
-    """Get token from query string or cookie; avoid Query() which can cause 403 before accept()."""
+def _get_query_param(websocket: WebSocket, name: str) -> Optional[str]:
+    """Query param from scope; avoid Query() which can cause 403 before accept()."""
     # Query params from scope (reliable for WebSocket handshake)
     query_string = websocket.scope.get("query_string", b"").decode("utf-8", errors="replace")
     if query_string:
         for part in query_string.split("&"):
             if "=" in part:
                 k, v = part.split("=", 1)
-                if k.strip().lower() == "token":
+                if k.strip().lower() == name:
                     return unquote(v.strip()) or None
-    return websocket.cookies.get("access_token")
+    return None
+
+
+def _get_ws_token(websocket: WebSocket) -> Optional[str]:
+    """Get token from query string or cookie."""
+    return _get_query_param(websocket, "token") or websocket.cookies.get("access_token")
+
+
+def _kds_channel(websocket: WebSocket, tenant_id: int) -> Optional[str]:
+    """KDS scope from ``?station_id=`` or ``?route=kitchen|bar``; None = whole tenant."""
+    station_id = _get_query_param(websocket, "station_id")
+    if station_id and station_id.isdigit():
+        return f"kds:{tenant_id}:station:{int(station_id)}"
+    route = (_get_query_param(websocket, "route") or "").lower()
+    if route in ("kitchen", "bar"):
+        return f"kds:{tenant_id}:route:{route}"
+    return None
+
+
+async def _start_with_replay(websocket: WebSocket, conn: ClientConnection, stream_key: str) -> None:
+    """Replay the gap for a reconnecting client (``?last_event_id=``), then start live delivery."""
+    last_event_id = _get_query_param(websocket, "last_event_id")
+    if last_event_id:
+        try:
+            await replay_events(conn, stream_key, last_event_id)
+        except Exception as e:
+            logger.warning(f"Replay failed for {conn.label} ({stream_key}): {e}")
+            try:
+                await websocket.send_text(RESYNC_REQUIRED_MESSAGE)
+            except Exception:
+                pass
+    conn.start()
 
 
 @app_base.websocket("/ws/tenant/{tenant_id}")
@@ -406,20 +818,19 @@ async def websocket_tenant_endpoint(websocket: WebSocket, tenant_id: int):
 
     logger.info(f"WebSocket /ws/tenant/{tenant_id}: Successfully authenticated for tenant {tenant_id} from {client_host}")
 
-    # Add to connections
-    if tenant_id not in tenant_connections:
-        tenant_connections[tenant_id] = set()
-    tenant_connections[tenant_id].add(websocket)
-
+    # Add to connections (kitchen/bar displays may narrow to one route or station)
+    kds_channel = _kds_channel(websocket, tenant_id)
+    if kds_channel:
+        kind, channels, stream_key = "kds", (kds_channel,), f"events:{kds_channel}"
+    else:
+        kind, stream_key = "tenant", f"events:tenant:{tenant_id}"
+        channels = (f"orders:tenant:{tenant_id}", f"reservations:tenant:{tenant_id}")
+    conn = ClientConnection(websocket, f"{kds_channel or f'tenant:{tenant_id}'}@{client_host}")
     try:
-        while True:
-            data = await websocket.receive_text()
-    except WebSocketDisconnect:
-        pass
+        await registry.add(conn, kind, channels)
+        await _start_with_replay(websocket, conn, stream_key)
+        await _receive_until_closed(websocket)
     finally:
-        if tenant_id in tenant_connections:
-            tenant_connections[tenant_id].discard(websocket)
-            if not tenant_connections[tenant_id]:
-                del tenant_connections[tenant_id]
+        await registry.remove(conn)
 
 